@@ -0,0 +1,69 @@
+"""Generates synthetic ANTLR grammar trees used by the benchmark suite."""
+import pathlib
+import typing
+
+
+def _rule_block(name: str, index: int, rules: int) -> str:
+    """Creates a block of parser rules which pads a grammar to the requested size.
+
+    :param name: name of grammar the rules belong to
+    :param index: index of grammar inside corpus
+    :param rules: number of rules to generate
+    :return: source code of parser rules
+    """
+    lines = []
+    for r in range(rules):
+        lines.append('{}_rule_{}_{}\n    : \'{}{}\' ID (\',\' ID)*\n    ;\n'.format(
+            name.lower(), index, r, name.lower(), r))
+    return '\n'.join(lines)
+
+
+def create_corpus(base_path: pathlib.Path, grammars: int, fanout: int=0, depth: int=1,
+                  rules: int=10) -> typing.List[pathlib.Path]:
+    """Creates a synthetic grammar tree below base directory.
+
+    The tree contains a number of top-level grammars which are distributed over nested package
+    directories. Imported grammars are placed into a single shared directory because ANTLR only
+    supports one library directory per grammar. Each imported grammar imports the next one, so
+    the import graph of a top-level grammar has a nesting depth equal to the fan-out.
+
+    :param base_path: directory the corpus is created in
+    :param grammars: number of top-level grammars
+    :param fanout: number of grammars imported by each top-level grammar
+    :param depth: nesting depth of package directories containing top-level grammars
+    :param rules: number of parser rules per grammar, controls the file size
+    :return: a list of paths of all created grammar files
+    """
+    paths = []
+
+    # create shared grammars imported by top-level grammars
+    shared_dir = pathlib.Path(base_path, 'shared')
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(fanout):
+        name = 'Shared{}'.format(i)
+        imports = 'import Shared{};\n\n'.format(i + 1) if i + 1 < fanout else ''
+        source = 'parser grammar {};\n\n{}{}'.format(name, imports, _rule_block(name, i, rules))
+        path = pathlib.Path(shared_dir, name + '.g4')
+        path.write_text(source)
+        paths.append(path)
+
+    # create top-level grammars
+    for i in range(grammars):
+        # spread grammars over up to four sub-packages per nesting level
+        parts = ['pkg{}'.format(i // 4 ** d % 4) for d in range(depth)]
+        grammar_dir = pathlib.Path(base_path, *parts)
+        grammar_dir.mkdir(parents=True, exist_ok=True)
+
+        name = 'Grammar{}'.format(i)
+        imports = ''
+        if fanout:
+            imports = 'import {};\n\n'.format(', '.join('Shared{}'.format(j)
+                                                        for j in range(fanout)))
+        source = ('// synthetic grammar {}\ngrammar {};\n\n{}start\n    : {}_rule_{}_0+ EOF\n'
+                  '    ;\n\n{}\nID  : [a-z]+ ;\nWS  : [ \\t\\r\\n]+ -> skip ;\n'.format(
+                      i, name, imports, name.lower(), i, _rule_block(name, i, rules)))
+        path = pathlib.Path(grammar_dir, name + '.g4')
+        path.write_text(source)
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,256 @@
+"""Benchmark suite of the 'antlr' setuptools command.
+
+The suite measures how grammar discovery, import resolution and parser generation scale with the
+size of a project. It runs on synthetic grammar trees and a stub Java executable simulating ANTLR,
+so no JDK is required. Results are written as JSON. For each series a scaling exponent is fitted;
+the suite exits with a non-zero status if an exponent exceeds its limit or a result regresses
+compared to a baseline.
+
+Usage::
+
+    > python benchmarks/run_benchmarks.py --output benchmark.json [--baseline previous.json]
+"""
+import argparse
+import contextlib
+import distutils.log
+import json
+import math
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import typing
+
+import setuptools.dist
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import corpus  # noqa: E402
+import stub_java  # noqa: E402
+from setuptools_antlr.command import AntlrCommand, AntlrGrammar  # noqa: E402
+
+
+class Series(object):
+    """A benchmark series measuring one operation for a range of a single corpus parameter."""
+
+    def __init__(self, name: str, parameter: str, values: typing.List[int], limit: float,
+                 setup: typing.Callable[[pathlib.Path, int], typing.Any],
+                 measure: typing.Callable[[pathlib.Path, typing.Any], None]):
+        """Initializes a new Series object.
+
+        :param name: name of series
+        :param parameter: name of varied corpus parameter
+        :param values: values of varied parameter
+        :param limit: maximal accepted scaling exponent
+        :param setup: creates a corpus for a parameter value and returns a context for measure
+        :param measure: runs the measured operation once
+        """
+        self.name = name
+        self.parameter = parameter
+        self.values = values
+        self.limit = limit
+        self.setup = setup
+        self.measure = measure
+
+
+@contextlib.contextmanager
+def _working_dir(path: pathlib.Path):
+    """Temporarily changes the working directory."""
+    init_dir = os.getcwd()
+    os.chdir(str(path))
+    try:
+        yield
+    finally:
+        os.chdir(init_dir)
+
+
+def _fit_exponent(values: typing.List[int], seconds: typing.List[float]) -> float:
+    """Fits the exponent k of t = c * n^k using least squares in log-log space.
+
+    :param values: parameter values n
+    :param seconds: measured times t
+    :return: the scaling exponent
+    """
+    xs = [math.log(v) for v in values]
+    ys = [math.log(max(s, 1e-9)) for s in seconds]
+    mean_x = statistics.mean(xs)
+    mean_y = statistics.mean(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def _create_command(**options) -> AntlrCommand:
+    command = AntlrCommand(setuptools.dist.Distribution())
+    command.initialize_options()
+    for name, value in options.items():
+        setattr(command, name, value)
+    command.finalize_options()
+    return command
+
+
+def _setup_find_grammars(fanout: int, rules: int):
+    def setup(path: pathlib.Path, grammars: int):
+        corpus.create_corpus(path, grammars, fanout=fanout, depth=3, rules=rules)
+        return _create_command()
+
+    def measure(path: pathlib.Path, command: AntlrCommand):
+        command._find_grammars(path)
+
+    return setup, measure
+
+
+def _setup_fanout(grammars: int):
+    def setup(path: pathlib.Path, fanout: int):
+        corpus.create_corpus(path, grammars, fanout=fanout, depth=2, rules=5)
+        return _create_command()
+
+    def measure(path: pathlib.Path, command: AntlrCommand):
+        command._find_grammars(path)
+
+    return setup, measure
+
+
+def _setup_read_imports():
+    def setup(path: pathlib.Path, rules: int):
+        paths = corpus.create_corpus(path, 1, fanout=4, depth=1, rules=rules)
+        return AntlrGrammar(paths[-1])
+
+    def measure(path: pathlib.Path, grammar: AntlrGrammar):
+        grammar.read_imports()
+
+    return setup, measure
+
+
+def _setup_run():
+    def setup(path: pathlib.Path, grammars: int):
+        corpus.create_corpus(path, grammars, fanout=2, depth=2, rules=5)
+        return None
+
+    def measure(path: pathlib.Path, _):
+        # repetitions would only measure skipping the parsers generated by the first one
+        with _working_dir(path):
+            _create_command(force=1).run()
+
+    return setup, measure
+
+
+def create_series(quick: bool) -> typing.List[Series]:
+    """Creates all benchmark series.
+
+    :param quick: flag whether a reduced parameter range is used
+    :return: a list of benchmark series
+    """
+    scale = 1 if quick else 4
+    return [
+        Series('find_grammars', 'grammars', [50 * scale * 2 ** i for i in range(4)], 1.3,
+               *_setup_find_grammars(fanout=4, rules=5)),
+        Series('find_grammars_fanout', 'fanout', [2, 4, 8, 16], 1.3,
+               *_setup_fanout(grammars=25 * scale)),
+        Series('read_imports', 'rules', [100 * scale * 2 ** i for i in range(4)], 1.3,
+               *_setup_read_imports()),
+        Series('run', 'grammars', [4 * scale * 2 ** i for i in range(3)], 1.3, *_setup_run())
+    ]
+
+
+def run_series(series: Series, repeat: int) -> dict:
+    """Runs a benchmark series and fits its scaling exponent.
+
+    :param series: benchmark series
+    :param repeat: number of repetitions per parameter value
+    :return: JSON serializable results
+    """
+    results = []
+    for value in series.values:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = pathlib.Path(tmp_dir)
+            context = series.setup(path, value)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                series.measure(path, context)
+                timings.append(time.perf_counter() - start)
+        results.append({'value': value, 'min': min(timings),
+                        'median': statistics.median(timings)})
+
+    exponent = _fit_exponent(series.values, [r['min'] for r in results])
+    return {'name': series.name, 'parameter': series.parameter, 'results': results,
+            'exponent': exponent, 'limit': series.limit, 'passed': exponent <= series.limit}
+
+
+def compare_baseline(report: dict, baseline: dict, tolerance: float) -> typing.List[str]:
+    """Compares results with a baseline report.
+
+    :param report: current results
+    :param baseline: results of a previous run
+    :param tolerance: accepted relative slowdown e.g. 0.5 for 50%
+    :return: a list of detected regressions
+    """
+    regressions = []
+    previous = {(b['name'], r['value']): r['min'] for b in baseline['benchmarks']
+                for r in b['results']}
+    for benchmark in report['benchmarks']:
+        for result in benchmark['results']:
+            key = (benchmark['name'], result['value'])
+            if key in previous and result['min'] > previous[key] * (1 + tolerance):
+                regressions.append('{} ({}={}): {:.4f}s > {:.4f}s'.format(
+                    benchmark['name'], benchmark['parameter'], result['value'], result['min'],
+                    previous[key]))
+    return regressions
+
+
+def main(argv: typing.List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks the antlr setuptools command.')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='accepted relative slowdown compared to baseline (default: 0.5)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='repetitions per measurement (default: 5)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated ANTLR latency in seconds (default: 0)')
+    parser.add_argument('--output-size', type=int, default=4096,
+                        help='size of each simulated generated module in bytes (default: 4096)')
+    parser.add_argument('--quick', action='store_true', help='use a reduced parameter range')
+    args = parser.parse_args(argv)
+
+    distutils.log.set_threshold(distutils.log.WARN)
+
+    with tempfile.TemporaryDirectory() as bin_dir:
+        stub_java.install(pathlib.Path(bin_dir))
+        os.environ.pop('JAVA_HOME', None)
+        os.environ['PATH'] = os.pathsep.join([bin_dir, os.environ.get('PATH', '')])
+        os.environ['STUB_JAVA_LATENCY'] = str(args.latency)
+        os.environ['STUB_JAVA_OUTPUT_SIZE'] = str(args.output_size)
+
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmarks': [run_series(s, args.repeat) for s in create_series(args.quick)]
+        }
+
+    failures = ['{}: scaling exponent {:.2f} exceeds limit {:.2f}'.format(
+        b['name'], b['exponent'], b['limit']) for b in report['benchmarks'] if not b['passed']]
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures.extend(compare_baseline(report, json.load(f), args.tolerance))
+    report['failures'] = failures
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for failure in failures:
+        print('benchmark failed: {}'.format(failure), file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""A stub of the Java executable which simulates the ANTLR tool.
+
+The stub answers version queries like a real JRE and mimics a parser generation by sleeping for a
+configurable latency and writing the modules ANTLR would generate. It allows running benchmarks
+without a JDK. The behaviour is controlled by the following environment variables:
+
+- ``STUB_JAVA_LATENCY``: simulated generation time in seconds (default: 0)
+- ``STUB_JAVA_OUTPUT_SIZE``: size of each generated module in bytes (default: 4096)
+"""
+import os
+import pathlib
+import re
+import sys
+import time
+import typing
+
+_GRAMMAR_TYPE_REGEX = re.compile(r'^\s*(lexer\s+|parser\s+)?grammar\s+\w+\s*;', re.MULTILINE)
+
+
+def _generated_files(name: str, grammar_type: str, listener: bool,
+                     visitor: bool) -> typing.List[str]:
+    """Determines the names of the files ANTLR generates for a grammar.
+
+    :param name: name of grammar
+    :param grammar_type: type of grammar, either 'lexer', 'parser' or 'combined'
+    :param listener: flag whether a listener is generated
+    :param visitor: flag whether a visitor is generated
+    :return: a list of generated file names
+    """
+    if grammar_type == 'lexer':
+        return [name + '.py', name + '.tokens', name + '.interp']
+
+    recognizer = name if grammar_type == 'parser' else name + 'Parser'
+    files = [recognizer + '.py', name + '.tokens', name + '.interp']
+    if grammar_type == 'combined':
+        files.extend([name + 'Lexer.py', name + 'Lexer.tokens', name + 'Lexer.interp'])
+    if listener:
+        files.append(name + 'Listener.py')
+    if visitor:
+        files.append(name + 'Visitor.py')
+    return files
+
+
+def main(args: typing.List[str]) -> int:
+    """Runs the stub.
+
+    :param args: command line arguments passed to Java
+    :return: exit code
+    """
+    if '-version' in args:
+        print('java version "1.8.0_152"', file=sys.stderr)
+        return 0
+
+    latency = float(os.environ.get('STUB_JAVA_LATENCY', '0'))
+    output_size = int(os.environ.get('STUB_JAVA_OUTPUT_SIZE', '4096'))
+
+    output_dir = pathlib.Path(args[args.index('-o') + 1]) if '-o' in args else pathlib.Path('.')
+    grammar_file = pathlib.Path(args[-1])
+
+    try:
+        source = grammar_file.read_text()
+    except OSError:
+        print('error(2): can\'t find or load grammar {}'.format(grammar_file))
+        return 1
+
+    match = _GRAMMAR_TYPE_REGEX.search(source)
+    grammar_type = match.group(1).strip() if match and match.group(1) else 'combined'
+    files = _generated_files(grammar_file.stem, grammar_type, '-no-listener' not in args,
+                             '-visitor' in args)
+
+    time.sleep(latency)
+
+    if '-depend' in args:
+        for f in files:
+            print('{} : {}'.format(pathlib.Path(output_dir, f), grammar_file))
+        return 0
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    line = '# generated by stub java\n'
+    content = line * max(1, output_size // len(line))
+    for f in files:
+        pathlib.Path(output_dir, f).write_text(content)
+    return 0
+
+
+def install(bin_dir: pathlib.Path) -> pathlib.Path:
+    """Installs the stub as executable called 'java' into passed directory.
+
+    :param bin_dir: directory which is later added to PATH
+    :return: path to installed executable
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    stub_file = pathlib.Path(__file__).resolve()
+
+    if os.name == 'nt':
+        java_exe = pathlib.Path(bin_dir, 'java.bat')
+        java_exe.write_text('@"{}" "{}" %*\n'.format(sys.executable, stub_file))
+    else:
+        java_exe = pathlib.Path(bin_dir, 'java')
+        source = stub_file.read_text().split('\n', 1)[1]
+        java_exe.write_text('#!{}\n{}'.format(sys.executable, source))
+        java_exe.chmod(0o755)
+    return java_exe
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -3,6 +3,8 @@ import sys
 
 import setuptools
 
+import setuptools_antlr
+
 # need to guard script here due to reentrance while testing multiprocessing:
 if __name__ == '__main__':
     needs_pytest = {'pytest', 'test', 'ptr'}.intersection(sys.argv)
@@ -17,7 +19,7 @@ if __name__ == '__main__':
 
     setuptools.setup(
         name='setuptools-antlr',
-        version='0.4.0',
+        version=setuptools_antlr.__version__,
         packages=setuptools.find_packages(),
         package_data={'setuptools_antlr': ['lib/antlr-4.7.1-complete.jar', 'lib/LICENSE.txt']},
         entry_points={
@@ -0,0 +1,2 @@
+"""Setuptools command for generating ANTLR based parsers."""
+__version__ = '0.4.0'
@@ -0,0 +1,206 @@
+"""Creates benchmark modules which are generated into the packages of parsers.
+
+A benchmark module measures how fast the generated lexer and parser process a set of sample
+inputs. It only depends on the ANTLR runtime and is run as a module of the generated package::
+
+    > python -m foobar.dsl.foo.bench samples/foo --output foo.json
+"""
+import string
+
+BENCH_MODULE = 'bench.py'
+
+_BENCH_TEMPLATE = string.Template('''"""Benchmarks the ${grammar} parser.
+
+Generated by setuptools-antlr, don't edit.
+
+Usage::
+
+    python -m <package>.bench <samples> [--rule RULE] [--pattern GLOB] [--repeat N] [--output FILE]
+
+Lexing and parsing of each sample file are timed separately; the fastest of all repetitions is
+reported. Peak memory and the number of SLL and LL predictions are measured in an additional
+untimed run with warm DFA caches. Results are printed as JSON.
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+
+${lexer_import}
+${parser_import}
+
+GRAMMAR = '${grammar}'
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+
+class _ErrorCounter(ErrorListener):
+    def __init__(self):
+        self.errors = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors += 1
+
+
+def _lex(text):
+    lexer = LEXER(InputStream(text))
+    lexer.removeErrorListeners()
+    errors = _ErrorCounter()
+    lexer.addErrorListener(errors)
+    tokens = CommonTokenStream(lexer)
+    tokens.fill()
+    return tokens, errors
+
+
+def _parse(tokens, rule, counts=None):
+    parser = PARSER(tokens)
+    parser.removeErrorListeners()
+    errors = _ErrorCounter()
+    parser.addErrorListener(errors)
+    if counts is not None:
+        _count_predictions(parser, counts)
+    getattr(parser, rule or parser.ruleNames[0])()
+    return errors
+
+
+def _count_predictions(parser, counts):
+    simulator = parser._interp
+    adaptive_predict = simulator.adaptivePredict
+    exec_full_context = simulator.execATNWithFullContext
+
+    def adaptivePredict(*args):
+        counts['predictions'] += 1
+        return adaptive_predict(*args)
+
+    def execATNWithFullContext(*args):
+        counts['ll_predictions'] += 1
+        return exec_full_context(*args)
+
+    simulator.adaptivePredict = adaptivePredict
+    simulator.execATNWithFullContext = execATNWithFullContext
+
+
+def bench_file(path, rule=None, repeat=5):
+    """Benchmarks lexing and parsing of a single sample file.
+
+    :param path: path of sample file
+    :param rule: name of start rule, defaults to first rule of grammar
+    :param repeat: number of timed repetitions
+    :return: JSON serializable results
+    """
+    text = pathlib.Path(path).read_text(encoding='utf-8')
+    lex_seconds = parse_seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens, lex_errors = _lex(text)
+        lex_seconds = min(lex_seconds, time.perf_counter() - start)
+        if PARSER is not None:
+            tokens.seek(0)
+            start = time.perf_counter()
+            _parse(tokens, rule)
+            parse_seconds = min(parse_seconds, time.perf_counter() - start)
+
+    counts = {'predictions': 0, 'll_predictions': 0}
+    tracemalloc.start()
+    try:
+        tokens, lex_errors = _lex(text)
+        parse_errors = _parse(tokens, rule, counts) if PARSER is not None else None
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    if PARSER is None:
+        parse_seconds = 0.0
+    token_count = len(tokens.tokens)
+    total_seconds = lex_seconds + parse_seconds
+    return {
+        'file': str(path),
+        'bytes': len(text.encode('utf-8')),
+        'tokens': token_count,
+        'lex_seconds': lex_seconds,
+        'parse_seconds': parse_seconds,
+        'tokens_per_second': token_count / total_seconds if total_seconds else None,
+        'peak_memory': peak_memory,
+        'predictions': counts['predictions'],
+        'sll_predictions': counts['predictions'] - counts['ll_predictions'],
+        'll_predictions': counts['ll_predictions'],
+        'lex_errors': lex_errors.errors,
+        'parse_errors': parse_errors.errors if parse_errors else 0
+    }
+
+
+def bench(samples, rule=None, pattern='*', repeat=5):
+    """Benchmarks lexing and parsing of sample files.
+
+    :param samples: a sample file or a directory containing sample files
+    :param rule: name of start rule, defaults to first rule of grammar
+    :param pattern: glob pattern selecting sample files inside directory
+    :param repeat: number of timed repetitions
+    :return: JSON serializable results
+    """
+    samples = pathlib.Path(samples)
+    paths = sorted(p for p in samples.rglob(pattern) if p.is_file()) if samples.is_dir() \\
+        else [samples]
+    files = [bench_file(p, rule, repeat) for p in paths]
+
+    total = {k: sum(f[k] for f in files) for k in ('bytes', 'tokens', 'lex_seconds',
+                                                    'parse_seconds', 'predictions',
+                                                    'sll_predictions', 'll_predictions',
+                                                    'lex_errors', 'parse_errors')}
+    total_seconds = total['lex_seconds'] + total['parse_seconds']
+    total['tokens_per_second'] = total['tokens'] / total_seconds if total_seconds else None
+    total['peak_memory'] = max((f['peak_memory'] for f in files), default=0)
+    return {
+        'grammar': GRAMMAR,
+        'rule': rule,
+        'repeat': repeat,
+        'python': sys.version.split()[0],
+        'files': files,
+        'total': total
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the {} parser.'.format(GRAMMAR))
+    parser.add_argument('samples', help='sample file or directory containing sample files')
+    parser.add_argument('--rule', help='start rule (default: first rule of grammar)')
+    parser.add_argument('--pattern', default='*', help='glob pattern of sample files (default: *)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed repetitions (default: 5)')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = bench(args.samples, args.rule, args.pattern, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+''')
+
+
+def create_bench_module(grammar: str, lexer_import: str, lexer_class: str, parser_import: str,
+                        parser_class: str) -> str:
+    """Creates the source code of a benchmark module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser or None if grammar is a lexer grammar
+    :param parser_class: name of parser class or None if grammar is a lexer grammar
+    :return: source code of benchmark module
+    """
+    return _BENCH_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                      lexer_class=lexer_class,
+                                      parser_import=parser_import or '',
+                                      parser_class=parser_class or 'None')
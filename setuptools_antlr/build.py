@@ -0,0 +1,113 @@
+"""Integrates generated parsers into the setuptools commands sdist and build_py.
+
+Source distributions built by ``AntlrSdistCommand`` ship the grammars together with the generated
+packages and their manifests. ``AntlrBuildPyCommand`` runs the antlr command before building, which
+verifies the fingerprints of the shipped manifests and doesn't look for a JRE if all parsers are up
+to date. Only parsers of modified grammars are regenerated. Both commands replace the commands of
+setuptools in the setup script::
+
+    from setuptools_antlr.build import AntlrBuildPyCommand, AntlrSdistCommand
+
+    setup(
+        ...
+        cmdclass={'build_py': AntlrBuildPyCommand, 'sdist': AntlrSdistCommand}
+    )
+"""
+import distutils.log
+import os
+import pathlib
+import typing
+
+import setuptools.command.build_py
+import setuptools.command.sdist
+
+from setuptools_antlr.bundle import get_package_name
+from setuptools_antlr.generator import AntlrGenerator, GenerationJob
+
+
+def get_generated_files(job: GenerationJob) -> typing.List[pathlib.Path]:
+    """Lists all existing files generated by a job including its manifest. Files inside of
+    generated directories are listed recursively, hidden files and cached bytecode are left out.
+
+    :param job: a generation job
+    :return: paths of generated files
+    """
+    names = list(job.outputs) + [AntlrGenerator.MANIFEST_FILE.format(job.grammar.name)]
+    files = []
+    for name in names:
+        path = pathlib.Path(job.package_dir, name)
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                relative = child.relative_to(str(path))
+                if any(p.startswith('.') or p == '__pycache__' for p in relative.parts) or \
+                        child.suffix == '.pyc' or not child.is_file():
+                    continue
+                files.append(child)
+        elif path.is_file():
+            files.append(path)
+    return files
+
+
+class AntlrSdistCommand(setuptools.command.sdist.sdist):
+    """A sdist command shipping the parsers generated by the antlr command, so that installing
+    the source distribution doesn't require a JRE."""
+
+    def run(self):
+        """Generates all stale parsers before creating the source distribution."""
+        self.run_command('antlr')
+        super().run()
+
+    def make_distribution(self):
+        """Adds the grammars and generated files of all parsers to the file list of the source
+        distribution before creating it.
+        """
+        antlr = self.get_finalized_command('antlr')
+        root_dir = os.path.abspath(os.curdir)
+        for job in antlr.jobs:
+            for path in list(job.inputs) + get_generated_files(job):
+                relative = os.path.relpath(os.path.abspath(str(path)), root_dir)
+                if relative.startswith(os.pardir):
+                    distutils.log.warn('{} isn\'t shipped, it\'s located outside of project '
+                                       'directory'.format(path))
+                    continue
+                self.filelist.append(relative)
+        self.filelist.sort()
+        self.filelist.remove_duplicates()
+        super().make_distribution()
+
+
+class AntlrBuildPyCommand(setuptools.command.build_py.build_py):
+    """A build_py command building the parsers generated by the antlr command together with the
+    packages of the distribution. Parsers shipped by a source distribution are only regenerated
+    if their grammars were modified."""
+
+    def run(self):
+        """Generates all stale parsers and adds the generated packages and their data files e.g.
+        token files and manifests to the built packages.
+        """
+        self.run_command('antlr')
+        antlr = self.get_finalized_command('antlr')
+
+        base_dir = antlr._get_base_dir()
+        packages = list(self.packages or [])
+        package_data = {n: list(p) for n, p in (self.package_data or {}).items()}
+        for job in antlr.jobs:
+            try:
+                package = get_package_name(job.package_dir, base_dir)
+            except ValueError as e:
+                distutils.log.warn('{} parser isn\'t built: {}'.format(job.grammar.name, e))
+                continue
+            for path in get_generated_files(job):
+                relative = path.relative_to(str(job.package_dir))
+                if path.suffix == '.py':
+                    subpackage = '.'.join((package,) + relative.parts[:-1])
+                    if subpackage not in packages:
+                        packages.append(subpackage)
+                else:
+                    package_data.setdefault(package, []).append(relative.as_posix())
+        self.packages = packages
+        self.package_data = package_data
+
+        # data files are determined lazily from packages and package data
+        self.__dict__.pop('data_files', None)
+        super().run()
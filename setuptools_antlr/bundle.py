@@ -0,0 +1,253 @@
+"""Packs generated parser packages into zip bundles which are imported from a single mapped file.
+
+Importing a generated package from its directory costs several stat and open calls per module, which
+dominate the startup time of tools on network and overlay file systems. A bundle is a zip archive
+named after the fully qualified package, e.g. ``foobar.dsl.foo.zip``. It contains all files of the
+package including grammar artifacts like interpreter data and the manifest and bytecode compiled by
+the Python version building it. Files are stored uncompressed next to their bytecode, so a bundle
+of a top-level package can also be put on ``sys.path`` and imported by zipimport.
+
+The import helper module ``bundleimport.py`` written next to the bundles opens and memory maps each
+bundle once and imports its modules from memory::
+
+    import bundleimport
+
+    bundleimport.install('build/bundles')
+    from foobar.dsl.foo.FooParser import FooParser
+"""
+import importlib.util
+import marshal
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import time
+import typing
+import zipfile
+
+BUNDLE_SUFFIX = '.zip'
+BUNDLE_IMPORT_MODULE = 'bundleimport.py'
+
+# timestamp of all archive members, which keeps bundles reproducible
+_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_BUNDLE_IMPORT_SOURCE = '''"""Imports generated parser packages from zip bundles.
+
+Generated by setuptools-antlr, don't edit.
+
+A bundle ``<package>.zip`` contains a generated package and bytecode compiled by the Python version
+which built it. Each bundle is opened and memory mapped once, its modules are imported from memory
+afterwards. Modules are compiled from source if the bytecode was built by another Python version::
+
+    import bundleimport
+
+    bundleimport.install('build/bundles')
+
+Bundled packages take precedence over packages of the same name on the file system.
+"""
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import marshal
+import mmap
+import os
+import struct
+import sys
+import zipfile
+
+SUFFIX = '.zip'
+
+# size of bytecode header, which includes flags since Python 3.7 (PEP 552)
+_HEADER_SIZE = 16 if sys.version_info >= (3, 7) else 12
+
+
+class BundleFinder(importlib.abc.MetaPathFinder, importlib.abc.InspectLoader):
+    """Finds and loads the modules of a generated package in a bundle."""
+
+    def __init__(self, path, package=None):
+        """Initializes a new BundleFinder object and maps the bundle into memory.
+
+        :param path: path of bundle
+        :param package: fully qualified name of bundled package, defaults to name of bundle
+        """
+        self.path = os.path.abspath(path)
+        self.package = package or os.path.basename(path)[:-len(SUFFIX)]
+        self._root = self.package.rpartition('.')[2]
+        with open(self.path, 'rb') as f:
+            self._members = {i.filename: i for i in zipfile.ZipFile(f).infolist()}
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, name):
+        """Reads an archive member, which is stored uncompressed."""
+        info = self._members.get(name)
+        if info is None:
+            raise FileNotFoundError('{} isn\\'t contained in {}'.format(name, self.path))
+        offset = info.header_offset
+        name_size, extra_size = struct.unpack('<HH', self._data[offset + 26:offset + 30])
+        start = offset + 30 + name_size + extra_size
+        return self._data[start:start + info.file_size]
+
+    def _find_member(self, fullname):
+        """Determines the source member of a module and whether it's a package."""
+        if fullname != self.package and not fullname.startswith(self.package + '.'):
+            return None, False
+        base = '/'.join([self._root] + fullname[len(self.package) + 1:].split('.')) \\
+            if fullname != self.package else self._root
+        if base + '/__init__.py' in self._members:
+            return base + '/__init__.py', True
+        if base + '.py' in self._members:
+            return base + '.py', False
+        return None, False
+
+    def find_spec(self, fullname, path=None, target=None):
+        member, is_package = self._find_member(fullname)
+        if member is None:
+            return None
+        spec = importlib.machinery.ModuleSpec(fullname, self, is_package=is_package,
+                                              origin=os.path.join(self.path, member))
+        spec.has_location = True
+        if is_package:
+            spec.submodule_search_locations.append(os.path.dirname(spec.origin))
+        return spec
+
+    def is_package(self, fullname):
+        return self._find_member(fullname)[1]
+
+    def get_source(self, fullname):
+        member, _ = self._find_member(fullname)
+        if member is None:
+            raise ImportError('{} isn\\'t contained in {}'.format(fullname, self.path),
+                              name=fullname)
+        return importlib.util.decode_source(self._read(member))
+
+    def get_code(self, fullname):
+        member, _ = self._find_member(fullname)
+        if member is None:
+            raise ImportError('{} isn\\'t contained in {}'.format(fullname, self.path),
+                              name=fullname)
+        try:
+            data = self._read(member + 'c')
+        except FileNotFoundError:
+            data = b''
+        if data[:4] == importlib.util.MAGIC_NUMBER:
+            return marshal.loads(data[_HEADER_SIZE:])
+        return self.source_to_code(self._read(member), os.path.join(self.path, member))
+
+    def get_data(self, path):
+        """Reads a file of the bundle, e.g. to load package resources.
+
+        :param path: path of file inside the bundle
+        :return: content of file
+        """
+        name = os.path.relpath(path, self.path).replace(os.sep, '/')
+        return self._read(name)
+
+
+def install(path):
+    """Makes the packages of bundles importable.
+
+    :param path: path of a bundle or of a directory containing bundles
+    :return: a list of installed finders
+    """
+    if os.path.isdir(path):
+        paths = [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.endswith(SUFFIX)]
+    else:
+        paths = [path]
+    finders = [BundleFinder(p) for p in paths]
+    sys.meta_path[0:0] = finders
+    return finders
+'''
+
+
+def create_bundle_import_module() -> str:
+    """Creates the source code of the module importing packages from bundles.
+
+    :return: source code of bundle import module
+    """
+    return _BUNDLE_IMPORT_SOURCE
+
+
+def get_package_name(package_dir: pathlib.Path, base_dir: pathlib.Path) -> str:
+    """Determines the fully qualified name of a package.
+
+    :param package_dir: directory of package
+    :param base_dir: root directory of Python packages
+    :return: name of package
+    """
+    package_dir = pathlib.Path(os.path.abspath(str(package_dir)))
+    try:
+        package = package_dir.relative_to(os.path.abspath(str(base_dir)))
+    except ValueError:
+        raise ValueError('package {} isn\'t located in {}'.format(package_dir, base_dir))
+    if not package.parts:
+        raise ValueError('package {} is the root directory of packages'.format(package_dir))
+    return '.'.join(package.parts)
+
+
+def _compile_bytecode(source: bytes, filename: str) -> bytes:
+    """Compiles the source of a module into the content of a bytecode file. Bytecode isn't
+    validated against its source, which is immutable inside a bundle.
+
+    :param source: source code of module
+    :param filename: file name recorded in code objects
+    :return: content of bytecode file
+    """
+    code = compile(source, filename, 'exec', dont_inherit=True)
+    header = importlib.util.MAGIC_NUMBER
+    if sys.version_info >= (3, 7):
+        # unchecked hash-based bytecode (PEP 552)
+        header += struct.pack('<I', 0b01) + importlib.util.source_hash(source)
+    else:
+        mtime = int(time.mktime(_DATE_TIME + (0, 0, -1)))
+        header += struct.pack('<II', mtime & 0xFFFFFFFF, len(source) & 0xFFFFFFFF)
+    return header + marshal.dumps(code)
+
+
+def _list_package_files(package_dir: pathlib.Path) -> typing.List[pathlib.Path]:
+    """Lists the files of a package to bundle. Hidden files like locks and temporary generation
+    directories and cached bytecode are left out.
+
+    :param package_dir: directory of package
+    :return: paths of files relative to package directory
+    """
+    files = []
+    for path in sorted(package_dir.rglob('*')):
+        relative = path.relative_to(package_dir)
+        if any(p.startswith('.') or p == '__pycache__' for p in relative.parts) or \
+                path.suffix == '.pyc' or not path.is_file():
+            continue
+        files.append(relative)
+    return files
+
+
+def create_bundle(package_dir: pathlib.Path, package: str, bundle_file: pathlib.Path) -> int:
+    """Packs a package into a bundle. The bundle is replaced atomically.
+
+    :param package_dir: directory of package
+    :param package: fully qualified name of package
+    :param bundle_file: path of bundle
+    :return: number of bundled files without bytecode
+    """
+    root = package.rpartition('.')[2]
+    files = _list_package_files(package_dir)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=str(bundle_file.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as bundle:
+            for relative in files:
+                name = '/'.join((root,) + relative.parts)
+                content = pathlib.Path(package_dir, relative).read_bytes()
+                bundle.writestr(zipfile.ZipInfo(name, _DATE_TIME), content)
+                if relative.suffix == '.py':
+                    bytecode = _compile_bytecode(content, '{}/{}'.format(bundle_file.name, name))
+                    bundle.writestr(zipfile.ZipInfo(name + 'c', _DATE_TIME), bytecode)
+        # temporary files are only readable by their owner
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, str(bundle_file))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(files)
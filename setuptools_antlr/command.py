@@ -3,90 +3,34 @@ import collections
 import datetime
 import distutils.errors
 import distutils.log
+import distutils.util
 import distutils.version
-import os.path
+import importlib.util
+import json
 import pathlib
 import re
 import shutil
 import shlex
-import subprocess
 import typing
 
 import setuptools
 
 from setuptools_antlr import __path__
-from setuptools_antlr.util import camel_to_snake_case, find_java
-
-
-class AntlrGrammar(object):
-    """Basic information about an ANTLR grammar file.
-
-    For generation of ANTLR based parsers basic information about the grammar like imports is
-    necessary. This information and the functionality to retrieve this information out of a grammar
-    file is placed in this class.
-    """
-
-    def __init__(self, path: pathlib.Path):
-        """Initializes a new AntlrGrammar object.
-
-        :param path: path to grammar file
-        """
-        # by convention grammar name is always equal to file name
-        self.name = path.stem
-        self.path = path
-        self.dependencies = []
-
-    def __eq__(self, other):
-        return (isinstance(other, AntlrGrammar) and hash(other) == hash(self) and
-                self.dependencies == other.dependencies)
-
-    def __hash__(self):
-        return hash((self.name, self.path))
-
-    def read_imports(self) -> typing.List[str]:
-        """Reads all imported grammars out of grammar file.
-
-        :return: a list of imported grammars
-        """
-        import_stmt_regex = re.compile('^\s*import\s+(.*)\s*;', re.MULTILINE)
-
-        try:
-            with self.path.open() as f:
-                match = import_stmt_regex.search(f.read())
-                if match:
-                    imported_grammars = match.group(1)
-                    return [s.strip() for s in imported_grammars.split(',')]
-                else:
-                    return []
-        except IOError as e:
-            raise distutils.errors.DistutilsFileError('Can\'t read grammar "{}"'.format(e.filename))
-
-    def walk(self):
-        """Returns dependent grammars by walking the dependency tree of the grammar top-down."""
-        for d in self.dependencies:
-            yield d
-            yield from d.walk()
-
-
-class ImportGrammarError(Exception):
-    """Raised when an imported grammar can't be found in package source directory."""
-
-    def __init__(self, name: str, parent: AntlrGrammar=None):
-        """Initializes a new ImportGrammarError object.
-
-        :param name: name of included grammar
-        :param parent: parent grammar which includes missing grammar
-        """
-        super().__init__()
-        self.name = name
-        self.parent = parent
-
-    def __str__(self):
-        """Returns a nicely printable string representation of this ImportGrammarError object.
-
-        :return: a string representation of this error
-        """
-        return self.name
+from setuptools_antlr.bundle import BUNDLE_IMPORT_MODULE, BUNDLE_SUFFIX, \
+    create_bundle, create_bundle_import_module, get_package_name
+from setuptools_antlr.extension import cythonize_modules, get_recognizer_modules, has_c_compiler, \
+    is_cython_available
+from setuptools_antlr.generator import AntlrGenerator, GenerationJob, GenerationOptions, \
+    GenerationResult, write_atomic
+from setuptools_antlr.grammar import AntlrGrammar, find_grammars, get_affected_grammars, \
+    sort_grammars
+# ImportGrammarError is still importable from this module
+from setuptools_antlr.grammar import ImportGrammarError  # noqa: F401
+from setuptools_antlr.importbudget import check_budgets, format_results, measure_imports, \
+    parse_budgets, read_report, write_report
+from setuptools_antlr.util import find_java, which_java
+from setuptools_antlr.validation import format_errors, validate_grammars
+from setuptools_antlr.watch import create_watcher, wait_debounced
 
 
 class AntlrCommand(setuptools.Command):
@@ -127,19 +71,49 @@ class AntlrCommand(setuptools.Command):
         ('no-visitor', None, 'don\'t generate parse tree visitor (default)'),
         ('depend', None, 'generate file dependencies'),
         ('grammar-options=', None, "set/override a grammar-level options"),
+        ('overrides=', None, 'override options for single grammars e.g. Foo.visitor=yes'),
         ('w-error', None, 'treat warnings as error'),
         ('x-dbg-st', None, 'launch StringTemplate visualizer on generated code'),
         ('x-dbg-st-wait', None, 'wait for STViz to close before continuing'),
         ('x-exact-output-dir', None, 'output goes into -o directories regardless of paths/package'),
         ('x-force-atn', None, 'use the ATN simulator for all predictions'),
-        ('x-log', None, 'dump lots of logging info to antlr-<timestamp>.log')
+        ('x-log', None, 'dump lots of logging info to antlr-<timestamp>.log'),
+        ('force', 'f', 'generate parsers even if they are up to date'),
+        ('plan', None, 'print a JSON build plan without running ANTLR'),
+        ('validate', None, 'check grammars for structural errors before running ANTLR (default)'),
+        ('no-validate', None, 'don\'t check grammars for structural errors before running ANTLR'),
+        ('watch', None, 'regenerate parsers whenever grammars change'),
+        ('watch-delay=', None, 'seconds without changes which end a burst of grammar changes'),
+        ('parallel=', 'j', 'number of parsers generated in parallel (default: number of CPUs)'),
+        ('compile', None, 'compile generated lexers and parsers into C extensions using Cython'),
+        ('bundle=', None, 'pack generated packages into zip bundles in this directory'),
+        ('measure-imports', None, 'measure import time and memory of generated modules'),
+        ('import-budgets=', None, 'fail if imports exceed budgets e.g. time=200 Foo.memory=4096'),
+        ('import-report=', None, 'file import measurements are compared with and written to'),
+        ('bench', None, 'generate a bench module measuring parse performance into each package'),
+        ('profile', None, 'generate a profiling module recording statistics of parser decisions'),
+        ('fast-parse', None, 'generate a module parsing in two stages SLL then LL'),
+        ('streaming', None, 'generate a module lexing large files with constant memory'),
+        ('corpus', None, 'generate a module parsing many files using a process pool'),
+        ('slots', None, 'declare __slots__ in parse tree context classes to reduce memory'),
+        ('flat-tree', None, 'generate a module flattening parse trees into arrays'),
+        ('token-store', None, 'generate a token stream storing tokens in typed arrays'),
+        ('walker', None, 'generate an iterative tree walker dispatching to the listener'),
+        ('fast-lexer', None, 'generate a lexer matching tokens with precomputed DFA tables'),
+        ('parse-cache', None, 'generate a module caching reduced parse results on disk'),
+        ('incremental', None, 'generate a module updating tokens and parse trees incrementally'),
+        ('lazy-init', None, 'generate a package __init__ importing generated classes lazily'),
+        ('split-parser', None, 'split parser modules into submodules imported on first use')
     ]
 
     boolean_options = ['atn', 'long-messages', 'listener', 'no-listener', 'visitor', 'no-visitor',
                        'depend', 'w-error', 'x-dbg-st', 'x-dbg-st-wait', 'x-exact-output-dir',
-                       'x-force-atn', 'x-log']
+                       'x-force-atn', 'x-log', 'force', 'plan', 'validate', 'no-validate', 'watch',
+                       'compile', 'measure-imports', 'bench', 'profile', 'fast-parse',
+                       'streaming', 'corpus', 'slots', 'flat-tree', 'token-store', 'walker',
+                       'fast-lexer', 'parse-cache', 'incremental', 'lazy-init', 'split-parser']
 
-    negative_opt = {'no-listener': 'listener', 'no-visitor': 'visitor'}
+    negative_opt = {'no-listener': 'listener', 'no-visitor': 'visitor', 'no-validate': 'validate'}
 
     def initialize_options(self):
         """Sets default values for all the options that this command supports. Note that these
@@ -156,12 +130,41 @@ class AntlrCommand(setuptools.Command):
         self.visitor = 0
         self.depend = 0
         self.grammar_options = {}
+        self.overrides = {}
         self.w_error = 0
         self.x_dbg_st = 0
         self.x_dbg_st_wait = 0
         self.x_exact_output_dir = 0
         self.x_force_atn = 0
         self.x_log = 0
+        self.force = 0
+        self.plan = 0
+        self.validate = 1
+        self.watch = 0
+        self.watch_delay = None
+        self.parallel = None
+        self.compile = 0
+        self.bundle = None
+        self.measure_imports = 0
+        self.import_budgets = {}
+        self.import_report = None
+        self.bench = 0
+        self.profile = 0
+        self.fast_parse = 0
+        self.streaming = 0
+        self.corpus = 0
+        self.slots = 0
+        self.flat_tree = 0
+        self.token_store = 0
+        self.walker = 0
+        self.fast_lexer = 0
+        self.parse_cache = 0
+        self.incremental = 0
+        self.lazy_init = 0
+        self.split_parser = 0
+
+        # generation jobs of the last run, which are distributed by sdist and build_py
+        self.jobs = []
 
     def finalize_options(self):
         """Sets final values for all the options that this command supports. This is always called
@@ -194,6 +197,10 @@ class AntlrCommand(setuptools.Command):
         else:
             self.grammar_options['language'] = 'Python3'
 
+        # parse options overridden for single grammars
+        if self.overrides:
+            self.overrides = self._parse_overrides(self.overrides)
+
         # sanity check for debugging options
         if not self.x_dbg_st and self.x_dbg_st_wait:
             distutils.log.warn('Waiting for StringTemplate visualizer (x_dbg_st_wait) without '
@@ -201,6 +208,69 @@ class AntlrCommand(setuptools.Command):
                                'StringTemplate visualizer will be forced.')
             self.x_dbg_st = 1
 
+        # parse watch delay
+        try:
+            self.watch_delay = float(self.watch_delay) if self.watch_delay is not None else 0.2
+        except ValueError:
+            raise distutils.errors.DistutilsOptionError('watch delay has to be a number of '
+                                                        'seconds')
+
+        # parse number of parallel generations
+        if self.parallel is not None:
+            try:
+                self.parallel = int(self.parallel)
+            except ValueError:
+                self.parallel = 0
+            if self.parallel < 1:
+                raise distutils.errors.DistutilsOptionError('parallel has to be a positive '
+                                                            'number')
+
+        # parse import budgets
+        if self.import_budgets:
+            self.import_budgets = parse_budgets(self.import_budgets)
+        if self.import_report is None:
+            self.import_report = 'build/antlr-imports.json'
+
+    @classmethod
+    def _parse_overrides(cls, value: str) -> typing.Dict[str, dict]:
+        """Parses options overridden for single grammars. Each override has the form
+        <grammar>.<option>=<value>. Options unknown to ANTLR are passed as grammar-level options.
+
+        :param value: whitespace separated overrides
+        :return: a dictionary mapping grammar names to overridden options
+        """
+        overrides = {}
+        for token in shlex.split(value, comments=True):
+            match = re.match(r'^(\w+)\.([\w-]+)=(.*)$', token)
+            if not match:
+                raise distutils.errors.DistutilsOptionError('{} isn\'t a valid override. Use '
+                                                            '<grammar>.<option>=<value>.'.format(
+                                                                token))
+            grammar, option, option_value = match.groups()
+            grammar_overrides = overrides.setdefault(grammar, {})
+
+            name = cls.negative_opt.get(option, option).replace('-', '_')
+            if name in GenerationOptions.OVERRIDABLE_OPTIONS and name != 'grammar_options':
+                if option in cls.boolean_options:
+                    try:
+                        option_value = distutils.util.strtobool(option_value)
+                    except ValueError:
+                        raise distutils.errors.DistutilsOptionError(
+                            '{} of {} has to be a boolean'.format(option, grammar))
+                    if option in cls.negative_opt:
+                        option_value = int(not option_value)
+                grammar_overrides[name] = option_value
+            elif name in vars(GenerationOptions()):
+                raise distutils.errors.DistutilsOptionError('{} can\'t be overridden for a '
+                                                            'single grammar'.format(option))
+            elif option == 'language' and option_value != 'Python3':
+                raise distutils.errors.DistutilsOptionError('{} isn\'t a supported language. Only '
+                                                            'Python3 code can be generated.'.format(
+                                                                option_value))
+            else:
+                grammar_overrides.setdefault('grammar_options', {})[option] = option_value
+        return overrides
+
     def _find_antlr(self) -> pathlib.Path:
         """Searches for ANTLR library at setuptools-antlr install location.
 
@@ -249,172 +319,302 @@ class AntlrCommand(setuptools.Command):
         else:
             return None
 
-    def _find_grammars(self, base_path: pathlib.Path=pathlib.Path('.')) -> typing.List[AntlrGrammar]:
+    def _find_grammars(self,
+                       base_path: pathlib.Path=pathlib.Path('.')) -> typing.List[AntlrGrammar]:
         """Searches for all ANTLR grammars starting from base directory and returns a list of it.
 
         :param base_path: base path to search for ANTLR grammars
         :return: a list of all found ANTLR grammars
         """
-        grammars = []
+        # imported grammars which aren't found are reported together with all other errors
+        return find_grammars(base_path, self._GRAMMAR_FILE_EXT, strict=not self.validate)
 
-        def get_grammar(name: str) -> AntlrGrammar:
-            """Searches in grammars list for a grammar which has passed name.
+    def _validate_grammars(self, grammars: typing.List[AntlrGrammar],
+                           all_grammars: typing.List[AntlrGrammar]):
+        """Checks grammars and the grammars imported by them for structural errors and reports
+        all errors at once. Grammar-level options, which are passed to ANTLR, are taken into
+        account.
 
-            :param name: name of grammar
-            :return: an ANTLR grammar
-            """
-            try:
-                return next(g for g in grammars if g.name == name)
-            except StopIteration:
-                raise ImportGrammarError(name)
+        :param grammars: selected ANTLR grammars
+        :param all_grammars: all found ANTLR grammars
+        """
+        errors = validate_grammars(grammars, all_grammars, self._get_generation_options())
+        if errors:
+            raise distutils.errors.DistutilsFileError('grammars contain errors\n{}'.format(
+                format_errors(errors)))
+
+    def _get_generation_options(self) -> GenerationOptions:
+        """Collects the generation options set by the user.
+
+        :return: generation options
+        """
+        return GenerationOptions(**{n: getattr(self, n) for n in vars(GenerationOptions())})
+
+    def _create_generator(self, java_exe: pathlib.Path,
+                          antlr_jar: pathlib.Path) -> AntlrGenerator:
+        """Creates a generator configured by the user options.
 
-        # search for all grammars in package source directory
-        for root, _, files in os.walk(str(base_path), followlinks=True):
-            grammar_files = [f for f in files if f.endswith("." + self._GRAMMAR_FILE_EXT)]
-            for fb in grammar_files:
-                grammars.append(AntlrGrammar(pathlib.Path(root, fb)))
+        :param java_exe: path to Java executable
+        :param antlr_jar: path to ANTLR library
+        :return: a parser generator
+        """
+        return AntlrGenerator(java_exe, antlr_jar, self._get_generation_options(),
+                              max_workers=self.parallel, progress=self._report_progress)
+
+    def _report_progress(self, event: str, job: GenerationJob, result: GenerationResult):
+        """Logs the progress of a generation job.
 
-        # generate a dependency tree for each grammar
+        :param event: name of event
+        :param job: a generation job
+        :param result: result of job or None if it isn't finished yet
+        """
+        if event == 'skipped':
+            distutils.log.info('skipping {} parser ({})'.format(job.grammar.name, job.reason))
+        elif event == 'waiting':
+            distutils.log.info('waiting for concurrent generation into {}'.format(
+                job.package_dir))
+        elif event == 'started':
+            if self.depend:
+                dependency_file = pathlib.Path(job.package_dir, 'dependencies.txt')
+                distutils.log.info('generating {} file dependencies -> {}'.format(
+                    job.grammar.path.name, dependency_file))
+            else:
+                distutils.log.info('generating {} parser -> {}'.format(job.grammar.name,
+                                                                       job.package_dir))
+        elif event == 'finished' and result.returncode is not None and self.x_log:
+            # move logging info into build directory
+            antlr_log_file = self._find_antlr_log(job.cwd)
+            if antlr_log_file:
+                package_log_file = pathlib.Path(job.package_dir, antlr_log_file.name)
+                distutils.log.info('dumping logging info of {} -> {}'.format(
+                    job.grammar.path.name, package_log_file))
+                shutil.move(str(antlr_log_file), str(package_log_file))
+            else:
+                distutils.log.warn('no logging info dumped out by ANTLR')
+
+    def _print_plan(self, jobs: typing.List[GenerationJob], java_exe: pathlib.Path,
+                    antlr_jar: pathlib.Path):
+        """Prints the build plan of all jobs as JSON document to stdout.
+
+        :param jobs: planned generation jobs
+        :param java_exe: path to Java executable
+        :param antlr_jar: path to ANTLR library
+        """
+        plan = {
+            'java': str(java_exe),
+            'antlr': str(antlr_jar),
+            'stale': any(j.stale for j in jobs),
+            'grammars': [j.to_dict() for j in jobs]
+        }
+        print(json.dumps(plan, indent=2))
+
+    def _get_base_dir(self) -> pathlib.Path:
+        """Determines the root package directory of the distribution e.g. src, which generated
+        packages and modules are named relative to.
+
+        :return: path of root package directory
+        """
+        return pathlib.Path((self.distribution.package_dir or {}).get('', '.'))
+
+    def _compile_parsers(self, jobs: typing.List[GenerationJob]):
+        """Creates C extensions of all generated lexers and parsers and adds them to the extensions
+        of the distribution, so that they are built by build_ext. Generated modules stay pure
+        Python if Cython or a C compiler isn't available.
+
+        :param jobs: generation jobs
+        """
+        if not is_cython_available():
+            distutils.log.warn('Cython isn\'t installed, generated parsers stay pure Python')
+            return
+        if not has_c_compiler():
+            distutils.log.warn('no C compiler was found, generated parsers stay pure Python')
+            return
+
+        modules = []
+        for job in jobs:
+            try:
+                modules.extend(get_recognizer_modules(job, self._get_base_dir()))
+            except ValueError as e:
+                distutils.log.warn('{} parser isn\'t compiled: {}'.format(job.grammar.name, e))
+
+        distutils.log.info('compiling {} generated modules into C extensions'.format(len(modules)))
         try:
-            for grammar in grammars:
-                imports = grammar.read_imports()
-                if imports:
-                    try:
-                        grammar.dependencies = [get_grammar(i) for i in imports]
-                    except ImportGrammarError as e:
-                        e.parent = grammar
-                        raise
-        except ImportGrammarError as e:
-            raise distutils.errors.DistutilsFileError('Imported grammar "{}" in file "{}" isn\'t '
-                                                      'present in package source directory.'.format(
-                                                          str(e), str(e.parent.path)))
+            extensions = cythonize_modules(modules, force=self.force)
+        except distutils.errors.DistutilsExecError as e:
+            distutils.log.warn('{}, generated parsers stay pure Python'.format(e))
+            return
+
+        ext_modules = list(self.distribution.ext_modules or [])
+        names = {e.name for e in extensions}
+        ext_modules = [e for e in ext_modules if e.name not in names] + extensions
+        self.distribution.ext_modules = ext_modules
 
-        return grammars
+    def _bundle_parsers(self, jobs: typing.List[GenerationJob]):
+        """Packs the packages of all jobs into zip bundles and writes the module importing them
+        into the bundle directory. Bundles of packages which weren't regenerated are kept.
+
+        :param jobs: generation jobs
+        """
+        bundle_dir = pathlib.Path(self.bundle)
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(pathlib.Path(bundle_dir, BUNDLE_IMPORT_MODULE), create_bundle_import_module())
+
+        for job in jobs:
+            try:
+                package = get_package_name(job.package_dir, self._get_base_dir())
+            except ValueError as e:
+                distutils.log.warn('{} parser isn\'t bundled: {}'.format(job.grammar.name, e))
+                continue
+            bundle_file = pathlib.Path(bundle_dir, package + BUNDLE_SUFFIX)
+            if job.stale or self.force or not bundle_file.exists():
+                distutils.log.info('bundling {} parser -> {}'.format(job.grammar.name,
+                                                                     bundle_file))
+                create_bundle(job.package_dir, package, bundle_file)
+
+    def _check_imports(self, jobs: typing.List[GenerationJob]):
+        """Measures the import costs of all generated packages, compares them with the previous
+        run and checks them against the import budgets.
+
+        :param jobs: generation jobs
+        """
+        if importlib.util.find_spec('antlr4') is None:
+            distutils.log.warn('ANTLR runtime isn\'t installed, imports of generated parsers '
+                               'aren\'t measured')
+            return
+
+        base_dir = self._get_base_dir()
+        measured = []
+        for job in jobs:
+            try:
+                get_package_name(job.package_dir, base_dir)
+            except ValueError as e:
+                distutils.log.warn('imports of {} parser aren\'t measured: {}'.format(
+                    job.grammar.name, e))
+                continue
+            measured.append(job)
+
+        distutils.log.info('measuring imports of {} generated packages'.format(len(measured)))
+        results = measure_imports(measured, base_dir, self.parallel)
+        report_file = pathlib.Path(self.import_report)
+        previous = read_report(report_file)
+        for grammar, grammar_results in sorted(results.items()):
+            distutils.log.info(format_results(grammar, grammar_results, previous.get(grammar)))
+        write_report(report_file, results)
+
+        violations = check_budgets(results, self.import_budgets)
+        if violations:
+            raise distutils.errors.DistutilsExecError('\n'.join(violations))
+
+    def _select_grammars(self,
+                         grammars: typing.Iterable[AntlrGrammar]) -> typing.List[AntlrGrammar]:
+        """Filters grammars if grammars are passed by user and sorts them in generation order.
+
+        :param grammars: ANTLR grammars
+        :return: a sorted list of selected grammars
+        """
+        if self.grammars:
+            grammars = filter(lambda g: g.name in self.grammars, grammars)
+        return sort_grammars(grammars)
 
     @classmethod
-    def _create_init_file(cls, path: pathlib.Path) -> bool:
-        """Creates a __init__.py file if it doesn't exist.
+    def _run_jobs(cls, generator: AntlrGenerator, jobs: typing.List[GenerationJob]):
+        """Runs all stale generation jobs.
+
+        :param generator: parser generator
+        :param jobs: generation jobs
+        """
+        results = generator.run(jobs)
+
+        failed = [r for r in results if not r.succeeded]
+        if failed:
+            raise distutils.errors.DistutilsExecError('{} parser couldn\'t be generated\n'
+                                                      '{}'.format(failed[0].job.grammar.name,
+                                                                  failed[0].output))
+
+    def _watch(self, generator: AntlrGenerator):
+        """Watches the directories of all grammars and regenerates the parsers of changed grammars
+        and their dependent grammars until the user interrupts.
 
-        :param path: path where init file should be created
-        :return: True if init file was created
+        :param generator: parser generator
         """
-        init_file = pathlib.Path(path, '__init__.py')
+        watcher = create_watcher(self._GRAMMAR_FILE_EXT)
+        grammars = self._find_grammars()
         try:
-            init_file.touch(exist_ok=False)
-        except FileExistsError:
-            return False
-        return True
+            while True:
+                watcher.watch(set(g.path.parent for g in grammars))
+                distutils.log.info('watching {} grammars for changes'.format(len(grammars)))
+                changed_files = wait_debounced(watcher, self.watch_delay)
+
+                # errors are reported but don't stop watching
+                try:
+                    grammars = self._find_grammars()
+                    affected = self._select_grammars(get_affected_grammars(grammars,
+                                                                           changed_files))
+                    if self.validate:
+                        self._validate_grammars(affected, grammars)
+                    jobs = generator.plan(affected)
+                    self._run_jobs(generator, jobs)
+                    if self.bundle:
+                        self._bundle_parsers(jobs)
+                except distutils.errors.DistutilsError as e:
+                    distutils.log.error(str(e))
+        except KeyboardInterrupt:
+            distutils.log.info('stopped watching grammars')
+        finally:
+            watcher.close()
 
     def run(self):
         """Performs all tasks necessary to generate ANTLR based parsers for all found grammars. This
         process is controlled by the user options passed on the command line or set internally to
         default values.
         """
-        java_exe = find_java(self._MIN_JAVA_VERSION)
-        if not java_exe:
-            raise distutils.errors.DistutilsExecError('no compatible JRE was found on the system')
-
         antlr_jar = self._find_antlr()
         if not antlr_jar:
             raise distutils.errors.DistutilsExecError('no ANTLR jar was found in lib directory')
 
+        # planning never launches Java, so the executable isn't validated
+        java_exe = which_java() or pathlib.Path('java')
+        generator = self._create_generator(java_exe, antlr_jar)
+
         # find grammars and filter result if grammars are passed by user
-        grammars = self._find_grammars()
-        if self.grammars:
-            grammars = filter(lambda g: g.name in self.grammars, grammars)
+        all_grammars = self._find_grammars()
+        grammars = self._select_grammars(all_grammars)
 
-        # generate parser for each grammar
-        for grammar in grammars:
-            # build up ANTLR command line
-            run_args = [str(java_exe), '-jar', str(antlr_jar)]
-            if self.atn:
-                run_args.append('-atn')
-            if self.encoding:
-                run_args.extend(['-encoding', self.encoding])
-            if self.message_format:
-                run_args.extend(['-message-format', self.message_format])
-            if self.long_messages:
-                run_args.append('-long-messages')
-            run_args.append('-listener' if self.listener else '-no-listener')
-            run_args.append('-visitor' if self.visitor else '-no-visitor')
-            if self.depend:
-                run_args.append('-depend')
-            run_args.extend(['-D{}={}'.format(option, value) for option, value in
-                            self.grammar_options.items()])
-            if self.w_error:
-                run_args.append('-Werror')
-            if self.x_dbg_st:
-                run_args.append('-XdbgST')
-            if self.x_dbg_st_wait:
-                run_args.append('-XdbgSTWait')
-            if self.x_exact_output_dir:
-                run_args.append('-Xexact-output-dir')
-            if self.x_force_atn:
-                run_args.append('-Xforce-atn')
-            if self.x_log:
-                run_args.append('-Xlog')
-
-            # determine location of dependencies e.g. imported grammars and token files
-            dependency_dirs = set(g.path.parent for g in grammar.walk())
-            if len(dependency_dirs) == 1:
-                run_args.extend(['-lib', str(dependency_dirs.pop().absolute())])
-            elif len(dependency_dirs) > 1:
-                raise distutils.errors.DistutilsOptionError('Imported grammars of \'{}\' are '
-                                                            'located in more than one directory. '
-                                                            'This isn\'t supported by ANTLR. Move '
-                                                            'all imported grammars into one '
-                                                            'directory.'.format(grammar.name))
-
-            # build up package path
-            grammar_dir = grammar.path.parent
-            if grammar.name in self.output:
-                output_dir = self.output[grammar.name]
-            else:
-                output_dir = self.output['default']
-            if self.x_exact_output_dir:
-                package_dir = pathlib.Path(output_dir)
-            else:
-                package_dir = pathlib.Path(output_dir, grammar_dir,
-                                           camel_to_snake_case(grammar.name))
+        unknown = set(self.overrides) - {g.name for g in all_grammars}
+        for name in sorted(unknown):
+            distutils.log.warn('options are overridden for unknown grammar {}'.format(name))
 
-            # create package directory
-            package_dir.mkdir(parents=True, exist_ok=True)
-            run_args.extend(['-o', str(package_dir.resolve())])
+        # report simple mistakes in grammars before launching Java
+        if self.validate:
+            self._validate_grammars(grammars, all_grammars)
 
-            grammar_file = grammar.path.name
-            run_args.append(str(grammar_file))
+        jobs = generator.plan(grammars)
 
-            if self.depend:
-                dependency_file = pathlib.Path(package_dir, 'dependencies.txt')
-                distutils.log.info('generating {} file dependencies -> {}'.format(grammar_file,
-                                                                                  dependency_file))
-
-                # call ANTLR for file dependency generation
-                result = subprocess.run(run_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                        universal_newlines=True, cwd=str(grammar_dir))
-                with dependency_file.open('wt') as f:
-                    f.write(result.stdout)
-            else:
-                distutils.log.info('generating {} parser -> {}'.format(grammar.name, package_dir))
+        if self.plan:
+            self._print_plan(jobs, java_exe, antlr_jar)
+            return
 
-                # create Python package if don't exist
-                self._create_init_file(package_dir)
+        # a JRE is only required if a parser has to be generated e.g. not while installing an
+        # sdist shipping up to date parsers
+        if any(j.stale for j in jobs) or self.watch:
+            java_exe = find_java(self._MIN_JAVA_VERSION)
+            if not java_exe:
+                raise distutils.errors.DistutilsExecError('no compatible JRE was found on the '
+                                                          'system')
+            generator.set_java_exe(java_exe, jobs)
+        self.jobs = jobs
 
-                # call ANTLR for parser generation
-                result = subprocess.run(run_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                        universal_newlines=True, cwd=str(grammar_dir))
-                if result.returncode:
-                    raise distutils.errors.DistutilsExecError('{} parser couldn\'t be generated\n'
-                                                              '{}'.format(grammar.name,
-                                                                          result.stdout))
+        # generate parsers of all stale grammars concurrently
+        self._run_jobs(generator, jobs)
 
-            # move logging info into build directory
-            if self.x_log:
-                antlr_log_file = self._find_antlr_log(grammar_dir)
-                if antlr_log_file:
-                    package_log_file = pathlib.Path(package_dir, antlr_log_file.name)
-                    distutils.log.info('dumping logging info of {} -> {}'.format(grammar_file,
-                                                                                 package_log_file))
-                    shutil.move(str(antlr_log_file), str(package_log_file))
-                else:
-                    distutils.log.warn('no logging info dumped out by ANTLR')
+        if self.compile and not self.depend:
+            self._compile_parsers(jobs)
+
+        if self.bundle and not self.depend:
+            self._bundle_parsers(jobs)
+
+        if (self.measure_imports or self.import_budgets) and not self.depend:
+            self._check_imports(jobs)
+
+        if self.watch:
+            self._watch(generator)
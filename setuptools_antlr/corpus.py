@@ -0,0 +1,214 @@
+"""Creates corpus modules which are generated into the packages of parsers.
+
+A corpus module parses many files in parallel using a pool of worker processes. Each worker keeps
+a lexer, a parser and the DFA caches of the generated recognizers warm across files. Parse trees
+stay inside the workers; only the results of a user supplied map function are sent back and
+combined by a user supplied reduce function::
+
+    from foobar.dsl.foo.corpus import parse_corpus
+
+    result = parse_corpus(paths, count_rules, operator.add, 0)
+"""
+import string
+
+CORPUS_MODULE = 'corpus.py'
+
+_CORPUS_TEMPLATE = string.Template('''"""Parses a corpus of ${grammar} files using a process pool.
+
+Generated by setuptools-antlr, don't edit.
+
+Usage::
+
+    python -m <package>.corpus <corpus> [--rule RULE] [--pattern GLOB] [--workers N]
+                                        [--chunk-size N] [--output FILE]
+
+Files are distributed dynamically in small chunks, so idle workers fetch the next chunk instead of
+waiting for slow files of others. Each worker reuses its lexer and parser, and the DFA caches
+shared by all recognizers of a process stay warm across files. Files are parsed in two stages, SLL
+prediction first and LL prediction only if this fails. Parse trees aren't sent back to the calling
+process, a map function running inside the workers reduces each tree to a picklable value.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import time
+
+from antlr4 import CommonTokenStream, FileStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+${lexer_import}
+${parser_import}
+
+GRAMMAR = '${grammar}'
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+
+class CorpusResult(object):
+    """Combined result of parsing a corpus."""
+
+    def __init__(self, value):
+        self.value = value
+        self.files = 0
+        self.ll_fallbacks = 0
+        self.failures = []
+
+    @property
+    def succeeded(self):
+        """Returns whether all files were parsed without errors."""
+        return not self.failures
+
+    def as_dict(self):
+        return {'value': self.value, 'files': self.files, 'll_fallbacks': self.ll_fallbacks,
+                'failures': self.failures}
+
+
+class _ErrorCollector(ErrorListener):
+    def __init__(self):
+        self.messages = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.messages.append('{}:{}: {}'.format(line, column, msg))
+
+
+class _Worker(object):
+    """Parses files with a lexer and a parser reused across files."""
+
+    def __init__(self, start_rule, encoding, map_function):
+        self.encoding = encoding
+        self.map_function = map_function
+        self.errors = _ErrorCollector()
+        self.lexer = LEXER(None)
+        self.lexer.removeErrorListeners()
+        self.lexer.addErrorListener(self.errors)
+        self.parser = PARSER(None)
+        self.rule = getattr(self.parser, start_rule or self.parser.ruleNames[0])
+
+    def parse(self, path):
+        self.errors.messages = []
+        self.lexer.inputStream = FileStream(path, self.encoding)
+        parser = self.parser
+        parser.setTokenStream(CommonTokenStream(self.lexer))
+
+        parser.removeErrorListeners()
+        parser._errHandler = BailErrorStrategy()
+        parser._interp.predictionMode = PredictionMode.SLL
+        fallback = False
+        try:
+            tree = self.rule()
+        except ParseCancellationException:
+            fallback = True
+            parser.reset()
+            parser.addErrorListener(self.errors)
+            parser._errHandler = DefaultErrorStrategy()
+            parser._interp.predictionMode = PredictionMode.LL
+            tree = self.rule()
+        value = self.map_function(tree, path) if self.map_function is not None else None
+        return value, fallback
+
+
+_worker = None
+
+
+def _init_worker(start_rule, encoding, map_function):
+    global _worker
+    _worker = _Worker(start_rule, encoding, map_function)
+
+
+def _parse_file(path):
+    try:
+        value, fallback = _worker.parse(path)
+        return path, value, fallback, _worker.errors.messages, None
+    except Exception as e:
+        return path, None, False, _worker.errors.messages, '{}: {}'.format(type(e).__name__, e)
+
+
+def parse_corpus(paths, map_function=None, reduce_function=None, initial=None, start_rule=None,
+                 workers=None, chunk_size=None, encoding='utf-8'):
+    """Parses files using a pool of worker processes.
+
+    Map and reduce function have to be defined at module level, so that they can be pickled.
+
+    :param paths: paths of files to parse
+    :param map_function: function called by the workers with the parse tree and the path of each
+                         file returning a picklable value
+    :param reduce_function: function called with the accumulated value and the value of each
+                            successfully parsed file returning the new accumulated value
+    :param initial: initial accumulated value
+    :param start_rule: name of start rule, defaults to first rule of grammar
+    :param workers: number of worker processes, defaults to number of CPUs
+    :param chunk_size: number of files a worker fetches at once
+    :param encoding: encoding of files
+    :return: a CorpusResult
+    """
+    paths = [str(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # small chunks balance load, larger chunks reduce communication
+        chunk_size = max(1, min(64, len(paths) // (workers * 16)))
+
+    result = CorpusResult(initial)
+    with multiprocessing.Pool(workers, _init_worker, (start_rule, encoding, map_function)) as pool:
+        for path, value, fallback, errors, exception in pool.imap_unordered(_parse_file, paths,
+                                                                            chunk_size):
+            result.files += 1
+            result.ll_fallbacks += fallback
+            if errors or exception:
+                result.failures.append({'file': path, 'errors': errors, 'exception': exception})
+            elif reduce_function is not None:
+                result.value = reduce_function(result.value, value)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parses a corpus of {} files.'.format(GRAMMAR))
+    parser.add_argument('corpus', help='directory containing files to parse')
+    parser.add_argument('--rule', help='start rule (default: first rule of grammar)')
+    parser.add_argument('--pattern', default='*', help='glob pattern of files (default: *)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, help='files a worker fetches at once')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    args = parser.parse_args(argv)
+
+    paths = sorted(p for p in pathlib.Path(args.corpus).rglob(args.pattern) if p.is_file())
+    start = time.perf_counter()
+    result = parse_corpus(paths, start_rule=args.rule, workers=args.workers,
+                          chunk_size=args.chunk_size)
+    seconds = time.perf_counter() - start
+    results = dict(result.as_dict(), grammar=GRAMMAR, seconds=seconds,
+                   files_per_second=result.files / seconds if seconds else None)
+    del results['value']
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0 if result.succeeded else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+''')
+
+
+def create_corpus_module(grammar: str, lexer_import: str, lexer_class: str, parser_import: str,
+                         parser_class: str) -> str:
+    """Creates the source code of a corpus module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :return: source code of corpus module
+    """
+    return _CORPUS_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                       lexer_class=lexer_class, parser_import=parser_import,
+                                       parser_class=parser_class)
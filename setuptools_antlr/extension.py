@@ -0,0 +1,102 @@
+"""Compiles generated parsers into C extensions using Cython.
+
+Compilation is optional. If Cython or a C compiler isn't available the generated modules stay pure
+Python. Extensions are marked as optional, so a failing build of an extension falls back to the
+pure Python module as well.
+"""
+import distutils.ccompiler
+import distutils.errors
+import distutils.sysconfig
+import importlib.util
+import os.path
+import pathlib
+import shutil
+import typing
+
+import setuptools
+
+from setuptools_antlr.generator import GenerationJob
+
+
+def is_cython_available() -> bool:
+    """Checks whether Cython is installed without importing it.
+
+    :return: flag whether Cython is available
+    """
+    return importlib.util.find_spec('Cython') is not None
+
+
+def has_c_compiler() -> bool:
+    """Checks whether a C compiler compatible to the running Python interpreter is available.
+
+    :return: flag whether a C compiler was found
+    """
+    compiler = distutils.ccompiler.new_compiler()
+    try:
+        distutils.sysconfig.customize_compiler(compiler)
+        if hasattr(compiler, 'initialize'):
+            # MSVC is searched for during initialization
+            compiler.initialize()
+    except (distutils.errors.DistutilsError, OSError):
+        return False
+
+    executable = getattr(compiler, 'compiler_so', None)
+    return not executable or shutil.which(executable[0]) is not None
+
+
+def get_recognizer_modules(job: GenerationJob,
+                           base_dir: pathlib.Path) -> typing.List[typing.Tuple[str, pathlib.Path]]:
+    """Determines the generated lexer and parser modules of a job. Listeners, visitors and helper
+    modules are left out, because they don't contribute to parsing throughput.
+
+    :param job: a generation job
+    :param base_dir: root directory of Python packages
+    :return: a list of fully qualified module names and paths of module files
+    """
+    package_dir = pathlib.Path(os.path.abspath(str(job.package_dir)))
+    try:
+        package = package_dir.relative_to(os.path.abspath(str(base_dir)))
+    except ValueError:
+        raise ValueError('package {} isn\'t located in {}'.format(job.package_dir, base_dir))
+
+    modules = []
+    for output in job.outputs:
+        path = pathlib.PurePath(output)
+        if path.suffix != '.py' or path.stem == '__init__' or output in job.extra_files or \
+                path.stem.endswith(('Listener', 'Visitor')):
+            continue
+        name = '.'.join(package.parts + (path.stem,))
+        modules.append((name, pathlib.Path(job.package_dir, output)))
+    return modules
+
+
+def cythonize_modules(modules: typing.List[typing.Tuple[str, pathlib.Path]],
+                      force: bool=False) -> typing.List[setuptools.Extension]:
+    """Translates Python modules into C sources and creates an extension for each of them.
+
+    :param modules: fully qualified module names and paths of module files
+    :param force: flag whether C sources are translated even if they are up to date
+    :return: a list of optional extensions
+    :raises DistutilsModuleError: if Cython isn't installed
+    :raises DistutilsExecError: if Cython fails
+    """
+    # importing Cython is expensive, so it's deferred until parsers are actually compiled
+    try:
+        from Cython.Build import cythonize
+        from Cython.Compiler.Errors import CompileError
+    except ImportError:
+        raise distutils.errors.DistutilsModuleError('Cython isn\'t installed')
+
+    extensions = [setuptools.Extension(name, [str(path)], optional=True)
+                  for name, path in modules]
+    try:
+        # annotations of generated code refer to runtime classes unknown to Cython
+        extensions = cythonize(extensions, compiler_directives={'language_level': 3,
+                                                                'annotation_typing': False},
+                               force=force, quiet=True)
+    except CompileError as e:
+        raise distutils.errors.DistutilsExecError('Cython couldn\'t translate generated modules: '
+                                                  '{}'.format(e))
+    for extension in extensions:
+        extension.optional = True
+    return extensions
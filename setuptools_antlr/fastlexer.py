@@ -0,0 +1,589 @@
+"""Creates fast lexer modules which are generated into the packages of lexers.
+
+The lexer ATN simulator of the ANTLR runtime builds the DFA of a lexer while it lexes by moving
+sets of ATN configurations from character to character. A fast lexer module contains the DFA of
+each lexer mode, computed ahead of time from the serialized ATN, as transition tables. Its lexer
+looks up the next state for each character in the tables and falls back to the ATN simulator for
+inputs and modes the tables don't cover::
+
+    from foobar.dsl.foo.fastlexer import FastLexer
+
+    lexer = FastLexer(InputStream(text))
+
+The tables are computed from the interpreter data ANTLR writes next to the generated lexer, so
+the module is completed by a post-processor after ANTLR ran.
+"""
+import bisect
+import collections
+import logging
+import pathlib
+import re
+import string
+import textwrap
+import typing
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FAST_LEXER_MODULE = 'fastlexer.py'
+
+# maximal number of DFA states of a mode
+MAX_DFA_STATES = 5000
+
+# maximal depth of an epsilon closure, exceeded by recursive lexer rules
+MAX_CLOSURE_DEPTH = 500
+
+MAX_CHAR = 0x10FFFF
+
+# constants of the ATN serialization, see ATNDeserializer of the runtime
+_SERIALIZED_VERSION = 3
+_ADDED_UNICODE_SMP = uuid.UUID('59627784-3BE5-417A-B9EB-8131A7286089')
+_LEXER_ATN = 0
+_BLOCK_START_STATES = (3, 4, 5)
+_DECISION_STATES = (3, 4, 5, 6, 10, 11)
+_RULE_STOP_STATE = 7
+_LOOP_END_STATE = 12
+_EPSILON, _RANGE, _RULE, _PREDICATE, _ATOM, _ACTION, _SET, _NOT_SET, _WILDCARD, _PRECEDENCE = \
+    range(1, 11)
+_EPSILON_TRANSITIONS = (_EPSILON, _RULE, _PREDICATE, _ACTION, _PRECEDENCE)
+_CUSTOM_ACTION = 1
+
+_TABLES_PLACEHOLDER = '# transition tables are inserted after generation\n'
+
+AtnState = collections.namedtuple('AtnState', ['type', 'rule', 'transitions', 'epsilon_only'])
+AtnState.__doc__ = 'A state of a lexer ATN.'
+
+Transition = collections.namedtuple('Transition', ['type', 'target', 'intervals', 'eof', 'arg'])
+Transition.__doc__ = '''A transition of a lexer ATN. Intervals are the inclusive character ranges
+matched by the transition. Arg is the follow state of rule transitions and the index of the lexer
+action of action transitions.'''
+
+
+class UnsupportedLexerError(Exception):
+    """Raised if the DFA of a lexer mode can't be computed ahead of time."""
+
+
+class LexerAtn(object):
+    """The ATN of a lexer deserialized from the interpreter data generated by ANTLR.
+
+    Only the parts of the ATN needed to compute the DFA are read.
+    """
+
+    def __init__(self, serialized: typing.List[int], rule_names: typing.List[str]=None,
+                 mode_names: typing.List[str]=None):
+        """Initializes a new LexerAtn object.
+
+        :param serialized: serialized ATN as written to the interpreter data
+        :param rule_names: names of lexer rules
+        :param mode_names: names of lexer modes
+        """
+        # values except the version are shifted like the serialized ATN of the generated lexer
+        self._data = serialized[:1] + [v - 2 if v > 1 else v + 65533 for v in serialized[1:]]
+        self._pos = 0
+
+        version = self._read()
+        if version != _SERIALIZED_VERSION:
+            raise ValueError('unsupported ATN serialization version {}'.format(version))
+        unicode_smp = self._read_uuid() == _ADDED_UNICODE_SMP
+        if self._read() != _LEXER_ATN:
+            raise ValueError('ATN isn\'t the ATN of a lexer')
+        self._read()
+
+        states = []
+        for _ in range(self._read()):
+            state_type = self._read()
+            if not state_type:
+                states.append(None)
+                continue
+            rule = self._read()
+            if state_type == _LOOP_END_STATE or state_type in _BLOCK_START_STATES:
+                self._read()
+            states.append((state_type, -1 if rule == 0xFFFF else rule))
+        self.non_greedy = frozenset(s for s in self._read_list()
+                                    if states[s][0] in _DECISION_STATES)
+        self._read_list()
+
+        self.rule_start_states = []
+        self.rule_token_types = []
+        for _ in range(self._read()):
+            self.rule_start_states.append(self._read())
+            token_type = self._read()
+            self.rule_token_types.append(-1 if token_type == 0xFFFF else token_type)
+        self.mode_start_states = self._read_list()
+
+        sets = self._read_sets(self._read)
+        if unicode_smp:
+            sets.extend(self._read_sets(self._read_int32))
+
+        transitions = [[] for _ in states]
+        for _ in range(self._read()):
+            source, target, transition_type, arg1, arg2, arg3 = (self._read() for _ in range(6))
+            intervals, eof, arg = (), False, None
+            if transition_type == _RANGE:
+                intervals, eof = ((arg1, arg2),), arg3 != 0
+            elif transition_type == _ATOM:
+                intervals, eof = ((arg1, arg1),), arg3 != 0
+            elif transition_type in (_SET, _NOT_SET):
+                intervals, eof = sets[arg1]
+                if transition_type == _NOT_SET:
+                    intervals, eof = _complement(intervals), False
+            elif transition_type == _WILDCARD:
+                intervals = ((0, MAX_CHAR),)
+            elif transition_type == _RULE:
+                # rule transitions lead to the start state of the rule and return to the target
+                target, arg = arg1, target
+            elif transition_type == _ACTION:
+                arg = arg2
+            transitions[source].append(Transition(transition_type, target, intervals, eof, arg))
+        self.states = [None if s is None else
+                       AtnState(s[0], s[1], tuple(t),
+                                bool(t) and all(x.type in _EPSILON_TRANSITIONS for x in t))
+                       for s, t in zip(states, transitions)]
+
+        self._read_list()
+        self.action_types = []
+        for _ in range(self._read()):
+            self.action_types.append(self._read())
+            self._read()
+            self._read()
+
+        self.rule_names = rule_names or ['rule {}'.format(i)
+                                         for i in range(len(self.rule_start_states))]
+        self.mode_names = mode_names or ['mode {}'.format(i)
+                                         for i in range(len(self.mode_start_states))]
+
+    @classmethod
+    def from_interp(cls, text: str) -> 'LexerAtn':
+        """Deserializes the ATN of a lexer from its interpreter data.
+
+        :param text: content of an interp file
+        :return: a LexerAtn
+        """
+        sections = {}
+        for section in text.strip().split('\n\n'):
+            name, _, values = section.partition(':\n')
+            sections[name.strip()] = values.splitlines()
+        if 'atn' not in sections:
+            raise ValueError('interpreter data contains no ATN')
+        serialized = [int(v) for v in ''.join(sections['atn']).strip('[]').split(',')]
+        return cls(serialized, sections.get('rule names'), sections.get('mode names'))
+
+    def _read(self) -> int:
+        value = self._data[self._pos]
+        self._pos += 1
+        return value
+
+    def _read_int32(self) -> int:
+        return self._read() | self._read() << 16
+
+    def _read_uuid(self) -> uuid.UUID:
+        low = self._read_int32() | self._read_int32() << 32
+        high = self._read_int32() | self._read_int32() << 32
+        return uuid.UUID(int=low | high << 64)
+
+    def _read_list(self) -> typing.List[int]:
+        return [self._read() for _ in range(self._read())]
+
+    def _read_sets(self, read: typing.Callable[[], int]) -> typing.List[tuple]:
+        sets = []
+        for _ in range(self._read()):
+            count = self._read()
+            eof = self._read() != 0
+            sets.append((tuple((read(), read()) for _ in range(count)), eof))
+        return sets
+
+
+def _complement(intervals: typing.Iterable[typing.Tuple[int, int]]) -> tuple:
+    """Determines the characters not contained in a set of intervals."""
+    complement = []
+    start = 0
+    for low, high in sorted(intervals):
+        if low > start:
+            complement.append((start, low - 1))
+        start = max(start, high + 1)
+    if start <= MAX_CHAR:
+        complement.append((start, MAX_CHAR))
+    return tuple(complement)
+
+
+LexerTables = collections.namedtuple('LexerTables', ['bounds', 'classes', 'modes', 'unsupported'])
+LexerTables.__doc__ = '''Transition tables of a lexer. Bounds are the first characters of
+intervals of characters and classes the character class of each interval. Modes maps the number
+of each supported mode to the transitions of each DFA state as list of character class and next
+state pairs and a dictionary mapping accepting states to token type and indices of lexer actions.
+Unsupported maps the other modes to the reason why they aren't supported.'''
+
+
+class _DfaBuilder(object):
+    """Computes the DFA of a lexer mode like the lexer ATN simulator of the runtime.
+
+    A DFA state is the ordered tuple of ATN configurations the simulator reaches. A configuration
+    is a tuple of ATN state, alternative, stack of return states, a flag whether it passed a
+    non-greedy decision and the indices of the lexer actions to execute.
+    """
+
+    def __init__(self, atn: LexerAtn, bounds: typing.List[int]):
+        """Initializes a new _DfaBuilder object.
+
+        :param atn: a lexer ATN
+        :param bounds: first characters of the intervals all transitions are split into
+        """
+        self.atn = atn
+        self.bounds = bounds
+        # matching transitions of each ATN state as first and last interval and target
+        self.moves = []
+        for state in atn.states:
+            moves = []
+            for transition in state.transitions if state else ():
+                if transition.type in _EPSILON_TRANSITIONS:
+                    continue
+                if transition.eof:
+                    moves = None
+                    break
+                for low, high in transition.intervals:
+                    moves.append((bisect.bisect_left(bounds, low),
+                                  bisect.bisect_right(bounds, high) - 1, transition.target))
+            self.moves.append(moves)
+
+    def _fail(self, reason: str, state: int):
+        raise UnsupportedLexerError('rule {} {}'.format(
+            self.atn.rule_names[self.atn.states[state].rule], reason))
+
+    def _closure(self, config: tuple, configs: collections.OrderedDict, reached: bool,
+                 depth: int=0) -> bool:
+        """Adds all configurations reachable by epsilon transitions to an ordered set.
+
+        :return: a flag whether the alternative of config reached an accepting state
+        """
+        if depth > MAX_CLOSURE_DEPTH:
+            self._fail('is recursive', config[0])
+        number, alt, stack, non_greedy, actions = config
+        state = self.atn.states[number]
+        if state.type == _RULE_STOP_STATE:
+            if not stack:
+                configs[config] = None
+                return True
+            follow = stack[-1]
+            return self._closure((follow, alt, stack[:-1],
+                                  non_greedy or follow in self.atn.non_greedy, actions),
+                                 configs, reached, depth + 1)
+
+        if not state.epsilon_only and (not reached or not non_greedy):
+            configs[config] = None
+        for transition in state.transitions:
+            target = transition.target
+            target_non_greedy = non_greedy or target in self.atn.non_greedy
+            if transition.type == _RULE:
+                config = (target, alt, stack + (transition.arg,), target_non_greedy, actions)
+            elif transition.type == _EPSILON:
+                config = (target, alt, stack, target_non_greedy, actions)
+            elif transition.type == _ACTION:
+                # actions of invoked rules are ignored by the runtime
+                if not stack:
+                    if self.atn.action_types[transition.arg] == _CUSTOM_ACTION:
+                        self._fail('contains an action', number)
+                    config = (target, alt, stack, target_non_greedy,
+                              actions + (transition.arg,))
+                else:
+                    config = (target, alt, stack, target_non_greedy, actions)
+            elif transition.type in (_PREDICATE, _PRECEDENCE):
+                self._fail('contains a semantic predicate', number)
+            else:
+                continue
+            reached = self._closure(config, configs, reached, depth + 1)
+        return reached
+
+    def _reach(self, configs: tuple, moves: tuple) -> tuple:
+        """Computes the configurations reached by a character.
+
+        :param configs: configurations of a DFA state
+        :param moves: index of configuration and target ATN states of all transitions matching
+                      the character
+        :return: configurations of the next DFA state
+        """
+        reach = collections.OrderedDict()
+        skip_alt = 0
+        for index, targets in moves:
+            _, alt, stack, non_greedy, actions = configs[index]
+            reached = alt == skip_alt
+            if reached and non_greedy:
+                continue
+            for target in targets:
+                config = (target, alt, stack, non_greedy or target in self.atn.non_greedy,
+                          actions)
+                if self._closure(config, reach, reached):
+                    skip_alt = alt
+        return tuple(reach)
+
+    def build(self, mode: int) -> typing.Tuple[typing.List[dict], typing.Dict[int, tuple]]:
+        """Computes the DFA of a lexer mode.
+
+        :param mode: number of mode
+        :return: next state by interval index for each DFA state and token type and lexer
+                 actions of accepting states
+        """
+        tokens_start = self.atn.states[self.atn.mode_start_states[mode]]
+        start = collections.OrderedDict()
+        for alt, transition in enumerate(tokens_start.transitions, 1):
+            self._closure((transition.target, alt, (), False, ()), start, False)
+
+        dfa_states = collections.OrderedDict([(tuple(start), 0)])
+        transitions = []
+        accepts = {}
+        pending = collections.deque(dfa_states)
+        while pending:
+            configs = pending.popleft()
+            number = dfa_states[configs]
+            accept = next((c for c in configs
+                           if self.atn.states[c[0]].type == _RULE_STOP_STATE), None)
+            if accept is not None:
+                if not number:
+                    raise UnsupportedLexerError('a rule matches the empty string')
+                rule = self.atn.states[accept[0]].rule
+                accepts[number] = (self.atn.rule_token_types[rule], accept[4])
+
+            # transitions of all configurations matching each interval in order
+            matching = collections.defaultdict(list)
+            for index, config in enumerate(configs):
+                moves = self.moves[config[0]]
+                if moves is None:
+                    self._fail('matches the end of input', config[0])
+                for first, last, target in moves:
+                    for interval in range(first, last + 1):
+                        targets = matching[interval]
+                        if targets and targets[-1][0] == index:
+                            targets[-1][1].append(target)
+                        else:
+                            targets.append((index, [target]))
+
+            row = {}
+            reached = {}
+            for interval, moves in matching.items():
+                moves = tuple((i, tuple(t)) for i, t in moves)
+                if moves not in reached:
+                    reached[moves] = self._reach(configs, moves)
+                reach = reached[moves]
+                if not reach:
+                    continue
+                if reach not in dfa_states:
+                    if len(dfa_states) >= MAX_DFA_STATES:
+                        raise UnsupportedLexerError('DFA has more than {} states'.format(
+                            MAX_DFA_STATES))
+                    dfa_states[reach] = len(dfa_states)
+                    pending.append(reach)
+                row[interval] = dfa_states[reach]
+            transitions.append(row)
+        return transitions, accepts
+
+
+def compute_lexer_tables(atn: LexerAtn) -> LexerTables:
+    """Computes the transition tables of all modes of a lexer.
+
+    Characters are grouped into classes of characters leading to the same next state in every
+    state of every mode.
+
+    :param atn: a lexer ATN
+    :return: transition tables
+    """
+    bounds = {0}
+    for state in atn.states:
+        for transition in state.transitions if state else ():
+            for low, high in transition.intervals:
+                bounds.update((low, high + 1))
+    bounds = sorted(b for b in bounds if b <= MAX_CHAR)
+
+    builder = _DfaBuilder(atn, bounds)
+    dfas = collections.OrderedDict()
+    unsupported = collections.OrderedDict()
+    for mode in range(len(atn.mode_start_states)):
+        try:
+            dfas[mode] = builder.build(mode)
+        except UnsupportedLexerError as e:
+            unsupported[mode] = str(e)
+
+    # merge intervals with the same transitions
+    class_numbers = {}
+    interval_classes = []
+    for interval in range(len(bounds)):
+        key = tuple(row.get(interval, -1) for transitions, _ in dfas.values()
+                    for row in transitions)
+        interval_classes.append(class_numbers.setdefault(key, len(class_numbers)))
+    table_bounds, table_classes = [], []
+    for bound, cls in zip(bounds, interval_classes):
+        if not table_classes or table_classes[-1] != cls:
+            table_bounds.append(bound)
+            table_classes.append(cls)
+
+    modes = collections.OrderedDict()
+    for mode, (transitions, accepts) in dfas.items():
+        rows = []
+        for row in transitions:
+            pairs = collections.OrderedDict()
+            for interval, target in sorted(row.items()):
+                pairs[interval_classes[interval]] = target
+            rows.append([v for p in pairs.items() for v in p])
+        modes[mode] = (rows, accepts)
+    return LexerTables(table_bounds, table_classes, modes, unsupported)
+
+
+_FAST_LEXER_TEMPLATE = string.Template('''"""Lexes ${grammar} input with precomputed DFA tables.
+
+Generated by setuptools-antlr, don't edit.
+
+``FastLexer`` is a drop-in replacement of ``${lexer_class}``. Its ATN simulator looks up the next
+state of the DFA of the current mode for each character in a transition table and applies the
+lexer commands of the longest match like the ATN simulator of the runtime. Lexer errors, the end
+of input, input streams without a list of characters and modes listed in ``UNSUPPORTED_MODES``
+are handled by the ATN simulator of the runtime.
+"""
+import bisect
+import sys
+
+from antlr4.PredictionContext import PredictionContextCache
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+
+${lexer_import}
+
+LEXER = ${lexer_class}
+
+${tables}
+NUM_CLASSES = max(CLASSES) + 1
+
+# character classes of the first 256 characters
+LATIN1 = [CLASSES[bisect.bisect_right(BOUNDS, c) - 1] for c in range(256)]
+
+
+def _expand(mode):
+    """Expands the tables of a mode indexed by the offset of each state in the flat table."""
+    rows, accepts = mode
+    transitions = [-1] * (len(rows) * NUM_CLASSES)
+    for state, row in enumerate(rows):
+        offset = state * NUM_CLASSES
+        for i in range(0, len(row), 2):
+            transitions[offset + row[i]] = row[i + 1] * NUM_CLASSES
+    return transitions, {s * NUM_CLASSES: a for s, a in accepts.items()}
+
+
+TABLES = {m: _expand(t) for m, t in MODES.items()}
+
+
+class FastLexerATNSimulator(LexerATNSimulator):
+    """A lexer ATN simulator matching tokens with the transition tables of this module."""
+
+    def match(self, input, mode):
+        tables = TABLES.get(mode)
+        data = getattr(input, 'data', None)
+        text = getattr(input, 'strdata', None)
+        if tables is None or data is None or text is None:
+            return super().match(input, mode)
+
+        transitions, accepts = tables
+        latin1 = LATIN1
+        start = position = input.index
+        size = len(data)
+        state = 0
+        accepted = None
+        while position < size:
+            char = data[position]
+            state = transitions[state + (latin1[char] if char < 256 else
+                                         CLASSES[bisect.bisect_right(BOUNDS, char) - 1])]
+            if state < 0:
+                break
+            position += 1
+            if state in accepts:
+                accepted = state
+                stop = position
+        if accepted is None:
+            # let the runtime report the error or match the end of input
+            return super().match(input, mode)
+
+        self.mode = mode
+        self.startIndex = start
+        newlines = text.count('\\n', start, stop)
+        if newlines:
+            self.line += newlines
+            self.column = stop - text.rindex('\\n', start, stop) - 1
+        else:
+            self.column += stop - start
+        input.seek(stop)
+
+        token_type, actions = accepts[accepted]
+        if actions and self.recog is not None:
+            lexer_actions = self.atn.lexerActions
+            for action in actions:
+                lexer_actions[action].execute(self.recog)
+        return token_type
+
+
+class FastLexer(LEXER):
+    """A ${lexer_class} matching tokens with the transition tables of this module."""
+
+    def __init__(self, input=None, output=sys.stdout):
+        super().__init__(input, output)
+        self._interp = FastLexerATNSimulator(self, self.atn, self.decisionsToDFA,
+                                             PredictionContextCache())
+''')
+
+
+def create_fast_lexer_module(grammar: str, lexer_import: str, lexer_class: str) -> str:
+    """Creates the source code of a fast lexer module. The transition tables are inserted by
+    add_lexer_tables after ANTLR generated the lexer.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :return: source code of fast lexer module without transition tables
+    """
+    return _FAST_LEXER_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                           lexer_class=lexer_class, tables=_TABLES_PLACEHOLDER)
+
+
+def _format_value(name: str, value: str) -> str:
+    return '\n'.join(textwrap.wrap('{} = {}'.format(name, value), 99, subsequent_indent='    ',
+                                   break_long_words=False, break_on_hyphens=False))
+
+
+def format_lexer_tables(tables: LexerTables) -> str:
+    """Formats transition tables as Python source code.
+
+    :param tables: transition tables of a lexer
+    :return: source code assigning BOUNDS, CLASSES, MODES and UNSUPPORTED_MODES
+    """
+    modes = ', '.join('{}: ({!r}, {{{}}})'.format(mode, rows, ', '.join(
+        '{}: {!r}'.format(s, a) for s, a in sorted(accepts.items())))
+        for mode, (rows, accepts) in sorted(tables.modes.items()))
+    unsupported = ''.join('\n    {}: {!r},'.format(m, r) for m, r in tables.unsupported.items())
+    return '\n'.join([
+        '# first characters of intervals of characters and the character class of each interval',
+        _format_value('BOUNDS', repr(tables.bounds)),
+        _format_value('CLASSES', repr(tables.classes)),
+        '# by mode the transitions of each state as pairs of character class and next state and',
+        '# the token type and lexer action indices of accepting states',
+        _format_value('MODES', '{' + modes + '}'),
+        '# modes lexed by the ATN simulator of the runtime and why',
+        'UNSUPPORTED_MODES = {' + unsupported + ('\n}' if unsupported else '}'),
+    ]) + '\n'
+
+
+def add_lexer_tables(source: str, output_dir: pathlib.Path) -> str:
+    """Inserts the transition tables into a fast lexer module. The tables are computed from the
+    interpreter data of the lexer in the output directory.
+
+    :param source: source code of a fast lexer module
+    :param output_dir: directory containing the generated lexer
+    :return: source code of fast lexer module with transition tables
+    """
+    lexer_class = re.search(r'^LEXER = (\w+)$', source, re.MULTILINE).group(1)
+    path = pathlib.Path(output_dir, lexer_class + '.interp')
+    try:
+        atn = LexerAtn.from_interp(path.read_text(encoding='utf-8'))
+    except ValueError as e:
+        logger.warning('%s is lexed by the ATN simulator, because its ATN can\'t be read: %s',
+                       lexer_class, e)
+        tables = LexerTables([0], [0], {}, {})
+    else:
+        tables = compute_lexer_tables(atn)
+        for mode, reason in tables.unsupported.items():
+            logger.warning('mode %s of %s is lexed by the ATN simulator, because %s',
+                           atn.mode_names[mode], lexer_class, reason)
+    return source.replace(_TABLES_PLACEHOLDER, format_lexer_tables(tables))
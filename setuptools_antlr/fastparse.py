@@ -0,0 +1,164 @@
+"""Creates fast parse modules which are generated into the packages of parsers.
+
+A fast parse module parses in two stages. At first the input is parsed with SLL prediction, which
+is considerably faster, and a bail out error strategy. Only if this fails the input is parsed
+again with full LL prediction and the default error strategy, which yields the same result and the
+same syntax errors as parsing with LL prediction only::
+
+    from foobar.dsl.foo.fastparse import parse_fast
+
+    tree = parse_fast('foo bar', 'r')
+"""
+import string
+
+FAST_PARSE_MODULE = 'fastparse.py'
+
+_FAST_PARSE_TEMPLATE = string.Template('''"""Parses input of the ${grammar} grammar in two stages.
+
+Generated by setuptools-antlr, don't edit.
+
+At first the input is parsed with SLL prediction and a bail out error strategy. If this fails
+because of a syntax error or an SLL conflict the input is parsed again with full LL prediction and
+the default error strategy. Tokens are lexed only once. The module level ``statistics`` count how
+often each stage produced the result.
+"""
+import threading
+
+from antlr4 import CommonTokenStream, FileStream, InputStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+${lexer_import}
+${parser_import}
+
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+
+class ParseStatistics(object):
+    """Counts how often inputs were parsed by SLL prediction and how often the LL fallback was
+    used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sll = 0
+        self.ll = 0
+
+    @property
+    def total(self):
+        """Returns the number of parsed inputs."""
+        return self.sll + self.ll
+
+    @property
+    def fallback_ratio(self):
+        """Returns the share of inputs which needed the LL fallback."""
+        return self.ll / self.total if self.total else 0.0
+
+    def count(self, fallback):
+        """Counts a parsed input.
+
+        :param fallback: flag whether LL fallback was used
+        """
+        with self._lock:
+            if fallback:
+                self.ll += 1
+            else:
+                self.sll += 1
+
+    def reset(self):
+        """Resets all counters."""
+        with self._lock:
+            self.sll = 0
+            self.ll = 0
+
+    def as_dict(self):
+        """Returns all counters as dictionary."""
+        return {'sll': self.sll, 'll': self.ll, 'fallback_ratio': self.fallback_ratio}
+
+
+statistics = ParseStatistics()
+
+
+def parse_fast_stream(stream, start_rule=None, error_listener=None):
+    """Parses a character stream in two stages.
+
+    :param stream: an ANTLR character stream
+    :param start_rule: name of start rule, defaults to first rule of grammar
+    :param error_listener: an error listener replacing the console error listeners of lexer and
+                           parser or None to keep them
+    :return: the parse tree
+    """
+    lexer = LEXER(stream)
+    if error_listener is not None:
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(error_listener)
+    tokens = CommonTokenStream(lexer)
+    parser = PARSER(tokens)
+    rule = getattr(parser, start_rule or parser.ruleNames[0])
+
+    listeners = [error_listener] if error_listener is not None else \\
+        list(parser.getErrorListenerDispatch().delegates)
+
+    # stage 1: SLL prediction failing fast on the first syntax error
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        tree = rule()
+        statistics.count(False)
+        return tree
+    except ParseCancellationException:
+        pass
+
+    # stage 2: full LL prediction reporting syntax errors; rewinds token stream
+    parser.reset()
+    for listener in listeners:
+        parser.addErrorListener(listener)
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    tree = rule()
+    statistics.count(True)
+    return tree
+
+
+def parse_fast(text, start_rule=None, error_listener=None):
+    """Parses a string in two stages.
+
+    :param text: input text
+    :param start_rule: name of start rule, defaults to first rule of grammar
+    :param error_listener: an error listener replacing the console error listeners of lexer and
+                           parser or None to keep them
+    :return: the parse tree
+    """
+    return parse_fast_stream(InputStream(text), start_rule, error_listener)
+
+
+def parse_fast_file(path, start_rule=None, error_listener=None, encoding='utf-8'):
+    """Parses a file in two stages.
+
+    :param path: path of input file
+    :param start_rule: name of start rule, defaults to first rule of grammar
+    :param error_listener: an error listener replacing the console error listeners of lexer and
+                           parser or None to keep them
+    :param encoding: encoding of input file
+    :return: the parse tree
+    """
+    return parse_fast_stream(FileStream(str(path), encoding), start_rule, error_listener)
+''')
+
+
+def create_fast_parse_module(grammar: str, lexer_import: str, lexer_class: str,
+                             parser_import: str, parser_class: str) -> str:
+    """Creates the source code of a fast parse module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :return: source code of fast parse module
+    """
+    return _FAST_PARSE_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                           lexer_class=lexer_class, parser_import=parser_import,
+                                           parser_class=parser_class)
@@ -0,0 +1,350 @@
+"""Creates flat tree modules which are generated into the packages of parsers.
+
+A flat tree module converts a parse tree into parallel arrays holding kind, parent, descendant
+range and character span of each node. Queries over the arrays avoid walking the object graph and
+are vectorized if NumPy is installed. Flat trees are written to and mapped from disk without
+copying the arrays::
+
+    from foobar.dsl.foo.flattree import flatten
+
+    flat = flatten(tree)
+    flat.save('foo.tree')
+"""
+import string
+
+FLAT_TREE_MODULE = 'flattree.py'
+
+_FLAT_TREE_TEMPLATE = string.Template('''"""Flattens ${grammar} parse trees into arrays.
+
+Generated by setuptools-antlr, don't edit.
+
+Usage::
+
+    python -m <package>.flattree <input> <output> [--rule RULE] [--encoding ENCODING]
+
+``flatten`` converts a parse tree into a ``FlatTree``. Its nodes are numbered in pre-order, so the
+descendants of node ``i`` are the nodes ``i + 1`` up to ``end[i] - 1``. For each node the parallel
+arrays hold:
+
+kind
+    rule index of rule nodes, token type of terminal nodes
+terminal
+    1 for terminal and error nodes, 0 for rule nodes
+parent
+    index of the parent node, -1 for the root
+end
+    index following the last descendant
+start, stop
+    offsets of the first and the last character, stop is start - 1 for empty nodes
+line, column
+    position of the first token
+
+If NumPy is installed, ``FlatTree.numpy`` returns the arrays as NumPy arrays without copying them
+and queries are vectorized. ``FlatTree.save`` writes the arrays as they are in memory and
+``FlatTree.load`` maps a file and uses the arrays of the file without copying them.
+"""
+import argparse
+import array
+import collections
+import json
+import mmap
+import sys
+
+from antlr4 import CommonTokenStream, FileStream
+from antlr4.tree.Tree import TerminalNode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+${lexer_import}
+${parser_import}
+
+GRAMMAR = '${grammar}'
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+MAGIC = b'ANTLRFT1'
+
+# names and type codes of the parallel arrays
+FIELDS = (('kind', 'i'), ('terminal', 'b'), ('parent', 'i'), ('end', 'i'), ('start', 'q'),
+          ('stop', 'q'), ('line', 'i'), ('column', 'i'))
+
+_ALIGNMENT = 8
+
+
+def _align(size):
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class FlatTree(object):
+    """A parse tree stored in parallel arrays."""
+
+    def __init__(self, arrays=None):
+        """Initializes a new FlatTree object.
+
+        :param arrays: arrays by field name, missing arrays are created empty
+        """
+        arrays = arrays or {}
+        for name, typecode in FIELDS:
+            setattr(self, name, arrays[name] if name in arrays else array.array(typecode))
+        self._map = None
+
+    def __len__(self):
+        return len(self.kind)
+
+    def kind_name(self, index):
+        """Returns the rule name or the symbolic token name of a node."""
+        kind = self.kind[index]
+        if not self.terminal[index]:
+            return PARSER.ruleNames[kind]
+        if 0 <= kind < len(PARSER.symbolicNames):
+            return PARSER.symbolicNames[kind]
+        return 'EOF' if kind == -1 else str(kind)
+
+    def children(self, index):
+        """Returns the indices of the children of a node."""
+        child, end = index + 1, self.end[index]
+        while child < end:
+            yield child
+            child = self.end[child]
+
+    def descendants(self, index):
+        """Returns the indices of all descendants of a node."""
+        return range(index + 1, self.end[index])
+
+    def ancestors(self, index):
+        """Returns the indices of all ancestors of a node starting with its parent."""
+        index = self.parent[index]
+        while index >= 0:
+            yield index
+            index = self.parent[index]
+
+    def text(self, index, source):
+        """Returns the text of a node.
+
+        :param index: index of node
+        :param source: input text the tree was parsed from
+        :return: text of node
+        """
+        return source[self.start[index]:self.stop[index] + 1]
+
+    def numpy(self):
+        """Returns all arrays as NumPy arrays sharing memory with this tree.
+
+        :return: NumPy arrays by field name
+        """
+        if numpy is None:
+            raise RuntimeError('NumPy is not installed')
+        return {name: numpy.frombuffer(getattr(self, name), typecode) if len(self) else
+                numpy.zeros(0, typecode) for name, typecode in FIELDS}
+
+    def select(self, name):
+        """Returns the indices of all nodes of a rule or a token type.
+
+        :param name: a rule name or a symbolic token name
+        :return: indices of nodes in pre-order
+        """
+        if name in PARSER.ruleNames:
+            kind, terminal = PARSER.ruleNames.index(name), 0
+        elif name in PARSER.symbolicNames:
+            kind, terminal = PARSER.symbolicNames.index(name), 1
+        else:
+            raise KeyError(name)
+        if numpy is not None:
+            arrays = self.numpy()
+            return numpy.flatnonzero((arrays['kind'] == kind) & (arrays['terminal'] == terminal))
+        return [i for i, (k, t) in enumerate(zip(self.kind, self.terminal))
+                if k == kind and t == terminal]
+
+    def rule_counts(self):
+        """Counts the nodes of each rule.
+
+        :return: number of nodes by rule name
+        """
+        if numpy is not None:
+            arrays = self.numpy()
+            counts = numpy.bincount(arrays['kind'][arrays['terminal'] == 0],
+                                    minlength=len(PARSER.ruleNames))
+            return collections.OrderedDict((r, int(c)) for r, c in zip(PARSER.ruleNames, counts))
+        counts = collections.OrderedDict((r, 0) for r in PARSER.ruleNames)
+        for kind, terminal in zip(self.kind, self.terminal):
+            if not terminal:
+                counts[PARSER.ruleNames[kind]] += 1
+        return counts
+
+    def save(self, path):
+        """Writes all arrays to a file.
+
+        The file consists of a magic number, a JSON header and the arrays in native byte order,
+        each aligned to 8 bytes.
+
+        :param path: path of output file
+        """
+        fields = []
+        offset = 0
+        for name, typecode in FIELDS:
+            fields.append([name, typecode, offset])
+            offset += _align(len(getattr(self, name)) * array.array(typecode).itemsize)
+        header = json.dumps({'grammar': GRAMMAR, 'byteorder': sys.byteorder, 'nodes': len(self),
+                             'fields': fields}).encode()
+        prefix = MAGIC + len(header).to_bytes(4, 'little') + header
+        with open(str(path), 'wb') as f:
+            f.write(prefix.ljust(_align(len(prefix)), b'\\0'))
+            for name, _ in FIELDS:
+                data = memoryview(getattr(self, name)).cast('B')
+                f.write(data)
+                f.write(bytes(_align(len(data)) - len(data)))
+
+    @classmethod
+    def load(cls, path):
+        """Maps a file written by save. The arrays of the returned tree are memory views of the
+        mapped file, which is unmapped by close.
+
+        :param path: path of input file
+        :return: a FlatTree
+        """
+        with open(str(path), 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(MAGIC)] != MAGIC:
+            buffer.close()
+            raise ValueError('{} is no flat tree'.format(path))
+        size = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 4], 'little')
+        header = json.loads(buffer[len(MAGIC) + 4:len(MAGIC) + 4 + size].decode())
+        if header['grammar'] != GRAMMAR or header['byteorder'] != sys.byteorder:
+            buffer.close()
+            raise ValueError('{} is a flat tree of grammar {} in {} endian byte order'.format(
+                path, header['grammar'], header['byteorder']))
+
+        base = _align(len(MAGIC) + 4 + size)
+        nodes = header['nodes']
+        arrays = {}
+        with memoryview(buffer) as view:
+            for name, typecode, offset in header['fields']:
+                begin = base + offset
+                length = nodes * array.array(typecode).itemsize
+                arrays[name] = view[begin:begin + length].cast(typecode)
+        tree = cls(arrays)
+        tree._map = buffer
+        return tree
+
+    def close(self):
+        """Unmaps the file of a loaded tree. NumPy arrays of the tree must be deleted before."""
+        if self._map is None:
+            return
+        for name, typecode in FIELDS:
+            data = getattr(self, name)
+            if isinstance(data, memoryview):
+                data.release()
+            setattr(self, name, array.array(typecode))
+        self._map.close()
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def flatten(tree):
+    """Converts a parse tree into a flat tree without recursion.
+
+    :param tree: a parse tree of the ${grammar} parser
+    :return: a FlatTree
+    """
+    flat = FlatTree()
+    kinds, terminals, parents, ends = flat.kind, flat.terminal, flat.parent, flat.end
+    starts, stops, lines, columns = flat.start, flat.stop, flat.line, flat.column
+
+    # entries are nodes with the index of their parent, None closes the subtree of the parent
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        if node is None:
+            ends[parent] = len(kinds)
+            continue
+
+        index = len(kinds)
+        parents.append(parent)
+        if isinstance(node, TerminalNode):
+            token = node.symbol
+            kinds.append(token.type)
+            terminals.append(1)
+            ends.append(index + 1)
+            starts.append(token.start)
+            stops.append(token.stop)
+            lines.append(token.line)
+            columns.append(token.column)
+            continue
+
+        first, last = node.start, node.stop
+        kinds.append(node.getRuleIndex())
+        terminals.append(0)
+        ends.append(index + 1)
+        if first is None:
+            starts.append(-1)
+            stops.append(-2)
+            lines.append(0)
+            columns.append(-1)
+        else:
+            starts.append(first.start)
+            # the stop token of an empty rule precedes its start token
+            empty = last is None or last.tokenIndex < first.tokenIndex
+            stops.append(first.start - 1 if empty else last.stop)
+            lines.append(first.line)
+            columns.append(first.column)
+        if node.children:
+            stack.append((None, index))
+            stack.extend((c, index) for c in reversed(node.children))
+    return flat
+
+
+def parse_file(path, start_rule=None, encoding='utf-8'):
+    """Parses a file and flattens its parse tree.
+
+    :param path: path of input file
+    :param start_rule: name of start rule, defaults to first rule of grammar
+    :param encoding: encoding of input file
+    :return: a FlatTree
+    """
+    parser = PARSER(CommonTokenStream(LEXER(FileStream(str(path), encoding))))
+    return flatten(getattr(parser, start_rule or parser.ruleNames[0])())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flattens the parse tree of a {} '
+                                                 'file.'.format(GRAMMAR))
+    parser.add_argument('input', help='file to parse')
+    parser.add_argument('output', help='file the flat tree is written to')
+    parser.add_argument('--rule', help='start rule (default: first rule of grammar)')
+    parser.add_argument('--encoding', default='utf-8', help='encoding of input (default: utf-8)')
+    args = parser.parse_args(argv)
+
+    flat = parse_file(args.input, args.rule, args.encoding)
+    flat.save(args.output)
+    json.dump(flat.rule_counts(), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+''')
+
+
+def create_flat_tree_module(grammar: str, lexer_import: str, lexer_class: str,
+                            parser_import: str, parser_class: str) -> str:
+    """Creates the source code of a flat tree module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :return: source code of flat tree module
+    """
+    return _FLAT_TREE_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                          lexer_class=lexer_class, parser_import=parser_import,
+                                          parser_class=parser_class)
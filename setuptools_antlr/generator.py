@@ -0,0 +1,1019 @@
+"""Generates ANTLR based parsers independent of setuptools.
+
+The generation of parsers is planned as one job per grammar. Jobs are executed concurrently as
+asyncio subprocesses. Grammars providing a token vocabulary are generated before the grammars
+using it. The outcome of each job is reported as result object and through an optional progress
+callback.
+"""
+import asyncio
+import collections
+import copy
+import distutils.errors
+import hashlib
+import itertools
+import json
+import locale
+import logging
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from setuptools_antlr import __version__
+from setuptools_antlr.bench import BENCH_MODULE, create_bench_module
+from setuptools_antlr.corpus import CORPUS_MODULE, create_corpus_module
+from setuptools_antlr.fastlexer import FAST_LEXER_MODULE, add_lexer_tables, \
+    create_fast_lexer_module
+from setuptools_antlr.fastparse import FAST_PARSE_MODULE, create_fast_parse_module
+from setuptools_antlr.flattree import FLAT_TREE_MODULE, create_flat_tree_module
+from setuptools_antlr.grammar import AntlrGrammar, sort_grammars
+from setuptools_antlr.incremental import INCREMENTAL_MODULE, create_incremental_module
+from setuptools_antlr.lazyinit import INIT_MODULE, INIT_STUB, create_lazy_init_module, \
+    create_lazy_init_stub
+from setuptools_antlr.lock import FileLock
+from setuptools_antlr.parsecache import PARSE_CACHE_MODULE, create_parse_cache_module
+from setuptools_antlr.profiling import PROFILING_MODULE, create_profiling_module
+from setuptools_antlr.slots import add_slots
+from setuptools_antlr.splitparser import get_parts_package, quote_context_annotations, \
+    split_parser
+from setuptools_antlr.streaming import STREAMING_MODULE, create_streaming_module
+from setuptools_antlr.tokenstore import TOKEN_STORE_MODULE, create_token_store_module
+from setuptools_antlr.util import camel_to_snake_case
+from setuptools_antlr.walker import WALKER_MODULE, create_walker_module
+
+logger = logging.getLogger(__name__)
+
+Diagnostic = collections.namedtuple('Diagnostic', ['severity', 'code', 'file', 'line', 'column',
+                                                   'message'])
+Diagnostic.__doc__ = 'An error or warning reported by ANTLR.'
+
+
+class GenerationOptions(object):
+    """Options controlling the generation of ANTLR based parsers.
+
+    The options mirror the command line options of ANTLR. Additionally the output directories of
+    the generated packages and whether up to date parsers are generated again can be specified.
+
+    Options can be overridden for single grammars. The overrides map a grammar name to a
+    dictionary of option values, e.g. ``{'Foo': {'visitor': 1, 'grammar_options':
+    {'superClass': 'FooBase'}}}``. Grammar-level options are merged with the global ones.
+
+    :cvar OVERRIDABLE_OPTIONS: Options which can be overridden for single grammars
+    """
+
+    OVERRIDABLE_OPTIONS = ('atn', 'encoding', 'message_format', 'long_messages', 'listener',
+                           'visitor', 'grammar_options', 'w_error', 'x_force_atn', 'bench',
+                           'profile', 'fast_parse', 'streaming', 'corpus', 'slots', 'flat_tree',
+                           'token_store', 'walker', 'fast_lexer', 'parse_cache',
+                           'incremental', 'lazy_init', 'split_parser')
+
+    def __init__(self, **kwargs):
+        """Initializes a new GenerationOptions object.
+
+        :param kwargs: values overriding the default options
+        """
+        self.output = {'default': '.'}
+        self.atn = 0
+        self.encoding = None
+        self.message_format = None
+        self.long_messages = 0
+        self.listener = 1
+        self.visitor = 0
+        self.depend = 0
+        self.grammar_options = {'language': 'Python3'}
+        self.w_error = 0
+        self.x_dbg_st = 0
+        self.x_dbg_st_wait = 0
+        self.x_exact_output_dir = 0
+        self.x_force_atn = 0
+        self.x_log = 0
+        self.force = 0
+        self.bench = 0
+        self.profile = 0
+        self.fast_parse = 0
+        self.streaming = 0
+        self.corpus = 0
+        self.slots = 0
+        self.flat_tree = 0
+        self.token_store = 0
+        self.walker = 0
+        self.fast_lexer = 0
+        self.parse_cache = 0
+        self.incremental = 0
+        self.lazy_init = 0
+        self.split_parser = 0
+        self.overrides = {}
+
+        for name, value in kwargs.items():
+            if not hasattr(self, name):
+                raise TypeError('{} isn\'t a generation option'.format(name))
+            setattr(self, name, value)
+
+    def for_grammar(self, grammar: AntlrGrammar) -> 'GenerationOptions':
+        """Applies the overrides of a grammar.
+
+        :param grammar: an ANTLR grammar
+        :return: options used for generating the parser of grammar
+        """
+        overrides = self.overrides.get(grammar.name)
+        if not overrides:
+            return self
+
+        options = copy.copy(self)
+        for name, value in overrides.items():
+            if name not in self.OVERRIDABLE_OPTIONS:
+                raise ValueError('{} can\'t be overridden for grammar {}'.format(name,
+                                                                                 grammar.name))
+            if name == 'grammar_options':
+                value = dict(self.grammar_options, **value)
+            setattr(options, name, value)
+        options.overrides = {}
+        return options
+
+    def to_args(self) -> typing.List[str]:
+        """Builds up the ANTLR command line options.
+
+        :return: a list of command line options
+        """
+        args = []
+        if self.atn:
+            args.append('-atn')
+        if self.encoding:
+            args.extend(['-encoding', self.encoding])
+        if self.message_format:
+            args.extend(['-message-format', self.message_format])
+        if self.long_messages:
+            args.append('-long-messages')
+        args.append('-listener' if self.listener else '-no-listener')
+        args.append('-visitor' if self.visitor else '-no-visitor')
+        if self.depend:
+            args.append('-depend')
+        args.extend(['-D{}={}'.format(option, value) for option, value in
+                     self.grammar_options.items()])
+        if self.w_error:
+            args.append('-Werror')
+        if self.x_dbg_st:
+            args.append('-XdbgST')
+        if self.x_dbg_st_wait:
+            args.append('-XdbgSTWait')
+        if self.x_exact_output_dir:
+            args.append('-Xexact-output-dir')
+        if self.x_force_atn:
+            args.append('-Xforce-atn')
+        if self.x_log:
+            args.append('-Xlog')
+        return args
+
+    def get_package_dir(self, grammar: AntlrGrammar) -> pathlib.Path:
+        """Determines the Python package the parser of a grammar is generated into.
+
+        :param grammar: an ANTLR grammar
+        :return: path of package directory
+        """
+        if grammar.name in self.output:
+            output_dir = self.output[grammar.name]
+        else:
+            output_dir = self.output['default']
+        if self.x_exact_output_dir:
+            return pathlib.Path(output_dir)
+        else:
+            return pathlib.Path(output_dir, grammar.path.parent, camel_to_snake_case(grammar.name))
+
+
+class GenerationJob(object):
+    """A planned ANTLR invocation generating the parser of a single grammar.
+
+    A job bundles everything necessary to generate the parser of a grammar: the command line, the
+    working directory, the output package and the files which are expected to be generated. The
+    fingerprint of a job identifies its inputs and options. It's recorded in a manifest after a
+    successful generation and used to detect whether generated files are outdated.
+    """
+
+    def __init__(self, grammar: AntlrGrammar, args: typing.List[str], package_dir: pathlib.Path,
+                 lib_dir: pathlib.Path, inputs: typing.List[pathlib.Path],
+                 outputs: typing.List[str], fingerprint: str,
+                 extra_files: typing.Dict[str, str]=None,
+                 post_processors: typing.Dict[str, typing.List[str]]=None):
+        """Initializes a new GenerationJob object.
+
+        :param grammar: grammar to generate a parser for
+        :param args: command line of ANTLR
+        :param package_dir: path of Python package the parser is generated into
+        :param lib_dir: location of imported grammars or None if grammar doesn't import grammars
+        :param inputs: paths of grammar files the generated parser depends on
+        :param outputs: names of files which are expected to be generated into package directory
+        :param fingerprint: a hash identifying inputs and options of this job
+        :param extra_files: names and contents of files added to the package after generation
+        :param post_processors: names of generated files and post-processors applied to them
+        """
+        self.grammar = grammar
+        self.args = args
+        self.package_dir = package_dir
+        self.lib_dir = lib_dir
+        self.inputs = inputs
+        self.outputs = outputs
+        self.fingerprint = fingerprint
+        self.extra_files = extra_files or {}
+        self.post_processors = post_processors or {}
+        self.stale = True
+        self.reason = None
+
+    @property
+    def cwd(self) -> pathlib.Path:
+        """Returns the working directory ANTLR is started in."""
+        return self.grammar.path.parent
+
+    def to_dict(self) -> dict:
+        """Returns a JSON serializable representation of this job.
+
+        :return: a dictionary describing this job
+        """
+        return {
+            'name': self.grammar.name,
+            'grammar': str(self.grammar.path),
+            'inputs': [str(p) for p in self.inputs],
+            'outputs': [str(pathlib.Path(self.package_dir, o)) for o in self.outputs],
+            'package': str(self.package_dir),
+            'lib': str(self.lib_dir) if self.lib_dir else None,
+            'cwd': str(self.cwd),
+            'args': self.args,
+            'fingerprint': self.fingerprint,
+            'post_processors': self.post_processors,
+            'stale': self.stale,
+            'reason': self.reason
+        }
+
+
+class GenerationResult(object):
+    """The outcome of a generation job.
+
+    :cvar SKIPPED: status of a job which wasn't run because its parser is up to date
+    :cvar SUCCEEDED: status of a job whose parser was generated
+    :cvar FAILED: status of a job whose parser couldn't be generated
+    """
+
+    SKIPPED = 'skipped'
+
+    SUCCEEDED = 'succeeded'
+
+    FAILED = 'failed'
+
+    _DIAGNOSTIC_REGEX = re.compile(r'^(error|warning)\((\d+)\):\s*(?:(.+?):(\d+):(\d+):)?\s*(.*)$',
+                                   re.MULTILINE)
+
+    def __init__(self, job: GenerationJob, status: str, returncode: int=None, output: str='',
+                 duration: float=0.0):
+        """Initializes a new GenerationResult object.
+
+        :param job: the generation job
+        :param status: status of job
+        :param returncode: exit code of ANTLR or None if ANTLR wasn't run
+        :param output: messages printed by ANTLR
+        :param duration: time in seconds ANTLR was running
+        """
+        self.job = job
+        self.status = status
+        self.returncode = returncode
+        self.output = output
+        self.duration = duration
+
+    @property
+    def succeeded(self) -> bool:
+        """Returns whether the parser of job is up to date."""
+        return self.status != self.FAILED
+
+    @property
+    def files(self) -> typing.List[pathlib.Path]:
+        """Returns the paths of all generated files which are present."""
+        paths = (pathlib.Path(self.job.package_dir, o) for o in self.job.outputs)
+        return [p for p in paths if p.exists()]
+
+    @property
+    def diagnostics(self) -> typing.List[Diagnostic]:
+        """Returns errors and warnings reported by ANTLR."""
+        return [Diagnostic(m.group(1), int(m.group(2)), m.group(3),
+                           int(m.group(4)) if m.group(4) else None,
+                           int(m.group(5)) if m.group(5) else None, m.group(6))
+                for m in self._DIAGNOSTIC_REGEX.finditer(self.output or '')]
+
+
+async def run_antlr(args: typing.List[str], cwd: str=None) -> subprocess.CompletedProcess:
+    """Runs ANTLR as asyncio subprocess. If the calling task is cancelled ANTLR is killed.
+
+    :param args: command line of ANTLR
+    :param cwd: working directory of ANTLR
+    :return: exit code and output of ANTLR
+    """
+    process = await asyncio.create_subprocess_exec(*args, stdout=subprocess.PIPE,
+                                                   stderr=subprocess.STDOUT, cwd=cwd)
+    try:
+        stdout, _ = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    output = stdout.decode(locale.getpreferredencoding(False), 'replace').replace('\r\n', '\n')
+    return subprocess.CompletedProcess(args, process.returncode, output)
+
+
+def _get_event_loop() -> typing.Optional[asyncio.AbstractEventLoop]:
+    """Returns the event loop set for the current thread. Unlike asyncio.get_event_loop no loop is
+    created if none is set.
+
+    :return: an event loop or None if no loop is set
+    """
+    # the default event loop policies keep the loop of each thread in a thread local
+    local = getattr(asyncio.get_event_loop_policy(), '_local', None)
+    return getattr(local, '_loop', None)
+
+
+def run_coroutine(coroutine: typing.Awaitable) -> typing.Any:
+    """Runs a coroutine in a dedicated event loop supporting subprocesses and blocks until it's
+    finished. The event loop set before is restored afterwards.
+
+    :param coroutine: a coroutine
+    :return: result of coroutine
+    """
+    loop = asyncio.ProactorEventLoop() if sys.platform == 'win32' else asyncio.new_event_loop()
+    previous_loop = _get_event_loop()
+    try:
+        # child watcher of older Python versions needs a loop set
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(previous_loop)
+        loop.close()
+
+
+def _get_umask() -> int:
+    """Returns the file mode creation mask of the process, which can only be read by setting it.
+
+    :return: the umask
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_atomic(path: pathlib.Path, text: str):
+    """Writes a text file atomically. The text is written into a temporary file, which replaces
+    the target file afterwards. Readers either see the previous or the complete new content.
+
+    :param path: path of file
+    :param text: content of file
+    """
+    fd, tmp_file = tempfile.mkstemp(prefix='.' + path.name, suffix='.tmp', dir=str(path.parent))
+    try:
+        # temporary files are only readable by their owner, unlike files created by open
+        os.chmod(tmp_file, 0o666 & ~_get_umask())
+        with open(fd, 'wt') as f:
+            f.write(text)
+        os.replace(tmp_file, str(path))
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+def publish_files(source_dir: pathlib.Path, target_dir: pathlib.Path) -> typing.List[pathlib.Path]:
+    """Moves all files of a source directory into a target directory. Each file atomically
+    replaces an existing file with the same name. Both directories have to be located on the same
+    file system.
+
+    :param source_dir: directory containing files to publish
+    :param target_dir: directory files are published to
+    :return: a list of published files
+    """
+    published = []
+    for source_file in sorted(source_dir.rglob('*')):
+        if source_file.is_file():
+            target_file = pathlib.Path(target_dir, source_file.relative_to(source_dir))
+            target_file.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(str(source_file), str(target_file))
+            published.append(target_file)
+    return published
+
+
+def create_init_file(path: pathlib.Path) -> bool:
+    """Creates a __init__.py file if it doesn't exist.
+
+    :param path: path where init file should be created
+    :return: True if init file was created
+    """
+    init_file = pathlib.Path(path, '__init__.py')
+    try:
+        init_file.touch(exist_ok=False)
+    except FileExistsError:
+        return False
+    return True
+
+
+class AntlrGenerator(object):
+    """Generates ANTLR based parsers for a set of grammars.
+
+    The generator plans a job for each grammar and runs all stale jobs concurrently. It's
+    independent of setuptools and can be used by any asyncio application:
+
+    .. code:: python
+
+        generator = AntlrGenerator(java_exe, antlr_jar, GenerationOptions(visitor=1))
+        results = await generator.generate(generator.plan(grammars))
+
+    A progress callback is called with an event name ('skipped', 'waiting', 'started' or
+    'finished'), the job and its result, which is None for waiting and started jobs.
+
+    Concurrent generators, even in different processes, are synchronized by an advisory lock per
+    package. A generator waiting for a package reuses the parser generated meanwhile if it's up to
+    date.
+
+    :cvar MANIFEST_FILE: Name pattern of manifest files recording generated parsers
+    :cvar LOCK_FILE: Name of lock file inside a package
+    :cvar LOCK_INTERVAL: Time in seconds between two attempts to acquire a lock
+    :cvar TMP_DIR_PREFIX: Prefix of temporary directories parsers are generated into
+    :cvar POST_PROCESSORS: Source transformations applied to generated files by name, called with
+                           the source of a file and the directory of all generated files
+    """
+
+    MANIFEST_FILE = '{}.manifest.json'
+
+    LOCK_FILE = '.antlr.lock'
+
+    LOCK_INTERVAL = 0.05
+
+    TMP_DIR_PREFIX = '.antlr-'
+
+    POST_PROCESSORS = {'slots': lambda source, output_dir: add_slots(source),
+                       'fast_lexer': add_lexer_tables,
+                       'split_parser': split_parser,
+                       'quote_contexts': lambda source, output_dir: quote_context_annotations(
+                           source)}
+
+    def __init__(self, java_exe: pathlib.Path, antlr_jar: pathlib.Path,
+                 options: GenerationOptions=None, max_workers: int=None,
+                 progress: typing.Callable[[str, GenerationJob, GenerationResult], None]=None):
+        """Initializes a new AntlrGenerator object.
+
+        :param java_exe: path to Java executable
+        :param antlr_jar: path to ANTLR library
+        :param options: generation options
+        :param max_workers: maximal number of concurrently running ANTLR processes, defaults to
+                            the number of processors
+        :param progress: a callback notified about the progress of jobs
+        """
+        self.java_exe = java_exe
+        self.antlr_jar = antlr_jar
+        self.options = options or GenerationOptions()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.progress = progress
+
+        # log files of ANTLR can't be assigned to a grammar if ANTLR runs concurrently
+        if self.options.x_log or self.options.x_dbg_st:
+            self.max_workers = 1
+
+    @classmethod
+    def _get_generated_files(cls, grammar: AntlrGrammar,
+                             args: typing.List[str]) -> typing.List[str]:
+        """Determines the names of all files ANTLR generates for a grammar.
+
+        :param grammar: an ANTLR grammar
+        :param args: command line options passed to ANTLR
+        :return: a list of file names
+        """
+        grammar_type = grammar.read_type()
+        if grammar_type == 'lexer':
+            return [grammar.name + '.py', grammar.name + '.tokens', grammar.name + '.interp']
+
+        recognizer = grammar.name if grammar_type == 'parser' else grammar.name + 'Parser'
+        files = [recognizer + '.py', grammar.name + '.tokens', grammar.name + '.interp']
+        if grammar_type == 'combined':
+            files.extend(['{}Lexer.{}'.format(grammar.name, e) for e in ('py', 'tokens', 'interp')])
+        if '-listener' in args:
+            files.append(grammar.name + 'Listener.py')
+        if '-visitor' in args:
+            files.append(grammar.name + 'Visitor.py')
+        return files
+
+    @classmethod
+    def _compute_fingerprint(cls, antlr_jar: pathlib.Path, args: typing.List[str],
+                             inputs: typing.List[pathlib.Path],
+                             extra_files: typing.Dict[str, str]=None,
+                             post_processors: typing.Dict[str, typing.List[str]]=None) -> str:
+        """Computes a hash identifying the ANTLR version, the options and the content of all input
+        grammars. Paths aren't part of the fingerprint so that it stays valid if a project is moved.
+        The version of setuptools-antlr is included, because it determines the content of helper
+        modules and the output of post-processors.
+
+        :param antlr_jar: path to ANTLR library
+        :param args: command line options passed to ANTLR
+        :param inputs: paths of input grammars
+        :param extra_files: names and contents of files added to the package after generation
+        :param post_processors: names of generated files and post-processors applied to them
+        :return: a hex encoded hash
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update(antlr_jar.name.encode())
+        fingerprint.update(b'\0' + __version__.encode())
+        for arg in args:
+            fingerprint.update(b'\0' + arg.encode())
+        for path in inputs:
+            try:
+                content = path.read_bytes()
+            except IOError as e:
+                raise distutils.errors.DistutilsFileError('Can\'t read grammar "{}"'.format(
+                    e.filename))
+            fingerprint.update(b'\0' + path.name.encode() + b'\0')
+            fingerprint.update(hashlib.sha256(content).digest())
+        for name, content in sorted((extra_files or {}).items()):
+            fingerprint.update(b'\0' + name.encode() + b'\0')
+            fingerprint.update(hashlib.sha256(content.encode()).digest())
+        for name, processors in sorted((post_processors or {}).items()):
+            fingerprint.update(b'\0' + name.encode() + b'\0' + ','.join(processors).encode())
+        return fingerprint.hexdigest()
+
+    def _get_recognizers(self, grammar: AntlrGrammar, grammar_type: str,
+                         package_dir: pathlib.Path) -> typing.Optional[typing.Tuple[str, ...]]:
+        """Determines how the generated lexer and parser of a grammar are imported from inside of
+        its package. The lexer of a parser grammar is imported from the package of its token
+        vocabulary.
+
+        :param grammar: an ANTLR grammar
+        :param grammar_type: type of grammar
+        :param package_dir: path of package directory
+        :return: import statement and class name of lexer and parser or None if grammar has no
+                 lexer; import and name of parser are None for lexer grammars
+        """
+        if grammar_type == 'lexer':
+            return 'from .{0} import {0}'.format(grammar.name), grammar.name, None, None
+        if grammar_type == 'combined':
+            lexer = grammar.name + 'Lexer'
+            parser = grammar.name + 'Parser'
+            return ('from .{0} import {0}'.format(lexer), lexer,
+                    'from .{0} import {0}'.format(parser), parser)
+        if not grammar.token_vocab:
+            return None
+
+        # import lexer relative to common parent package
+        package_parts = pathlib.Path(os.path.abspath(str(package_dir))).parts
+        vocab_parts = pathlib.Path(os.path.abspath(str(self.options.get_package_dir(
+            grammar.token_vocab)))).parts
+        common = len(os.path.commonprefix([package_parts, vocab_parts]))
+        lexer = grammar.token_vocab.name
+        lexer_module = '.' * (len(package_parts) - common + 1) + '.'.join(
+            vocab_parts[common:] + (lexer,))
+        return ('from {} import {}'.format(lexer_module, lexer), lexer,
+                'from .{0} import {0}'.format(grammar.name), grammar.name)
+
+    @staticmethod
+    def _get_post_processors(grammar: AntlrGrammar,
+                             options: GenerationOptions) -> typing.Dict[str, typing.List[str]]:
+        """Determines the post-processors applied to the generated files of a grammar.
+
+        :param grammar: an ANTLR grammar
+        :param options: generation options of grammar
+        :return: names of generated files and post-processors applied to them
+        """
+        post_processors = {}
+        grammar_type = grammar.read_type()
+        recognizer = grammar.name if grammar_type == 'parser' else grammar.name + 'Parser'
+        if options.slots and grammar_type != 'lexer':
+            post_processors[recognizer + '.py'] = ['slots']
+        if options.split_parser and grammar_type != 'lexer':
+            post_processors.setdefault(recognizer + '.py', []).append('split_parser')
+            args = options.to_args()
+            for flag, suffix in (('-listener', 'Listener'), ('-visitor', 'Visitor')):
+                if flag in args:
+                    post_processors[grammar.name + suffix + '.py'] = ['quote_contexts']
+        if options.fast_lexer and grammar_type != 'parser':
+            post_processors[FAST_LEXER_MODULE] = ['fast_lexer']
+        return post_processors
+
+    @staticmethod
+    def _get_rule_locations(grammar: AntlrGrammar) -> typing.Dict[str, typing.Tuple[str, int]]:
+        """Determines where the rules of a grammar are defined. Rules of a grammar take precedence
+        over rules of imported grammars.
+
+        :param grammar: an ANTLR grammar
+        :return: names of grammar files and line numbers of all rules
+        """
+        locations = collections.OrderedDict()
+        for g in itertools.chain([grammar], grammar.walk()):
+            for rule, line in g.read_rules().items():
+                locations.setdefault(rule, (g.path.name, line))
+        return locations
+
+    @classmethod
+    def _get_generated_classes(cls, grammar: AntlrGrammar,
+                               options: GenerationOptions) -> typing.List[str]:
+        """Determines the classes ANTLR generates for a grammar, each in a module of its name.
+
+        :param grammar: an ANTLR grammar
+        :param options: generation options of grammar
+        :return: a list of class names
+        """
+        generated_files = cls._get_generated_files(grammar, options.to_args())
+        return [f[:-len('.py')] for f in generated_files if f.endswith('.py')]
+
+    def _create_extra_files(self, grammar: AntlrGrammar, options: GenerationOptions,
+                            package_dir: pathlib.Path) -> typing.Dict[str, str]:
+        """Creates the helper modules which are added to the package of a grammar.
+
+        :param grammar: an ANTLR grammar
+        :param options: generation options of grammar
+        :param package_dir: path of package directory
+        :return: names and contents of helper modules
+        """
+        extra_files = collections.OrderedDict()
+        if options.lazy_init:
+            classes = self._get_generated_classes(grammar, options)
+            extra_files[INIT_MODULE] = create_lazy_init_module(grammar.name, classes)
+            extra_files[INIT_STUB] = create_lazy_init_stub(classes)
+        if not any((options.bench, options.profile, options.fast_parse, options.streaming,
+                    options.corpus, options.flat_tree, options.token_store, options.walker,
+                    options.fast_lexer, options.parse_cache, options.incremental)):
+            return extra_files
+
+        grammar_type = grammar.read_type()
+        recognizers = self._get_recognizers(grammar, grammar_type, package_dir)
+        if not recognizers:
+            logger.warning('no helper modules are generated for %s, because it has no lexer',
+                           grammar.name)
+            return extra_files
+        if options.bench:
+            extra_files[BENCH_MODULE] = create_bench_module(grammar.name, *recognizers)
+        if options.streaming:
+            extra_files[STREAMING_MODULE] = create_streaming_module(grammar.name, *recognizers[:2])
+        if options.token_store:
+            extra_files[TOKEN_STORE_MODULE] = create_token_store_module(grammar.name,
+                                                                        *recognizers[:2])
+        if options.fast_lexer:
+            if grammar_type != 'parser':
+                extra_files[FAST_LEXER_MODULE] = create_fast_lexer_module(grammar.name,
+                                                                          *recognizers[:2])
+            else:
+                logger.warning('no fast lexer module is generated for %s, because its lexer is '
+                               'generated from %s', grammar.name, grammar.token_vocab.name)
+        if options.fast_parse and recognizers[3]:
+            extra_files[FAST_PARSE_MODULE] = create_fast_parse_module(grammar.name, *recognizers)
+        if options.corpus and recognizers[3]:
+            extra_files[CORPUS_MODULE] = create_corpus_module(grammar.name, *recognizers)
+        if options.flat_tree and recognizers[3]:
+            extra_files[FLAT_TREE_MODULE] = create_flat_tree_module(grammar.name, *recognizers)
+        if options.parse_cache and recognizers[3]:
+            extra_files[PARSE_CACHE_MODULE] = create_parse_cache_module(
+                grammar.name, *recognizers, manifest=self.MANIFEST_FILE.format(grammar.name),
+                flat_tree=bool(options.flat_tree))
+        if options.incremental and recognizers[3]:
+            extra_files[INCREMENTAL_MODULE] = create_incremental_module(grammar.name, *recognizers)
+        if options.walker and recognizers[3]:
+            if options.listener:
+                extra_files[WALKER_MODULE] = create_walker_module(
+                    grammar.name, *recognizers[2:], listener_class=grammar.name + 'Listener')
+            else:
+                logger.warning('no walker module is generated for %s, because it has no listener',
+                               grammar.name)
+        if options.profile and recognizers[3]:
+            extra_files[PROFILING_MODULE] = create_profiling_module(
+                grammar.name, *recognizers, rule_locations=self._get_rule_locations(grammar))
+        return extra_files
+
+    def set_java_exe(self, java_exe: pathlib.Path, jobs: typing.Iterable[GenerationJob]=()):
+        """Changes the Java executable ANTLR is launched with, which allows to plan jobs before
+        looking for a JRE. The executable isn't part of the fingerprint of a job, so jobs planned
+        before remain valid and are updated instead of being planned again.
+
+        :param java_exe: path to Java executable
+        :param jobs: jobs planned by this generator
+        """
+        for job in jobs:
+            job.args[0] = str(java_exe)
+        self.java_exe = java_exe
+
+    def plan(self, grammars: typing.Iterable[AntlrGrammar]) -> typing.List[GenerationJob]:
+        """Plans the generation of parsers for all passed grammars without running ANTLR.
+
+        :param grammars: ANTLR grammars
+        :return: a list of generation jobs
+        """
+        jobs = [self.plan_job(g) for g in grammars]
+        self._merge_lazy_init(jobs)
+        self._check_extra_files(jobs)
+        return jobs
+
+    def _merge_lazy_init(self, jobs: typing.List[GenerationJob]):
+        """Merges the lazy init modules of grammars generated into the same package, e.g. a lexer
+        and a parser grammar using x_exact_output_dir, so that the package exports the classes of
+        all of them. The merged module is part of the fingerprint of each of these grammars.
+
+        :param jobs: generation jobs
+        """
+        packages = collections.OrderedDict()
+        for job in jobs:
+            if INIT_MODULE in job.extra_files:
+                packages.setdefault(os.path.abspath(str(job.package_dir)), []).append(job)
+
+        for package_jobs in packages.values():
+            if len(package_jobs) < 2:
+                continue
+            classes = []
+            for job in package_jobs:
+                classes.extend(c for c in self._get_generated_classes(
+                    job.grammar, self.options.for_grammar(job.grammar)) if c not in classes)
+            init_module = create_lazy_init_module(' and '.join(j.grammar.name for j in
+                                                               package_jobs), classes)
+            init_stub = create_lazy_init_stub(classes)
+            for job in package_jobs:
+                job.extra_files[INIT_MODULE] = init_module
+                job.extra_files[INIT_STUB] = init_stub
+                if job.fingerprint:
+                    args = self.options.for_grammar(job.grammar).to_args()
+                    job.fingerprint = self._compute_fingerprint(self.antlr_jar, args, job.inputs,
+                                                                job.extra_files,
+                                                                job.post_processors)
+                    job.stale, job.reason = self._check_stale(job)
+
+    @staticmethod
+    def _check_extra_files(jobs: typing.List[GenerationJob]):
+        """Checks that no two jobs add different files of the same name to the same package, e.g.
+        if grammars are generated into the same directory using x_exact_output_dir. The file of
+        one grammar would replace the file of the other one without its manifest noticing it.
+
+        :param jobs: generation jobs
+        """
+        owners = {}
+        for job in jobs:
+            package_dir = os.path.abspath(str(job.package_dir))
+            for name in job.extra_files:
+                owner = owners.setdefault((package_dir, name), job)
+                if owner.extra_files[name] != job.extra_files[name]:
+                    raise distutils.errors.DistutilsOptionError(
+                        '{} of grammars {} and {} would be generated into the same package {}. '
+                        'Generate them into different directories or override the option '
+                        'generating it for one of them.'.format(name, owner.grammar.name,
+                                                                job.grammar.name, job.package_dir))
+
+    def plan_job(self, grammar: AntlrGrammar) -> GenerationJob:
+        """Plans the generation of a parser for a grammar without running ANTLR.
+
+        :param grammar: an ANTLR grammar
+        :return: a generation job
+        """
+        job_options = self.options.for_grammar(grammar)
+        options = job_options.to_args()
+        run_args = [str(self.java_exe), '-jar', str(self.antlr_jar)] + options
+
+        # determine location of dependencies e.g. imported grammars and token files
+        dependencies = []
+        for d in grammar.walk():
+            if d not in dependencies:
+                dependencies.append(d)
+        dependency_dirs = set(g.path.parent for g in dependencies)
+        lib_dir = None
+        if len(dependency_dirs) == 1:
+            lib_dir = dependency_dirs.pop().absolute()
+            run_args.extend(['-lib', str(lib_dir)])
+        elif len(dependency_dirs) > 1:
+            raise distutils.errors.DistutilsOptionError('Imported grammars of \'{}\' are '
+                                                        'located in more than one directory. '
+                                                        'This isn\'t supported by ANTLR. Move '
+                                                        'all imported grammars into one '
+                                                        'directory.'.format(grammar.name))
+
+        # token file of token vocabulary is generated into package of its grammar
+        if grammar.token_vocab:
+            vocab_dir = pathlib.Path(os.path.abspath(str(self.options.get_package_dir(
+                grammar.token_vocab))))
+            if not lib_dir:
+                lib_dir = vocab_dir
+                run_args.extend(['-lib', str(lib_dir)])
+            elif lib_dir != vocab_dir:
+                logger.warning('token vocabulary %s of %s isn\'t located in directory of imported '
+                               'grammars', grammar.token_vocab.name, grammar.name)
+
+        package_dir = self.options.get_package_dir(grammar)
+        run_args.extend(['-o', os.path.abspath(str(package_dir))])
+        run_args.append(grammar.path.name)
+
+        inputs = [grammar.path] + [d.path for d in dependencies]
+        if grammar.token_vocab:
+            inputs.append(grammar.token_vocab.path)
+        outputs = ['dependencies.txt'] if self.options.depend else ['__init__.py']
+        extra_files = {}
+        post_processors = {}
+        try:
+            if not self.options.depend:
+                outputs.extend(self._get_generated_files(grammar, options))
+                extra_files = self._create_extra_files(grammar, job_options, package_dir)
+                outputs.extend(n for n in extra_files if n not in outputs)
+                post_processors = self._get_post_processors(grammar, job_options)
+                outputs.extend(get_parts_package(n[:-len('.py')])
+                               for n, p in post_processors.items() if 'split_parser' in p)
+            fingerprint = self._compute_fingerprint(self.antlr_jar, options, inputs, extra_files,
+                                                    post_processors)
+        except distutils.errors.DistutilsFileError as e:
+            # leave reporting of unreadable grammars up to ANTLR
+            job = GenerationJob(grammar, run_args, package_dir, lib_dir, inputs, outputs, None)
+            job.reason = str(e)
+            return job
+
+        job = GenerationJob(grammar, run_args, package_dir, lib_dir, inputs, outputs, fingerprint,
+                            extra_files, post_processors)
+        job.stale, job.reason = self._check_stale(job)
+        return job
+
+    def _check_stale(self, job: GenerationJob) -> typing.Tuple[bool, str]:
+        """Checks whether the generated files of a job are outdated.
+
+        :param job: a generation job
+        :return: a flag whether the job has to be run and the reason for it
+        """
+        if self.options.force:
+            return True, 'generation is forced'
+        if self.options.depend:
+            return True, 'file dependencies are always generated'
+
+        manifest_file = pathlib.Path(job.package_dir, self.MANIFEST_FILE.format(job.grammar.name))
+        try:
+            with manifest_file.open() as f:
+                manifest = json.load(f)
+        except (IOError, ValueError):
+            return True, 'no manifest found'
+
+        if manifest.get('fingerprint') != job.fingerprint:
+            return True, 'grammars or options changed'
+        missing = [o for o in job.outputs if not pathlib.Path(job.package_dir, o).exists()]
+        if missing:
+            return True, 'generated file {} is missing'.format(missing[0])
+        return False, 'up to date'
+
+    def _write_manifest(self, job: GenerationJob):
+        """Records the fingerprint and the generated files of a job in a manifest file. The
+        manifest is replaced atomically after all generated files are published.
+
+        :param job: a successfully run generation job
+        """
+        manifest = {
+            'grammar': job.grammar.name,
+            'antlr': self.antlr_jar.name,
+            'setuptools_antlr': __version__,
+            'fingerprint': job.fingerprint,
+            'inputs': [p.name for p in job.inputs],
+            'outputs': job.outputs
+        }
+        manifest_file = pathlib.Path(job.package_dir, self.MANIFEST_FILE.format(job.grammar.name))
+        write_atomic(manifest_file, json.dumps(manifest, indent=2, sort_keys=True))
+
+    def _notify(self, event: str, job: GenerationJob, result: GenerationResult=None):
+        """Passes the progress of a job to the progress callback.
+
+        :param event: name of event
+        :param job: a generation job
+        :param result: result of job if it's finished
+        """
+        if self.progress:
+            self.progress(event, job, result)
+
+    async def _acquire_lock(self, job: GenerationJob) -> typing.Tuple[FileLock, bool]:
+        """Acquires the lock of the package a job generates into. Waiting for the lock doesn't
+        block the event loop.
+
+        :param job: a generation job
+        :return: the acquired lock and a flag whether it was held by someone else before
+        """
+        lock = FileLock(pathlib.Path(job.package_dir, self.LOCK_FILE))
+        contended = False
+        while not lock.try_acquire():
+            if not contended:
+                contended = True
+                self._notify('waiting', job)
+            await asyncio.sleep(self.LOCK_INTERVAL)
+        return lock, contended
+
+    def _post_process(self, job: GenerationJob, output_dir: pathlib.Path):
+        """Applies the post-processors of a job to the generated files and helper modules.
+
+        :param job: a generation job
+        :param output_dir: directory containing the generated files
+        """
+        for name, processors in job.post_processors.items():
+            path = pathlib.Path(output_dir, name)
+            source = path.read_text(encoding='utf-8')
+            for processor in processors:
+                source = self.POST_PROCESSORS[processor](source, output_dir)
+            path.write_text(source, encoding='utf-8')
+
+    async def _run_antlr(self, job: GenerationJob) -> subprocess.CompletedProcess:
+        """Runs ANTLR for a job. Parsers are generated into a temporary directory inside the
+        package and published file by file afterwards, so that other processes never import a
+        partially written module.
+
+        :param job: a generation job
+        :return: exit code and output of ANTLR
+        """
+        if self.options.depend:
+            process = await run_antlr(job.args, cwd=str(job.cwd))
+            write_atomic(pathlib.Path(job.package_dir, 'dependencies.txt'), process.stdout)
+            return process
+
+        # create Python package if don't exist
+        create_init_file(job.package_dir)
+
+        tmp_dir = tempfile.mkdtemp(prefix=self.TMP_DIR_PREFIX,
+                                   dir=os.path.abspath(str(job.package_dir)))
+        try:
+            args = list(job.args)
+            args[args.index('-o') + 1] = tmp_dir
+            process = await run_antlr(args, cwd=str(job.cwd))
+            if not process.returncode:
+                for name, content in job.extra_files.items():
+                    pathlib.Path(tmp_dir, name).write_text(content)
+                self._post_process(job, pathlib.Path(tmp_dir))
+                publish_files(pathlib.Path(tmp_dir), job.package_dir)
+                if job.fingerprint:
+                    self._write_manifest(job)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return process
+
+    async def _generate_job(self, job: GenerationJob, semaphore: asyncio.Semaphore,
+                            predecessors: typing.List[asyncio.Future]) -> GenerationResult:
+        """Runs a single job after all jobs it depends on are finished.
+
+        :param job: a generation job
+        :param semaphore: semaphore limiting the number of concurrent ANTLR processes
+        :param predecessors: tasks of jobs generating files required by this job
+        :return: result of job
+        """
+        if not job.stale:
+            result = GenerationResult(job, GenerationResult.SKIPPED)
+            self._notify('skipped', job, result)
+            return result
+
+        for predecessor in predecessors:
+            predecessor_result = await predecessor
+            if not predecessor_result.succeeded:
+                result = GenerationResult(job, GenerationResult.FAILED, output='{} parser '
+                                          'providing the token vocabulary couldn\'t be '
+                                          'generated'.format(predecessor_result.job.grammar.name))
+                self._notify('finished', job, result)
+                return result
+
+        job.package_dir.mkdir(parents=True, exist_ok=True)
+        lock, contended = await self._acquire_lock(job)
+        try:
+            # reuse parser generated by a concurrent invocation while waiting for the lock
+            if contended and job.fingerprint:
+                job.stale, job.reason = self._check_stale(job)
+                if not job.stale:
+                    job.reason = 'generated by concurrent invocation'
+                    result = GenerationResult(job, GenerationResult.SKIPPED)
+                    self._notify('skipped', job, result)
+                    return result
+
+            async with semaphore:
+                self._notify('started', job)
+                start = time.perf_counter()
+                process = await self._run_antlr(job)
+                duration = time.perf_counter() - start
+        finally:
+            lock.release()
+
+        status = GenerationResult.FAILED if process.returncode else GenerationResult.SUCCEEDED
+        if self.options.depend:
+            status = GenerationResult.SUCCEEDED
+
+        result = GenerationResult(job, status, process.returncode, process.stdout, duration)
+        self._notify('finished', job, result)
+        return result
+
+    async def generate(self, jobs: typing.List[GenerationJob]) -> typing.List[GenerationResult]:
+        """Runs all stale jobs concurrently. Jobs of grammars using a token vocabulary wait for the
+        job generating it, regardless of the order of passed jobs. Cancelling the calling task
+        kills all running ANTLR processes.
+
+        :param jobs: generation jobs
+        :return: a list of results in order of passed jobs
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        grammar_jobs = collections.OrderedDict((j.grammar, j) for j in jobs)
+        tasks = {}
+        # tasks of token vocabularies are created before the tasks waiting for them
+        for grammar in sort_grammars(grammar_jobs):
+            vocab = grammar.token_vocab
+            predecessors = [tasks[vocab]] if vocab in tasks else []
+            tasks[grammar] = asyncio.ensure_future(self._generate_job(grammar_jobs[grammar],
+                                                                      semaphore, predecessors))
+        return list(await asyncio.gather(*(tasks[j.grammar] for j in jobs)))
+
+    def run(self, jobs: typing.List[GenerationJob]) -> typing.List[GenerationResult]:
+        """Runs all stale jobs concurrently in a dedicated event loop and blocks until all jobs are
+        finished.
+
+        :param jobs: generation jobs
+        :return: a list of results in order of passed jobs
+        """
+        return run_coroutine(self.generate(jobs))
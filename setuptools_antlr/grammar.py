@@ -0,0 +1,272 @@
+"""Provides information about ANTLR grammars and their dependencies."""
+import collections
+import distutils.errors
+import os.path
+import pathlib
+import re
+import typing
+
+
+class AntlrGrammar(object):
+    """Basic information about an ANTLR grammar file.
+
+    For generation of ANTLR based parsers basic information about the grammar like imports is
+    necessary. This information and the functionality to retrieve this information out of a grammar
+    file is placed in this class.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """Initializes a new AntlrGrammar object.
+
+        :param path: path to grammar file
+        """
+        # by convention grammar name is always equal to file name
+        self.name = path.stem
+        self.path = path
+        self.dependencies = []
+        self.token_vocab = None
+
+    def __eq__(self, other):
+        return (isinstance(other, AntlrGrammar) and hash(other) == hash(self) and
+                self.dependencies == other.dependencies)
+
+    def __hash__(self):
+        return hash((self.name, self.path))
+
+    def _read(self) -> str:
+        """Reads the content of grammar file.
+
+        :return: content of grammar file
+        """
+        try:
+            with self.path.open() as f:
+                return f.read()
+        except IOError as e:
+            raise distutils.errors.DistutilsFileError('Can\'t read grammar "{}"'.format(e.filename))
+
+    def read_imports(self) -> typing.List[str]:
+        """Reads all imported grammars out of grammar file.
+
+        :return: a list of imported grammars
+        """
+        import_stmt_regex = re.compile(r'^\s*import\s+(.*)\s*;', re.MULTILINE)
+
+        match = import_stmt_regex.search(self._read())
+        if match:
+            imported_grammars = match.group(1)
+            return [s.strip() for s in imported_grammars.split(',')]
+        else:
+            return []
+
+    def read_type(self) -> str:
+        """Reads the type of grammar out of grammar file.
+
+        :return: the grammar type which is either 'lexer', 'parser' or 'combined'
+        """
+        grammar_stmt_regex = re.compile(r'^\s*(lexer|parser)?\s*grammar\s+\w+\s*;', re.MULTILINE)
+
+        match = grammar_stmt_regex.search(self._read())
+        if match and match.group(1):
+            return match.group(1)
+        else:
+            return 'combined'
+
+    def read_token_vocab(self) -> str:
+        """Reads the name of the token vocabulary set in the options of grammar file.
+
+        :return: name of token vocabulary or None if grammar has no token vocabulary
+        """
+        token_vocab_regex = re.compile(r'^\s*options\s*{[^}]*?\btokenVocab\s*=\s*(\w+)\s*;',
+                                       re.MULTILINE)
+
+        match = token_vocab_regex.search(self._read())
+        return match.group(1) if match else None
+
+    def read_rules(self) -> typing.Dict[str, int]:
+        """Reads the names of all rules defined in grammar file together with the line numbers of
+        their definitions. Rules of imported grammars aren't included.
+
+        :return: an ordered dictionary mapping rule names to line numbers
+        """
+        rule_regex = re.compile(r'(?:^|[;}])\s*(?:(?:public|private|protected|fragment)\s+)?'
+                                r'([a-zA-Z_]\w*)\s*(?:\[\s*\]\s*)?'
+                                r'(?:(?:returns|locals)\s*\[\s*\]\s*)*(?:throws\s+[\w.,\s]+?)?'
+                                r'(?:options\s*{\s*}\s*)?(?:@\w+\s*{\s*}\s*)*:')
+
+        content = _blank_out(self._read())
+        rules = collections.OrderedDict()
+        for match in rule_regex.finditer(content):
+            line = content.count('\n', 0, match.start(1)) + 1
+            rules.setdefault(match.group(1), line)
+        return rules
+
+    def walk(self):
+        """Returns dependent grammars by walking the dependency tree of the grammar top-down."""
+        for d in self.dependencies:
+            yield d
+            yield from d.walk()
+
+
+def _blank_out(content: str) -> str:
+    """Replaces comments, literals, actions and arguments of a grammar by spaces. Line breaks are
+    kept, so that positions of the remaining text are unchanged.
+
+    :param content: content of grammar file
+    :return: content containing only the structure of grammar
+    """
+    blank_regex = re.compile(r"//[^\n]*|/\*.*?\*/|'(?:\\.|[^'\\])*'|\[(?:\\.|[^\]\\])*\]",
+                             re.DOTALL)
+
+    def blank(match) -> str:
+        text = re.sub('[^\n]', ' ', match.group(0))
+        # keep brackets of arguments and character sets
+        return '[' + text[1:-1] + ']' if match.group(0).startswith('[') else text
+
+    content = blank_regex.sub(blank, content)
+
+    # actions may be nested
+    result = []
+    depth = 0
+    for c in content:
+        if c == '}':
+            depth = max(depth - 1, 0)
+        result.append(c if not depth or c == '\n' else ' ')
+        if c == '{':
+            depth += 1
+    return ''.join(result)
+
+
+class ImportGrammarError(Exception):
+    """Raised when an imported grammar can't be found in package source directory."""
+
+    def __init__(self, name: str, parent: AntlrGrammar=None):
+        """Initializes a new ImportGrammarError object.
+
+        :param name: name of included grammar
+        :param parent: parent grammar which includes missing grammar
+        """
+        super().__init__()
+        self.name = name
+        self.parent = parent
+
+    def __str__(self):
+        """Returns a nicely printable string representation of this ImportGrammarError object.
+
+        :return: a string representation of this error
+        """
+        return self.name
+
+
+def find_grammars(base_path: pathlib.Path, file_ext: str='g4',
+                  strict: bool=True) -> typing.List[AntlrGrammar]:
+    """Searches for all ANTLR grammars starting from base directory and returns a list of it.
+    Imported grammars and token vocabularies are linked to the grammars using them.
+
+    :param base_path: base path to search for ANTLR grammars
+    :param file_ext: file extension of ANTLR grammars
+    :param strict: whether an imported grammar which isn't found is an error, otherwise it's left
+                   out of the dependencies of the importing grammar
+    :return: a list of all found ANTLR grammars
+    """
+    grammars = []
+    grammar_index = {}
+
+    def get_grammar(name: str) -> AntlrGrammar:
+        """Searches in grammars list for a grammar which has passed name.
+
+        :param name: name of grammar
+        :return: an ANTLR grammar
+        """
+        try:
+            return grammar_index[name]
+        except KeyError:
+            raise ImportGrammarError(name)
+
+    # search for all grammars in package source directory
+    for root, _, files in os.walk(str(base_path), followlinks=True):
+        grammar_files = [f for f in files if f.endswith("." + file_ext)]
+        for fb in grammar_files:
+            grammars.append(AntlrGrammar(pathlib.Path(root, fb)))
+
+    # index grammars by name, the first found grammar wins if names are ambiguous
+    for grammar in grammars:
+        grammar_index.setdefault(grammar.name, grammar)
+
+    # generate a dependency tree for each grammar
+    try:
+        for grammar in grammars:
+            imports = grammar.read_imports()
+            if not strict:
+                imports = [i for i in imports if i in grammar_index]
+            if imports:
+                try:
+                    grammar.dependencies = [get_grammar(i) for i in imports]
+                except ImportGrammarError as e:
+                    e.parent = grammar
+                    raise
+    except ImportGrammarError as e:
+        raise distutils.errors.DistutilsFileError('Imported grammar "{}" in file "{}" isn\'t '
+                                                  'present in package source directory.'.format(
+                                                      str(e), str(e.parent.path)))
+
+    # link grammars to the grammar generating their token vocabulary, a token vocabulary
+    # without grammar is a token file maintained by the user
+    for grammar in grammars:
+        token_vocab = grammar.read_token_vocab()
+        if token_vocab:
+            grammar.token_vocab = grammar_index.get(token_vocab)
+
+    return grammars
+
+
+def sort_grammars(grammars: typing.Iterable[AntlrGrammar]) -> typing.List[AntlrGrammar]:
+    """Sorts grammars so that grammars generating a token vocabulary precede the grammars using
+    it. Apart from that the order of grammars is kept.
+
+    :param grammars: ANTLR grammars
+    :return: a sorted list of grammars
+    """
+    grammars = list(grammars)
+    selected = set(grammars)
+    sorted_grammars = []
+    visited = set()
+
+    def visit(grammar: AntlrGrammar):
+        if grammar in visited:
+            return
+        visited.add(grammar)
+        if grammar.token_vocab in selected:
+            visit(grammar.token_vocab)
+        sorted_grammars.append(grammar)
+
+    for g in grammars:
+        visit(g)
+    return sorted_grammars
+
+
+def get_affected_grammars(grammars: typing.List[AntlrGrammar],
+                          changed_files: typing.Iterable[pathlib.Path]
+                          ) -> typing.List[AntlrGrammar]:
+    """Determines all grammars affected by changed grammar files. These are the changed grammars
+    itself and all grammars importing them or using their token vocabulary, directly or
+    indirectly.
+
+    :param grammars: all ANTLR grammars
+    :param changed_files: paths of changed grammar files
+    :return: a list of affected grammars
+    """
+    changed_files = {pathlib.Path(os.path.abspath(str(p))) for p in changed_files}
+    affected = {g for g in grammars if pathlib.Path(os.path.abspath(str(g.path))) in
+                changed_files}
+
+    # propagate changes until no further grammar is affected
+    propagated = True
+    while propagated:
+        propagated = False
+        for grammar in grammars:
+            if grammar not in affected and (grammar.token_vocab in affected or
+                                            any(d in affected for d in grammar.dependencies)):
+                affected.add(grammar)
+                propagated = True
+
+    return [g for g in grammars if g in affected]
@@ -0,0 +1,248 @@
+"""Measures the import costs of generated packages and checks them against budgets.
+
+A grammar change can make the generated parser much slower to import or much larger without any
+test failing. Each generated module is imported in a fresh Python process, once measuring the time
+and once measuring the memory allocated by the import using tracemalloc. The ANTLR runtime and the
+parent packages of a module are imported before, so they aren't accounted. Processes run in
+parallel. Results of a grammar are aggregated to
+
+* ``time``: import time of its slowest module in milliseconds,
+* ``memory``: memory allocated by importing its largest module in kilobytes and
+* ``size``: size of all its module files in kilobytes.
+
+Results are written to a JSON report and compared with the report of the previous run.
+"""
+import asyncio
+import compileall
+import distutils.errors
+import json
+import locale
+import os
+import pathlib
+import platform
+import shlex
+import subprocess
+import sys
+import typing
+
+from setuptools_antlr.bundle import get_package_name
+from setuptools_antlr.generator import GenerationJob, run_coroutine
+
+METRICS = ('time', 'memory', 'size')
+
+UNITS = {'time': 'ms', 'memory': 'kB', 'size': 'kB'}
+
+# imports a module in a fresh interpreter and prints its import time in seconds or the number of
+# bytes allocated by it
+_MEASURE_SCRIPT = '''import importlib, sys, time
+sys.path.insert(0, sys.argv[1])
+name, metric = sys.argv[2], sys.argv[3]
+import antlr4
+if '.' in name:
+    importlib.import_module(name.rpartition('.')[0])
+if metric == 'memory':
+    import tracemalloc
+    tracemalloc.start()
+start = time.perf_counter()
+importlib.import_module(name)
+print(tracemalloc.get_traced_memory()[0] if metric == 'memory' else time.perf_counter() - start)
+'''
+
+
+def parse_budgets(value: str) -> typing.Dict[str, typing.Dict[str, float]]:
+    """Parses import budgets. Each budget has the form [<grammar>.]<metric>=<limit>. Budgets
+    without grammar apply to all grammars.
+
+    :param value: whitespace separated budgets
+    :return: limits of metrics by grammar name, budgets of all grammars are keyed by None
+    """
+    budgets = {}
+    for token in shlex.split(value, comments=True):
+        key, _, limit = token.partition('=')
+        grammar, _, metric = key.rpartition('.')
+        if metric not in METRICS:
+            raise distutils.errors.DistutilsOptionError('{} isn\'t a valid import budget. Use '
+                                                        '[<grammar>.]<metric>=<limit> with one '
+                                                        'of the metrics {}.'.format(
+                                                            token, ', '.join(METRICS)))
+        try:
+            limit = float(limit)
+        except ValueError:
+            raise distutils.errors.DistutilsOptionError('limit of import budget {} has to be a '
+                                                        'number'.format(token))
+        budgets.setdefault(grammar or None, {})[metric] = limit
+    return budgets
+
+
+def list_modules(job: GenerationJob,
+                 base_dir: pathlib.Path) -> typing.List[typing.Tuple[str, pathlib.Path]]:
+    """Determines all modules of the package generated by a job including helper modules and
+    subpackages.
+
+    :param job: a generation job
+    :param base_dir: root directory of Python packages
+    :return: a list of fully qualified module names and paths of module files
+    """
+    package = get_package_name(job.package_dir, base_dir)
+    modules = []
+    for path in sorted(pathlib.Path(job.package_dir).rglob('*.py')):
+        relative = path.relative_to(str(job.package_dir))
+        if any(p.startswith('.') or p == '__pycache__' for p in relative.parts):
+            continue
+        parts = relative.parts[:-1] if path.stem == '__init__' else \
+            relative.parts[:-1] + (path.stem,)
+        modules.append(('.'.join((package,) + parts), path))
+    return modules
+
+
+async def _measure(module: str, metric: str, base_dir: pathlib.Path,
+                   semaphore: asyncio.Semaphore) -> float:
+    """Imports a module in a subprocess and measures a metric.
+
+    :param module: fully qualified module name
+    :param metric: time or memory
+    :param base_dir: root directory of Python packages
+    :param semaphore: semaphore limiting the number of concurrent processes
+    :return: import time in milliseconds or allocated memory in kilobytes
+    """
+    async with semaphore:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-c', _MEASURE_SCRIPT, os.path.abspath(str(base_dir)), module, metric,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = await process.communicate()
+    if process.returncode:
+        output = stderr.decode(locale.getpreferredencoding(False), 'replace')
+        raise distutils.errors.DistutilsExecError('{} can\'t be imported\n{}'.format(module,
+                                                                                     output))
+    value = float(stdout.decode('ascii').split()[-1])
+    return value * 1000 if metric == 'time' else value / 1024
+
+
+async def _measure_modules(modules: typing.List[typing.Tuple[str, pathlib.Path]],
+                           base_dir: pathlib.Path,
+                           max_workers: int) -> typing.Dict[str, typing.Dict[str, float]]:
+    """Measures the import time and memory of modules concurrently.
+
+    :param modules: fully qualified module names and paths of module files
+    :param base_dir: root directory of Python packages
+    :param max_workers: maximal number of concurrent processes
+    :return: results of metrics by module name
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    tasks = [asyncio.ensure_future(_measure(m, metric, base_dir, semaphore))
+             for m, _ in modules for metric in ('time', 'memory')]
+    try:
+        values = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    results = {}
+    for index, (module, path) in enumerate(modules):
+        results[module] = {'time': round(values[2 * index], 2),
+                           'memory': round(values[2 * index + 1], 1),
+                           'size': round(path.stat().st_size / 1024, 1)}
+    return results
+
+
+def measure_imports(jobs: typing.List[GenerationJob], base_dir: pathlib.Path,
+                    max_workers: int=None) -> typing.Dict[str, dict]:
+    """Measures the import costs of the packages generated by jobs. Modules are compiled before,
+    so that compiling them isn't measured.
+
+    :param jobs: generation jobs
+    :param base_dir: root directory of Python packages
+    :param max_workers: maximal number of concurrent processes, defaults to the number of
+                        processors
+    :return: aggregated results and results of each module by grammar name
+    """
+    modules = {}
+    for job in jobs:
+        modules[job.grammar.name] = list_modules(job, base_dir)
+        compileall.compile_dir(str(job.package_dir), quiet=1)
+
+    results = run_coroutine(_measure_modules(
+        [m for grammar_modules in modules.values() for m in grammar_modules], base_dir,
+        max_workers or os.cpu_count() or 1))
+
+    report = {}
+    for grammar, grammar_modules in modules.items():
+        module_results = {m: results[m] for m, _ in grammar_modules}
+        values = list(module_results.values())
+        report[grammar] = {
+            'time': max((v['time'] for v in values), default=0),
+            'memory': max((v['memory'] for v in values), default=0),
+            'size': round(sum(v['size'] for v in values), 1),
+            'modules': module_results
+        }
+    return report
+
+
+def read_report(path: pathlib.Path) -> typing.Dict[str, dict]:
+    """Reads the results of a previous run.
+
+    :param path: path of report
+    :return: results by grammar name, empty if there's no valid report
+    """
+    try:
+        with path.open(encoding='utf-8') as f:
+            report = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    # results of another Python version aren't comparable
+    if report.get('python') != platform.python_version():
+        return {}
+    return report.get('grammars', {})
+
+
+def write_report(path: pathlib.Path, results: typing.Dict[str, dict]):
+    """Writes results into a report. Results of grammars which weren't measured are kept.
+
+    :param path: path of report
+    :param results: results by grammar name
+    """
+    grammars = read_report(path)
+    grammars.update(results)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as f:
+        json.dump({'python': platform.python_version(), 'grammars': grammars}, f, indent=2,
+                  sort_keys=True)
+
+
+def format_results(grammar: str, results: dict, previous: dict=None) -> str:
+    """Formats the aggregated results of a grammar and their changes since a previous run.
+
+    :param grammar: name of grammar
+    :param results: aggregated results of grammar
+    :param previous: aggregated results of the previous run
+    :return: a line of text
+    """
+    values = []
+    for metric in METRICS:
+        value = '{} {:.1f} {}'.format(metric, results[metric], UNITS[metric])
+        if previous and previous.get(metric):
+            change = (results[metric] - previous[metric]) * 100 / previous[metric]
+            value += ' ({:+.1f}%)'.format(change)
+        values.append(value)
+    return '{} imports: {}'.format(grammar, ', '.join(values))
+
+
+def check_budgets(results: typing.Dict[str, dict],
+                  budgets: typing.Dict[str, typing.Dict[str, float]]) -> typing.List[str]:
+    """Checks the aggregated results of grammars against their budgets.
+
+    :param results: results by grammar name
+    :param budgets: limits of metrics by grammar name, budgets of all grammars are keyed by None
+    :return: a description of each exceeded budget
+    """
+    violations = []
+    for grammar, grammar_results in sorted(results.items()):
+        limits = dict(budgets.get(None, {}))
+        limits.update(budgets.get(grammar, {}))
+        for metric in METRICS:
+            if metric in limits and grammar_results[metric] > limits[metric]:
+                violations.append('{} exceeds {} budget: {:.1f} {unit} > {:g} {unit}'.format(
+                    grammar, metric, grammar_results[metric], limits[metric],
+                    unit=UNITS[metric]))
+    return violations
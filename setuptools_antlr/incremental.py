@@ -0,0 +1,594 @@
+"""Creates incremental modules which are generated into the packages of parsers.
+
+Editors and language servers parse the same input again after each keystroke. An incremental
+module keeps the tokens and the parse tree of a document and updates them after an edit by lexing
+only the tokens around the edit and parsing only the top-level rules containing changed tokens::
+
+    from foobar.dsl.foo.incremental import Document
+
+    document = Document(text)
+    tree = document.edit(10, 12, 'bar')
+"""
+import string
+
+INCREMENTAL_MODULE = 'incremental.py'
+
+_INCREMENTAL_TEMPLATE = string.Template('''"""Updates ${grammar} parse trees incrementally.
+
+Generated by setuptools-antlr, don't edit.
+
+A ``Document`` keeps the text, the tokens and the parse tree of an input. ``Document.edit``
+replaces a range of characters and updates them:
+
+1. Tokens are lexed again starting with the first token whose lexing looked at an edited character,
+   until a token starts behind the edit at a position where a token started before, with the same
+   lexer modes. The following tokens are kept and their positions are shifted.
+2. If only tokens on hidden channels changed, the parse tree is kept. If the changed tokens have
+   the same types as before and the parser has neither predicates nor actions, the new tokens
+   replace the old ones in the parse tree.
+3. Otherwise the top-level rules, i.e. the children of the start rule, containing changed tokens
+   are parsed again, starting with the first one whose parse looked at a changed token. If the
+   start rule invokes a single rule, it is invoked until the unchanged rules or the tokens
+   following all rules are reached. Otherwise a single rule is parsed again, which must end where
+   it ended before, and the choice of it must not have looked at a changed token.
+4. If that isn't possible or a syntax error occurs, the whole input is parsed again.
+
+Lexing and parsing effort depends on the size of an edit, but positions of all following tokens are
+shifted. ``Document.update`` tells how the parse tree was updated by the last edit.
+"""
+import bisect
+import collections
+
+from antlr4 import CommonTokenStream, InputStream, Token
+from antlr4.atn.Transition import Transition
+from antlr4.tree.Tree import ErrorNode, ParseTreeListener, TerminalNode, TerminalNodeImpl
+
+${lexer_import}
+${parser_import}
+
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+# updates of parse trees
+TOKENS = 'tokens'
+RULES = 'rules'
+FULL = 'full'
+
+
+def _invoked_rules(rule):
+    """Determines the rules a rule invokes."""
+    return {t.target.ruleIndex for s in PARSER.atn.states if s is not None and s.ruleIndex == rule
+            for t in s.transitions if t.serializationType == Transition.RULE}
+
+
+def _is_text_dependent():
+    """Checks whether the parser has predicates or actions, which may depend on texts of tokens."""
+    actions = collections.Counter()
+    for state in PARSER.atn.states:
+        for transition in state.transitions if state is not None else ():
+            if transition.serializationType == Transition.PREDICATE:
+                return True
+            if transition.serializationType == Transition.ACTION:
+                actions[state.ruleIndex] += 1
+    # ANTLR adds an action to each left recursive rule
+    return any(n > PARSER.atn.ruleToStartState[r].isPrecedenceRule for r, n in actions.items())
+
+
+TEXT_DEPENDENT = _is_text_dependent()
+
+
+class _DocumentStream(InputStream):
+    """A mutable input stream recording the furthest character the lexer consumed."""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.reached = 0
+
+    def consume(self):
+        super().consume()
+        if self._index > self.reached:
+            self.reached = self._index
+
+    def replace(self, start, end, text):
+        """Replaces a range of characters.
+
+        :param start: index of first replaced character
+        :param end: index behind last replaced character
+        :param text: new characters
+        """
+        self.strdata = self.strdata[:start] + text + self.strdata[end:]
+        self.data[start:end] = [ord(c) for c in text]
+        self._size = len(self.data)
+
+
+class _TokenList(CommonTokenStream):
+    """A token stream over a list of tokens recording the furthest token the parser looked at."""
+
+    def __init__(self, tokens, lexer):
+        super().__init__(lexer)
+        self.tokens = tokens
+        self.fetchedEOF = True
+        self.reached = -1
+
+    def LT(self, k):
+        token = super().LT(k)
+        if token is not None and token.tokenIndex > self.reached:
+            self.reached = token.tokenIndex
+        return token
+
+
+class _LookaheadRecorder(ParseTreeListener):
+    """Records the furthest token the parser looked at before and after each top-level rule."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.root = None
+        self.entered = None
+        self.lookahead = {}
+
+    def enterEveryRule(self, ctx):
+        if self.root is None:
+            self.root = ctx
+        elif ctx.parentCtx is self.root and self.entered is None:
+            self.entered = self.stream.reached
+
+    def exitEveryRule(self, ctx):
+        if ctx.parentCtx is self.root and self.entered is not None:
+            self.lookahead[id(ctx)] = (self.entered, self.stream.reached)
+            self.entered = None
+
+
+class Document(object):
+    """The text, tokens and parse tree of an input, which are updated incrementally."""
+
+    def __init__(self, text='', rule=None, error_listener=None):
+        """Initializes a new Document object and parses its text.
+
+        :param text: input text
+        :param rule: name of start rule, defaults to first rule of grammar
+        :param error_listener: listener notified about syntax errors, defaults to printing them
+        """
+        self.rule = rule or PARSER.ruleNames[0]
+        self.error_listener = error_listener
+        self.tree = None
+        self.update = FULL
+        self._single_rule = len(_invoked_rules(PARSER.ruleNames.index(self.rule))) == 1
+        self._stream = _DocumentStream(text)
+        self._lexer = LEXER(self._stream)
+        self._set_error_listener(self._lexer)
+
+        # begin of the characters each token was lexed from, furthest character the lexer looked
+        # at until then and the lexer modes at the begin
+        self.tokens = []
+        self._begins = []
+        self._reach = []
+        self._modes = []
+        self._restart(0, (LEXER.DEFAULT_MODE, ()))
+        reach = 0
+        while True:
+            token, begin, lookahead, modes = self._next()
+            reach = max(reach, lookahead)
+            token.tokenIndex = len(self.tokens)
+            self.tokens.append(token)
+            self._begins.append(begin)
+            self._reach.append(reach)
+            self._modes.append(modes)
+            if token.type == Token.EOF:
+                break
+        self._parse()
+
+    @property
+    def text(self):
+        """Text of document."""
+        return self._stream.strdata
+
+    def _set_error_listener(self, recognizer):
+        if self.error_listener is not None:
+            recognizer.removeErrorListeners()
+            recognizer.addErrorListener(self.error_listener)
+
+    def _restart(self, begin, modes):
+        """Prepares the lexer to continue at a character.
+
+        :param begin: index of character
+        :param modes: lexer mode and mode stack at the character
+        """
+        lexer = self._lexer
+        lexer.reset()
+        self._stream.seek(begin)
+        text = self._stream.strdata
+        lexer._interp.line = text.count('\\n', 0, begin) + 1
+        lexer._interp.column = begin - text.rfind('\\n', 0, begin) - 1
+        lexer._mode, stack = modes
+        lexer._modeStack = list(stack)
+
+    def _next(self):
+        """Lexes the next token.
+
+        :return: token, index of first character lexed, index behind the furthest character looked
+                 at and lexer modes before lexing
+        """
+        lexer = self._lexer
+        stream = self._stream
+        begin = stream.index
+        modes = (lexer._mode, tuple(lexer._modeStack))
+        stream.reached = begin
+        token = lexer.nextToken()
+        return token, begin, stream.reached + 1, modes
+
+    def edit(self, start, end, text):
+        """Replaces characters and updates tokens and parse tree.
+
+        :param start: index of first replaced character
+        :param end: index behind last replaced character
+        :param text: new characters
+        :return: updated parse tree
+        """
+        if not 0 <= start <= end <= len(self.text):
+            raise IndexError('range {}:{} is outside of document'.format(start, end))
+        delta = len(text) - (end - start)
+        self._stream.replace(start, end, text)
+
+        # tokens lexed without looking at replaced characters are kept
+        first = bisect.bisect_right(self._reach, start)
+        self._restart(self._begins[first], self._modes[first])
+        reach = self._reach[first - 1] if first else 0
+        resume = start + len(text)
+        tokens, begins, reaches, modes = [], [], [], []
+        last = len(self.tokens)
+        while True:
+            begin = self._stream.index
+            if begin >= resume:
+                # lexing continues like before if a token started here with the same modes
+                i = bisect.bisect_left(self._begins, begin - delta)
+                if i < last and self._begins[i] == begin - delta and \\
+                        self._modes[i] == (self._lexer._mode, tuple(self._lexer._modeStack)):
+                    last = i
+                    break
+            token, begin, lookahead, mode = self._next()
+            reach = max(reach, lookahead)
+            token.tokenIndex = first + len(tokens)
+            tokens.append(token)
+            begins.append(begin)
+            reaches.append(reach)
+            modes.append(mode)
+            if token.type == Token.EOF:
+                break
+
+        old_tokens = self.tokens[first:last]
+        self._shift_tokens(last, delta, len(tokens) - len(old_tokens), reach)
+        self.tokens[first:last] = tokens
+        self._begins[first:last] = begins
+        self._reach[first:last] = reaches
+        self._modes[first:last] = modes
+        self._update_tree(first, old_tokens, tokens)
+        return self.tree
+
+    def _shift_tokens(self, index, delta, count, reach):
+        """Shifts the tokens behind an edit.
+
+        :param index: index of first token behind edit
+        :param delta: difference of the number of characters
+        :param count: difference of the number of tokens
+        :param reach: furthest character looked at by lexing the tokens of the edit
+        """
+        if index == len(self.tokens):
+            return
+        old_line, old_column = self.tokens[index].line, self.tokens[index].column
+        line = self._lexer._interp.line
+        column = self._lexer._interp.column
+        # the lexer is positioned at the begin of the token, which may follow skipped characters
+        text = self.text
+        position = self.tokens[index].start + delta
+        begin = self._stream.index
+        line += text.count('\\n', begin, position)
+        if line != self._lexer._interp.line:
+            column = position - text.rfind('\\n', begin, position) - 1
+        else:
+            column += position - begin
+        line_delta = line - old_line
+        column_delta = column - old_column
+        if delta or count or line_delta or column_delta:
+            for token in self.tokens[index:]:
+                token.start += delta
+                token.stop += delta
+                token.tokenIndex += count
+                if token.line == old_line:
+                    token.column += column_delta
+                token.line += line_delta
+        if delta:
+            self._begins[index:] = [b + delta for b in self._begins[index:]]
+        self._reach[index:] = [max(r + delta, reach) for r in self._reach[index:]]
+
+    def _parse(self):
+        """Parses all tokens and records the lookahead of the top-level rules."""
+        stream = _TokenList(self.tokens, self._lexer)
+        parser = PARSER(stream)
+        self._set_error_listener(parser)
+        recorder = _LookaheadRecorder(stream)
+        parser.addParseListener(recorder)
+        self.tree = getattr(parser, self.rule)()
+        parser.removeParseListener(recorder)
+        self.update = FULL
+
+        # first and last token, furthest token looked at before and after parsing, and position
+        # in the children of the start rule of each top-level rule
+        self._starts, self._stops, self._entered, self._exited, self._positions = [], [], [], [], []
+        self._trailing = None
+        if recorder.root is not self.tree:
+            # children of left recursive start rules are moved while parsing
+            self._positions = None
+            return
+        for position, child in enumerate(self.tree.getChildren()):
+            if isinstance(child, TerminalNode):
+                continue
+            lookahead = recorder.lookahead.get(id(child))
+            if lookahead is None or child.stop is None or \\
+                    child.stop.tokenIndex < child.start.tokenIndex:
+                self._positions = None
+                return
+            self._starts.append(child.start.tokenIndex)
+            self._stops.append(child.stop.tokenIndex)
+            self._entered.append(lookahead[0])
+            self._exited.append(lookahead[1])
+            self._positions.append(position)
+        # types of the terminals following the top-level rules of a start rule invoking one rule
+        trailing = self.tree.children[self._positions[-1] + 1:] if self._positions else []
+        if self._single_rule and self._positions and \\
+                self._positions[-1] - self._positions[0] == len(self._positions) - 1 and \\
+                not any(isinstance(c, ErrorNode) for c in trailing):
+            self._trailing = [c.symbol.type for c in trailing]
+
+    def _update_tree(self, first, old_tokens, new_tokens):
+        """Updates the parse tree after tokens were replaced.
+
+        :param first: index of first replaced token
+        :param old_tokens: replaced tokens
+        :param new_tokens: new tokens
+        """
+        end = first + len(old_tokens)
+        count = len(new_tokens) - len(old_tokens)
+        old_visible = [t for t in old_tokens if t.channel == Token.DEFAULT_CHANNEL]
+        new_visible = [t for t in new_tokens if t.channel == Token.DEFAULT_CHANNEL]
+
+        if self._positions is None:
+            self._parse()
+        elif not old_visible and not new_visible:
+            self._shift_rules(0, first, end, count)
+            self.update = TOKENS
+        elif not TEXT_DEPENDENT and \\
+                [t.type for t in old_visible] == [t.type for t in new_visible]:
+            self._replace_tokens(first, end, count, old_visible, new_visible)
+            self.update = TOKENS
+        elif self._reparse(first, end, count, old_visible):
+            self.update = RULES
+        else:
+            self._parse()
+
+    def _shift_rules(self, index, first, end, count, tokens=None):
+        """Shifts the recorded token indices of top-level rules after tokens were replaced.
+
+        :param index: index of first top-level rule
+        :param first: index of first replaced token
+        :param end: index behind the last replaced token
+        :param count: difference of the number of tokens
+        :param tokens: new indices of replaced tokens by old index
+        """
+        tokens = tokens or {}
+        for indices in (self._starts, self._stops, self._entered, self._exited):
+            for i in range(index, len(indices)):
+                if indices[i] >= end:
+                    indices[i] += count
+                elif indices[i] >= first:
+                    # tokens looked at were replaced, assume all new tokens were looked at
+                    indices[i] = tokens.get(indices[i], end + count - 1)
+
+    def _replace_tokens(self, first, end, count, old_visible, new_visible):
+        """Replaces tokens by tokens of the same types in the parse tree.
+
+        :param first: index of first replaced token
+        :param end: index behind the last replaced token
+        :param count: difference of the number of tokens
+        :param old_visible: replaced tokens on the default channel
+        :param new_visible: new tokens on the default channel
+        """
+        tokens = dict(zip(map(id, old_visible), new_visible))
+        indices = {o.tokenIndex: n.tokenIndex for o, n in zip(old_visible, new_visible)}
+        low = bisect.bisect_right(self._starts, old_visible[0].tokenIndex) - 1
+        high = bisect.bisect_right(self._starts, old_visible[-1].tokenIndex) - 1
+        positions = self._positions
+        low = positions[max(low, 0)] if positions else 0
+        high = positions[high] if positions and high >= 0 else -1
+        # only terminals of the start rule and top-level rules containing tokens are walked
+        root = self.tree
+        stack = []
+        for position, child in enumerate(root.children):
+            if isinstance(child, TerminalNode):
+                child.symbol = tokens.get(id(child.symbol), child.symbol)
+            elif low <= position <= high:
+                stack.append(child)
+        root.start = tokens.get(id(root.start), root.start)
+        root.stop = tokens.get(id(root.stop), root.stop)
+        while stack:
+            node = stack.pop()
+            node.start = tokens.get(id(node.start), node.start)
+            node.stop = tokens.get(id(node.stop), node.stop)
+            for child in node.children or ():
+                if isinstance(child, TerminalNode):
+                    child.symbol = tokens.get(id(child.symbol), child.symbol)
+                else:
+                    stack.append(child)
+        self._shift_rules(0, first, end, count, indices)
+
+    def _reparse(self, first, end, count, old_visible):
+        """Parses the top-level rules containing replaced tokens again.
+
+        :param first: index of first replaced token
+        :param end: index behind the last replaced token
+        :param count: difference of the number of tokens
+        :param old_visible: replaced tokens on the default channel
+        :return: a flag whether the parse tree was updated
+        """
+        starts, stops = self._starts, self._stops
+        if not starts:
+            return False
+        if old_visible:
+            low, high = old_visible[0].tokenIndex, old_visible[-1].tokenIndex
+        else:
+            # tokens were inserted between two tokens on the default channel
+            low = high = first
+        # the top-level rule containing the first changed token and the first top-level rule whose
+        # parse looked at a changed token
+        containing = bisect.bisect_right(starts, low) - 1
+        affected = bisect.bisect_left(self._exited, first)
+
+        stream = _TokenList(self.tokens, self._lexer)
+        parser = PARSER(stream)
+        parser.removeErrorListeners()
+        root = self.tree
+        parser._ctx = root
+        if self._trailing is None:
+            index = containing
+            if index < 0 or affected < index or high > stops[index] or stops[index] < end or \\
+                    self._entered[index] >= first or (not old_visible and starts[index] >= first):
+                return False
+            stream.seek(starts[index])
+            stream.reached = stream.index - 1
+            previous = root.children[self._positions[index]]
+            child = self._parse_rule(parser, previous.getRuleIndex(), previous.invokingState)
+            if child is None or child.stop.tokenIndex != stops[index] + count:
+                return False
+            root.children[self._positions[index]] = child
+            children, entered, following = [child], [starts[index]], index + 1
+        else:
+            index = min(max(containing, 0), affected)
+            # the first unchanged top-level rule following the changed tokens
+            following = bisect.bisect_left(starts, end)
+            target = starts[following] + count if following < len(starts) else None
+            if index == 0:
+                if self._positions[0] != 0:
+                    return False
+                stream.seek(0)
+                root.start = stream.LT(1)
+            else:
+                stream.seek(stops[index - 1] + 1)
+            stream.reached = stream.index - 1
+            rule = root.children[self._positions[0]].getRuleIndex()
+            invoking = [root.children[p].invokingState for p in (self._positions[0],
+                                                                 self._positions[-1])]
+            children, entered = [], []
+            while True:
+                if target is None:
+                    if self._is_trailing(stream.index):
+                        break
+                elif stream.index >= target:
+                    if stream.index > target:
+                        return False
+                    break
+                entered.append(stream.reached)
+                child = self._parse_rule(parser, rule, invoking[bool(index or children)])
+                if child is None:
+                    return False
+                children.append(child)
+
+            begin = self._positions[index]
+            if target is None:
+                # the terminals following the top-level rules are replaced by new ones
+                nodes = []
+                for token in self._trailing_tokens(stream.index):
+                    node = TerminalNodeImpl(token)
+                    node.parentCtx = root
+                    nodes.append(node)
+                    if token.type != Token.EOF:
+                        stream.consume()
+                root.stop = stream.LT(-1)
+                root.children[begin:] = children + nodes
+            else:
+                root.children[begin:begin + following - index] = children
+
+        # record the lookahead of the new top-level rules
+        self._shift_rules(following, first, end, count)
+        reached = self._exited[index - 1] if index else -1
+        exited = []
+        for child in children:
+            reached = max(reached, child.lookahead)
+            exited.append(reached)
+            del child.lookahead
+        for values, new in ((starts, [c.start.tokenIndex for c in children]),
+                            (stops, [c.stop.tokenIndex for c in children]),
+                            (self._entered, entered), (self._exited, exited)):
+            values[index:following] = new
+        for i in range(index + len(children), len(self._exited)):
+            self._exited[i] = max(self._exited[i], reached)
+        self._positions = [self._positions[0] + i for i in range(len(starts))] \\
+            if self._trailing is not None else self._positions
+        return True
+
+    def _parse_rule(self, parser, rule, invoking_state):
+        """Parses a top-level rule.
+
+        :param parser: parser whose current context is the start rule
+        :param rule: index of rule
+        :param invoking_state: ATN state the rule is invoked from
+        :return: the context of the rule or None if the rule can't be parsed without syntax errors
+        """
+        stream = parser.getInputStream()
+        start = stream.index
+        parser.state = invoking_state
+        try:
+            ctx = getattr(parser, PARSER.ruleNames[rule])()
+        except TypeError:
+            # rules with parameters can only be invoked by their invoking rule
+            return None
+        finally:
+            parser._ctx = self.tree
+        # the rule was added to the children of the start rule
+        self.tree.children.pop()
+        if parser.getNumberOfSyntaxErrors() or stream.index <= start or ctx.stop is None:
+            return None
+        ctx.lookahead = stream.reached
+        return ctx
+
+    def _is_trailing(self, index):
+        """Checks whether the tokens from an index on are the terminals following the top-level
+        rules.
+
+        :param index: token index
+        :return: a flag whether the types of the tokens on the default channel match
+        """
+        return [t.type for t in self._trailing_tokens(index)] == self._trailing
+
+    def _trailing_tokens(self, index):
+        """Returns the tokens on the default channel from an index on, which are checked against
+        the terminals following the top-level rules.
+
+        :param index: token index
+        :return: at most one more token than terminals, without EOF if the start rule doesn't
+                 match it
+        """
+        tokens = []
+        for token in self.tokens[index:]:
+            if token.channel == Token.DEFAULT_CHANNEL:
+                if token.type == Token.EOF and Token.EOF not in self._trailing:
+                    break
+                tokens.append(token)
+                if len(tokens) > len(self._trailing):
+                    break
+        return tokens
+''')
+
+
+def create_incremental_module(grammar: str, lexer_import: str, lexer_class: str,
+                              parser_import: str, parser_class: str) -> str:
+    """Creates the source code of an incremental module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :return: source code of incremental module
+    """
+    return _INCREMENTAL_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                            lexer_class=lexer_class, parser_import=parser_import,
+                                            parser_class=parser_class)
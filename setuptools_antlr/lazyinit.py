@@ -0,0 +1,94 @@
+"""Creates package init modules which import the generated classes of a grammar lazily.
+
+An empty ``__init__.py`` requires importing each generated module by name. A lazy init module
+exposes the generated classes as attributes of the package, but imports a module only when its
+class is accessed first (PEP 562). Tools which only tokenize don't import parser, listener and
+visitor::
+
+    from foobar.dsl.foo import FooLexer
+
+A stub file lists the classes for static analysis.
+"""
+import string
+import typing
+
+INIT_MODULE = '__init__.py'
+INIT_STUB = '__init__.pyi'
+
+_INIT_TEMPLATE = string.Template('''"""Package of the ${grammar} grammar.
+
+Generated by setuptools-antlr, don't edit.
+
+Generated classes are imported when they are accessed first, so importing one of them doesn't
+import the others. Before Python 3.7 modules can't define ``__getattr__`` and all classes are
+imported with the package.
+"""
+import importlib
+import sys
+import types
+
+__all__ = [${names}]
+
+# modules of the generated classes by class name
+_MODULES = {${modules}}
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    """A package ignoring modules bound to it, which would hide the classes of the same name."""
+
+    def __setattr__(self, name, value):
+        if name in _MODULES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+if sys.version_info < (3, 7):
+${imports}
+''')
+
+_STUB_TEMPLATE = string.Template('''# Generated by setuptools-antlr, don't edit.
+${imports}
+
+__all__ = [${names}]
+''')
+
+
+def create_lazy_init_module(grammar: str, classes: typing.Iterable[str]) -> str:
+    """Creates the source code of a package init module importing generated classes lazily.
+
+    :param grammar: name of grammar
+    :param classes: names of generated classes, which are imported from modules of the same name
+    :return: source code of init module
+    """
+    classes = list(classes)
+    return _INIT_TEMPLATE.substitute(
+        grammar=grammar, names=', '.join(repr(c) for c in classes),
+        modules=', '.join('{0!r}: {0!r}'.format(c) for c in classes),
+        imports='\n'.join('    from .{0} import {0}'.format(c) for c in classes) or '    pass')
+
+
+def create_lazy_init_stub(classes: typing.Iterable[str]) -> str:
+    """Creates the stub file of a package init module importing generated classes lazily.
+
+    :param classes: names of generated classes, which are imported from modules of the same name
+    :return: content of stub file
+    """
+    classes = list(classes)
+    return _STUB_TEMPLATE.substitute(
+        names=', '.join(repr(c) for c in classes),
+        imports='\n'.join('from .{0} import {0} as {0}'.format(c) for c in classes))
@@ -0,0 +1,101 @@
+"""Provides advisory file locks synchronizing concurrent generations of the same parser.
+
+On POSIX systems locks are acquired with flock, on Windows with msvcrt. Locks are released by the
+operating system if the holding process dies. Lock files are never deleted, because a deleted lock
+file could be locked by two processes at the same time.
+"""
+import os
+import pathlib
+import sys
+import time
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock(object):
+    """An exclusive advisory lock on a lock file.
+
+    The lock isn't reentrant. Two locks on the same file conflict even inside a single process.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """Initializes a new FileLock object.
+
+        :param path: path of lock file, which is created if it doesn't exist
+        """
+        self.path = path
+        self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        """Returns whether this lock is held."""
+        return self._fd is not None
+
+    def _lock(self, fd: int) -> bool:
+        """Tries to lock an open lock file without blocking.
+
+        :param fd: file descriptor of lock file
+        :return: True if lock was acquired
+        """
+        try:
+            if sys.platform == 'win32':
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def try_acquire(self) -> bool:
+        """Tries to acquire the lock without blocking.
+
+        :return: True if lock was acquired, False if it's held by someone else
+        """
+        if self._fd is not None:
+            raise RuntimeError('lock {} is already acquired'.format(self.path))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        if self._lock(fd):
+            self._fd = fd
+            return True
+        os.close(fd)
+        return False
+
+    def acquire(self, timeout: float=None, interval: float=0.05) -> bool:
+        """Acquires the lock and blocks until it's available.
+
+        :param timeout: maximal time in seconds to wait or None to wait infinitely
+        :param interval: time in seconds between two attempts to acquire the lock
+        :return: True if lock was acquired, False if timeout expired
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def release(self):
+        """Releases the lock."""
+        if self._fd is None:
+            return
+        try:
+            if sys.platform == 'win32':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,293 @@
+"""Creates parse cache modules which are generated into the packages of parsers.
+
+A parse cache module stores reduced parse results, e.g. flat trees, in a directory shared by
+processes. Entries are keyed by the hash of the input and belong to the fingerprint of the
+generated parser, so a regenerated parser never gets results of its predecessor::
+
+    from foobar.dsl.foo.parsecache import ParseCache
+
+    cache = ParseCache('.cache', reduce=count_rules)
+    result = cache.parse_file('foo.txt')
+"""
+import string
+
+PARSE_CACHE_MODULE = 'parsecache.py'
+
+_PARSE_CACHE_TEMPLATE = string.Template('''"""Caches reduced ${grammar} parse results on disk.
+
+Generated by setuptools-antlr, don't edit.
+
+``ParseCache`` stores the result of reducing a parse tree${default_reduce_doc} in a cache
+directory. Entries are keyed by a hash of the input, the start rule and the name of the reduction.
+They are stored in a directory named after the fingerprint of the generated parser, which is read
+from the manifest written by setuptools-antlr. Without a manifest the lexer and parser modules are
+hashed instead. Entries of other fingerprints are removed when a cache is opened, so results of a
+regenerated parser are never mixed up.
+
+Each entry is a pickle file written to a temporary file and renamed, so processes can share a
+cache directory. Reading an entry updates its modification time. When the entries written by a
+process exceed the maximal size, the least recently used entries are removed.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+from antlr4 import CommonTokenStream, InputStream
+
+${lexer_import}
+${parser_import}
+${flat_tree_import}
+
+GRAMMAR = '${grammar}'
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+MANIFEST = pathlib.Path(__file__).with_name('${manifest}')
+
+# default maximal size of all entries in bytes
+MAX_SIZE = 256 * 1024 * 1024
+
+# reduction used if none is passed
+DEFAULT_REDUCE = ${default_reduce}
+
+_SUFFIX = '.pickle'
+
+# age in seconds of temporary files considered abandoned
+_TMP_FILE_AGE = 3600
+
+
+def get_fingerprint():
+    """Returns the fingerprint of the generated parser.
+
+    :return: a hex encoded hash
+    """
+    # files are read by the loader of their module, which also supports zip bundles
+    try:
+        return json.loads(__loader__.get_data(str(MANIFEST)).decode('utf-8'))['fingerprint']
+    except (IOError, ValueError, KeyError):
+        pass
+    fingerprint = hashlib.sha256()
+    for cls in (LEXER, PARSER):
+        module = sys.modules[cls.__module__]
+        fingerprint.update(module.__loader__.get_data(module.__file__))
+    return fingerprint.hexdigest()
+
+
+class ParseCache(object):
+    """A directory of reduced parse results shared by processes."""
+
+    def __init__(self, directory, reduce=DEFAULT_REDUCE, max_size=MAX_SIZE, namespace=None):
+        """Initializes a new ParseCache object and removes entries of other fingerprints.
+
+        :param directory: path of cache directory, which may be shared with other grammars
+        :param reduce: function reducing a parse tree to a picklable value
+        :param max_size: maximal size of all entries in bytes
+        :param namespace: name distinguishing results of different reductions, defaults to the
+                          qualified name of reduce
+        """
+        if reduce is None:
+            raise ValueError('a function reducing parse trees is required')
+        self.reduce = reduce
+        self.max_size = max_size
+        self.namespace = namespace or '{}.{}'.format(
+            reduce.__module__, getattr(reduce, '__qualname__', reduce.__name__))
+        self.fingerprint = get_fingerprint()
+        self.directory = pathlib.Path(str(directory), GRAMMAR, self.fingerprint)
+        self.hits = 0
+        self.misses = 0
+        # size of all entries, determined when the first entry is written
+        self._size = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.parent.iterdir():
+            if path.name != self.fingerprint and path.is_dir():
+                shutil.rmtree(str(path), ignore_errors=True)
+
+    def key(self, text, rule=None):
+        """Computes the key of an entry.
+
+        :param text: input text
+        :param rule: name of start rule, defaults to first rule of grammar
+        :return: a hex encoded hash
+        """
+        key = hashlib.sha256()
+        for part in (self.namespace, rule or PARSER.ruleNames[0], text):
+            key.update(part.encode('utf-8', 'surrogatepass') + b'\\0')
+        return key.hexdigest()
+
+    def _load(self, key):
+        """Reads an entry.
+
+        :param key: key of entry
+        :return: a flag whether the entry exists and its value
+        """
+        path = pathlib.Path(self.directory, key + _SUFFIX)
+        try:
+            with path.open('rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except Exception:
+            # entries which can't be unpickled anymore are treated as missing
+            self._remove(path)
+            self.misses += 1
+            return False, None
+        try:
+            os.utime(str(path))
+        except OSError:
+            pass
+        self.hits += 1
+        return True, value
+
+    def _store(self, key, value):
+        """Writes an entry atomically and removes the least recently used entries if the cache
+        grows too large.
+
+        :param key: key of entry
+        :param value: a picklable value
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self._size is None:
+            self._size = sum(size for _, _, size in self._scan())
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=str(self.directory))
+        except FileNotFoundError:
+            # removed by a process using another fingerprint
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=str(self.directory))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, str(pathlib.Path(self.directory, key + _SUFFIX)))
+        except BaseException:
+            self._remove(pathlib.Path(tmp_path))
+            raise
+        self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _scan(self):
+        """Lists all entries and removes abandoned temporary files.
+
+        :return: path, modification time and size of each entry
+        """
+        entries = []
+        now = time.time()
+        try:
+            paths = list(self.directory.iterdir())
+        except FileNotFoundError:
+            return entries
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.name.endswith(_SUFFIX):
+                entries.append((path, stat.st_mtime, stat.st_size))
+            elif path.name.endswith('.tmp') and now - stat.st_mtime > _TMP_FILE_AGE:
+                self._remove(path)
+        return entries
+
+    def evict(self, size=None):
+        """Removes the least recently used entries until the entries of all processes fit.
+
+        :param size: size the entries are reduced to, defaults to three quarters of max_size
+        """
+        if size is None:
+            size = self.max_size * 3 // 4
+        entries = sorted(self._scan(), key=lambda e: e[1])
+        total = sum(s for _, _, s in entries)
+        for path, _, entry_size in entries:
+            if total <= size:
+                break
+            self._remove(path)
+            total -= entry_size
+        self._size = total
+
+    def clear(self):
+        """Removes all entries."""
+        self.evict(0)
+
+    def get(self, text, rule=None, default=None):
+        """Returns the cached result of an input.
+
+        :param text: input text
+        :param rule: name of start rule, defaults to first rule of grammar
+        :param default: value returned if the input isn't cached
+        :return: reduced parse result
+        """
+        found, value = self._load(self.key(text, rule))
+        return value if found else default
+
+    def put(self, text, value, rule=None):
+        """Stores the result of an input.
+
+        :param text: input text
+        :param value: reduced parse result
+        :param rule: name of start rule, defaults to first rule of grammar
+        """
+        self._store(self.key(text, rule), value)
+
+    def parse(self, text, rule=None):
+        """Returns the cached result of an input or parses and reduces it.
+
+        :param text: input text
+        :param rule: name of start rule, defaults to first rule of grammar
+        :return: reduced parse result
+        """
+        rule = rule or PARSER.ruleNames[0]
+        key = self.key(text, rule)
+        found, value = self._load(key)
+        if not found:
+            parser = PARSER(CommonTokenStream(LEXER(InputStream(text))))
+            value = self.reduce(getattr(parser, rule)())
+            self._store(key, value)
+        return value
+
+    def parse_file(self, path, rule=None, encoding='utf-8'):
+        """Returns the cached result of a file or parses and reduces it.
+
+        :param path: path of input file
+        :param rule: name of start rule, defaults to first rule of grammar
+        :param encoding: encoding of input file
+        :return: reduced parse result
+        """
+        with open(str(path), encoding=encoding) as f:
+            return self.parse(f.read(), rule)
+''')
+
+
+def create_parse_cache_module(grammar: str, lexer_import: str, lexer_class: str,
+                              parser_import: str, parser_class: str, manifest: str,
+                              flat_tree: bool=False) -> str:
+    """Creates the source code of a parse cache module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :param manifest: name of manifest file recording the fingerprint of the parser
+    :param flat_tree: flag whether parse trees are flattened by default using the flat tree module
+    :return: source code of parse cache module
+    """
+    return _PARSE_CACHE_TEMPLATE.substitute(
+        grammar=grammar, lexer_import=lexer_import, lexer_class=lexer_class,
+        parser_import=parser_import, parser_class=parser_class, manifest=manifest,
+        flat_tree_import='from .flattree import flatten' if flat_tree else '',
+        default_reduce='flatten' if flat_tree else 'None',
+        default_reduce_doc=', by default to a flat tree,' if flat_tree else '')
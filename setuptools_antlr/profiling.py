@@ -0,0 +1,254 @@
+"""Creates profiling modules which are generated into the packages of parsers.
+
+The Python runtime of ANTLR lacks the profiling ATN simulator of the Java runtime. A profiling
+module provides an instrumented ATN simulator recording statistics of each decision of the
+generated parser. Decisions are reported together with their rules and the line numbers of the rules
+in the grammar files::
+
+    > python -m foobar.dsl.foo.profiling samples/foo --top 10
+"""
+import string
+import typing
+
+PROFILING_MODULE = 'profiling.py'
+
+_PROFILING_TEMPLATE = string.Template('''"""Profiles the decisions of the ${grammar} parser.
+
+Generated by setuptools-antlr, don't edit.
+
+Usage::
+
+    python -m <package>.profiling <samples> [--rule RULE] [--pattern GLOB] [--exact] [--top N]
+                                            [--output FILE]
+
+The parser is run with an instrumented ATN simulator. For each decision it records the number of
+predictions, the time spent, the lookahead depth of SLL prediction, the fallbacks to full context
+(LL) prediction with their lookahead depth, context sensitivities and ambiguities. Ambiguities are
+only detected exactly with --exact, which slows down LL prediction. Results are printed as JSON,
+sorted by time spent.
+
+A parser can also be instrumented inside an application::
+
+    simulator = install(parser)
+    parser.startRule()
+    print(report(simulator.decisions))
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.Errors import RecognitionException
+
+${lexer_import}
+${parser_import}
+
+GRAMMAR = '${grammar}'
+LEXER = ${lexer_class}
+PARSER = ${parser_class}
+
+# grammar file and line of each rule
+RULE_LOCATIONS = {
+${rule_locations}
+}
+
+
+class DecisionInfo(object):
+    """Statistics of a single decision."""
+
+    def __init__(self, decision):
+        self.decision = decision
+        self.invocations = 0
+        self.seconds = 0.0
+        self.sll_lookahead = 0
+        self.sll_max_lookahead = 0
+        self.ll_fallbacks = 0
+        self.ll_lookahead = 0
+        self.ll_max_lookahead = 0
+        self.context_sensitivities = 0
+        self.ambiguities = 0
+        self.errors = 0
+
+
+class ProfilingATNSimulator(ParserATNSimulator):
+    """A parser ATN simulator recording statistics of each decision."""
+
+    def __init__(self, parser, decisions=None):
+        super().__init__(parser, parser.atn, parser.decisionsToDFA, parser.sharedContextCache)
+        self.decisions = decisions if decisions is not None else \\
+            [DecisionInfo(d) for d in range(len(parser.atn.decisionToState))]
+        self._sll_stop_index = None
+
+    def adaptivePredict(self, input, decision, outerContext):
+        info = self.decisions[decision]
+        info.invocations += 1
+        self._sll_stop_index = None
+        start = time.perf_counter()
+        try:
+            return super().adaptivePredict(input, decision, outerContext)
+        except RecognitionException:
+            info.errors += 1
+            raise
+        finally:
+            info.seconds += time.perf_counter() - start
+
+    def execATN(self, dfa, s0, input, startIndex, outerContext):
+        try:
+            return super().execATN(dfa, s0, input, startIndex, outerContext)
+        finally:
+            # SLL prediction ends where it fails over to full context prediction
+            stop_index = self._sll_stop_index if self._sll_stop_index is not None else input.index
+            info = self.decisions[dfa.decision]
+            lookahead = stop_index - startIndex + 1
+            info.sll_lookahead += lookahead
+            info.sll_max_lookahead = max(info.sll_max_lookahead, lookahead)
+
+    def execATNWithFullContext(self, dfa, D, s0, input, startIndex, outerContext):
+        try:
+            return super().execATNWithFullContext(dfa, D, s0, input, startIndex, outerContext)
+        finally:
+            info = self.decisions[dfa.decision]
+            lookahead = input.index - startIndex + 1
+            info.ll_fallbacks += 1
+            info.ll_lookahead += lookahead
+            info.ll_max_lookahead = max(info.ll_max_lookahead, lookahead)
+
+    def reportAttemptingFullContext(self, dfa, conflictingAlts, configs, startIndex, stopIndex):
+        self._sll_stop_index = stopIndex
+        super().reportAttemptingFullContext(dfa, conflictingAlts, configs, startIndex, stopIndex)
+
+    def reportContextSensitivity(self, dfa, prediction, configs, startIndex, stopIndex):
+        self.decisions[dfa.decision].context_sensitivities += 1
+        super().reportContextSensitivity(dfa, prediction, configs, startIndex, stopIndex)
+
+    def reportAmbiguity(self, dfa, D, startIndex, stopIndex, exact, ambigAlts, configs):
+        self.decisions[dfa.decision].ambiguities += 1
+        super().reportAmbiguity(dfa, D, startIndex, stopIndex, exact, ambigAlts, configs)
+
+
+def install(parser, decisions=None, exact=False):
+    """Replaces the ATN simulator of a parser by a profiling one.
+
+    :param parser: a ${grammar} parser
+    :param decisions: statistics of a previous profiling run to continue
+    :param exact: flag whether ambiguities are detected exactly
+    :return: the profiling ATN simulator
+    """
+    simulator = ProfilingATNSimulator(parser, decisions)
+    if exact:
+        simulator.predictionMode = PredictionMode.LL_EXACT_AMBIG_DETECTION
+    parser._interp = simulator
+    return simulator
+
+
+def report(decisions, top=None):
+    """Creates a report of all predicted decisions sorted by time spent.
+
+    :param decisions: statistics of decisions
+    :param top: maximal number of reported decisions
+    :return: JSON serializable report
+    """
+    rows = []
+    for info in decisions:
+        if not info.invocations:
+            continue
+        state = PARSER.atn.decisionToState[info.decision]
+        rule = PARSER.ruleNames[state.ruleIndex]
+        file, line = RULE_LOCATIONS.get(rule, (None, None))
+        rows.append({
+            'decision': info.decision,
+            'state': state.stateNumber,
+            'rule': rule,
+            'file': file,
+            'line': line,
+            'invocations': info.invocations,
+            'seconds': info.seconds,
+            'sll_lookahead': info.sll_lookahead / info.invocations,
+            'sll_max_lookahead': info.sll_max_lookahead,
+            'll_fallbacks': info.ll_fallbacks,
+            'll_lookahead': info.ll_lookahead / info.ll_fallbacks if info.ll_fallbacks else 0,
+            'll_max_lookahead': info.ll_max_lookahead,
+            'context_sensitivities': info.context_sensitivities,
+            'ambiguities': info.ambiguities,
+            'errors': info.errors
+        })
+    rows.sort(key=lambda r: r['seconds'], reverse=True)
+    return rows[:top] if top else rows
+
+
+def profile(paths, rule=None, decisions=None, exact=False):
+    """Parses sample files using a profiling ATN simulator.
+
+    :param paths: paths of sample files
+    :param rule: name of start rule, defaults to first rule of grammar
+    :param decisions: statistics of a previous profiling run to continue
+    :param exact: flag whether ambiguities are detected exactly
+    :return: statistics of decisions
+    """
+    for path in paths:
+        lexer = LEXER(InputStream(pathlib.Path(path).read_text(encoding='utf-8')))
+        lexer.removeErrorListeners()
+        parser = PARSER(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        decisions = install(parser, decisions, exact).decisions
+        getattr(parser, rule or parser.ruleNames[0])()
+    return decisions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profiles the decisions of the {} '
+                                                 'parser.'.format(GRAMMAR))
+    parser.add_argument('samples', help='sample file or directory containing sample files')
+    parser.add_argument('--rule', help='start rule (default: first rule of grammar)')
+    parser.add_argument('--pattern', default='*', help='glob pattern of sample files (default: *)')
+    parser.add_argument('--exact', action='store_true', help='detect ambiguities exactly')
+    parser.add_argument('--top', type=int, help='number of reported decisions (default: all)')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    args = parser.parse_args(argv)
+
+    samples = pathlib.Path(args.samples)
+    paths = sorted(p for p in samples.rglob(args.pattern) if p.is_file()) if samples.is_dir() \\
+        else [samples]
+    decisions = profile(paths, args.rule, exact=args.exact)
+    results = {
+        'grammar': GRAMMAR,
+        'rule': args.rule,
+        'files': len(paths),
+        'decisions': report(decisions or [], args.top)
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+''')
+
+
+def create_profiling_module(grammar: str, lexer_import: str, lexer_class: str,
+                            parser_import: str, parser_class: str,
+                            rule_locations: typing.Dict[str, typing.Tuple[str, int]]) -> str:
+    """Creates the source code of a profiling module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :param rule_locations: names of grammar files and line numbers of rules
+    :return: source code of profiling module
+    """
+    locations = '\n'.join('    {!r}: ({!r}, {}),'.format(r, f, l)
+                          for r, (f, l) in rule_locations.items())
+    return _PROFILING_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                          lexer_class=lexer_class, parser_import=parser_import,
+                                          parser_class=parser_class, rule_locations=locations)
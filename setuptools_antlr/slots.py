@@ -0,0 +1,120 @@
+"""Adds __slots__ to the context classes of generated parsers.
+
+Each context class of a generated parser is a nested class of the parser inheriting directly from
+ParserRuleContext or, for labelled alternatives, from the context class of its rule. This
+post-processor declares __slots__ for the attributes of the runtime base classes in each rule
+context class and for the label and local fields in each context class. The context classes of the
+runtime don't declare __slots__, so instances keep a __dict__ for attributes assigned by user code,
+but it's never filled by the parser itself.
+"""
+import ast
+import typing
+
+# attributes assigned by RuleContext and ParserRuleContext of the Python runtime
+RUNTIME_CONTEXT_ATTRIBUTES = ('parentCtx', 'invokingState', 'children', 'start', 'stop',
+                              'exception')
+
+_BASE_CONTEXT = 'ParserRuleContext'
+
+
+def _get_assigned_attributes(node: ast.ClassDef) -> typing.List[str]:
+    """Collects the names of all attributes assigned to self in the methods of a class.
+
+    :param node: a class definition
+    :return: names of attributes in order of first assignment
+    """
+    names = []
+    for method in node.body:
+        if not isinstance(method, ast.FunctionDef):
+            continue
+        for statement in ast.walk(method):
+            if isinstance(statement, ast.Assign):
+                targets = statement.targets
+            elif isinstance(statement, ast.AugAssign):
+                targets = [statement.target]
+            else:
+                continue
+            for target in targets:
+                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and \
+                        target.value.id == 'self' and target.attr not in names:
+                    names.append(target.attr)
+    return names
+
+
+def _get_class_attributes(node: ast.ClassDef) -> typing.Set[str]:
+    """Collects the names of all methods and class attributes defined in a class body.
+
+    :param node: a class definition
+    :return: names of methods and class attributes
+    """
+    names = set()
+    for statement in node.body:
+        if isinstance(statement, (ast.FunctionDef, ast.ClassDef)):
+            names.add(statement.name)
+        elif isinstance(statement, ast.Assign):
+            names.update(t.id for t in statement.targets if isinstance(t, ast.Name))
+    return names
+
+
+def _find_context_classes(tree: ast.Module) -> typing.Dict[str, ast.ClassDef]:
+    """Searches for the context classes nested in the parser classes of a module.
+
+    :param tree: syntax tree of a generated parser module
+    :return: context classes by name
+    """
+    contexts = {}
+    for parser in tree.body:
+        if not isinstance(parser, ast.ClassDef):
+            continue
+        for node in parser.body:
+            if isinstance(node, ast.ClassDef) and node.name.endswith('Context') and \
+                    len(node.bases) == 1 and isinstance(node.bases[0], ast.Name):
+                contexts[node.name] = node
+    return contexts
+
+
+def add_slots(source: str) -> str:
+    """Adds __slots__ declarations to all context classes of a generated parser module.
+
+    :param source: source code of a generated parser module
+    :return: the modified source code
+    """
+    contexts = _find_context_classes(ast.parse(source))
+
+    def get_inherited(node: ast.ClassDef) -> typing.Tuple[typing.Set[str], typing.Set[str]]:
+        """Determines slots and class attributes a context class inherits from generated
+        contexts.
+        """
+        base = node.bases[0].id
+        if base == _BASE_CONTEXT:
+            return set(), set()
+        if base not in contexts:
+            return None, None
+        slots, attributes = get_inherited(contexts[base])
+        if slots is None:
+            return None, None
+        return (slots | set(get_slots(contexts[base])),
+                attributes | _get_class_attributes(contexts[base]))
+
+    def get_slots(node: ast.ClassDef) -> typing.List[str]:
+        """Determines the slots declared by a context class."""
+        slots, attributes = get_inherited(node)
+        names = list(RUNTIME_CONTEXT_ATTRIBUTES) if node.bases[0].id == _BASE_CONTEXT else []
+        names += [n for n in _get_assigned_attributes(node) if n not in names]
+        attributes = attributes | _get_class_attributes(node)
+        # a slot must neither be declared twice nor shadow a method
+        return [n for n in names if n not in slots and n not in attributes]
+
+    insertions = []
+    for node in contexts.values():
+        if get_inherited(node)[0] is None:
+            # not derived from ParserRuleContext
+            continue
+        first = node.body[0]
+        insertions.append((first.lineno, first.col_offset, get_slots(node)))
+
+    lines = source.splitlines(True)
+    for lineno, col_offset, slots in sorted(insertions, reverse=True):
+        declaration = '{}__slots__ = {!r}\n'.format(' ' * col_offset, tuple(slots))
+        lines.insert(lineno - 1, declaration)
+    return ''.join(lines)
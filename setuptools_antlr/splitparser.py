@@ -0,0 +1,249 @@
+"""Splits generated parser modules into submodules which are imported when they are used first.
+
+A generated parser module defines the context classes and the method of every rule and the
+serialized ATN, which is deserialized at import. For large grammars importing the parser takes
+most of the startup time of a tool, even if it only parses a few rules. This post-processor moves
+the context classes and the method of each rule and the ATN into submodules of a private package
+next to the parser module, e.g. ``_FooParser/expr.py`` and ``_FooParser/_atn.py``. The parser
+class keeps a placeholder for each moved name, which imports its submodule when it's accessed
+first and replaces itself by the definitions of the submodule::
+
+    from foobar.dsl.foo.FooParser import FooParser
+
+    FooParser.ExprContext   # imports _FooParser/expr.py
+    parser.expr()           # also imports _FooParser/_atn.py when the parser is created
+
+Annotations referring to context classes are quoted, so importing listeners and visitors doesn't
+import the submodules of all rules.
+"""
+import ast
+import logging
+import pathlib
+import re
+import string
+import typing
+
+logger = logging.getLogger(__name__)
+
+ATN_PART = '_atn'
+
+# class attributes of the parser moved into the submodule of the ATN
+_ATN_ATTRIBUTES = ('atn', 'decisionsToDFA')
+
+_ATN_FUNCTION = 'serializedATN'
+
+_LOADER_TEMPLATE = string.Template('''import importlib
+
+# package of the submodules defining the rules and the ATN of ${parser}
+_PARTS_PACKAGE = __name__[:__name__.rfind('.') + 1] + '${package}'
+
+
+def ${atn_function}():
+    return importlib.import_module(_PARTS_PACKAGE + '.${atn_part}').${atn_function}()
+
+
+class _Part(object):
+    """Placeholder of a name of ${parser} defined in a submodule. The submodule is imported when
+    the name is accessed first and all names it defines replace their placeholders.
+    """
+
+    __slots__ = ('name', 'module')
+
+    def __init__(self, name, module):
+        self.name = name
+        self.module = module
+
+    def __get__(self, instance, owner):
+        module = importlib.import_module(_PARTS_PACKAGE + '.' + self.module)
+        for name in module.__all__:
+            setattr(${parser}, name, getattr(module, name))
+        return getattr(owner if instance is None else instance, self.name)
+
+
+''')
+
+_PART_TEMPLATE = string.Template('''${comment}
+# ${description} of ${parser}, split by setuptools-antlr
+from ..${parser} import *
+
+__all__ = [${names}]
+
+
+${body}''')
+
+_PACKAGE_TEMPLATE = string.Template('''"""Rules and ATN of ${parser} imported on first use.
+
+Generated by setuptools-antlr, don't edit.
+"""
+''')
+
+_CONTEXT_ANNOTATION = re.compile(r'(:\s*)(\w+\.\w+Context)\b')
+
+
+def get_parts_package(parser_class: str) -> str:
+    """Determines the name of the package containing the submodules split from a parser module.
+
+    :param parser_class: name of parser class, which is also the name of its module
+    :return: name of package
+    """
+    return '_' + parser_class
+
+
+def _find_parser_class(tree: ast.Module) -> typing.Tuple[ast.ClassDef, typing.List[str]]:
+    """Searches for the parser class of a module and reads the names of its rules.
+
+    :param tree: syntax tree of a generated parser module
+    :return: the parser class and names of rules or None if there's no parser class
+    """
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) and \
+                    any(isinstance(t, ast.Name) and t.id == 'ruleNames' for t in statement.targets):
+                return node, ast.literal_eval(statement.value)
+    return None, None
+
+
+def _get_first_line(node: ast.AST) -> int:
+    """Determines the first line of a statement including decorators.
+
+    :param node: a statement
+    :return: line number
+    """
+    return min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+
+
+def _assign_parts(parser: ast.ClassDef,
+                  rules: typing.List[str]) -> typing.Dict[int, typing.Tuple[str, typing.List[str]]]:
+    """Assigns the statements of the parser class to the submodules they are moved into.
+
+    :param parser: parser class
+    :param rules: names of rules
+    :return: submodule and defined names of each moved statement by index in the class body
+    """
+    context_rules = {r[0].upper() + r[1:] + 'Context': r for r in rules}
+    parts = {}
+    for index, node in enumerate(parser.body):
+        if isinstance(node, ast.ClassDef):
+            rule = context_rules.get(node.name)
+            if rule is None and len(node.bases) == 1 and isinstance(node.bases[0], ast.Name):
+                # context of a labelled alternative
+                rule = context_rules.get(node.bases[0].id)
+            if rule is not None:
+                parts[index] = (rule, [node.name])
+        elif isinstance(node, ast.FunctionDef) and node.name in rules:
+            parts[index] = (node.name, [node.name])
+        elif isinstance(node, ast.Assign):
+            names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+            if names and all(n in _ATN_ATTRIBUTES for n in names):
+                parts[index] = (ATN_PART, names)
+    return parts
+
+
+def _quote_annotations(node: ast.AST, names: typing.Set[str], lines: typing.List[str]):
+    """Quotes annotations of a statement consisting of a moved name, which isn't defined in the
+    class body anymore.
+
+    :param node: a statement in the class body
+    :param names: moved names
+    :param lines: lines of source code modified in place
+    """
+    annotations = []
+    for child in ast.walk(node):
+        if isinstance(child, ast.arg) and child.annotation is not None:
+            annotations.append(child.annotation)
+        elif isinstance(child, ast.FunctionDef) and child.returns is not None:
+            annotations.append(child.returns)
+    for annotation in sorted(annotations, key=lambda a: (a.lineno, a.col_offset), reverse=True):
+        if isinstance(annotation, ast.Name) and annotation.id in names:
+            line = lines[annotation.lineno - 1]
+            start = annotation.col_offset
+            end = start + len(annotation.id)
+            lines[annotation.lineno - 1] = '{}{!r}{}'.format(line[:start], annotation.id,
+                                                             line[end:])
+
+
+def _dedent(lines: typing.List[str], indent: str) -> typing.List[str]:
+    """Removes the indentation of the class body from lines.
+
+    :param lines: lines of source code
+    :param indent: indentation of the class body
+    :return: dedented lines
+    """
+    return [line[len(indent):] if line.startswith(indent) else line.lstrip(' \t')
+            for line in lines]
+
+
+def split_parser(source: str, output_dir: pathlib.Path) -> str:
+    """Moves the context classes and methods of all rules and the serialized ATN of a generated
+    parser module into submodules, which are written into a package in the output directory.
+
+    :param source: source code of a generated parser module
+    :param output_dir: directory containing the generated parser module
+    :return: source code of the parser module with placeholders of moved names
+    """
+    tree = ast.parse(source)
+    parser, rules = _find_parser_class(tree)
+    if parser is None:
+        logger.warning('parser module isn\'t split, because it doesn\'t define a parser class')
+        return source
+    lines = source.splitlines(True)
+    module_starts = [_get_first_line(n) for n in tree.body] + [len(lines) + 1]
+    class_end = next(s for s in module_starts if s > parser.lineno) - 1
+    body_starts = [_get_first_line(n) for n in parser.body] + [class_end + 1]
+    indent = ' ' * parser.body[0].col_offset
+
+    parts = _assign_parts(parser, rules)
+    moved = set(n for _, names in parts.values() for n in names)
+    segments = {}
+    body = []
+    for index, node in enumerate(parser.body):
+        segment = lines[body_starts[index] - 1:body_starts[index + 1] - 1]
+        if index not in parts:
+            _quote_annotations(node, moved, lines)
+            body.extend(lines[body_starts[index] - 1:body_starts[index + 1] - 1])
+            continue
+        part, names = parts[index]
+        segments.setdefault(part, ([], []))
+        segments[part][0].extend(names)
+        segments[part][1].extend(_dedent(segment, indent))
+        body.extend('{}{} = _Part({!r}, {!r})\n'.format(indent, n, n, part) for n in names)
+        if not segment[-1].strip() and parts.get(index + 1, (None,))[0] != part:
+            body.append('\n')
+
+    # serialized ATN is moved with the attributes deserializing it
+    header = lines[:_get_first_line(parser) - 1]
+    for index, node in enumerate(tree.body):
+        if isinstance(node, ast.FunctionDef) and node.name == _ATN_FUNCTION:
+            start, end = _get_first_line(node) - 1, module_starts[index + 1] - 1
+            segments.setdefault(ATN_PART, ([], []))[1][0:0] = lines[start:end]
+            del header[start:end]
+            break
+
+    package = get_parts_package(parser.name)
+    package_dir = pathlib.Path(output_dir, package)
+    package_dir.mkdir(exist_ok=True)
+    pathlib.Path(package_dir, '__init__.py').write_text(
+        _PACKAGE_TEMPLATE.substitute(parser=parser.name), encoding='utf-8')
+    comment = lines[0].rstrip() if lines[0].startswith('#') else '# Generated by ANTLR'
+    for part, (names, part_lines) in segments.items():
+        description = 'ATN' if part == ATN_PART else 'Rule {}'.format(part)
+        pathlib.Path(package_dir, part + '.py').write_text(_PART_TEMPLATE.substitute(
+            comment=comment, description=description, parser=parser.name,
+            names=', '.join(repr(n) for n in names), body=''.join(part_lines)), encoding='utf-8')
+
+    loader = _LOADER_TEMPLATE.substitute(parser=parser.name, package=package, atn_part=ATN_PART,
+                                         atn_function=_ATN_FUNCTION)
+    class_lines = lines[_get_first_line(parser) - 1:body_starts[0] - 1]
+    return ''.join(header + [loader] + class_lines + body + lines[class_end:])
+
+
+def quote_context_annotations(source: str) -> str:
+    """Quotes annotations referring to context classes of a parser, e.g. in generated listeners
+    and visitors, so that they don't import the submodules of a split parser.
+
+    :param source: source code of a generated module
+    :return: the modified source code
+    """
+    return _CONTEXT_ANNOTATION.sub(lambda m: '{}{!r}'.format(m.group(1), m.group(2)), source)
@@ -0,0 +1,223 @@
+"""Creates streaming modules which are generated into the packages of lexers.
+
+The input streams of the ANTLR runtime decode the whole input into memory at once. A streaming
+module provides a memory mapped input stream decoding incrementally and keeping only a bounded
+window of characters, together with a token iterator for lexer-only use cases::
+
+    from foobar.dsl.foo.streaming import iter_tokens
+
+    for token in iter_tokens('huge.log'):
+        ...
+"""
+import string
+
+STREAMING_MODULE = 'streaming.py'
+
+_STREAMING_TEMPLATE = string.Template('''"""Lexes large inputs of the ${grammar} grammar.
+
+Generated by setuptools-antlr, don't edit.
+
+``MappedInputStream`` memory maps an input file and decodes it incrementally in chunks. Characters
+before the current token are discarded, so memory stays flat regardless of input size. Therefore
+tokens have to copy their text, which is ensured by ``create_lexer``. ``iter_tokens`` emits tokens
+one by one without buffering them.
+"""
+import codecs
+import mmap
+
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import Token
+
+${lexer_import}
+
+LEXER = ${lexer_class}
+
+
+class MappedInputStream(object):
+    """A character stream memory mapping a file and decoding it incrementally."""
+
+    def __init__(self, path, encoding='utf-8', errors='strict', chunk_size=65536):
+        """Initializes a new MappedInputStream object.
+
+        :param path: path of input file
+        :param encoding: encoding of input file
+        :param errors: error handling scheme of decoder
+        :param chunk_size: number of bytes decoded at once
+        """
+        self.name = str(path)
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors)
+        with open(self.name, 'rb') as f:
+            size = f.seek(0, 2)
+            # empty files can't be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._position = 0
+        self._eof = False
+        # decoded characters and their code points starting at index _offset
+        self._buffer = ''
+        self._data = []
+        self._offset = 0
+        self._index = 0
+        self._marks = 0
+        self._mark_index = 0
+
+    @property
+    def sourceName(self):
+        return self.name
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def size(self):
+        """Returns the number of characters decoded so far, which is the size of the input after
+        end of input was reached."""
+        return self._offset + len(self._buffer)
+
+    def _fill(self, index):
+        """Decodes chunks until character at index is available or end of input is reached.
+
+        :param index: index of character
+        :return: True if character is available
+        """
+        while index >= self._offset + len(self._data):
+            if self._eof:
+                return False
+            chunk = self._map[self._position:self._position + self._chunk_size]
+            self._position += len(chunk)
+            self._eof = self._position >= len(self._map)
+            text = self._decoder.decode(chunk, final=self._eof)
+            self._buffer += text
+            self._data.extend(map(ord, text))
+        return True
+
+    def _discard(self):
+        """Discards characters which can't be requested anymore."""
+        start = self._mark_index if self._marks else self._index
+        if start - self._offset >= self._chunk_size:
+            self._buffer = self._buffer[start - self._offset:]
+            del self._data[:start - self._offset]
+            self._offset = start
+
+    def reset(self):
+        self.seek(0)
+
+    def consume(self):
+        if self._index - self._offset >= len(self._data) and not self._fill(self._index):
+            raise Exception('cannot consume EOF')
+        self._index += 1
+        if not self._marks:
+            self._discard()
+
+    def LA(self, offset):
+        if offset > 0:
+            pos = self._index + offset - 1 - self._offset
+            if pos < len(self._data):
+                return self._data[pos]
+        elif offset == 0:
+            return 0
+        else:
+            pos = self._index + offset - self._offset
+        if pos < 0 or not self._fill(pos + self._offset):
+            return Token.EOF
+        return self._data[pos]
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+    def mark(self):
+        if not self._marks:
+            self._mark_index = self._index
+        self._marks += 1
+        return -self._marks
+
+    def release(self, marker):
+        self._marks -= 1
+        if not self._marks:
+            self._discard()
+
+    def seek(self, index):
+        if index < self._offset:
+            raise ValueError('can\\'t seek to {}, input before {} was discarded'.format(
+                index, self._offset))
+        if index > self._index:
+            # seek forward only until end of input
+            self._fill(index - 1)
+            index = min(index, self.size)
+        self._index = index
+
+    def getText(self, start, stop):
+        if start < self._offset:
+            raise ValueError('text at {} was discarded'.format(start))
+        self._fill(stop)
+        return self._buffer[start - self._offset:stop - self._offset + 1]
+
+    def close(self):
+        """Unmaps input file."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _CopyingTokenFactory(CommonTokenFactory):
+    """A token factory copying the texts of all tokens except EOF, whose text is derived from its
+    type like the text of tokens which aren't copied."""
+
+    def __init__(self):
+        super().__init__(copyText=True)
+
+    def create(self, source, type, text, channel, start, stop, line, column):
+        token = super().create(source, type, text, channel, start, stop, line, column)
+        if type == Token.EOF and text is None:
+            token._text = None
+        return token
+
+
+def create_lexer(stream):
+    """Creates a lexer for a streaming input. Tokens copy their text, because the text isn't
+    available from the input stream anymore after the token was emitted.
+
+    :param stream: a character stream
+    :return: a ${lexer_class} lexer
+    """
+    lexer = LEXER(stream)
+    lexer._factory = _CopyingTokenFactory()
+    return lexer
+
+
+def iter_tokens(path, encoding='utf-8', channel=None, chunk_size=65536):
+    """Lexes a file and emits its tokens one by one.
+
+    :param path: path of input file
+    :param encoding: encoding of input file
+    :param channel: emit only tokens of this channel or None to emit tokens of all channels
+    :param chunk_size: number of bytes decoded at once
+    :return: an iterator of tokens, the EOF token isn't emitted
+    """
+    with MappedInputStream(path, encoding, chunk_size=chunk_size) as stream:
+        lexer = create_lexer(stream)
+        while True:
+            token = lexer.nextToken()
+            if token.type == Token.EOF:
+                return
+            if channel is None or token.channel == channel:
+                yield token
+''')
+
+
+def create_streaming_module(grammar: str, lexer_import: str, lexer_class: str) -> str:
+    """Creates the source code of a streaming module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :return: source code of streaming module
+    """
+    return _STREAMING_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                          lexer_class=lexer_class)
@@ -0,0 +1,329 @@
+"""Creates token store modules which are generated into the packages of lexers.
+
+A ``CommonTokenStream`` keeps a ``CommonToken`` object for every token of the input. A token store
+module provides a token stream keeping the attributes of all tokens in typed arrays instead and a
+token factory reusing a single token object while the stream fetches tokens from the lexer. Token
+objects are created only when the parser or user code accesses them::
+
+    from foobar.dsl.foo.tokenstore import create_token_stream
+
+    tokens = create_token_stream(lexer)
+    parser = FooParser(tokens)
+"""
+import string
+
+TOKEN_STORE_MODULE = 'tokenstore.py'
+
+_TOKEN_STORE_TEMPLATE = string.Template('''"""Stores ${grammar} tokens in typed arrays.
+
+Generated by setuptools-antlr, don't edit.
+
+``TokenStoreStream`` is a drop-in replacement of ``CommonTokenStream``. The type, channel, start
+and stop index, line and column of each token are appended to the arrays of a ``TokenStore``. Token
+objects are created when they are accessed. The objects of the most recently accessed tokens are
+cached, so the parser gets the same object for a token while it's building the parse tree. A token
+accessed again much later is created again. Lookahead by type and the search for tokens on a
+channel read the arrays directly, so tokens on hidden channels are never created while parsing.
+
+``TokenStoreFactory`` reuses a single token object for all tokens emitted by the lexer while the
+stream fetches tokens. It stops reusing the object as soon as the lexer emits a token before the
+previous one was fetched, e.g. if it queues tokens. Lexers keeping references to emitted tokens
+across calls of ``nextToken`` have to disable reuse.
+"""
+import array
+
+from antlr4 import CommonTokenStream
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import CommonToken, Token
+from antlr4.error.Errors import IllegalStateException
+
+${lexer_import}
+
+LEXER = ${lexer_class}
+
+# number of cached token objects, a power of two
+CACHE_SIZE = 64
+
+
+class TokenStore(object):
+    """A sequence of tokens stored in typed arrays."""
+
+    def __init__(self):
+        self.types = array.array('i')
+        self.channels = array.array('i')
+        self.starts = array.array('q')
+        self.stops = array.array('q')
+        self.lines = array.array('i')
+        self.columns = array.array('i')
+        # token source and input stream shared by all tokens, texts and sources deviating from it
+        self.source = CommonToken.EMPTY_SOURCE
+        self.texts = {}
+        self.sources = {}
+        # recently accessed tokens at their index modulo CACHE_SIZE
+        self._cache = [None] * CACHE_SIZE
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.types)))]
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError('token index out of range')
+        return self.get(index)
+
+    def get(self, index):
+        """Returns the token at a valid index. The token object is created unless it's cached.
+
+        :param index: index of token
+        :return: a token
+        """
+        slot = index & (CACHE_SIZE - 1)
+        token = self._cache[slot]
+        if token is None or token.tokenIndex != index:
+            # bypasses the constructors, attributes are assigned in the same order to share keys
+            token = CommonToken.__new__(CommonToken)
+            token.source = self.sources.get(index, self.source)
+            token.type = self.types[index]
+            token.channel = self.channels[index]
+            token.start = self.starts[index]
+            token.stop = self.stops[index]
+            token.tokenIndex = index
+            token.line = self.lines[index]
+            token.column = self.columns[index]
+            token._text = self.texts.get(index)
+            self._cache[slot] = token
+        return token
+
+    def append(self, token):
+        """Appends the attributes of a token.
+
+        :param token: a token, which may be reused afterwards
+        """
+        index = len(self.types)
+        self.types.append(token.type)
+        self.channels.append(token.channel)
+        self.starts.append(token.start)
+        self.stops.append(token.stop)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        if token.source is not self.source:
+            if not index:
+                self.source = token.source
+            else:
+                self.sources[index] = token.source
+        if token._text is not None:
+            self.texts[index] = token._text
+
+    def text(self, index):
+        """Returns the text of a token without creating a token object.
+
+        :param index: index of token
+        :return: text of token
+        """
+        if index in self.texts:
+            return self.texts[index]
+        if self.types[index] == Token.EOF:
+            return '<EOF>'
+        return self.sources.get(index, self.source)[1].getText(self.starts[index],
+                                                                self.stops[index])
+
+
+class TokenStoreFactory(CommonTokenFactory):
+    """A token factory reusing a single token object while a TokenStoreStream fetches tokens."""
+
+    def __init__(self, recycle=True):
+        """Initializes a new TokenStoreFactory object.
+
+        :param recycle: flag whether the token object is reused
+        """
+        super().__init__()
+        self.recycle = recycle
+        self.fetching = False
+        self._token = None
+        self._free = False
+
+    def create(self, source, type, text, channel, start, stop, line, column):
+        if not (self.recycle and self.fetching):
+            return super().create(source, type, text, channel, start, stop, line, column)
+        token = self._token
+        if token is None:
+            token = self._token = CommonToken(source, type, channel, start, stop)
+        elif self._free:
+            token.source = source
+            token.type = type
+            token.channel = channel
+            token.start = start
+            token.stop = stop
+            token.tokenIndex = -1
+        else:
+            # the lexer holds the previous token, don't reuse it anymore
+            self.recycle = False
+            self._token = None
+            return super().create(source, type, text, channel, start, stop, line, column)
+        token.line = line
+        token.column = column
+        token.text = text
+        self._free = False
+        return token
+
+    def release(self, token):
+        """Releases a token after it was stored.
+
+        :param token: a token emitted by the lexer
+        """
+        if token is self._token:
+            self._free = True
+
+
+class TokenStoreStream(CommonTokenStream):
+    """A token stream storing tokens in typed arrays."""
+
+    def __init__(self, lexer, channel=Token.DEFAULT_CHANNEL):
+        super().__init__(lexer, channel)
+        self.tokens = TokenStore()
+
+    def setTokenSource(self, tokenSource):
+        super().setTokenSource(tokenSource)
+        self.tokens = TokenStore()
+
+    def sync(self, i):
+        n = i - len(self.tokens.types) + 1
+        return n <= 0 or self.fetch(n) >= n
+
+    def consume(self):
+        index = self.index
+        size = len(self.tokens.types)
+        if index < 0:
+            skip_eof_check = False
+        elif self.fetchedEOF:
+            skip_eof_check = index < size - 1
+        else:
+            skip_eof_check = index < size
+        if not skip_eof_check and self.LA(1) == Token.EOF:
+            raise IllegalStateException('cannot consume EOF')
+        if self.sync(index + 1):
+            self.index = self.nextTokenOnChannel(index + 1, self.channel)
+
+    def fetch(self, n):
+        if self.fetchedEOF:
+            return 0
+        factory = getattr(self.tokenSource, '_factory', None)
+        recycling = isinstance(factory, TokenStoreFactory)
+        if recycling:
+            factory.fetching = True
+        try:
+            tokens = self.tokens
+            for i in range(n):
+                token = self.tokenSource.nextToken()
+                token.tokenIndex = len(tokens)
+                tokens.append(token)
+                if recycling:
+                    factory.release(token)
+                if token.type == Token.EOF:
+                    self.fetchedEOF = True
+                    return i + 1
+            return n
+        finally:
+            if recycling:
+                factory.fetching = False
+
+    def LT(self, k):
+        self.lazyInit()
+        if k == 1:
+            return self.tokens.get(self.index)
+        if k <= 0:
+            return self.LB(-k) if k else None
+        index = self.index
+        for _ in range(k - 1):
+            if self.sync(index + 1):
+                index = self.nextTokenOnChannel(index + 1, self.channel)
+        return self.tokens.get(index)
+
+    def LA(self, i):
+        self.lazyInit()
+        if i == 1:
+            return self.tokens.types[self.index]
+        if i == 0:
+            return 0
+        if i < 0:
+            index = self.index
+            for _ in range(-i):
+                index = self.previousTokenOnChannel(index - 1, self.channel)
+            return self.tokens.types[index] if index >= 0 else 0
+        index = self.index
+        for _ in range(i - 1):
+            if self.sync(index + 1):
+                index = self.nextTokenOnChannel(index + 1, self.channel)
+        return self.tokens.types[index]
+
+    def nextTokenOnChannel(self, i, channel):
+        self.sync(i)
+        channels = self.tokens.channels
+        if i >= len(channels):
+            return -1
+        types = self.tokens.types
+        while channels[i] != channel:
+            if types[i] == Token.EOF:
+                return -1
+            i += 1
+            self.sync(i)
+        return i
+
+    def previousTokenOnChannel(self, i, channel):
+        channels = self.tokens.channels
+        while i >= 0 and channels[i] != channel:
+            i -= 1
+        return i
+
+    def getText(self, interval=None):
+        self.lazyInit()
+        self.fill()
+        tokens = self.tokens
+        if interval is None:
+            interval = (0, len(tokens) - 1)
+        start, stop = interval
+        if isinstance(start, Token):
+            start = start.tokenIndex
+        if isinstance(stop, Token):
+            stop = stop.tokenIndex
+        if start is None or stop is None or start < 0 or stop < 0:
+            return ''
+        stop = min(stop, len(tokens) - 1)
+        texts = []
+        for index in range(start, stop + 1):
+            if tokens.types[index] == Token.EOF:
+                break
+            texts.append(tokens.text(index))
+        return ''.join(texts)
+
+
+def create_token_stream(lexer, channel=Token.DEFAULT_CHANNEL, recycle=True):
+    """Creates a token stream storing the tokens of a lexer in typed arrays.
+
+    :param lexer: a ${lexer_class} lexer
+    :param channel: channel of tokens passed to the parser
+    :param recycle: flag whether the lexer may reuse a single token object
+    :return: a TokenStoreStream
+    """
+    lexer._factory = TokenStoreFactory(recycle)
+    return TokenStoreStream(lexer, channel)
+''')
+
+
+def create_token_store_module(grammar: str, lexer_import: str, lexer_class: str) -> str:
+    """Creates the source code of a token store module.
+
+    :param grammar: name of grammar
+    :param lexer_import: import statement of lexer
+    :param lexer_class: name of lexer class
+    :return: source code of token store module
+    """
+    return _TOKEN_STORE_TEMPLATE.substitute(grammar=grammar, lexer_import=lexer_import,
+                                            lexer_class=lexer_class)
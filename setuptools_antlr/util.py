@@ -64,3 +64,18 @@ def find_java(min_java_version: str) -> pathlib.Path:
 
     # java wasn't found on the system
     return None
+
+
+def which_java() -> pathlib.Path:
+    """Searches for a Java executable set in JAVA_HOME or PATH environment variables without
+    launching it. A Java executable located in JAVA_HOME will be preferred.
+
+    :return: a path to a Java executable or None if no executable was found
+    """
+    if 'JAVA_HOME' in os.environ:
+        java_exe = shutil.which('java', path=os.path.join(os.environ['JAVA_HOME'], 'bin'))
+        if java_exe:
+            return pathlib.Path(java_exe)
+
+    java_exe = shutil.which('java', path=None)
+    return pathlib.Path(java_exe) if java_exe else None
@@ -0,0 +1,473 @@
+"""Checks ANTLR grammars for structural errors before launching ANTLR.
+
+Launching Java takes longer than reading all grammars of a project, and ANTLR reports the errors
+of one grammar at a time. Each grammar file is tokenized in Python well enough to find simple
+mistakes:
+
+* a missing grammar declaration or a grammar name which doesn't match the file name,
+* unbalanced braces, parentheses and unterminated literals or comments,
+* a missing semicolon at the end of a rule, an option or a statement,
+* imported grammars and token vocabularies which can't be found and
+* parser grammars using tokens without setting a token vocabulary, neither in the grammar file
+  nor as grammar-level option passed to ANTLR.
+
+Actions and arguments are skipped like the ANTLR tool does, the content of actions isn't checked.
+The checks are conservative, grammars passing them can still be rejected by ANTLR.
+"""
+import collections
+import difflib
+import pathlib
+import re
+import typing
+
+from setuptools_antlr.generator import GenerationOptions
+from setuptools_antlr.grammar import AntlrGrammar
+
+GrammarError = collections.namedtuple('GrammarError', ['file', 'line', 'message'])
+GrammarError.__doc__ = 'A structural error found in a grammar before running ANTLR.'
+
+_Token = collections.namedtuple('_Token', ['kind', 'text', 'line'])
+
+_TOKEN_REGEX = re.compile(r"""
+    (?P<space>\s+)
+    |(?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<literal>'(?:\\.|[^'\\\n])*')
+    |(?P<argument>\[(?:\\.|[^\]\\])*\])
+    |(?P<id>[^\W\d]\w*)
+    |(?P<int>\d+)
+    |(?P<punct>::|->|\+=|\.\.|[^\s\w])
+""", re.VERBOSE | re.DOTALL)
+
+_RULE_MODIFIERS = ('public', 'private', 'protected', 'fragment')
+
+
+def _skip_quoted(content: str, pos: int) -> int:
+    """Skips a string or character literal inside an action. Unlike ANTLR literals never span
+    lines, so that a single quote e.g. in a comment of the target language doesn't hide the rest
+    of an action.
+
+    :param content: content of grammar file
+    :param pos: position of opening quote
+    :return: position after literal
+    """
+    quote = content[pos]
+    pos += 1
+    while pos < len(content) and content[pos] not in (quote, '\n'):
+        pos += 2 if content[pos] == '\\' else 1
+    return pos + 1
+
+
+def _scan_action(content: str, pos: int) -> typing.Optional[int]:
+    """Scans a possibly nested action skipping literals and comments of the target language.
+
+    :param content: content of grammar file
+    :param pos: position of opening brace
+    :return: position after closing brace or None if action isn't closed
+    """
+    depth = 0
+    while pos < len(content):
+        c = content[pos]
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if not depth:
+                return pos + 1
+        elif c in '"\'':
+            pos = _skip_quoted(content, pos)
+            continue
+        elif content.startswith('//', pos):
+            pos = content.find('\n', pos)
+            if pos == -1:
+                return None
+            continue
+        elif content.startswith('/*', pos):
+            end = content.find('*/', pos + 2)
+            if end == -1:
+                return None
+            pos = end + 2
+            continue
+        pos += 1
+    return None
+
+
+def _tokenize(content: str,
+              first_line: int=1) -> typing.Tuple[typing.List[_Token], typing.List[tuple]]:
+    """Splits the content of a grammar into tokens. Comments are dropped, actions including their
+    braces are returned as single tokens.
+
+    :param content: content of grammar file
+    :param first_line: line number of content
+    :return: tokens and lexical errors as tuples of line number and message
+    """
+    tokens = []
+    errors = []
+    pos = 0
+    line = first_line
+    while pos < len(content):
+        c = content[pos]
+        if c == '{':
+            end = _scan_action(content, pos)
+            if end is None:
+                errors.append((line, 'unbalanced braces, \'{\' isn\'t closed'))
+                break
+            kind = 'action'
+        elif content.startswith('/*', pos) and content.find('*/', pos + 2) == -1:
+            errors.append((line, 'comment isn\'t closed'))
+            break
+        else:
+            match = _TOKEN_REGEX.match(content, pos)
+            kind, end = match.lastgroup, match.end()
+            if c == '}':
+                errors.append((line, 'unbalanced braces, \'}\' isn\'t opened'))
+            elif c == '\'' and kind == 'punct':
+                errors.append((line, 'string literal isn\'t closed'))
+                end = content.find('\n', pos)
+                end = len(content) if end == -1 else end
+                kind = 'literal'
+        text = content[pos:end]
+        if kind not in ('space', 'comment'):
+            tokens.append(_Token(kind, text, line))
+        line += text.count('\n')
+        pos = end
+    return tokens, errors
+
+
+class _GrammarChecker(object):
+    """Checks the tokens of a single grammar."""
+
+    def __init__(self, grammar: AntlrGrammar, tokens: typing.List[_Token]):
+        """Initializes a new _GrammarChecker object.
+
+        :param grammar: an ANTLR grammar
+        :param tokens: tokens of grammar
+        """
+        self.grammar = grammar
+        self.tokens = tokens
+        self.pos = 0
+        self.errors = []
+        self.type = 'combined'
+        self.imports = []
+        self.options = {}
+        self.defined_tokens = set()
+        self.used_tokens = []
+
+    def _peek(self, offset: int=0) -> typing.Optional[_Token]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def _text(self, offset: int=0) -> typing.Optional[str]:
+        token = self._peek(offset)
+        return token.text if token else None
+
+    def _line(self) -> int:
+        """Returns the line of the current token or of the last token at the end of grammar."""
+        token = self._peek() or (self.tokens[-1] if self.tokens else None)
+        return token.line if token else 1
+
+    def _error(self, message: str, line: int=None):
+        self.errors.append((line or self._line(), message))
+
+    def _expect_semicolon(self, statement: str):
+        """Consumes the semicolon terminating a statement or reports it as missing."""
+        if self._text() == ';':
+            self.pos += 1
+        else:
+            previous = self.tokens[self.pos - 1] if self.pos else None
+            self._error('missing \';\' after {}'.format(statement),
+                        previous.line if previous else None)
+
+    def _is_rule_start(self, offset: int=0) -> bool:
+        """Checks whether a rule definition starts at a token. The header of a rule consists of
+        its name, arguments, return values, locals, exceptions, options and named actions.
+        """
+        token = self._peek(offset)
+        if token is None or token.kind != 'id':
+            return False
+        if token.text in _RULE_MODIFIERS:
+            following = self._peek(offset + 1)
+            return following is not None and following.kind == 'id'
+        offset += 1
+        while self._peek(offset):
+            following = self._peek(offset)
+            if following.kind == 'argument' or following.text in ('returns', 'locals'):
+                offset += 1
+            elif following.text == 'throws':
+                offset += 1
+                while self._peek(offset) and (self._peek(offset).kind == 'id' or
+                                              self._text(offset) in ('.', ',')):
+                    offset += 1
+            elif following.text in ('options', '@'):
+                offset += 1
+                while self._peek(offset) and self._peek(offset).kind != 'action' and \
+                        self._text(offset) not in (':', ';'):
+                    offset += 1
+                offset += 1
+            else:
+                break
+        return self._text(offset) == ':'
+
+    def check(self) -> typing.List[tuple]:
+        """Checks the structure of grammar.
+
+        :return: errors as tuples of line number and message
+        """
+        if not self._check_declaration():
+            return self.errors
+        self._check_prequel()
+        while self._peek():
+            if self._is_mode_start():
+                self.pos += 2
+                self._expect_semicolon('mode declaration')
+            elif self._is_rule_start():
+                self._check_rule()
+            else:
+                self._error('unexpected \'{}\', a rule definition is expected'.format(
+                    self._text()))
+                self._skip_statement()
+        return self.errors
+
+    def _skip_statement(self):
+        """Skips all tokens up to the next rule definition."""
+        self.pos += 1
+        while self._peek() and not self._is_rule_start():
+            self.pos += 1
+            if self._text(-1) == ';':
+                break
+
+    def _is_mode_start(self) -> bool:
+        """Checks whether a lexer mode is declared at the current token, unlike the lexer command
+        mode(<name>).
+        """
+        following = self._peek(1)
+        return self._text() == 'mode' and following is not None and following.kind == 'id'
+
+    def _check_declaration(self) -> bool:
+        """Checks the grammar declaration, which has to be the first statement.
+
+        :return: whether the grammar declaration was found
+        """
+        if self._text() in ('lexer', 'parser'):
+            self.type = self._text()
+            self.pos += 1
+        if self._text() != 'grammar':
+            self._error('grammar declaration \'grammar {};\' is missing'.format(
+                self.grammar.name))
+            return False
+        self.pos += 1
+        token = self._peek()
+        if token is None or token.kind != 'id':
+            self._error('grammar name is missing')
+            return False
+        if token.text != self.grammar.name:
+            self._error('grammar name {} doesn\'t match file name {}'.format(
+                token.text, self.grammar.path.name), token.line)
+        self.pos += 1
+        self._expect_semicolon('grammar declaration')
+        return True
+
+    def _check_prequel(self):
+        """Checks the statements preceding the rules of a grammar."""
+        while self._peek():
+            text = self._text()
+            if text == 'options' and self._peek(1) and self._peek(1).kind == 'action':
+                self._check_options(self._peek(1))
+                self.pos += 2
+            elif text in ('tokens', 'channels') and self._peek(1) and \
+                    self._peek(1).kind == 'action':
+                action = self._peek(1)
+                tokens, _ = _tokenize(action.text[1:-1], action.line)
+                self.defined_tokens.update(t.text for t in tokens if t.kind == 'id')
+                self.pos += 2
+            elif text == 'import':
+                self._check_import()
+            elif text == '@':
+                # named actions e.g. @header or @parser::members
+                self.pos += 1
+                while self._peek() and self._peek().kind != 'action' and \
+                        not self._is_rule_start():
+                    self.pos += 1
+                if self._peek() and self._peek().kind == 'action':
+                    self.pos += 1
+            else:
+                return
+
+    def _check_options(self, action: _Token):
+        """Checks the options of a grammar and records them.
+
+        :param action: token of options block
+        """
+        tokens, _ = _tokenize(action.text[1:-1], action.line)
+        index = 0
+        while index < len(tokens):
+            name = tokens[index]
+            if index + 2 >= len(tokens) or tokens[index + 1].text != '=':
+                self._error('option has to be set as <name> = <value>;', name.line)
+                return
+            index += 2
+            values = [tokens[index]]
+            index += 1
+            # qualified names e.g. superClass = foo.Bar
+            while index + 1 < len(tokens) and tokens[index].text == '.':
+                values.extend(tokens[index:index + 2])
+                index += 2
+            self.options[name.text] = (''.join(t.text for t in values), name.line)
+            if index < len(tokens) and tokens[index].text == ';':
+                index += 1
+            else:
+                self._error('missing \';\' after option {}'.format(name.text),
+                            values[-1].line)
+
+    def _check_import(self):
+        """Checks an import statement and records the imported grammars."""
+        self.pos += 1
+        while self._peek() and self._peek().kind == 'id' and not self._is_rule_start():
+            token = self._peek()
+            self.pos += 1
+            # imports may be aliased e.g. import Foo = Bar
+            if self._text() == '=' and self._peek(1) and self._peek(1).kind == 'id':
+                token = self._peek(1)
+                self.pos += 2
+            self.imports.append(token)
+            if self._text() != ',':
+                break
+            self.pos += 1
+        self._expect_semicolon('import statement')
+
+    def _check_rule(self):
+        """Checks the definition of a rule up to its terminating semicolon."""
+        if self._text() in _RULE_MODIFIERS:
+            self.pos += 1
+        name = self._peek()
+        while self._peek() and self._text() not in (':', ';'):
+            self.pos += 1
+        if self._text() != ':':
+            self._error('missing \':\' after name of rule {}'.format(name.text), name.line)
+            self._skip_statement()
+            return
+        self.pos += 1
+
+        parentheses = []
+        while True:
+            token = self._peek()
+            if token is None or self._is_rule_start() or self._is_mode_start():
+                self._error('missing \';\' at end of rule {}'.format(name.text),
+                            self.tokens[self.pos - 1].line)
+                break
+            self.pos += 1
+            if token.text == '(':
+                parentheses.append(token)
+            elif token.text == ')':
+                if parentheses:
+                    parentheses.pop()
+                else:
+                    self._error('unbalanced parentheses, \')\' isn\'t opened', token.line)
+            elif token.text == ';':
+                break
+            elif token.kind == 'literal' or token.kind == 'id' and token.text[0].isupper() and \
+                    token.text != 'EOF':
+                self.used_tokens.append(token)
+        for token in parentheses:
+            self._error('unbalanced parentheses, \'(\' isn\'t closed', token.line)
+
+        # exception handlers of parser rules
+        while self._text() in ('catch', 'finally'):
+            self.pos += 1
+            while self._peek() and self._peek().kind in ('argument', 'action'):
+                self.pos += 1
+
+
+def _suggest(name: str, names: typing.Iterable[str]) -> str:
+    """Suggests a similar name for a misspelled name.
+
+    :param name: a name which can't be resolved
+    :param names: all known names
+    :return: a hint or an empty string if there's no similar name
+    """
+    matches = difflib.get_close_matches(name, sorted(names), n=1)
+    return ', did you mean {}?'.format(matches[0]) if matches else ''
+
+
+def validate_grammar(grammar: AntlrGrammar, known_grammars: typing.Iterable[AntlrGrammar]=(),
+                     imported: bool=False,
+                     grammar_options: typing.Dict[str, str]=None) -> typing.List[GrammarError]:
+    """Checks a grammar for structural errors. Unreadable grammars are left up to ANTLR.
+
+    :param grammar: an ANTLR grammar
+    :param known_grammars: all grammars imports and token vocabularies are resolved against
+    :param imported: whether the grammar is imported by another grammar, which provides its tokens
+    :param grammar_options: grammar-level options passed to ANTLR, which override the options set
+                            in the grammar file
+    :return: a list of errors ordered by line
+    """
+    try:
+        with grammar.path.open() as f:
+            content = f.read()
+    except IOError:
+        return []
+
+    # a byte order mark isn't part of the grammar
+    tokens, errors = _tokenize(content.lstrip('\ufeff'))
+    checker = _GrammarChecker(grammar, tokens)
+    errors.extend(checker.check())
+
+    names = {g.name for g in known_grammars}
+    for token in checker.imports:
+        if token.text not in names:
+            errors.append((token.line, 'imported grammar {} isn\'t found{}'.format(
+                token.text, _suggest(token.text, names))))
+
+    # a token vocabulary passed to ANTLR overrides the one set in the grammar file and is resolved
+    # by ANTLR itself e.g. in its library directory
+    token_vocab_passed = bool((grammar_options or {}).get('tokenVocab'))
+    token_vocab, line = checker.options.get('tokenVocab', (None, None))
+    if token_vocab and not token_vocab_passed:
+        tokens_file = pathlib.Path(grammar.path.parent, token_vocab + '.tokens')
+        if token_vocab not in names and not tokens_file.exists():
+            errors.append((line, 'token vocabulary {} isn\'t found{}'.format(
+                token_vocab, _suggest(token_vocab, names))))
+    elif checker.type == 'parser' and not imported and not token_vocab_passed:
+        undefined = [t for t in checker.used_tokens if t.text not in checker.defined_tokens]
+        if undefined:
+            errors.append((undefined[0].line, 'parser grammar uses token {} but doesn\'t set '
+                                              'option tokenVocab'.format(undefined[0].text)))
+
+    return [GrammarError(grammar.path, line, message) for line, message in sorted(errors)]
+
+
+def validate_grammars(grammars: typing.Iterable[AntlrGrammar],
+                      known_grammars: typing.Iterable[AntlrGrammar]=None,
+                      options: GenerationOptions=None) -> typing.List[GrammarError]:
+    """Checks grammars and the grammars imported by them for structural errors.
+
+    :param grammars: ANTLR grammars
+    :param known_grammars: all grammars imports and token vocabularies are resolved against,
+                           defaults to the checked grammars
+    :param options: generation options providing the grammar-level options of each grammar
+    :return: a list of errors ordered by grammar and line
+    """
+    options = options or GenerationOptions()
+    grammars = list(grammars)
+    known_grammars = grammars if known_grammars is None else list(known_grammars)
+    imported = {d for g in known_grammars for d in g.dependencies}
+
+    checked = []
+    for grammar in grammars:
+        for g in [grammar] + list(grammar.walk()):
+            if g not in checked:
+                checked.append(g)
+
+    errors = []
+    for grammar in checked:
+        errors.extend(validate_grammar(grammar, known_grammars, grammar in imported,
+                                       options.for_grammar(grammar).grammar_options))
+    return errors
+
+
+def format_errors(errors: typing.List[GrammarError]) -> str:
+    """Formats errors like compilers do, one error per line.
+
+    :param errors: errors found in grammars
+    :return: errors prefixed by file name and line number
+    """
+    return '\n'.join('{}:{}: {}'.format(e.file, e.line, e.message) for e in errors)
@@ -0,0 +1,210 @@
+"""Creates walker modules which are generated into the packages of parsers.
+
+The ``ParseTreeWalker`` of the ANTLR runtime walks parse trees recursively and dispatches each node
+through the context and the listener. A walker module walks iteratively using an explicit stack,
+so deep trees don't exceed the recursion limit. It dispatches through a table of bound listener
+methods per context class and skips subtrees which can't contain a node the listener handles::
+
+    from foobar.dsl.foo.walker import walk
+
+    walk(listener, tree)
+"""
+import string
+
+WALKER_MODULE = 'walker.py'
+
+_WALKER_TEMPLATE = string.Template('''"""Walks parse trees of the ${grammar} grammar iteratively.
+
+Generated by setuptools-antlr, don't edit.
+
+``walk`` calls the same listener methods in the same order as ``ParseTreeWalker.DEFAULT.walk``.
+Nodes are walked with an explicit stack instead of recursion, so the depth of trees is only limited
+by memory. Listener methods are looked up once per listener in a table indexed by context class.
+Methods a listener doesn't override aren't called. If a listener neither handles terminals, error
+nodes nor every rule, subtrees of rules which can't contain a rule the listener handles are
+skipped. The rules contained in a rule are determined from the ATN of the parser.
+"""
+from antlr4 import ParserRuleContext
+from antlr4.atn.Transition import RuleTransition
+from antlr4.tree.Tree import ErrorNode, ParseTreeListener, TerminalNode
+
+${parser_import}
+${listener_import}
+
+PARSER = ${parser_class}
+LISTENER = ${listener_class}
+
+
+def _find_contexts():
+    """Determines rule index and listener method names of all context classes of the parser."""
+    rules = {n[0].upper() + n[1:] + 'Context': i for i, n in enumerate(PARSER.ruleNames)}
+    contexts = {}
+    # names of a split parser are resolved on access, so its class dictionary holds placeholders
+    for cls in (getattr(PARSER, n) for n in dir(PARSER)):
+        if not isinstance(cls, type) or not issubclass(cls, ParserRuleContext):
+            continue
+        rule = next((rules[c.__name__] for c in cls.__mro__ if c.__name__ in rules), None)
+        if 'enterRule' in vars(cls):
+            name = cls.__name__[:-len('Context')]
+            contexts[cls] = (rule, 'enter' + name, 'exit' + name)
+        else:
+            # contexts of rules with labelled alternatives don't dispatch themselves
+            contexts[cls] = (rule, None, None)
+    return contexts
+
+
+def _find_contained_rules():
+    """Determines for each rule the rules which may occur in its subtrees including itself."""
+    invoked = [{i} for i in range(len(PARSER.ruleNames))]
+    for state in PARSER.atn.states:
+        if state is None:
+            continue
+        for transition in state.transitions:
+            if isinstance(transition, RuleTransition):
+                invoked[state.ruleIndex].add(transition.target.ruleIndex)
+
+    contained = []
+    for rule in range(len(invoked)):
+        rules = set()
+        stack = [rule]
+        while stack:
+            current = stack.pop()
+            if current not in rules:
+                rules.add(current)
+                stack.extend(invoked[current])
+        contained.append(frozenset(rules))
+    return contained
+
+
+# rule index, enter method name and exit method name by context class
+CONTEXTS = _find_contexts()
+# rules which may occur in the subtrees of each rule
+CONTAINED_RULES = _find_contained_rules()
+
+# functions of listeners which do nothing
+_NO_OPS = frozenset(f for c in (ParseTreeListener, LISTENER) for f in vars(c).values())
+
+
+def _get_method(listener, name):
+    """Returns a bound method of a listener or None if the listener doesn't override it."""
+    method = getattr(listener, name, None) if name else None
+    if method is None or getattr(method, '__func__', None) in _NO_OPS:
+        return None
+    return method
+
+
+class TreeWalker(object):
+    """Walks parse trees with a dispatch table built for a listener."""
+
+    def __init__(self, listener):
+        """Initializes a new TreeWalker object.
+
+        :param listener: a ${listener_class}
+        """
+        self.listener = listener
+        self.visit_terminal = _get_method(listener, 'visitTerminal')
+        self.visit_error_node = _get_method(listener, 'visitErrorNode')
+        self.enter_every_rule = _get_method(listener, 'enterEveryRule')
+        self.exit_every_rule = _get_method(listener, 'exitEveryRule')
+
+        # enter and exit method by context class
+        self.methods = {}
+        handled = set()
+        for cls, (rule, enter, exit) in CONTEXTS.items():
+            methods = (_get_method(listener, enter), _get_method(listener, exit))
+            self.methods[cls] = methods
+            if methods != (None, None):
+                handled.add(rule)
+
+        # context classes whose subtrees can't contain a node handled by the listener
+        if self.visit_terminal or self.visit_error_node or self.enter_every_rule or \\
+                self.exit_every_rule:
+            self.skipped = frozenset()
+        else:
+            self.skipped = frozenset(c for c, (r, _, _) in CONTEXTS.items()
+                                     if r is not None and not CONTAINED_RULES[r] & handled)
+
+    def _get_methods(self, cls):
+        """Returns enter and exit method for a context class unknown to the parser."""
+        listener = self.listener
+        methods = (lambda ctx: ctx.enterRule(listener), lambda ctx: ctx.exitRule(listener))
+        self.methods[cls] = methods
+        return methods
+
+    def walk(self, tree):
+        """Walks a parse tree.
+
+        :param tree: a parse tree of the ${grammar} parser
+        """
+        methods = self.methods
+        skipped = self.skipped
+        visit_terminal = self.visit_terminal
+        visit_error_node = self.visit_error_node
+        enter_every_rule = self.enter_every_rule
+        exit_every_rule = self.exit_every_rule
+
+        # entries are nodes to enter or tuples of a context and its exit method to exit it
+        stack = [tree]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        while stack:
+            node = pop()
+            cls = type(node)
+            if cls is tuple:
+                node, exit = node
+                if exit:
+                    exit(node)
+                if exit_every_rule:
+                    exit_every_rule(node)
+                continue
+
+            entry = methods.get(cls)
+            if entry is None:
+                if isinstance(node, TerminalNode):
+                    if isinstance(node, ErrorNode):
+                        if visit_error_node:
+                            visit_error_node(node)
+                    elif visit_terminal:
+                        visit_terminal(node)
+                    continue
+                entry = self._get_methods(cls)
+            elif cls in skipped:
+                continue
+
+            enter, exit = entry
+            if enter_every_rule:
+                enter_every_rule(node)
+            if enter:
+                enter(node)
+            if exit or exit_every_rule:
+                push((node, exit))
+            if node.children:
+                extend(reversed(node.children))
+
+
+def walk(listener, tree):
+    """Walks a parse tree notifying a listener like ``ParseTreeWalker.DEFAULT.walk``.
+
+    :param listener: a ${listener_class}
+    :param tree: a parse tree of the ${grammar} parser
+    """
+    TreeWalker(listener).walk(tree)
+''')
+
+
+def create_walker_module(grammar: str, parser_import: str, parser_class: str,
+                         listener_class: str) -> str:
+    """Creates the source code of a walker module.
+
+    :param grammar: name of grammar
+    :param parser_import: import statement of parser
+    :param parser_class: name of parser class
+    :param listener_class: name of listener class, which is imported from the same package
+    :return: source code of walker module
+    """
+    return _WALKER_TEMPLATE.substitute(grammar=grammar, parser_import=parser_import,
+                                       parser_class=parser_class,
+                                       listener_import='from .{0} import {0}'.format(
+                                           listener_class),
+                                       listener_class=listener_class)
@@ -0,0 +1,228 @@
+"""Watches grammar source directories for changes.
+
+On Linux the inotify API of the kernel is used to get notified about changes. On all other systems
+the watched directories are polled.
+"""
+import ctypes
+import ctypes.util
+import os
+import pathlib
+import select
+import struct
+import sys
+import time
+import typing
+
+
+class PollingWatcher(object):
+    """Detects changes of grammar files by periodically comparing modification times of all grammar
+    files in the watched directories.
+    """
+
+    def __init__(self, file_ext: str, interval: float=0.5):
+        """Initializes a new PollingWatcher object.
+
+        :param file_ext: file extension of watched files
+        :param interval: time in seconds between two scans of watched directories
+        """
+        self.file_ext = file_ext
+        self.interval = interval
+        self._directories = set()
+        self._snapshot = {}
+
+    def _scan(self) -> typing.Dict[pathlib.Path, typing.Tuple[int, int]]:
+        """Collects modification time and size of all grammar files in watched directories.
+
+        :return: a dictionary mapping file paths to modification time and size
+        """
+        snapshot = {}
+        for directory in self._directories:
+            try:
+                entries = list(os.scandir(str(directory)))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith('.' + self.file_ext) and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[pathlib.Path(directory, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def watch(self, directories: typing.Iterable[pathlib.Path]):
+        """Sets the directories which are watched for changes.
+
+        :param directories: directories containing grammar files
+        """
+        self._directories = set(directories)
+        self._snapshot = self._scan()
+
+    def wait(self, timeout: float=None) -> typing.Set[pathlib.Path]:
+        """Waits until at least one grammar file was created, modified or deleted.
+
+        :param timeout: maximal time in seconds to wait or None to wait infinitely
+        :return: a set of changed grammar files, empty if timeout expired
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            snapshot = self._scan()
+            changed = {p for p in set(snapshot) | set(self._snapshot)
+                       if snapshot.get(p) != self._snapshot.get(p)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        """Stops watching."""
+        self._directories = set()
+        self._snapshot = {}
+
+
+class InotifyWatcher(object):
+    """Detects changes of grammar files using the inotify API of the Linux kernel.
+
+    :cvar _EVENT_MASK: inotify events which signal a changed file (IN_MOVED_FROM, IN_MOVED_TO,
+                       IN_CLOSE_WRITE, IN_CREATE, IN_DELETE)
+    :cvar _EVENT_HEADER: binary layout of an inotify event without name
+    """
+
+    _EVENT_MASK = 0x00000040 | 0x00000080 | 0x00000008 | 0x00000100 | 0x00000200
+
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, file_ext: str):
+        """Initializes a new InotifyWatcher object.
+
+        :param file_ext: file extension of watched files
+        """
+        self.file_ext = file_ext
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify instance couldn\'t be created')
+        self._watches = {}
+
+    @classmethod
+    def _load_libc(cls) -> ctypes.CDLL:
+        """Loads C library providing the inotify API.
+
+        :return: the C library
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        for function in ('inotify_init1', 'inotify_add_watch', 'inotify_rm_watch'):
+            if not hasattr(libc, function):
+                raise OSError('C library doesn\'t provide {}'.format(function))
+        return libc
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """Checks whether the inotify API is available on this system.
+
+        :return: flag whether inotify is supported
+        """
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            cls._load_libc()
+        except OSError:
+            return False
+        return True
+
+    def watch(self, directories: typing.Iterable[pathlib.Path]):
+        """Sets the directories which are watched for changes.
+
+        :param directories: directories containing grammar files
+        """
+        directories = {pathlib.Path(os.path.abspath(str(d))) for d in directories}
+
+        for wd, directory in list(self._watches.items()):
+            if directory not in directories:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+        watched = set(self._watches.values())
+        for directory in directories - watched:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)),
+                                              self._EVENT_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+
+    def _read_events(self) -> typing.Set[pathlib.Path]:
+        """Reads all pending events and returns the affected grammar files.
+
+        :return: a set of changed grammar files
+        """
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if wd in self._watches and name.endswith('.' + self.file_ext):
+                changed.add(pathlib.Path(self._watches[wd], name))
+        return changed
+
+    def wait(self, timeout: float=None) -> typing.Set[pathlib.Path]:
+        """Waits until at least one grammar file was created, modified or deleted.
+
+        :param timeout: maximal time in seconds to wait or None to wait infinitely
+        :return: a set of changed grammar files, empty if timeout expired
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            remaining = max(0, deadline - time.monotonic()) if deadline is not None else None
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            elif deadline is not None:
+                return set()
+
+    def close(self):
+        """Stops watching."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches = {}
+
+
+def create_watcher(file_ext: str, interval: float=0.5):
+    """Creates a watcher using inotify if it's available and falls back to polling otherwise.
+
+    :param file_ext: file extension of watched files
+    :param interval: polling interval in seconds if inotify isn't available
+    :return: a watcher
+    """
+    if InotifyWatcher.is_supported():
+        return InotifyWatcher(file_ext)
+    else:
+        return PollingWatcher(file_ext, interval)
+
+
+def wait_debounced(watcher, delay: float) -> typing.Set[pathlib.Path]:
+    """Waits for changes and collects further changes until no change was detected for the passed
+    delay. A burst of saves results in a single set of changed files.
+
+    :param watcher: a watcher
+    :param delay: quiet period in seconds which ends a burst of changes
+    :return: a set of changed grammar files
+    """
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(delay)
+        if not more:
+            return changed
+        changed |= more
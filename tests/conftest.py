@@ -0,0 +1,34 @@
+import importlib
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+PREGENERATED_DIR = pathlib.Path(__file__).parent / 'resources' / 'pregenerated'
+
+PACKAGE = 'expr_dsl'
+
+
+@pytest.fixture()
+def expr_helper(monkeypatch, tmpdir):
+    """Returns a function writing a helper module into a copy of the package of the Expr parser,
+    which was pregenerated from resources/pregenerated/Expr.g4, and importing it."""
+    pytest.importorskip('antlr4')
+    package_dir = pathlib.Path(str(tmpdir), PACKAGE)
+    package_dir.mkdir()
+    for path in PREGENERATED_DIR.glob('*.py'):
+        shutil.copy(str(path), str(package_dir))
+    pathlib.Path(package_dir, '__init__.py').touch()
+    monkeypatch.syspath_prepend(str(tmpdir))
+
+    def load(name: str, source: str):
+        pathlib.Path(package_dir, name + '.py').write_text(source)
+        importlib.invalidate_caches()
+        return importlib.import_module('{}.{}'.format(PACKAGE, name))
+
+    yield load
+
+    # each test imports the package from its own directory
+    for name in [n for n in sys.modules if n == PACKAGE or n.startswith(PACKAGE + '.')]:
+        del sys.modules[name]
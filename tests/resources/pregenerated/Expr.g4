@@ -0,0 +1,25 @@
+// Parser pregenerated by ANTLR 4.7.1 for testing generated helper modules without Java:
+// java -jar antlr-4.7.1-complete.jar -Dlanguage=Python3 Expr.g4
+grammar Expr;
+
+prog
+    : stat* EOF
+    ;
+
+stat
+    : ID '=' expr ';'                       # assign
+    | expr ';'                              # print
+    ;
+
+expr
+    : expr op=('*'|'/') expr                # mulDiv
+    | expr op=('+'|'-') expr                # addSub
+    | INT                                   # int
+    | ID                                    # id
+    | '(' expr ')'                          # parens
+    ;
+
+ID : [a-z]+ ;
+INT : [0-9]+ ;
+COMMENT : '#' ~[\n]* -> channel(HIDDEN) ;
+WS : [ \t\r\n]+ -> skip ;
@@ -0,0 +1,82 @@
+# Generated from Expr.g4 by ANTLR 4.7.1
+from antlr4 import *
+if __name__ is not None and "." in __name__:
+    from .ExprParser import ExprParser
+else:
+    from ExprParser import ExprParser
+
+# This class defines a complete listener for a parse tree produced by ExprParser.
+class ExprListener(ParseTreeListener):
+
+    # Enter a parse tree produced by ExprParser#prog.
+    def enterProg(self, ctx:ExprParser.ProgContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#prog.
+    def exitProg(self, ctx:ExprParser.ProgContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#assign.
+    def enterAssign(self, ctx:ExprParser.AssignContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#assign.
+    def exitAssign(self, ctx:ExprParser.AssignContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#print.
+    def enterPrint(self, ctx:ExprParser.PrintContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#print.
+    def exitPrint(self, ctx:ExprParser.PrintContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#parens.
+    def enterParens(self, ctx:ExprParser.ParensContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#parens.
+    def exitParens(self, ctx:ExprParser.ParensContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#addSub.
+    def enterAddSub(self, ctx:ExprParser.AddSubContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#addSub.
+    def exitAddSub(self, ctx:ExprParser.AddSubContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#id.
+    def enterId(self, ctx:ExprParser.IdContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#id.
+    def exitId(self, ctx:ExprParser.IdContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#int.
+    def enterInt(self, ctx:ExprParser.IntContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#int.
+    def exitInt(self, ctx:ExprParser.IntContext):
+        pass
+
+
+    # Enter a parse tree produced by ExprParser#mulDiv.
+    def enterMulDiv(self, ctx:ExprParser.MulDivContext):
+        pass
+
+    # Exit a parse tree produced by ExprParser#mulDiv.
+    def exitMulDiv(self, ctx:ExprParser.MulDivContext):
+        pass
+
+
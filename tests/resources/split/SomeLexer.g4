@@ -0,0 +1,6 @@
+// define a lexer grammar called SomeLexer
+lexer grammar SomeLexer;
+
+HELLO : 'hello' ;
+ID    : [a-z]+ ;
+WS    : [ \t\r\n]+ -> skip ;
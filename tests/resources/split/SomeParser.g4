@@ -0,0 +1,6 @@
+// define a parser grammar called SomeParser
+parser grammar SomeParser;
+
+options { tokenVocab = SomeLexer; }
+
+r   : HELLO ID ;
@@ -0,0 +1,70 @@
+import ast
+import json
+
+from setuptools_antlr.bench import create_bench_module
+
+
+def _get_assignments(source):
+    return {n.targets[0].id: n.value for n in ast.parse(source).body if isinstance(n, ast.Assign)}
+
+
+def test_create_bench_module_combined():
+    source = create_bench_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                 'from .FooParser import FooParser', 'FooParser')
+
+    compile(source, 'bench.py', 'exec')
+    assignments = _get_assignments(source)
+    assert 'from .FooLexer import FooLexer\nfrom .FooParser import FooParser\n' in source
+    assert assignments['GRAMMAR'].s == 'Foo'
+    assert assignments['LEXER'].id == 'FooLexer'
+    assert assignments['PARSER'].id == 'FooParser'
+
+
+def test_create_bench_module_lexer():
+    source = create_bench_module('FooLexer', 'from .FooLexer import FooLexer', 'FooLexer', None,
+                                 None)
+
+    compile(source, 'bench.py', 'exec')
+    assignments = _get_assignments(source)
+    assert assignments['LEXER'].id == 'FooLexer'
+    assert assignments['PARSER'].value is None
+
+
+def _load_bench(expr_helper):
+    return expr_helper('bench', create_bench_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+
+
+def test_bench(expr_helper, tmpdir):
+    bench = _load_bench(expr_helper)
+    samples = tmpdir.mkdir('samples')
+    samples.join('valid.expr').write('a = 1 + 2 * b; # comment\n(a - 3) / 4;\n')
+    samples.join('invalid.expr').write('a 1;\n')
+    samples.join('ignored.txt').write('')
+
+    results = bench.bench(samples, pattern='*.expr', repeat=2)
+
+    invalid, valid = results['files']
+    # tokens on hidden channels and EOF are counted
+    assert (valid['tokens'], valid['parse_errors']) == (18, 0)
+    assert (invalid['tokens'], invalid['parse_errors']) == (4, 1)
+    assert valid['predictions'] == valid['sll_predictions'] + valid['ll_predictions'] > 0
+    assert valid['lex_seconds'] > 0 and valid['parse_seconds'] > 0
+    assert results['total']['tokens'] == 22
+    assert results['total']['parse_errors'] == 1
+
+
+def test_bench_main(expr_helper, tmpdir):
+    bench = _load_bench(expr_helper)
+    sample = tmpdir.join('sample.expr')
+    sample.write('1;')
+    output = tmpdir.join('results.json')
+
+    exit_code = bench.main([str(sample), '--rule', 'stat', '--repeat', '1', '--output',
+                            str(output)])
+
+    assert exit_code == 0
+    results = json.loads(output.read())
+    assert results['rule'] == 'stat'
+    assert results['files'][0]['tokens'] == 3
@@ -0,0 +1,90 @@
+import pathlib
+import tarfile
+import unittest.mock
+
+import pytest
+import setuptools.dist
+
+from setuptools_antlr.build import AntlrBuildPyCommand, AntlrSdistCommand, get_generated_files
+from setuptools_antlr.command import AntlrCommand
+
+
+@pytest.fixture()
+def project(monkeypatch, tmpdir):
+    """A project with a grammar and a parser generated into a subpackage."""
+    monkeypatch.chdir(str(tmpdir))
+    package = tmpdir.mkdir('foo')
+    package.join('__init__.py').write('')
+    package.join('Foo.g4').write('grammar Foo;')
+    generated = package.mkdir('foo_dsl')
+    for name in ('__init__.py', 'FooParser.py', 'Foo.tokens', 'Foo.manifest.json', '.antlr.lock'):
+        generated.join(name).write('')
+    generated.mkdir('_FooParser').join('__init__.py').write('')
+    generated.join('_FooParser').join('expr.py').write('')
+    generated.mkdir('__pycache__').join('FooParser.cpython-36.pyc').write('')
+
+    grammar = unittest.mock.Mock()
+    grammar.name = 'Foo'
+    job = unittest.mock.Mock(grammar=grammar, package_dir=pathlib.Path('foo', 'foo_dsl'),
+                             inputs=[pathlib.Path('foo', 'Foo.g4')],
+                             outputs=['__init__.py', 'FooParser.py', 'Foo.tokens', '_FooParser',
+                                      'FooListener.py'])
+
+    def run(command):
+        command.jobs = [job]
+
+    monkeypatch.setattr(AntlrCommand, 'run', run)
+    return job
+
+
+def create_distribution():
+    return setuptools.dist.Distribution({
+        'script_name': 'setup.py',
+        'name': 'foo',
+        'version': '1.0',
+        'packages': ['foo'],
+        'cmdclass': {'antlr': AntlrCommand, 'build_py': AntlrBuildPyCommand,
+                     'sdist': AntlrSdistCommand}
+    })
+
+
+@pytest.mark.usefixtures('project')
+def test_get_generated_files(project):
+    files = get_generated_files(project)
+
+    assert [p.relative_to('foo/foo_dsl').as_posix() for p in files] == [
+        '__init__.py', 'FooParser.py', 'Foo.tokens', '_FooParser/__init__.py',
+        '_FooParser/expr.py', 'Foo.manifest.json']
+
+
+@pytest.mark.usefixtures('project')
+def test_build_py(tmpdir):
+    dist = create_distribution()
+    command = dist.get_command_obj('build_py')
+    command.build_lib = str(tmpdir.join('build'))
+    command.compile = 0
+    dist.run_command('build_py')
+
+    build_dir = pathlib.Path(str(tmpdir), 'build', 'foo', 'foo_dsl')
+    assert sorted(p.relative_to(build_dir).as_posix() for p in build_dir.rglob('*')
+                  if p.is_file()) == ['Foo.manifest.json', 'Foo.tokens', 'FooParser.py',
+                                      '_FooParser/__init__.py', '_FooParser/expr.py',
+                                      '__init__.py']
+    assert dist.packages == ['foo']
+
+
+@pytest.mark.usefixtures('project')
+def test_sdist(tmpdir):
+    dist = create_distribution()
+    command = dist.get_command_obj('sdist')
+    command.dist_dir = str(tmpdir.join('dist'))
+    command.formats = ['gztar']
+    dist.run_command('sdist')
+
+    with tarfile.open(str(tmpdir.join('dist', 'foo-1.0.tar.gz'))) as sdist:
+        names = sdist.getnames()
+    for name in ('foo/Foo.g4', 'foo/foo_dsl/FooParser.py', 'foo/foo_dsl/Foo.tokens',
+                 'foo/foo_dsl/Foo.manifest.json', 'foo/foo_dsl/_FooParser/expr.py'):
+        assert 'foo-1.0/' + name in names
+    assert 'foo-1.0/foo/foo_dsl/.antlr.lock' not in names
+    assert not any('__pycache__' in n for n in names)
@@ -0,0 +1,85 @@
+import importlib.util
+import pathlib
+import sys
+import zipfile
+
+import pytest
+
+from setuptools_antlr.bundle import create_bundle, create_bundle_import_module, get_package_name
+
+
+@pytest.fixture()
+def package_dir(tmpdir):
+    package = tmpdir.mkdir('src').mkdir('bundle_foo').mkdir('dsl')
+    package.join('__init__.py').write('from .FooParser import FooParser\n')
+    package.join('FooParser.py').write('class FooParser(object):\n    pass\n')
+    package.join('Foo.interp').write('token literal names:\n')
+    package.join('.antlr.lock').write('')
+    package.mkdir('__pycache__').join('FooParser.cpython-36.pyc').write('')
+    return pathlib.Path(str(package))
+
+
+def load_bundle_import_module(tmpdir):
+    path = pathlib.Path(str(tmpdir), 'bundleimport.py')
+    path.write_text(create_bundle_import_module())
+    spec = importlib.util.spec_from_file_location('bundleimport', str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_create_bundle(tmpdir, package_dir):
+    bundle_file = pathlib.Path(str(tmpdir), 'bundle_foo.dsl.zip')
+
+    assert create_bundle(package_dir, 'bundle_foo.dsl', bundle_file) == 3
+
+    bundle = zipfile.ZipFile(str(bundle_file))
+    assert bundle.namelist() == ['dsl/Foo.interp', 'dsl/FooParser.py', 'dsl/FooParser.pyc',
+                                 'dsl/__init__.py', 'dsl/__init__.pyc']
+    assert all(i.compress_type == zipfile.ZIP_STORED for i in bundle.infolist())
+    assert bundle.read('dsl/FooParser.pyc')[:4] == importlib.util.MAGIC_NUMBER
+
+
+def test_create_bundle_reproducible(tmpdir, package_dir):
+    first = pathlib.Path(str(tmpdir.mkdir('first')), 'bundle_foo.dsl.zip')
+    second = pathlib.Path(str(tmpdir.mkdir('second')), 'bundle_foo.dsl.zip')
+
+    create_bundle(package_dir, 'bundle_foo.dsl', first)
+    create_bundle(package_dir, 'bundle_foo.dsl', second)
+
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_bundle_import(tmpdir, package_dir):
+    bundle_dir = tmpdir.mkdir('bundles')
+    create_bundle(package_dir, 'bundle_foo.dsl', pathlib.Path(str(bundle_dir),
+                                                              'bundle_foo.dsl.zip'))
+    # parent package is located on file system without bundled package
+    tmpdir.mkdir('bundle_foo').join('__init__.py').write('')
+    bundleimport = load_bundle_import_module(tmpdir)
+    sys.path.insert(0, str(tmpdir))
+
+    finders = bundleimport.install(str(bundle_dir))
+    try:
+        module = importlib.import_module('bundle_foo.dsl')
+        assert module.FooParser.__name__ == 'FooParser'
+        assert module.__file__ == str(pathlib.Path(str(bundle_dir), 'bundle_foo.dsl.zip', 'dsl',
+                                                   '__init__.py'))
+        interp = pathlib.Path(module.__file__).with_name('Foo.interp')
+        assert module.__loader__.get_data(str(interp)) == b'token literal names:\n'
+        assert 'class FooParser' in module.__loader__.get_source('bundle_foo.dsl.FooParser')
+        assert importlib.util.find_spec('bundle_foo.dsl.Missing') is None
+    finally:
+        sys.path.remove(str(tmpdir))
+        for finder in finders:
+            sys.meta_path.remove(finder)
+        for name in ('bundle_foo', 'bundle_foo.dsl', 'bundle_foo.dsl.FooParser'):
+            sys.modules.pop(name, None)
+
+
+def test_get_package_name(tmpdir):
+    base_dir = pathlib.Path(str(tmpdir), 'src')
+
+    assert get_package_name(pathlib.Path(str(base_dir), 'foo', 'dsl'), base_dir) == 'foo.dsl'
+    with pytest.raises(ValueError):
+        get_package_name(pathlib.Path(str(tmpdir), 'foo'), base_dir)
@@ -1,14 +1,21 @@
 import distutils.errors
+import json
 import os
 import pathlib
-import subprocess
 import unittest.mock
+import zipfile
 
 import pytest
 import setuptools.dist
 
 import setuptools_antlr.command
 from setuptools_antlr.command import AntlrGrammar, AntlrCommand
+from setuptools_antlr.generator import AntlrGenerator
+
+
+class AsyncMock(unittest.mock.MagicMock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
 
 
 @pytest.fixture(scope='module', autouse=True)
@@ -23,29 +30,6 @@ def ch_resources_dir(request):
     request.addfinalizer(fin)
 
 
-class TestAntlrGrammar:
-    def test_read_with_imports(self):
-        grammar = AntlrGrammar(pathlib.Path('distributed', 'SomeGrammar.g4'))
-        imports = set(grammar.read_imports())
-
-        assert len(imports) == 2
-        assert {'CommonTerminals', 'SharedRules'} == imports
-
-    def test_read_without_imports(self):
-        grammar = AntlrGrammar(pathlib.Path('distributed', 'CommonTerminals.g4'))
-        imports = grammar.read_imports()
-
-        assert not imports
-
-    def test_read_nonexistent_file(self):
-        grammar = AntlrGrammar(pathlib.Path('FooBar.g4'))
-
-        # check if DistutilsFileError was thrown
-        with pytest.raises(distutils.errors.DistutilsFileError) as excinfo:
-            grammar.read_imports()
-        assert excinfo.match('FooBar.g4')
-
-
 class TestAntlrCommand:
     @pytest.fixture(autouse=True)
     def command(self):
@@ -147,33 +131,41 @@ class TestAntlrCommand:
         assert shared_rules in grammars
         assert some_grammar in grammars
 
+    def test_find_grammars_token_vocab(self, command):
+        grammars = command._find_grammars(pathlib.Path('split'))
+
+        some_lexer = next(g for g in grammars if g.name == 'SomeLexer')
+        some_parser = next(g for g in grammars if g.name == 'SomeParser')
+
+        assert some_parser.token_vocab is some_lexer
+        assert some_lexer.token_vocab is None
+
     def test_find_grammars_incomplete(self, command):
+        command.validate = 0
+
         # check if DistutilsFileError was thrown
         with pytest.raises(distutils.errors.DistutilsFileError) as excinfo:
             command._find_grammars(pathlib.Path('incomplete'))
         assert excinfo.match('CommonTerminals')
 
-    def test_create_init_file_not_exists(self, tmpdir, command):
-        path = pathlib.Path(str(tmpdir.mkdir('package')))
-
-        init_file = pathlib.Path(path, '__init__.py')
-
-        created = command._create_init_file(path)
-
-        assert created
-        assert init_file.exists()
-
-    def test_create_init_file_exists(self, tmpdir, command):
-        path = pathlib.Path(str(tmpdir.mkdir('package')))
-
-        init_file = pathlib.Path(path, '__init__.py')
-        init_file.touch()
-        origin_init_mtime_ns = init_file.stat().st_mtime_ns
+    def test_validate_grammars_incomplete(self, command):
+        grammars = command._find_grammars(pathlib.Path('incomplete'))
 
-        created = command._create_init_file(path)
+        with pytest.raises(distutils.errors.DistutilsFileError) as excinfo:
+            command._validate_grammars(grammars, grammars)
+        message = str(excinfo.value)
+        assert 'SomeGrammar.g4:4: imported grammar CommonTerminals isn\'t found' in message
+        assert 'SharedRules.g4:3: imported grammar CommonTerminals isn\'t found' in message
+
+    def test_validate_grammars_token_vocab_option(self, command, tmpdir):
+        grammar_file = tmpdir.join('FooParser.g4')
+        grammar_file.write('parser grammar FooParser;\nr : A ;\n')
+        grammars = [AntlrGrammar(pathlib.Path(str(grammar_file)))]
+        command.overrides = 'FooParser.tokenVocab=FooLexer'
+        command.finalize_options()
 
-        assert not created
-        assert init_file.stat().st_mtime_ns == origin_init_mtime_ns
+        # token vocabulary is passed to ANTLR as -DtokenVocab=FooLexer
+        command._validate_grammars(grammars, grammars)
 
     def test_finalize_options_default(self, command):
         command.finalize_options()
@@ -247,6 +239,85 @@ class TestAntlrCommand:
         assert command.grammar_options['superClass'] == 'Abc'
         assert command.grammar_options['tokenVocab'] == 'Lexer'
 
+    def test_finalize_options_overrides(self, command):
+        command.overrides = 'Foo.visitor=yes Foo.no-listener=1 Foo.superClass=FooBase Bar.atn=no'
+        command.finalize_options()
+
+        assert command.overrides == {
+            'Foo': {'visitor': 1, 'listener': 0, 'grammar_options': {'superClass': 'FooBase'}},
+            'Bar': {'atn': 0}
+        }
+
+    def test_finalize_options_overrides_hyphenated(self, command):
+        command.overrides = 'Foo.message-format=gnu Foo.w-error=yes'
+        command.finalize_options()
+
+        assert command.overrides == {'Foo': {'message_format': 'gnu', 'w_error': 1}}
+
+    def test_finalize_options_overrides_bench(self, command):
+        command.overrides = 'Foo.bench=yes'
+        command.finalize_options()
+
+        assert command.overrides == {'Foo': {'bench': 1}}
+
+    def test_finalize_options_overrides_no_visitor(self, command):
+        command.overrides = 'Foo.no-visitor=yes'
+        command.finalize_options()
+
+        assert command.overrides == {'Foo': {'visitor': 0}}
+
+    test_ids_overrides_invalid = ['malformed', 'boolean', 'not_overridable', 'language']
+
+    test_data_overrides_invalid = [
+        ('visitor=yes', 'valid override'),
+        ('Foo.visitor=maybe', 'boolean'),
+        ('Foo.depend=yes', 'overridden'),
+        ('Foo.language=Java', 'Java')
+    ]
+
+    @pytest.mark.parametrize('overrides, message', test_data_overrides_invalid,
+                             ids=test_ids_overrides_invalid)
+    def test_finalize_options_overrides_invalid(self, command, overrides, message):
+        command.overrides = overrides
+
+        with pytest.raises(distutils.errors.DistutilsOptionError) as excinfo:
+            command.finalize_options()
+        assert excinfo.match(message)
+
+    def test_finalize_options_watch_delay(self, command):
+        command.watch_delay = '0.5'
+        command.finalize_options()
+
+        assert command.watch_delay == 0.5
+
+    def test_finalize_options_watch_delay_invalid(self, command):
+        command.watch_delay = 'abc'
+
+        with pytest.raises(distutils.errors.DistutilsOptionError) as excinfo:
+            command.finalize_options()
+        assert excinfo.match('watch delay')
+
+    def test_finalize_options_parallel(self, command):
+        command.parallel = '4'
+        command.finalize_options()
+
+        assert command.parallel == 4
+
+    @pytest.mark.parametrize('parallel', ['0', 'abc'], ids=['zero', 'invalid'])
+    def test_finalize_options_parallel_invalid(self, command, parallel):
+        command.parallel = parallel
+
+        with pytest.raises(distutils.errors.DistutilsOptionError) as excinfo:
+            command.finalize_options()
+        assert excinfo.match('parallel')
+
+    def test_finalize_options_import_budgets(self, command):
+        command.import_budgets = 'time=200 SomeGrammar.memory=4096'
+        command.finalize_options()
+
+        assert command.import_budgets == {None: {'time': 200}, 'SomeGrammar': {'memory': 4096}}
+        assert command.import_report == 'build/antlr-imports.json'
+
     def test_finalize_options_debugging_options_invalid(self, capsys, command):
         command.x_dbg_st = 0
         command.x_dbg_st_wait = 1
@@ -257,14 +328,14 @@ class TestAntlrCommand:
         assert 'Waiting for StringTemplate visualizer' in err
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_java_found(self, mock_find_grammars, mock_run, mock_find_java, tmpdir, command):
         java_exe = pathlib.Path('c:/path/to/java/bin/java.exe')
 
         mock_find_java.return_value = java_exe
         mock_find_grammars.return_value = [AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))]
-        mock_run.return_value = subprocess.CompletedProcess([], 0)
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
 
         command.output['default'] = str(tmpdir.mkdir('gen'))
         command.run()
@@ -274,17 +345,18 @@ class TestAntlrCommand:
         assert str(java_exe) in args[0]
         assert '-jar' in args[0]
 
+    @pytest.mark.usefixtures('configured_command')
     @unittest.mock.patch('setuptools_antlr.command.find_java')
-    def test_run_java_not_found(self, mock_find_java, command):
+    def test_run_java_not_found(self, mock_find_java, configured_command):
         mock_find_java.return_value = None
 
         with pytest.raises(distutils.errors.DistutilsExecError) as excinfo:
-            command.run()
+            configured_command.run()
         assert excinfo.match('no compatible JRE')
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_antlr_found(self, mock_find_grammars, mock_run, mock_find_antlr, mock_find_java,
                              tmpdir, command):
@@ -316,7 +388,7 @@ class TestAntlrCommand:
         assert excinfo.match('no ANTLR jar')
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_custom_output_dir(self, mock_run, tmpdir, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -331,10 +403,13 @@ class TestAntlrCommand:
         args, _ = mock_run.call_args
         assert mock_run.call_count == 1
         custom_package_path = pathlib.Path(custom_output_dir, 'foo').absolute()
-        assert any(custom_package_path == pathlib.Path(a) for a in args[0])
+        # parser is generated into a temporary directory inside of the package
+        output_dir = pathlib.Path(args[0][args[0].index('-o') + 1])
+        assert output_dir.parent == custom_package_path
+        assert pathlib.Path(custom_package_path, '__init__.py').exists()
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_grammars_multiple(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -351,7 +426,7 @@ class TestAntlrCommand:
         assert 'Foo.g4' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_grammars_multiple(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -370,7 +445,7 @@ class TestAntlrCommand:
         assert 'Bar.g4' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_grammars_not_found(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -384,7 +459,7 @@ class TestAntlrCommand:
         assert mock_run.call_count == 0
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_atn_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -396,7 +471,7 @@ class TestAntlrCommand:
         assert '-atn' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_atn_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -408,7 +483,7 @@ class TestAntlrCommand:
         assert '-atn' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_encoding_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -421,7 +496,7 @@ class TestAntlrCommand:
         assert 'euc-jp' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_encoding_not_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -433,7 +508,7 @@ class TestAntlrCommand:
         assert '-encoding' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_message_format_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -446,7 +521,7 @@ class TestAntlrCommand:
         assert 'gnu' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_message_format_not_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -458,7 +533,7 @@ class TestAntlrCommand:
         assert '-message-format' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_long_messages_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -470,7 +545,7 @@ class TestAntlrCommand:
         assert '-long-messages' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_long_messages_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -482,7 +557,7 @@ class TestAntlrCommand:
         assert '-long-messages' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_listener_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -494,7 +569,7 @@ class TestAntlrCommand:
         assert '-listener' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_listener_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -506,7 +581,7 @@ class TestAntlrCommand:
         assert '-no-listener' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_visitor_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -518,7 +593,7 @@ class TestAntlrCommand:
         assert '-visitor' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_visitor_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -530,7 +605,45 @@ class TestAntlrCommand:
         assert '-no-visitor' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_overrides(self, mock_run, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        configured_command._find_grammars = unittest.mock.Mock(return_value=[
+            AntlrGrammar(pathlib.Path('Foo.g4')),
+            AntlrGrammar(pathlib.Path('Bar.g4'))
+        ])
+
+        configured_command.grammar_options = {'language': 'Python3', 'superClass': 'Base'}
+        configured_command.overrides = {
+            'Foo': {'visitor': 1, 'listener': 0, 'grammar_options': {'superClass': 'FooBase'}}
+        }
+        configured_command.run()
+
+        assert mock_run.call_count == 2
+        args, _ = mock_run.call_args_list[0]
+        assert '-visitor' in args[0]
+        assert '-no-listener' in args[0]
+        assert '-DsuperClass=FooBase' in args[0]
+        assert '-Dlanguage=Python3' in args[0]
+        args, _ = mock_run.call_args_list[1]
+        assert '-no-visitor' in args[0]
+        assert '-listener' in args[0]
+        assert '-DsuperClass=Base' in args[0]
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_overrides_unknown_grammar(self, mock_run, capsys, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        configured_command.overrides = {'Unknown': {'visitor': 1}}
+        configured_command.run()
+
+        _, err = capsys.readouterr()
+        assert 'unknown grammar Unknown' in err
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_grammar_options_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -543,7 +656,7 @@ class TestAntlrCommand:
         assert '-DtokenVocab=Bar' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_grammar_options_not_specified(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -555,7 +668,7 @@ class TestAntlrCommand:
         assert not any(a.startswith('-D') for a in args[0])
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_depend_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0, stdout='FooParser.py : Foo.g4')
 
@@ -567,7 +680,7 @@ class TestAntlrCommand:
         assert '-depend' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_depend_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
         configured_command.depend = 0
@@ -578,7 +691,7 @@ class TestAntlrCommand:
         assert '-depend' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_w_error_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -590,7 +703,7 @@ class TestAntlrCommand:
         assert '-Werror' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_w_error_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -602,7 +715,7 @@ class TestAntlrCommand:
         assert '-Werror' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_dbg_st_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -614,7 +727,7 @@ class TestAntlrCommand:
         assert '-XdbgST' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_dbg_st_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -626,7 +739,7 @@ class TestAntlrCommand:
         assert '-XdbgST' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_dbg_st_wait_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -638,7 +751,7 @@ class TestAntlrCommand:
         assert '-XdbgSTWait' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_dbg_st_wait_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -650,7 +763,7 @@ class TestAntlrCommand:
         assert '-XdbgSTWait' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_exact_output_dir_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -662,7 +775,7 @@ class TestAntlrCommand:
         assert '-Xexact-output-dir' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_exact_output_dir_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -674,7 +787,7 @@ class TestAntlrCommand:
         assert '-Xexact-output-dir' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_force_atn_wait_enabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -686,7 +799,7 @@ class TestAntlrCommand:
         assert '-Xforce-atn' in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_force_atn_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -698,7 +811,7 @@ class TestAntlrCommand:
         assert '-Xforce-atn' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr_log')
     @unittest.mock.patch('shutil.move')
     def test_run_x_log_enabled(self, mock_move, mock_find_antlr_log, mock_run, capsys,
@@ -719,7 +832,7 @@ class TestAntlrCommand:
         assert log_file in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_x_log_disabled(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -731,7 +844,7 @@ class TestAntlrCommand:
         assert '-Xlog' not in args[0]
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr_log')
     def test_run_x_log_not_found(self, mock_find_antlr_log, mock_run, capsys, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
@@ -744,7 +857,7 @@ class TestAntlrCommand:
         assert 'no logging info dumped out by ANTLR' in err
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_parser_generation_successful(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=0)
 
@@ -756,7 +869,7 @@ class TestAntlrCommand:
         assert kwargs['cwd'] == 'standalone'
 
     @pytest.mark.usefixtures('configured_command')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     def test_run_parser_generation_failed(self, mock_run, configured_command):
         mock_run.return_value = unittest.mock.Mock(returncode=-1)
 
@@ -766,10 +879,10 @@ class TestAntlrCommand:
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_package_not_exists(self, mock_find_grammars, mock_run, mock_find_antlr,
-                                    mock_find_java, tmpdir, command):
+                                    mock_find_java, monkeypatch, tmpdir, command):
         java_exe = pathlib.Path('c:/path/to/java/bin/java.exe')
         antlr_jar = pathlib.Path('antlr-4.5.3-complete.jar')
         mock_find_java.return_value = java_exe
@@ -785,7 +898,7 @@ class TestAntlrCommand:
         package_init_file = pathlib.Path(package_dir, '__init__.py')
 
         command.output['default'] = base_dir
-        os.chdir(str(base_dir))
+        monkeypatch.chdir(str(base_dir))
 
         command.run()
 
@@ -793,7 +906,7 @@ class TestAntlrCommand:
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_package_exists(self, mock_find_grammars, mock_run, mock_find_antlr, mock_find_java,
                                 tmpdir, command):
@@ -822,7 +935,7 @@ class TestAntlrCommand:
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_one_library_location(self, mock_find_grammars, mock_run, mock_find_antlr,
                                       mock_find_java, tmpdir, command):
@@ -848,7 +961,7 @@ class TestAntlrCommand:
 
     @unittest.mock.patch('setuptools_antlr.command.find_java')
     @unittest.mock.patch.object(AntlrCommand, '_find_antlr')
-    @unittest.mock.patch('subprocess.run')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
     @unittest.mock.patch.object(AntlrCommand, '_find_grammars')
     def test_run_multiple_library_location(self, mock_find_grammars, mock_run, mock_find_antlr,
                                            mock_find_java, tmpdir, command):
@@ -871,3 +984,323 @@ class TestAntlrCommand:
             command.run()
         assert excinfo.match('Imported grammars of \'SomeGrammar\' are located in more than one '
                              'directory.')
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.is_cython_available', return_value=True)
+    @unittest.mock.patch('setuptools_antlr.command.has_c_compiler', return_value=True)
+    @unittest.mock.patch('setuptools_antlr.command.cythonize_modules')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_compile(self, mock_run, mock_cythonize_modules, mock_has_c_compiler,
+                         mock_is_cython_available, monkeypatch, tmpdir, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+        extension = setuptools.Extension('standalone.some_grammar.SomeGrammarParser',
+                                         ['SomeGrammarParser.py'])
+        mock_cythonize_modules.return_value = [extension]
+        monkeypatch.chdir(str(tmpdir))
+        pathlib.Path('standalone').mkdir()
+        pathlib.Path('standalone', 'SomeGrammar.g4').write_text('grammar SomeGrammar;')
+
+        configured_command.output['default'] = '.'
+        configured_command.compile = 1
+        configured_command.run()
+
+        modules, _ = mock_cythonize_modules.call_args
+        assert [m[0] for m in modules[0]] == ['standalone.some_grammar.SomeGrammarParser',
+                                              'standalone.some_grammar.SomeGrammarLexer']
+        assert configured_command.distribution.ext_modules == [extension]
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.is_cython_available', return_value=False)
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_compile_cython_not_available(self, mock_run, mock_is_cython_available, capsys,
+                                              configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        configured_command.compile = 1
+        configured_command.run()
+
+        _, err = capsys.readouterr()
+        assert 'Cython isn\'t installed' in err
+        assert not configured_command.distribution.ext_modules
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.is_cython_available', return_value=True)
+    @unittest.mock.patch('setuptools_antlr.command.has_c_compiler', return_value=False)
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_compile_no_c_compiler(self, mock_run, mock_has_c_compiler,
+                                       mock_is_cython_available, capsys, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        configured_command.compile = 1
+        configured_command.run()
+
+        _, err = capsys.readouterr()
+        assert 'no C compiler' in err
+        assert not configured_command.distribution.ext_modules
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_bundle(self, mock_run, monkeypatch, tmpdir, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+        monkeypatch.chdir(str(tmpdir))
+        pathlib.Path('standalone').mkdir()
+        pathlib.Path('standalone', 'SomeGrammar.g4').write_text('grammar SomeGrammar;')
+
+        configured_command.output['default'] = '.'
+        configured_command.bundle = 'bundles'
+        configured_command.run()
+
+        bundle = zipfile.ZipFile(str(pathlib.Path('bundles', 'standalone.some_grammar.zip')))
+        assert 'some_grammar/__init__.py' in bundle.namelist()
+        assert 'some_grammar/__init__.pyc' in bundle.namelist()
+        assert 'some_grammar/SomeGrammar.manifest.json' in bundle.namelist()
+        assert pathlib.Path('bundles', 'bundleimport.py').exists()
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.measure_imports')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_import_budgets(self, mock_run, mock_measure_imports, monkeypatch, tmpdir,
+                                configured_command):
+        pytest.importorskip('antlr4')
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+        mock_measure_imports.return_value = {'SomeGrammar': {'time': 250.0, 'memory': 100.0,
+                                                             'size': 10.0, 'modules': {}}}
+        monkeypatch.chdir(str(tmpdir))
+        pathlib.Path('standalone').mkdir()
+        pathlib.Path('standalone', 'SomeGrammar.g4').write_text('grammar SomeGrammar;')
+
+        configured_command.output['default'] = '.'
+        configured_command.import_budgets = {None: {'time': 200}}
+        configured_command.import_report = 'imports.json'
+        with pytest.raises(distutils.errors.DistutilsExecError) as excinfo:
+            configured_command.run()
+
+        assert excinfo.match('SomeGrammar exceeds time budget: 250.0 ms > 200 ms')
+        assert 'SomeGrammar' in pathlib.Path('imports.json').read_text()
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_manifest_written(self, mock_run, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        configured_command.run()
+
+        package_dir = pathlib.Path(configured_command.output['default'], 'standalone',
+                                   'some_grammar')
+        with pathlib.Path(package_dir, 'SomeGrammar.manifest.json').open() as f:
+            manifest = json.load(f)
+        assert manifest['grammar'] == 'SomeGrammar'
+        assert manifest['fingerprint']
+        assert 'SomeGrammarParser.py' in manifest['outputs']
+
+    @staticmethod
+    def _generate_outputs(args, **kwargs):
+        # simulate ANTLR by touching the expected generated files
+        package_dir = pathlib.Path(args[args.index('-o') + 1])
+        for name in ['SomeGrammarLexer.py', 'SomeGrammarParser.py', 'SomeGrammarListener.py',
+                     'SomeGrammar.tokens', 'SomeGrammar.interp', 'SomeGrammarLexer.tokens',
+                     'SomeGrammarLexer.interp']:
+            pathlib.Path(package_dir, name).touch()
+        return unittest.mock.Mock(returncode=0)
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_up_to_date(self, mock_run, capsys, configured_command):
+        mock_run.side_effect = self._generate_outputs
+
+        configured_command.run()
+        configured_command.run()
+
+        assert mock_run.call_count == 1
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_invalid_grammar(self, mock_run, monkeypatch, tmpdir, configured_command):
+        monkeypatch.chdir(str(tmpdir))
+        pathlib.Path('standalone').mkdir()
+        pathlib.Path('standalone', 'SomeGrammar.g4').write_text('grammar Some;\n'
+                                                                'r : A\n'
+                                                                'A : \'a\';\n')
+
+        with pytest.raises(distutils.errors.DistutilsFileError) as excinfo:
+            configured_command.run()
+
+        message = str(excinfo.value)
+        assert 'SomeGrammar.g4:1: grammar name Some doesn\'t match file name' in message
+        assert 'SomeGrammar.g4:2: missing \';\' at end of rule r' in message
+        assert not setuptools_antlr.command.find_java.called
+        assert not mock_run.called
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_invalid_grammar_not_validated(self, mock_run, monkeypatch, tmpdir,
+                                               configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+        monkeypatch.chdir(str(tmpdir))
+        pathlib.Path('standalone').mkdir()
+        pathlib.Path('standalone', 'SomeGrammar.g4').write_text('grammar Some;\n')
+
+        configured_command.validate = 0
+        configured_command.run()
+
+        assert mock_run.called
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_planned_once(self, mock_run, configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+
+        with unittest.mock.patch.object(AntlrGenerator, 'plan', autospec=True,
+                                        side_effect=AntlrGenerator.plan) as mock_plan:
+            configured_command.run()
+
+        assert mock_plan.call_count == 1
+        args, _ = mock_run.call_args
+        assert args[0][0] == str(pathlib.Path('c:/path/to/java/bin/java.exe'))
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_up_to_date_without_java(self, mock_run, configured_command):
+        mock_run.side_effect = self._generate_outputs
+        configured_command.run()
+
+        setuptools_antlr.command.find_java.return_value = None
+        configured_command.run()
+
+        assert setuptools_antlr.command.find_java.call_count == 1
+        assert mock_run.call_count == 1
+        assert [j.grammar.name for j in configured_command.jobs] == ['SomeGrammar']
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_force(self, mock_run, configured_command):
+        mock_run.side_effect = self._generate_outputs
+
+        configured_command.run()
+        configured_command.force = 1
+        configured_command.run()
+
+        assert mock_run.call_count == 2
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_options_changed(self, mock_run, configured_command):
+        mock_run.side_effect = self._generate_outputs
+
+        configured_command.run()
+        configured_command.atn = 1
+        configured_command.run()
+
+        assert mock_run.call_count == 2
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_output_missing(self, mock_run, configured_command):
+        mock_run.side_effect = self._generate_outputs
+
+        configured_command.run()
+        package_dir = pathlib.Path(configured_command.output['default'], 'standalone',
+                                   'some_grammar')
+        pathlib.Path(package_dir, 'SomeGrammarParser.py').unlink()
+        configured_command.run()
+
+        assert mock_run.call_count == 2
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.which_java')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_plan(self, mock_run, mock_which_java, capsys, configured_command):
+        mock_which_java.return_value = pathlib.Path('c:/path/to/java/bin/java.exe')
+
+        configured_command.plan = 1
+        configured_command.run()
+
+        assert not mock_run.called
+        out, _ = capsys.readouterr()
+        plan = json.loads(out)
+        assert plan['stale']
+        assert len(plan['grammars']) == 1
+        grammar = plan['grammars'][0]
+        assert grammar['name'] == 'SomeGrammar'
+        assert grammar['stale']
+        assert grammar['reason'] == 'no manifest found'
+        assert grammar['lib'] is None
+        assert 'SomeGrammar.g4' in grammar['args']
+        assert any(o.endswith('SomeGrammarParser.py') for o in grammar['outputs'])
+        assert not pathlib.Path(configured_command.output['default'], 'standalone').exists()
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_plan_up_to_date(self, mock_run, capsys, configured_command):
+        mock_run.side_effect = self._generate_outputs
+
+        configured_command.run()
+        capsys.readouterr()
+        configured_command.plan = 1
+        configured_command.run()
+
+        out, _ = capsys.readouterr()
+        plan = json.loads(out)
+        assert not plan['stale']
+        assert plan['grammars'][0]['reason'] == 'up to date'
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.which_java')
+    def test_run_plan_token_vocab(self, mock_which_java, capsys, configured_command):
+        mock_which_java.return_value = pathlib.Path('c:/path/to/java/bin/java.exe')
+        grammars = AntlrCommand(configured_command.distribution)._find_grammars(
+            pathlib.Path('split'))
+        configured_command._find_grammars = unittest.mock.Mock(return_value=grammars)
+
+        configured_command.plan = 1
+        configured_command.run()
+
+        out, _ = capsys.readouterr()
+        plan = json.loads(out)
+        assert [g['name'] for g in plan['grammars']] == ['SomeLexer', 'SomeParser']
+        some_parser = plan['grammars'][1]
+        lexer_package_dir = pathlib.Path(configured_command.output['default'], 'split',
+                                         'some_lexer')
+        assert pathlib.Path(some_parser['lib']) == lexer_package_dir.absolute()
+        assert pathlib.Path('split', 'SomeLexer.g4') in [pathlib.Path(i)
+                                                         for i in some_parser['inputs']]
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.create_watcher')
+    @unittest.mock.patch('setuptools_antlr.command.wait_debounced')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_watch(self, mock_run, mock_wait_debounced, mock_create_watcher,
+                       configured_command):
+        mock_run.return_value = unittest.mock.Mock(returncode=0)
+        mock_wait_debounced.side_effect = [{pathlib.Path('standalone', 'SomeGrammar.g4')},
+                                           KeyboardInterrupt]
+
+        configured_command.force = 1
+        configured_command.watch = 1
+        configured_command.run()
+
+        assert mock_run.call_count == 2
+        watcher = mock_create_watcher.return_value
+        watcher.watch.assert_called_with({pathlib.Path('standalone')})
+        assert watcher.close.called
+
+    @pytest.mark.usefixtures('configured_command')
+    @unittest.mock.patch('setuptools_antlr.command.create_watcher')
+    @unittest.mock.patch('setuptools_antlr.command.wait_debounced')
+    @unittest.mock.patch('setuptools_antlr.generator.run_antlr', new_callable=AsyncMock)
+    def test_run_watch_generation_failed(self, mock_run, mock_wait_debounced,
+                                         mock_create_watcher, capsys, configured_command):
+        mock_run.side_effect = [unittest.mock.Mock(returncode=0),
+                                unittest.mock.Mock(returncode=1, stdout='syntax error'),
+                                unittest.mock.Mock(returncode=0)]
+        mock_wait_debounced.side_effect = [{pathlib.Path('standalone', 'SomeGrammar.g4')},
+                                           {pathlib.Path('standalone', 'SomeGrammar.g4')},
+                                           KeyboardInterrupt]
+
+        configured_command.force = 1
+        configured_command.watch = 1
+        configured_command.run()
+
+        assert mock_run.call_count == 3
+        _, err = capsys.readouterr()
+        assert 'syntax error' in err
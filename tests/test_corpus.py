@@ -0,0 +1,65 @@
+import ast
+import operator
+
+import pytest
+
+from setuptools_antlr.corpus import create_corpus_module
+
+
+def test_create_corpus_module():
+    source = create_corpus_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                  'from .FooParser import FooParser', 'FooParser')
+
+    compile(source, 'corpus.py', 'exec')
+    functions = [n.name for n in ast.parse(source).body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['_init_worker', '_parse_file', 'parse_corpus', 'main']
+    assert 'from .FooParser import FooParser\n' in source
+
+
+def count_statements(tree, path):
+    return len(tree.stat())
+
+
+@pytest.fixture()
+def corpus(tmpdir):
+    corpus_dir = tmpdir.mkdir('corpus')
+    for i in range(20):
+        corpus_dir.join('{:02}.expr'.format(i)).write('a = {};\n'.format(i) * (i + 1))
+    corpus_dir.join('invalid.expr').write('a = 1;\nb = (2;\n')
+    return corpus_dir
+
+
+def _load_corpus(expr_helper):
+    return expr_helper('corpus', create_corpus_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+
+
+@pytest.mark.parametrize('workers, chunk_size', [(1, None), (2, 3)])
+def test_parse_corpus(expr_helper, corpus, workers, chunk_size):
+    corpus_module = _load_corpus(expr_helper)
+    paths = sorted(corpus.listdir())
+
+    result = corpus_module.parse_corpus(paths, count_statements, operator.add, 0,
+                                        workers=workers, chunk_size=chunk_size)
+
+    assert result.files == 21
+    # statements of invalid files aren't counted
+    assert result.value == sum(range(1, 21))
+    assert not result.succeeded
+    assert result.ll_fallbacks == 1
+    failure, = result.failures
+    assert failure['file'] == str(corpus.join('invalid.expr'))
+    assert failure['errors'] == ['2:6: missing \')\' at \';\'']
+    assert failure['exception'] is None
+
+
+def test_parse_corpus_start_rule(expr_helper, tmpdir):
+    corpus_module = _load_corpus(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write('(1 + 2) * 3')
+
+    result = corpus_module.parse_corpus([path], start_rule='expr', workers=1)
+
+    assert result.succeeded
+    assert result.value is None
@@ -0,0 +1,99 @@
+import distutils.errors
+import pathlib
+import subprocess
+import sys
+import unittest.mock
+
+import pytest
+
+from setuptools_antlr.extension import cythonize_modules, get_recognizer_modules, has_c_compiler, \
+    is_cython_available
+from setuptools_antlr.generator import GenerationJob
+from setuptools_antlr.grammar import AntlrGrammar
+
+
+def _create_job(package_dir, outputs):
+    return GenerationJob(AntlrGrammar(pathlib.Path('Foo.g4')), [], package_dir, None, [], outputs,
+                         None)
+
+
+def test_get_recognizer_modules(tmpdir):
+    base_dir = pathlib.Path(str(tmpdir))
+    package_dir = pathlib.Path(base_dir, 'foobar', 'foo')
+    job = _create_job(package_dir, ['__init__.py', 'FooParser.py', 'Foo.tokens', 'Foo.interp',
+                                    'FooLexer.py', 'FooListener.py', 'FooVisitor.py'])
+
+    modules = get_recognizer_modules(job, base_dir)
+
+    assert modules == [('foobar.foo.FooParser', pathlib.Path(package_dir, 'FooParser.py')),
+                       ('foobar.foo.FooLexer', pathlib.Path(package_dir, 'FooLexer.py'))]
+
+
+def test_get_recognizer_modules_extra_files(tmpdir):
+    base_dir = pathlib.Path(str(tmpdir))
+    job = _create_job(pathlib.Path(base_dir, 'foo'), ['FooParser.py', 'bench.py'])
+    job.extra_files = {'bench.py': ''}
+
+    modules = get_recognizer_modules(job, base_dir)
+
+    assert [n for n, _ in modules] == ['foo.FooParser']
+
+
+def test_get_recognizer_modules_outside_base_dir(tmpdir):
+    job = _create_job(pathlib.Path(str(tmpdir), 'foo'), ['FooParser.py'])
+
+    with pytest.raises(ValueError) as excinfo:
+        get_recognizer_modules(job, pathlib.Path(str(tmpdir), 'src'))
+    assert excinfo.match('isn\'t located in')
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='MSVC is searched for in registry')
+@unittest.mock.patch('shutil.which')
+def test_has_c_compiler_not_found(mock_which):
+    mock_which.return_value = None
+
+    assert not has_c_compiler()
+
+
+@unittest.mock.patch('shutil.which')
+def test_has_c_compiler_found(mock_which):
+    mock_which.return_value = '/usr/bin/cc'
+
+    assert has_c_compiler()
+
+
+def test_import_without_cython():
+    # Cython must not be imported unless parsers are compiled
+    code = 'import sys, setuptools_antlr.command; sys.exit(\'Cython\' in sys.modules)'
+
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+
+@unittest.mock.patch('importlib.util.find_spec')
+def test_is_cython_available_not_installed(mock_find_spec):
+    mock_find_spec.return_value = None
+
+    assert not is_cython_available()
+    mock_find_spec.assert_called_once_with('Cython')
+
+
+def test_cythonize_modules_not_installed(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'Cython.Build', None)
+
+    with pytest.raises(distutils.errors.DistutilsModuleError) as excinfo:
+        cythonize_modules([('foobar.foo.FooParser', pathlib.Path('FooParser.py'))])
+    assert excinfo.match('Cython isn\'t installed')
+
+
+def test_cythonize_modules(monkeypatch):
+    mock_cythonize = unittest.mock.Mock(side_effect=lambda extensions, **kwargs: extensions)
+    monkeypatch.setattr('Cython.Build.cythonize', mock_cythonize)
+
+    extensions = cythonize_modules([('foobar.foo.FooParser', pathlib.Path('FooParser.py'))])
+
+    assert len(extensions) == 1
+    assert extensions[0].name == 'foobar.foo.FooParser'
+    assert extensions[0].sources == ['FooParser.py']
+    assert extensions[0].optional
+    _, kwargs = mock_cythonize.call_args
+    assert kwargs['compiler_directives']['language_level'] == 3
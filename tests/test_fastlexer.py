@@ -0,0 +1,108 @@
+import bisect
+import pathlib
+
+from setuptools_antlr.fastlexer import LexerAtn, add_lexer_tables, compute_lexer_tables, \
+    create_fast_lexer_module
+
+# interpreter data of:
+#
+# lexer grammar Foo;
+# A : 'a' ;
+# AB : 'ab' -> channel(HIDDEN) ;
+# ID : [a-z]+ ;
+# COMMENT : '/*' .*? '*/' -> skip ;
+# OPEN : '<' -> pushMode(P) ;
+# mode P;
+# WORD : [a-z]+ {self.text != 'x'}? ;
+# CLOSE : '>' -> popMode ;
+FOO_INTERP = '''rule names:
+A
+AB
+ID
+COMMENT
+OPEN
+WORD
+CLOSE
+
+mode names:
+DEFAULT_MODE
+P
+
+atn:
+[3, 24715, 42794, 33075, 47597, 16764, 15335, 30598, 22884, 2, 9, 59, 8, 1, 8, 1, 4, 2, 9, 2,
+4, 3, 9, 3, 4, 4, 9, 4, 4, 5, 9, 5, 4, 6, 9, 6, 4, 7, 9, 7, 4, 8, 9, 8, 3, 2, 3, 2, 3, 3, 3, 3,
+3, 3, 3, 3, 3, 3, 3, 4, 6, 4, 27, 10, 4, 13, 4, 14, 4, 28, 3, 5, 3, 5, 3, 5, 3, 5, 7, 5, 35,
+10, 5, 12, 5, 14, 5, 38, 11, 5, 3, 5, 3, 5, 3, 5, 3, 5, 3, 5, 3, 6, 3, 6, 3, 6, 3, 6, 3, 7, 6,
+7, 50, 10, 7, 13, 7, 14, 7, 51, 3, 7, 3, 7, 3, 8, 3, 8, 3, 8, 3, 8, 3, 36, 2, 9, 4, 3, 6, 4, 8,
+5, 10, 6, 12, 7, 14, 8, 16, 9, 4, 2, 3, 3, 3, 2, 99, 124, 2, 60, 2, 4, 3, 2, 2, 2, 2, 6, 3, 2,
+2, 2, 2, 8, 3, 2, 2, 2, 2, 10, 3, 2, 2, 2, 2, 12, 3, 2, 2, 2, 3, 14, 3, 2, 2, 2, 3, 16, 3, 2,
+2, 2, 4, 18, 3, 2, 2, 2, 6, 20, 3, 2, 2, 2, 8, 26, 3, 2, 2, 2, 10, 30, 3, 2, 2, 2, 12, 44, 3,
+2, 2, 2, 14, 49, 3, 2, 2, 2, 16, 55, 3, 2, 2, 2, 18, 19, 7, 99, 2, 2, 19, 5, 3, 2, 2, 2, 20,
+21, 7, 99, 2, 2, 21, 22, 7, 100, 2, 2, 22, 23, 3, 2, 2, 2, 23, 24, 8, 3, 2, 2, 24, 7, 3, 2, 2,
+2, 25, 27, 9, 2, 2, 2, 26, 25, 3, 2, 2, 2, 27, 28, 3, 2, 2, 2, 28, 26, 3, 2, 2, 2, 28, 29, 3,
+2, 2, 2, 29, 9, 3, 2, 2, 2, 30, 31, 7, 49, 2, 2, 31, 32, 7, 44, 2, 2, 32, 36, 3, 2, 2, 2, 33,
+35, 11, 2, 2, 2, 34, 33, 3, 2, 2, 2, 35, 38, 3, 2, 2, 2, 36, 37, 3, 2, 2, 2, 36, 34, 3, 2, 2,
+2, 37, 39, 3, 2, 2, 2, 38, 36, 3, 2, 2, 2, 39, 40, 7, 44, 2, 2, 40, 41, 7, 49, 2, 2, 41, 42, 3,
+2, 2, 2, 42, 43, 8, 5, 3, 2, 43, 11, 3, 2, 2, 2, 44, 45, 7, 62, 2, 2, 45, 46, 3, 2, 2, 2, 46,
+47, 8, 6, 4, 2, 47, 13, 3, 2, 2, 2, 48, 50, 9, 2, 2, 2, 49, 48, 3, 2, 2, 2, 50, 51, 3, 2, 2, 2,
+51, 49, 3, 2, 2, 2, 51, 52, 3, 2, 2, 2, 52, 53, 3, 2, 2, 2, 53, 54, 6, 7, 2, 2, 54, 15, 3, 2,
+2, 2, 55, 56, 7, 64, 2, 2, 56, 57, 3, 2, 2, 2, 57, 58, 8, 8, 5, 2, 58, 17, 3, 2, 2, 2, 7, 2, 3,
+28, 36, 51, 6, 2, 3, 2, 8, 2, 2, 7, 3, 2, 6, 2, 2]
+'''
+
+
+def match(tables, mode, text):
+    """Matches the longest prefix of text like the generated lexer."""
+    rows, accepts = tables.modes[mode]
+    state, accepted = 0, None
+    for position, char in enumerate(text):
+        cls = tables.classes[bisect.bisect_right(tables.bounds, ord(char)) - 1]
+        row = dict(zip(rows[state][::2], rows[state][1::2]))
+        if cls not in row:
+            break
+        state = row[cls]
+        if state in accepts:
+            accepted = accepts[state] + (position + 1,)
+    return accepted
+
+
+def test_lexer_atn_from_interp():
+    atn = LexerAtn.from_interp(FOO_INTERP)
+
+    assert atn.rule_names == ['A', 'AB', 'ID', 'COMMENT', 'OPEN', 'WORD', 'CLOSE']
+    assert atn.mode_names == ['DEFAULT_MODE', 'P']
+    assert atn.rule_token_types == [1, 2, 3, 4, 5, 6, 7]
+    assert len(atn.mode_start_states) == 2
+    assert len(atn.non_greedy) == 1
+
+
+def test_compute_lexer_tables():
+    tables = compute_lexer_tables(LexerAtn.from_interp(FOO_INTERP))
+
+    # longest match, ties are won by the first rule
+    assert match(tables, 0, 'a') == (1, (), 1)
+    assert match(tables, 0, 'ab') == (2, (0,), 2)
+    assert match(tables, 0, 'abc+') == (3, (), 3)
+    # non-greedy loops stop at the first match
+    assert match(tables, 0, '/* a */ */') == (4, (1,), 7)
+    assert match(tables, 0, '/* a *') is None
+    assert match(tables, 0, '<a') == (5, (2,), 1)
+
+
+def test_compute_lexer_tables_unsupported():
+    tables = compute_lexer_tables(LexerAtn.from_interp(FOO_INTERP))
+
+    assert list(tables.modes) == [0]
+    assert tables.unsupported == {1: 'rule WORD contains a semantic predicate'}
+
+
+def test_add_lexer_tables(tmpdir):
+    pathlib.Path(str(tmpdir), 'Foo.interp').write_text(FOO_INTERP)
+    source = create_fast_lexer_module('Foo', 'from .Foo import Foo', 'Foo')
+
+    source = add_lexer_tables(source, pathlib.Path(str(tmpdir)))
+
+    compile(source, 'fastlexer.py', 'exec')
+    assert 'class FastLexer(LEXER):' in source
+    assert 'LEXER = Foo' in source
+    assert "UNSUPPORTED_MODES = {\n    1: 'rule WORD contains a semantic predicate',\n}" in source
@@ -0,0 +1,80 @@
+import ast
+
+import pytest
+
+from setuptools_antlr.fastparse import create_fast_parse_module
+
+
+def test_create_fast_parse_module():
+    source = create_fast_parse_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                      'from .FooParser import FooParser', 'FooParser')
+
+    compile(source, 'fastparse.py', 'exec')
+    functions = [n.name for n in ast.parse(source).body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['parse_fast_stream', 'parse_fast', 'parse_fast_file']
+    assert 'from .FooParser import FooParser\n' in source
+
+
+class _ErrorRecorder:
+    def __init__(self):
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors.append((line, column, msg))
+
+    def reportAmbiguity(self, *args):
+        pass
+
+    def reportAttemptingFullContext(self, *args):
+        pass
+
+    def reportContextSensitivity(self, *args):
+        pass
+
+
+def _parse_ll(fast_parse, text, error_listener):
+    from antlr4 import CommonTokenStream, InputStream
+
+    lexer = fast_parse.LEXER(InputStream(text))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(error_listener)
+    parser = fast_parse.PARSER(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(error_listener)
+    return parser.prog()
+
+
+def _load_fast_parse(expr_helper):
+    return expr_helper('fastparse', create_fast_parse_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+
+
+@pytest.mark.parametrize('text, fallback', [
+    ('a = 1 + 2 * b;\n(a - 3) / 4; # comment\n', False),
+    ('a = 1 +;\nb = (2;\n', True)
+], ids=['valid', 'syntax errors'])
+def test_parse_fast(expr_helper, text, fallback):
+    fast_parse = _load_fast_parse(expr_helper)
+    errors = _ErrorRecorder()
+    expected_errors = _ErrorRecorder()
+
+    tree = fast_parse.parse_fast(text, error_listener=errors)
+
+    rule_names = fast_parse.PARSER.ruleNames
+    expected = _parse_ll(fast_parse, text, expected_errors)
+    assert tree.toStringTree(rule_names) == expected.toStringTree(rule_names)
+    assert errors.errors == expected_errors.errors
+    assert bool(errors.errors) == fallback
+    assert fast_parse.statistics.as_dict() == {'sll': int(not fallback), 'll': int(fallback),
+                                               'fallback_ratio': float(fallback)}
+
+
+def test_parse_fast_file(expr_helper, tmpdir):
+    fast_parse = _load_fast_parse(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write('a = 1;\nb = a * 2;\n')
+
+    tree = fast_parse.parse_fast_file(path, 'prog')
+
+    assert [s.getText() for s in tree.stat()] == ['a=1;', 'b=a*2;']
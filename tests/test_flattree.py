@@ -0,0 +1,86 @@
+import ast
+
+from setuptools_antlr.flattree import create_flat_tree_module
+
+
+def test_create_flat_tree_module():
+    source = create_flat_tree_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                     'from .FooParser import FooParser', 'FooParser')
+
+    compile(source, 'flattree.py', 'exec')
+    tree = ast.parse(source)
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['_align', 'flatten', 'parse_file', 'main']
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assert classes == ['FlatTree']
+    assert 'from .FooParser import FooParser\n' in source
+
+
+TEXT = 'a = 1 + 2 * b;\n# comment\n(a - 3) / 4;\n'
+
+
+def _parse(flat_tree, text):
+    from antlr4 import CommonTokenStream, InputStream
+
+    parser = flat_tree.PARSER(CommonTokenStream(flat_tree.LEXER(InputStream(text))))
+    return parser.prog()
+
+
+def _walk(node, parent, nodes):
+    """Lists kind, terminal, parent, end, start and stop of all nodes in pre-order."""
+    from antlr4.tree.Tree import TerminalNode
+
+    index = len(nodes)
+    if isinstance(node, TerminalNode):
+        token = node.symbol
+        nodes.append([token.type, 1, parent, index + 1, token.start, token.stop])
+        return
+    stop = node.stop.stop if node.stop.tokenIndex >= node.start.tokenIndex else \
+        node.start.start - 1
+    nodes.append([node.getRuleIndex(), 0, parent, None, node.start.start, stop])
+    for child in node.getChildren():
+        _walk(child, index, nodes)
+    nodes[index][3] = len(nodes)
+
+
+def _load_flat_tree(expr_helper):
+    return expr_helper('flattree', create_flat_tree_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+
+
+def test_flatten(expr_helper):
+    flat_tree = _load_flat_tree(expr_helper)
+    tree = _parse(flat_tree, TEXT)
+
+    flat = flat_tree.flatten(tree)
+
+    expected = []
+    _walk(tree, -1, expected)
+    assert [list(n) for n in zip(flat.kind, flat.terminal, flat.parent, flat.end, flat.start,
+                                 flat.stop)] == expected
+    assert [flat.text(i, TEXT) for i in flat.children(0)] == ['a = 1 + 2 * b;',
+                                                              '(a - 3) / 4;', '']
+    assert [flat.kind_name(i) for i in flat.ancestors(flat.select('INT')[0])] == [
+        'expr', 'expr', 'stat', 'prog']
+    assert flat.rule_counts() == {'prog': 1, 'stat': 2, 'expr': 11}
+
+
+def test_flatten_empty_rule(expr_helper):
+    flat_tree = _load_flat_tree(expr_helper)
+
+    flat = flat_tree.flatten(_parse(flat_tree, ''))
+
+    assert list(flat.kind) == [0, -1]
+    assert (flat.start[0], flat.stop[0]) == (0, -1)
+
+
+def test_save_load(expr_helper, tmpdir):
+    flat_tree = _load_flat_tree(expr_helper)
+    flat = flat_tree.flatten(_parse(flat_tree, TEXT))
+    path = tmpdir.join('input.tree')
+
+    flat.save(path)
+    with flat_tree.FlatTree.load(path) as loaded:
+        for name, _ in flat_tree.FIELDS:
+            assert list(getattr(loaded, name)) == list(getattr(flat, name))
@@ -0,0 +1,695 @@
+import asyncio
+import distutils.errors
+import os
+import pathlib
+import subprocess
+import sys
+import unittest.mock
+
+import pytest
+
+from setuptools_antlr.generator import AntlrGenerator, GenerationOptions, GenerationResult, \
+    create_init_file, publish_files, run_antlr, run_coroutine, write_atomic
+from setuptools_antlr.grammar import AntlrGrammar, find_grammars
+from setuptools_antlr.lock import FileLock
+
+
+@pytest.fixture(scope='module', autouse=True)
+def ch_resources_dir(request):
+    init_dir = pathlib.Path.cwd()
+    local_dir = os.path.dirname(__file__)
+    os.chdir(os.path.join(local_dir, 'resources'))
+
+    def fin():
+        os.chdir(str(init_dir))
+    request.addfinalizer(fin)
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def test_create_init_file_not_exists(tmpdir):
+    path = pathlib.Path(str(tmpdir.mkdir('package')))
+
+    init_file = pathlib.Path(path, '__init__.py')
+
+    created = create_init_file(path)
+
+    assert created
+    assert init_file.exists()
+
+
+def test_create_init_file_exists(tmpdir):
+    path = pathlib.Path(str(tmpdir.mkdir('package')))
+
+    init_file = pathlib.Path(path, '__init__.py')
+    init_file.touch()
+    origin_init_mtime_ns = init_file.stat().st_mtime_ns
+
+    created = create_init_file(path)
+
+    assert not created
+    assert init_file.stat().st_mtime_ns == origin_init_mtime_ns
+
+
+def test_write_atomic(tmpdir):
+    path = pathlib.Path(str(tmpdir), 'file.txt')
+    path.write_text('old')
+
+    write_atomic(path, 'new')
+
+    assert path.read_text() == 'new'
+    assert [p.name for p in pathlib.Path(str(tmpdir)).iterdir()] == ['file.txt']
+
+
+def test_run_coroutine():
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        assert run_coroutine(answer()) == 42
+        # event loop of caller is kept
+        assert asyncio.get_event_loop() is loop
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='file modes aren\'t supported')
+def test_write_atomic_mode(tmpdir):
+    path = pathlib.Path(str(tmpdir), 'file.txt')
+    umask = os.umask(0o027)
+    try:
+        write_atomic(path, 'new')
+    finally:
+        os.umask(umask)
+
+    assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_publish_files(tmpdir):
+    source_dir = pathlib.Path(str(tmpdir.mkdir('source')))
+    target_dir = pathlib.Path(str(tmpdir.mkdir('target')))
+    pathlib.Path(source_dir, 'FooParser.py').write_text('new')
+    pathlib.Path(target_dir, 'FooParser.py').write_text('old')
+    pathlib.Path(target_dir, '__init__.py').touch()
+
+    published = publish_files(source_dir, target_dir)
+
+    assert published == [pathlib.Path(target_dir, 'FooParser.py')]
+    assert pathlib.Path(target_dir, 'FooParser.py').read_text() == 'new'
+    assert pathlib.Path(target_dir, '__init__.py').exists()
+    assert not list(source_dir.iterdir())
+
+
+class TestGenerationOptions:
+    def test_default(self):
+        options = GenerationOptions()
+
+        assert options.to_args() == ['-listener', '-no-visitor', '-Dlanguage=Python3']
+
+    def test_override(self):
+        options = GenerationOptions(visitor=1, atn=1)
+
+        args = options.to_args()
+
+        assert '-visitor' in args
+        assert '-atn' in args
+
+    def test_unknown_option(self):
+        with pytest.raises(TypeError) as excinfo:
+            GenerationOptions(foo=1)
+        assert excinfo.match('foo')
+
+    def test_get_package_dir(self):
+        options = GenerationOptions(output={'default': 'gen', 'Other': 'custom'})
+
+        some_grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        other_grammar = AntlrGrammar(pathlib.Path('Other.g4'))
+
+        assert options.get_package_dir(some_grammar) == pathlib.Path('gen', 'standalone',
+                                                                     'some_grammar')
+        assert options.get_package_dir(other_grammar) == pathlib.Path('custom', 'other')
+
+    def test_for_grammar(self):
+        options = GenerationOptions(grammar_options={'language': 'Python3', 'superClass': 'Base'},
+                                    overrides={'Foo': {'visitor': 1, 'grammar_options': {
+                                        'superClass': 'FooBase'}}})
+
+        foo_options = options.for_grammar(AntlrGrammar(pathlib.Path('Foo.g4')))
+        bar_options = options.for_grammar(AntlrGrammar(pathlib.Path('Bar.g4')))
+
+        assert foo_options.visitor == 1
+        assert foo_options.grammar_options == {'language': 'Python3', 'superClass': 'FooBase'}
+        assert bar_options is options
+        assert options.visitor == 0
+        assert options.grammar_options['superClass'] == 'Base'
+
+    def test_for_grammar_not_overridable(self):
+        options = GenerationOptions(overrides={'Foo': {'depend': 1}})
+
+        with pytest.raises(ValueError) as excinfo:
+            options.for_grammar(AntlrGrammar(pathlib.Path('Foo.g4')))
+        assert excinfo.match('depend')
+
+
+class TestGenerationResult:
+    def test_diagnostics(self):
+        output = ('error(50): Foo.g4:3:12: syntax error: mismatched input\n'
+                  'warning(154): Foo.g4:7:0: rule expr contains an optional block\n'
+                  'error(2): can\'t find or load grammar Bar.g4\n')
+        result = GenerationResult(None, GenerationResult.FAILED, 1, output)
+
+        diagnostics = result.diagnostics
+
+        assert len(diagnostics) == 3
+        assert diagnostics[0] == ('error', 50, 'Foo.g4', 3, 12, 'syntax error: mismatched input')
+        assert diagnostics[1].severity == 'warning'
+        assert diagnostics[1].line == 7
+        assert diagnostics[2].file is None
+        assert diagnostics[2].message == 'can\'t find or load grammar Bar.g4'
+
+    def test_succeeded(self):
+        assert GenerationResult(None, GenerationResult.SKIPPED).succeeded
+        assert GenerationResult(None, GenerationResult.SUCCEEDED, 0).succeeded
+        assert not GenerationResult(None, GenerationResult.FAILED, 1).succeeded
+
+
+def test_run_antlr_output():
+    args = [sys.executable, '-c', 'import sys; print("out"); print("err", file=sys.stderr)']
+
+    result = _run(run_antlr(args))
+
+    assert result.returncode == 0
+    assert 'out\n' in result.stdout
+    assert 'err\n' in result.stdout
+
+
+def test_run_antlr_cancelled():
+    args = [sys.executable, '-c', 'import time; time.sleep(30)']
+
+    async def cancel():
+        task = asyncio.ensure_future(run_antlr(args))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with unittest.mock.patch('asyncio.subprocess.Process.kill', autospec=True,
+                             side_effect=asyncio.subprocess.Process.kill) as mock_kill:
+        _run(cancel())
+
+    assert mock_kill.called
+
+
+class TestAntlrGenerator:
+    @pytest.fixture()
+    def generator(self, tmpdir):
+        options = GenerationOptions(output={'default': str(tmpdir.mkdir('gen'))})
+        return AntlrGenerator(pathlib.Path('java'), pathlib.Path('antlr-4.7.1-complete.jar'),
+                              options)
+
+    @staticmethod
+    def _grammar_of(args):
+        return pathlib.Path(args[-1]).stem
+
+    def test_plan(self, generator):
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = generator.plan(grammars)
+
+        assert len(jobs) == 2
+        assert all(j.stale for j in jobs)
+        assert all(j.reason == 'no manifest found' for j in jobs)
+
+    def test_set_java_exe(self, generator):
+        jobs = generator.plan(find_grammars(pathlib.Path('split')))
+        fingerprints = [j.fingerprint for j in jobs]
+
+        generator.set_java_exe(pathlib.Path('jre', 'bin', 'java'), jobs)
+
+        assert all(j.args[0] == str(pathlib.Path('jre', 'bin', 'java')) for j in jobs)
+        assert [j.fingerprint for j in jobs] == fingerprints
+        assert generator.plan_job(jobs[0].grammar).args == jobs[0].args
+
+    def test_plan_overrides(self, generator):
+        generator.options.overrides = {'SomeParser': {'listener': 0, 'visitor': 1}}
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'SomeParserVisitor.py' in jobs['SomeParser'].outputs
+        assert 'SomeParserListener.py' not in jobs['SomeParser'].outputs
+
+    def test_plan_bench(self, generator):
+        generator.options.bench = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'bench.py' in jobs['SomeLexer'].outputs
+        assert 'from .SomeLexer import SomeLexer' in jobs['SomeLexer'].extra_files['bench.py']
+        assert 'PARSER = None' in jobs['SomeLexer'].extra_files['bench.py']
+        bench = jobs['SomeParser'].extra_files['bench.py']
+        assert 'from ..some_lexer.SomeLexer import SomeLexer' in bench
+        assert 'from .SomeParser import SomeParser' in bench
+
+    def test_plan_fast_parse(self, generator):
+        generator.options.fast_parse = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'fastparse.py' not in jobs['SomeLexer'].outputs
+        assert 'fastparse.py' in jobs['SomeParser'].outputs
+        fast_parse = jobs['SomeParser'].extra_files['fastparse.py']
+        assert 'from ..some_lexer.SomeLexer import SomeLexer' in fast_parse
+
+    def test_plan_no_fast_parse(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        job = generator.plan([grammar])[0]
+
+        assert 'fastparse.py' not in job.outputs
+        assert not job.extra_files
+
+    @pytest.mark.parametrize('options, conflicting', [
+        ({'fast_parse': 1}, True),
+        ({'overrides': {'Foo': {'fast_parse': 1}}}, False),
+    ], ids=['requested', 'overridden'])
+    def test_plan_helpers_same_package(self, tmpdir, generator, options, conflicting):
+        for name, value in options.items():
+            setattr(generator.options, name, value)
+        generator.options.x_exact_output_dir = 1
+        for name in ('Foo', 'Bar'):
+            tmpdir.join(name + '.g4').write('grammar {};\nr : A ;\nA : \'a\' ;\n'.format(name))
+        grammars = [AntlrGrammar(pathlib.Path(str(tmpdir), n + '.g4')) for n in ('Foo', 'Bar')]
+
+        if conflicting:
+            with pytest.raises(distutils.errors.DistutilsOptionError) as excinfo:
+                generator.plan(grammars)
+            assert excinfo.match('fastparse.py of grammars Foo and Bar')
+        else:
+            assert len(generator.plan(grammars)) == 2
+
+    @pytest.mark.parametrize('options, warned', [
+        ({}, False),
+        ({'bench': 1}, True),
+        ({'overrides': {'Foo': {'fast_parse': 1}}}, True),
+    ], ids=['default', 'requested', 'overridden'])
+    def test_plan_helpers_no_lexer(self, caplog, tmpdir, generator, options, warned):
+        for name, value in options.items():
+            setattr(generator.options, name, value)
+        path = tmpdir.join('Foo.g4')
+        path.write('parser grammar Foo;\nr : A ;\n')
+        grammar = AntlrGrammar(pathlib.Path(str(path)))
+
+        job = generator.plan([grammar])[0]
+
+        assert not job.extra_files
+        warnings = [r for r in caplog.records if r.levelname == 'WARNING']
+        assert bool(warnings) == warned
+
+    def test_plan_streaming(self, generator):
+        generator.options.streaming = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'from .SomeLexer import SomeLexer' in jobs['SomeLexer'].extra_files['streaming.py']
+        streaming = jobs['SomeParser'].extra_files['streaming.py']
+        assert 'from ..some_lexer.SomeLexer import SomeLexer' in streaming
+
+    def test_plan_corpus(self, generator):
+        generator.options.corpus = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'corpus.py' not in jobs['SomeLexer'].outputs
+        assert 'corpus.py' in jobs['SomeParser'].outputs
+
+    def test_plan_parse_cache(self, generator):
+        generator.options.parse_cache = 1
+        generator.options.flat_tree = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'parsecache.py' not in jobs['SomeLexer'].outputs
+        parse_cache = jobs['SomeParser'].extra_files['parsecache.py']
+        assert "MANIFEST = pathlib.Path(__file__).with_name('SomeParser.manifest.json')" in \
+            parse_cache
+        assert 'DEFAULT_REDUCE = flatten' in parse_cache
+
+    def test_plan_incremental(self, generator):
+        generator.options.incremental = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'incremental.py' not in jobs['SomeLexer'].outputs
+        incremental = jobs['SomeParser'].extra_files['incremental.py']
+        assert 'from ..some_lexer.SomeLexer import SomeLexer' in incremental
+
+    def test_plan_lazy_init(self, generator):
+        generator.options.lazy_init = 1
+        generator.options.listener = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert jobs['SomeParser'].outputs.count('__init__.py') == 1
+        assert '__init__.pyi' in jobs['SomeParser'].outputs
+        init = jobs['SomeParser'].extra_files['__init__.py']
+        assert "__all__ = ['SomeParser', 'SomeParserListener']" in init
+        assert "__all__ = ['SomeLexer']" in jobs['SomeLexer'].extra_files['__init__.py']
+
+    def test_plan_lazy_init_same_package(self, generator):
+        generator.options.lazy_init = 1
+        generator.options.x_exact_output_dir = 1
+        grammars = find_grammars(pathlib.Path('split'))
+        some_lexer = next(g for g in grammars if g.name == 'SomeLexer')
+        fingerprint = generator.plan([some_lexer])[0].fingerprint
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        init = jobs['SomeLexer'].extra_files['__init__.py']
+        assert "__all__ = ['SomeLexer', 'SomeParser', 'SomeParserListener']" in init
+        assert jobs['SomeParser'].extra_files == jobs['SomeLexer'].extra_files
+        assert jobs['SomeLexer'].fingerprint != fingerprint
+
+    def test_plan_token_store(self, generator):
+        generator.options.token_store = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'tokenstore.py' in jobs['SomeLexer'].outputs
+        assert 'tokenstore.py' in jobs['SomeParser'].outputs
+
+    def test_plan_flat_tree(self, generator):
+        generator.options.flat_tree = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'flattree.py' not in jobs['SomeLexer'].outputs
+        assert 'flattree.py' in jobs['SomeParser'].outputs
+
+    def test_plan_walker(self, generator):
+        generator.options.walker = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'walker.py' not in jobs['SomeLexer'].outputs
+        walker = jobs['SomeParser'].extra_files['walker.py']
+        assert 'from .SomeParserListener import SomeParserListener' in walker
+
+    def test_plan_walker_no_listener(self, generator):
+        generator.options.walker = 1
+        generator.options.listener = 0
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        job = generator.plan([grammar])[0]
+
+        assert 'walker.py' not in job.outputs
+
+    def test_plan_fast_lexer(self, generator):
+        generator.options.fast_lexer = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'fastlexer.py' in jobs['SomeLexer'].outputs
+        assert jobs['SomeLexer'].post_processors == {'fastlexer.py': ['fast_lexer']}
+        assert 'fastlexer.py' not in jobs['SomeParser'].outputs
+        assert jobs['SomeParser'].post_processors == {}
+
+    def test_plan_profile(self, generator):
+        generator.options.profile = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert 'profiling.py' not in jobs['SomeLexer'].outputs
+        assert 'profiling.py' in jobs['SomeParser'].outputs
+        profiling = jobs['SomeParser'].extra_files['profiling.py']
+        assert "    'r': ('SomeParser.g4', 6)," in profiling
+
+    def test_plan_profile_imported_rules(self, generator):
+        generator.options.profile = 1
+        grammars = find_grammars(pathlib.Path('distributed'))
+        some_grammar = next(g for g in grammars if g.name == 'SomeGrammar')
+
+        job = generator.plan([some_grammar])[0]
+
+        profiling = job.extra_files['profiling.py']
+        assert "    'r': ('SomeGrammar.g4', 6)," in profiling
+        assert "    'sub_rule_bar': ('SharedRules.g4', 9)," in profiling
+
+    def test_plan_slots(self, generator):
+        generator.options.slots = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert jobs['SomeLexer'].post_processors == {}
+        assert jobs['SomeParser'].post_processors == {'SomeParser.py': ['slots']}
+
+    def test_plan_split_parser(self, generator):
+        generator.options.slots = 1
+        generator.options.split_parser = 1
+        generator.options.listener = 1
+        grammars = find_grammars(pathlib.Path('split'))
+
+        jobs = {j.grammar.name: j for j in generator.plan(grammars)}
+
+        assert jobs['SomeLexer'].post_processors == {}
+        assert jobs['SomeParser'].post_processors == {
+            'SomeParser.py': ['slots', 'split_parser'],
+            'SomeParserListener.py': ['quote_contexts']}
+        assert '_SomeParser' in jobs['SomeParser'].outputs
+        assert '_SomeLexer' not in jobs['SomeLexer'].outputs
+
+    def test_plan_bench_changes_fingerprint(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        fingerprint = generator.plan([grammar])[0].fingerprint
+
+        generator.options.bench = 1
+
+        assert generator.plan([grammar])[0].fingerprint != fingerprint
+
+    def test_plan_version_changes_fingerprint(self, monkeypatch, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        fingerprint = generator.plan([grammar])[0].fingerprint
+
+        monkeypatch.setattr('setuptools_antlr.generator.__version__', '99.0.0')
+
+        assert generator.plan([grammar])[0].fingerprint != fingerprint
+
+    def test_run(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        async def run_antlr_mock(args, cwd=None):
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammar]))
+
+        assert len(results) == 1
+        assert results[0].status == GenerationResult.SUCCEEDED
+        assert pathlib.Path(results[0].job.package_dir, '__init__.py').exists()
+        assert pathlib.Path(results[0].job.package_dir, 'SomeGrammar.manifest.json').exists()
+
+    def test_run_concurrent(self, generator):
+        grammars = [AntlrGrammar(pathlib.Path('{}.g4'.format(n))) for n in ('A', 'B', 'C', 'D')]
+        running = []
+        max_running = []
+
+        async def run_antlr_mock(args, cwd=None):
+            running.append(args)
+            max_running.append(len(running))
+            await asyncio.sleep(0.1)
+            running.remove(args)
+            return subprocess.CompletedProcess(args, 0, '')
+
+        generator.max_workers = 2
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan(grammars))
+
+        assert max(max_running) == 2
+        assert [r.job.grammar.name for r in results] == ['A', 'B', 'C', 'D']
+
+    @pytest.mark.parametrize('order', [['SomeLexer', 'SomeParser'], ['SomeParser', 'SomeLexer']],
+                             ids=['sorted', 'unsorted'])
+    def test_run_token_vocab_order(self, generator, order):
+        grammars = {g.name: g for g in find_grammars(pathlib.Path('split'))}
+        finished = []
+
+        async def run_antlr_mock(args, cwd=None):
+            # lexer is slower than parser, nevertheless it has to be finished first
+            await asyncio.sleep(0.2 if self._grammar_of(args) == 'SomeLexer' else 0)
+            finished.append(self._grammar_of(args))
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammars[n] for n in order]))
+
+        assert finished == ['SomeLexer', 'SomeParser']
+        assert [r.job.grammar.name for r in results] == order
+
+    def test_run_token_vocab_failed(self, generator):
+        grammars = find_grammars(pathlib.Path('split'))
+        some_parser = next(g for g in grammars if g.name == 'SomeParser')
+        some_lexer = next(g for g in grammars if g.name == 'SomeLexer')
+
+        async def run_antlr_mock(args, cwd=None):
+            return subprocess.CompletedProcess(args, 1, 'error(50): SomeLexer.g4:1:0: oops')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr',
+                                 unittest.mock.Mock(side_effect=run_antlr_mock)) as mock_run:
+            results = generator.run(generator.plan([some_lexer, some_parser]))
+
+        assert mock_run.call_count == 1
+        assert [r.status for r in results] == [GenerationResult.FAILED, GenerationResult.FAILED]
+        assert results[0].diagnostics[0].code == 50
+        assert 'SomeLexer parser providing the token vocabulary' in results[1].output
+
+    def test_run_progress(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        events = []
+        generator.progress = lambda event, job, result: events.append((event, job.grammar.name))
+
+        async def run_antlr_mock(args, cwd=None):
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            generator.run(generator.plan([grammar]))
+            jobs = generator.plan([grammar])
+            # fake generated files to make job up to date
+            for output in jobs[0].outputs:
+                pathlib.Path(jobs[0].package_dir, output).touch()
+            generator.run(generator.plan([grammar]))
+
+        assert events == [('started', 'SomeGrammar'), ('finished', 'SomeGrammar'),
+                          ('skipped', 'SomeGrammar')]
+
+    def test_x_log_not_concurrent(self):
+        generator = AntlrGenerator(pathlib.Path('java'), pathlib.Path('antlr.jar'),
+                                   GenerationOptions(x_log=1), max_workers=4)
+
+        assert generator.max_workers == 1
+
+    def test_run_atomic_publish(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        output_dirs = []
+
+        async def run_antlr_mock(args, cwd=None):
+            output_dir = pathlib.Path(args[args.index('-o') + 1])
+            output_dirs.append(output_dir)
+            pathlib.Path(output_dir, 'SomeGrammarParser.py').write_text('parser')
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammar]))
+
+        package_dir = results[0].job.package_dir
+        assert output_dirs[0].is_absolute()
+        assert output_dirs[0].parent == package_dir.absolute()
+        assert not output_dirs[0].exists()
+        assert pathlib.Path(package_dir, 'SomeGrammarParser.py').read_text() == 'parser'
+
+    def test_run_bench(self, generator):
+        generator.options.bench = 1
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        async def run_antlr_mock(args, cwd=None):
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammar]))
+
+        bench = pathlib.Path(results[0].job.package_dir, 'bench.py').read_text()
+        assert 'from .SomeGrammarParser import SomeGrammarParser' in bench
+
+    def test_run_slots(self, generator):
+        generator.options.slots = 1
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        async def run_antlr_mock(args, cwd=None):
+            output_dir = pathlib.Path(args[args.index('-o') + 1])
+            pathlib.Path(output_dir, 'SomeGrammarParser.py').write_text(
+                'class SomeGrammarParser(Parser):\n'
+                '    class RContext(ParserRuleContext):\n'
+                '        def __init__(self, parser):\n'
+                '            self.parser = parser\n')
+            return subprocess.CompletedProcess(args, 0, '')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammar]))
+
+        parser = pathlib.Path(results[0].job.package_dir, 'SomeGrammarParser.py').read_text()
+        assert "        __slots__ = ('parentCtx'," in parser
+
+    def test_run_failed_not_published(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+
+        async def run_antlr_mock(args, cwd=None):
+            output_dir = pathlib.Path(args[args.index('-o') + 1])
+            pathlib.Path(output_dir, 'SomeGrammarParser.py').write_text('partial')
+            return subprocess.CompletedProcess(args, 1, 'error(50): SomeGrammar.g4:1:0: oops')
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr', run_antlr_mock):
+            results = generator.run(generator.plan([grammar]))
+
+        package_dir = results[0].job.package_dir
+        assert results[0].status == GenerationResult.FAILED
+        assert not pathlib.Path(package_dir, 'SomeGrammarParser.py').exists()
+        assert not pathlib.Path(package_dir, 'SomeGrammar.manifest.json').exists()
+        assert not [p for p in package_dir.iterdir() if p.name.startswith('.antlr-')]
+
+    def test_run_concurrent_invocation(self, generator):
+        grammar = AntlrGrammar(pathlib.Path('standalone/SomeGrammar.g4'))
+        events = []
+        generator.progress = lambda event, job, result: events.append(event)
+        job = generator.plan([grammar])[0]
+        job.package_dir.mkdir(parents=True)
+
+        # simulate another invocation holding the lock while it generates the parser
+        lock = FileLock(pathlib.Path(job.package_dir, AntlrGenerator.LOCK_FILE))
+        lock.acquire()
+
+        async def concurrent_invocation():
+            await asyncio.sleep(0.2)
+            for output in job.outputs:
+                pathlib.Path(job.package_dir, output).touch()
+            generator._write_manifest(job)
+            lock.release()
+
+        async def run_antlr_mock(args, cwd=None):
+            return subprocess.CompletedProcess(args, 0, '')
+
+        async def generate():
+            results, _ = await asyncio.gather(generator.generate([job]), concurrent_invocation())
+            return results
+
+        with unittest.mock.patch('setuptools_antlr.generator.run_antlr',
+                                 unittest.mock.Mock(side_effect=run_antlr_mock)) as mock_run:
+            results = _run(generate())
+
+        assert not mock_run.called
+        assert results[0].status == GenerationResult.SKIPPED
+        assert results[0].job.reason == 'generated by concurrent invocation'
+        assert events == ['waiting', 'skipped']
@@ -0,0 +1,130 @@
+import distutils.errors
+import os
+import pathlib
+
+import pytest
+
+from setuptools_antlr.grammar import AntlrGrammar, find_grammars, get_affected_grammars, \
+    sort_grammars
+
+
+@pytest.fixture(scope='module', autouse=True)
+def ch_resources_dir(request):
+    init_dir = pathlib.Path.cwd()
+    local_dir = os.path.dirname(__file__)
+    os.chdir(os.path.join(local_dir, 'resources'))
+
+    def fin():
+        os.chdir(str(init_dir))
+    request.addfinalizer(fin)
+
+
+class TestAntlrGrammar:
+    def test_read_with_imports(self):
+        grammar = AntlrGrammar(pathlib.Path('distributed', 'SomeGrammar.g4'))
+        imports = set(grammar.read_imports())
+
+        assert len(imports) == 2
+        assert {'CommonTerminals', 'SharedRules'} == imports
+
+    def test_read_without_imports(self):
+        grammar = AntlrGrammar(pathlib.Path('distributed', 'CommonTerminals.g4'))
+        imports = grammar.read_imports()
+
+        assert not imports
+
+    def test_read_nonexistent_file(self):
+        grammar = AntlrGrammar(pathlib.Path('FooBar.g4'))
+
+        # check if DistutilsFileError was thrown
+        with pytest.raises(distutils.errors.DistutilsFileError) as excinfo:
+            grammar.read_imports()
+        assert excinfo.match('FooBar.g4')
+
+    test_ids_read_type = ['combined', 'lexer', 'parser']
+
+    test_data_read_type = [
+        ('standalone/SomeGrammar.g4', 'combined'),
+        ('split/SomeLexer.g4', 'lexer'),
+        ('split/SomeParser.g4', 'parser')
+    ]
+
+    @pytest.mark.parametrize('path, expected_type', test_data_read_type, ids=test_ids_read_type)
+    def test_read_type(self, path, expected_type):
+        grammar = AntlrGrammar(pathlib.Path(path))
+
+        assert grammar.read_type() == expected_type
+
+    def test_read_token_vocab(self):
+        grammar = AntlrGrammar(pathlib.Path('split/SomeParser.g4'))
+
+        assert grammar.read_token_vocab() == 'SomeLexer'
+
+    def test_read_without_token_vocab(self):
+        grammar = AntlrGrammar(pathlib.Path('split/SomeLexer.g4'))
+
+        assert grammar.read_token_vocab() is None
+
+    def test_read_rules(self):
+        grammar = AntlrGrammar(pathlib.Path('distributed/CommonTerminals.g4'))
+
+        assert list(grammar.read_rules().items()) == [('IDENTIFIER', 3), ('SEPARATOR', 7),
+                                                      ('WS', 11)]
+
+    def test_read_rules_skips_actions_and_literals(self, tmpdir):
+        path = pathlib.Path(str(tmpdir), 'Foo.g4')
+        path.write_text('grammar Foo;\n'
+                        '@header { import a; }\n'
+                        '/* b : c ; */\n'
+                        'r[int x] returns [int y]\n'
+                        '@init { if (x) { y(); } }\n'
+                        '    : ID \':\' {z: 1;} ;\n'
+                        'fragment DIGIT : [0-9\\]] ; // d : e ;\n')
+        grammar = AntlrGrammar(path)
+
+        assert grammar.read_rules() == {'r': 4, 'DIGIT': 7}
+
+
+def test_sort_grammars():
+    some_lexer = AntlrGrammar(pathlib.Path('SomeLexer.g4'))
+    some_parser = AntlrGrammar(pathlib.Path('SomeParser.g4'))
+    some_parser.token_vocab = some_lexer
+    other_grammar = AntlrGrammar(pathlib.Path('OtherGrammar.g4'))
+
+    sorted_grammars = sort_grammars([some_parser, other_grammar, some_lexer])
+
+    assert sorted_grammars == [some_lexer, some_parser, other_grammar]
+
+
+def test_sort_grammars_vocab_not_selected():
+    some_lexer = AntlrGrammar(pathlib.Path('SomeLexer.g4'))
+    some_parser = AntlrGrammar(pathlib.Path('SomeParser.g4'))
+    some_parser.token_vocab = some_lexer
+
+    assert sort_grammars([some_parser]) == [some_parser]
+
+
+def test_get_affected_grammars():
+    grammars = find_grammars(pathlib.Path('distributed'))
+
+    affected = get_affected_grammars(
+        grammars, [pathlib.Path('distributed', 'CommonTerminals.g4')])
+
+    assert {g.name for g in affected} == {'CommonTerminals', 'SharedRules', 'SomeGrammar'}
+
+
+def test_get_affected_grammars_leaf():
+    grammars = find_grammars(pathlib.Path('distributed'))
+
+    affected = get_affected_grammars(
+        grammars, [pathlib.Path('distributed', 'SomeGrammar.g4')])
+
+    assert [g.name for g in affected] == ['SomeGrammar']
+
+
+def test_get_affected_grammars_token_vocab():
+    grammars = find_grammars(pathlib.Path('split'))
+
+    affected = get_affected_grammars(grammars, [pathlib.Path('split', 'SomeLexer.g4')])
+
+    assert {g.name for g in affected} == {'SomeLexer', 'SomeParser'}
@@ -0,0 +1,112 @@
+import distutils.errors
+import json
+import pathlib
+import platform
+import unittest.mock
+
+import pytest
+
+from setuptools_antlr.importbudget import check_budgets, format_results, list_modules, \
+    measure_imports, parse_budgets, read_report, write_report
+
+
+@pytest.fixture()
+def job(tmpdir):
+    package = tmpdir.mkdir('budget_foo').mkdir('dsl')
+    tmpdir.join('budget_foo', '__init__.py').write('')
+    package.join('__init__.py').write('')
+    package.join('FooParser.py').write('VALUE = [0] * 100000\n')
+    package.mkdir('_FooParser').join('__init__.py').write('')
+    package.mkdir('.antlr-tmp').join('FooLexer.py').write('')
+    grammar = unittest.mock.Mock()
+    grammar.name = 'Foo'
+    return unittest.mock.Mock(grammar=grammar, package_dir=pathlib.Path(str(package)))
+
+
+def test_parse_budgets():
+    budgets = parse_budgets('time=200 Foo.memory=4096 Foo.size=512.5')
+
+    assert budgets == {None: {'time': 200}, 'Foo': {'memory': 4096, 'size': 512.5}}
+
+
+@pytest.mark.parametrize('value', ['Foo.speed=1', 'time', 'time=fast'])
+def test_parse_budgets_invalid(value):
+    with pytest.raises(distutils.errors.DistutilsOptionError):
+        parse_budgets(value)
+
+
+def test_list_modules(tmpdir, job):
+    modules = list_modules(job, pathlib.Path(str(tmpdir)))
+
+    assert [m for m, _ in modules] == ['budget_foo.dsl.FooParser', 'budget_foo.dsl._FooParser',
+                                       'budget_foo.dsl']
+
+
+def test_measure_imports(tmpdir, job):
+    pytest.importorskip('antlr4')
+
+    results = measure_imports([job], pathlib.Path(str(tmpdir)), max_workers=2)
+
+    modules = results['Foo']['modules']
+    assert sorted(modules) == ['budget_foo.dsl', 'budget_foo.dsl.FooParser',
+                               'budget_foo.dsl._FooParser']
+    # a list of 100000 references
+    assert modules['budget_foo.dsl.FooParser']['memory'] > 700
+    assert results['Foo']['memory'] == modules['budget_foo.dsl.FooParser']['memory']
+    assert results['Foo']['time'] >= modules['budget_foo.dsl']['time']
+    assert results['Foo']['size'] == modules['budget_foo.dsl.FooParser']['size']
+
+
+def test_measure_imports_failed(tmpdir, job):
+    pytest.importorskip('antlr4')
+    pathlib.Path(str(job.package_dir), 'FooParser.py').write_text('import missing_module\n')
+
+    with pytest.raises(distutils.errors.DistutilsExecError) as excinfo:
+        measure_imports([job], pathlib.Path(str(tmpdir)))
+
+    assert 'budget_foo.dsl.FooParser can\'t be imported' in str(excinfo.value)
+    assert 'missing_module' in str(excinfo.value)
+
+
+def test_write_report_keeps_other_grammars(tmpdir):
+    path = pathlib.Path(str(tmpdir), 'build', 'imports.json')
+    bar = {'time': 1.0, 'memory': 2.0, 'size': 3.0, 'modules': {}}
+    foo = {'time': 4.0, 'memory': 5.0, 'size': 6.0, 'modules': {}}
+
+    write_report(path, {'Bar': bar})
+    write_report(path, {'Foo': foo})
+
+    assert read_report(path) == {'Bar': bar, 'Foo': foo}
+
+
+def test_read_report_other_python_version(tmpdir):
+    path = pathlib.Path(str(tmpdir), 'imports.json')
+    path.write_text(json.dumps({'python': '2.7.18', 'grammars': {'Foo': {}}}))
+
+    assert read_report(path) == {}
+    assert platform.python_version() != '2.7.18'
+
+
+def test_read_report_missing(tmpdir):
+    assert read_report(pathlib.Path(str(tmpdir), 'imports.json')) == {}
+
+
+def test_format_results():
+    results = {'time': 12.0, 'memory': 1000.0, 'size': 50.0}
+    previous = {'time': 10.0, 'memory': 1000.0, 'size': 0.0}
+
+    assert format_results('Foo', results, previous) == \
+        'Foo imports: time 12.0 ms (+20.0%), memory 1000.0 kB (+0.0%), size 50.0 kB'
+    assert format_results('Foo', results) == \
+        'Foo imports: time 12.0 ms, memory 1000.0 kB, size 50.0 kB'
+
+
+def test_check_budgets():
+    results = {'Foo': {'time': 250.0, 'memory': 100.0, 'size': 10.0},
+               'Bar': {'time': 150.0, 'memory': 5000.0, 'size': 10.0}}
+    budgets = {None: {'time': 200}, 'Bar': {'time': 100, 'memory': 4096}}
+
+    assert check_budgets(results, budgets) == [
+        'Bar exceeds time budget: 150.0 ms > 100 ms',
+        'Bar exceeds memory budget: 5000.0 kB > 4096 kB',
+        'Foo exceeds time budget: 250.0 ms > 200 ms']
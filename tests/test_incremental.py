@@ -0,0 +1,139 @@
+import ast
+import random
+
+import pytest
+
+from setuptools_antlr.incremental import create_incremental_module
+
+
+def test_create_incremental_module():
+    source = create_incremental_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                       'from .FooParser import FooParser', 'FooParser')
+
+    compile(source, 'incremental.py', 'exec')
+    tree = ast.parse(source)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assert classes == ['_DocumentStream', '_TokenList', '_LookaheadRecorder', 'Document']
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['_invoked_rules', '_is_text_dependent']
+    assert 'LEXER = FooLexer\n' in source
+    assert 'PARSER = FooParser\n' in source
+
+
+TEXT = 'a = 1 + 2;\n# note\nb = a * 3;\nc = (b - 1) / 2;\n'
+
+
+class _ErrorRecorder:
+    def __init__(self):
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors.append((line, column, msg))
+
+
+def _get_attributes(token):
+    return (token.type, token.channel, token.start, token.stop, token.tokenIndex, token.line,
+            token.column, token.text)
+
+
+def _parse(incremental, text):
+    """Parses a text from scratch and returns its parse tree and tokens."""
+    from antlr4 import CommonTokenStream, InputStream
+
+    lexer = incremental.LEXER(InputStream(text))
+    lexer.removeErrorListeners()
+    stream = CommonTokenStream(lexer)
+    parser = incremental.PARSER(stream)
+    parser.removeErrorListeners()
+    tree = parser.prog()
+    tokens = [_get_attributes(t) for t in stream.tokens]
+    return tree.toStringTree(incremental.PARSER.ruleNames), tokens
+
+
+def _assert_parsed(incremental, document):
+    tree, tokens = _parse(incremental, document.text)
+    assert document.tree.toStringTree(incremental.PARSER.ruleNames) == tree
+    assert [_get_attributes(t) for t in document.tokens] == tokens
+
+
+def _load_incremental(expr_helper):
+    return expr_helper('incremental', create_incremental_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+
+
+@pytest.mark.parametrize('old, new, update', [
+    ('note', 'other note', 'tokens'),
+    ('1 +', '42 +', 'tokens'),
+    ('a =', 'abc =', 'tokens'),
+    ('# note\n', '', 'tokens'),
+    ('a * 3', 'a * 3 + 4', 'rules'),
+    ('b = a', 'x = 5;\nb = a', 'rules'),
+    ('a = 1 + 2;\n', '', 'rules'),
+    ('/ 2;\n', '/ 2;\nd = 7;\n', 'rules'),
+    ('+ 2', '+ (', 'full'),
+], ids=['comment', 'same token type', 'longer token', 'removed comment', 'changed rule',
+        'inserted rule', 'removed rule', 'appended rule', 'syntax error'])
+def test_document_edit(expr_helper, old, new, update):
+    incremental = _load_incremental(expr_helper)
+    errors = _ErrorRecorder()
+    document = incremental.Document(TEXT, error_listener=errors)
+    start = TEXT.index(old)
+
+    tree = document.edit(start, start + len(old), new)
+
+    assert document.text == TEXT.replace(old, new, 1)
+    assert tree is document.tree
+    assert document.update == update
+    assert bool(errors.errors) == (update == 'full')
+    _assert_parsed(incremental, document)
+
+
+def _create_statement(rng, depth=0):
+    """Creates a random statement if depth is 0, otherwise a random expression."""
+    if not depth:
+        target = rng.choice(['a = ', 'bc = ', ''])
+        comment = rng.choice([' # note', '', ''])
+        return '{}{};{}\n'.format(target, _create_statement(rng, 1), comment)
+    choice = rng.random()
+    if depth > 3 or choice < 0.4:
+        return rng.choice(['1', '23', 'a', 'bc'])
+    if choice < 0.55:
+        return '({})'.format(_create_statement(rng, depth + 1))
+    return '{} {} {}'.format(_create_statement(rng, depth + 1), rng.choice('+-*/'),
+                             _create_statement(rng, depth + 1))
+
+
+def test_document_edits(expr_helper):
+    incremental = _load_incremental(expr_helper)
+    rng = random.Random(4711)
+    statements = [_create_statement(rng) for _ in range(5)]
+    document = incremental.Document(''.join(statements))
+    updates = set()
+
+    for _ in range(200):
+        index = rng.randrange(len(statements) + 1)
+        start = sum(map(len, statements[:index]))
+        choice = rng.random()
+        if index == len(statements) or choice < 0.3:
+            statements.insert(index, _create_statement(rng))
+            document.edit(start, start, statements[index])
+        elif choice < 0.5:
+            document.edit(start, start + len(statements.pop(index)), '')
+        elif choice < 0.8:
+            old = statements[index]
+            statements[index] = _create_statement(rng)
+            document.edit(start, start + len(old), statements[index])
+        else:
+            # replaces a single letter or digit keeping the types of all tokens
+            old = statements[index]
+            i = rng.randrange(len(old))
+            char = rng.choice('0123456789' if old[i].isdigit() else 'abc' if old[i].isalpha()
+                              else old[i])
+            statements[index] = old[:i] + char + old[i + 1:]
+            document.edit(start + i, start + i + 1, char)
+        updates.add(document.update)
+
+        assert document.text == ''.join(statements)
+        _assert_parsed(incremental, document)
+    assert updates == {'tokens', 'rules'}
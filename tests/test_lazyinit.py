@@ -0,0 +1,38 @@
+import ast
+import importlib
+import sys
+
+from setuptools_antlr.lazyinit import create_lazy_init_module, create_lazy_init_stub
+
+
+def test_create_lazy_init_module(tmpdir, monkeypatch):
+    package = tmpdir.mkdir('lazy_foo')
+    package.join('__init__.py').write(create_lazy_init_module('Foo', ['FooLexer', 'FooParser']))
+    package.join('FooLexer.py').write('class FooLexer(object):\n    pass\n')
+    package.join('FooParser.py').write('class FooParser(object):\n    pass\n')
+    monkeypatch.syspath_prepend(str(tmpdir))
+
+    try:
+        module = importlib.import_module('lazy_foo')
+        assert module.__all__ == ['FooLexer', 'FooParser']
+        assert module.FooLexer.__name__ == 'FooLexer'
+        assert 'lazy_foo.FooParser' not in sys.modules
+
+        # importing the module of a class doesn't hide the class
+        importlib.import_module('lazy_foo.FooParser')
+        assert isinstance(module.FooParser, type)
+        assert 'FooParser' in dir(module)
+    finally:
+        for name in ('lazy_foo', 'lazy_foo.FooLexer', 'lazy_foo.FooParser'):
+            sys.modules.pop(name, None)
+
+
+def test_create_lazy_init_stub():
+    stub = create_lazy_init_stub(['FooLexer', 'FooParser'])
+
+    tree = ast.parse(stub)
+    imports = [(n.module, n.names[0].name, n.names[0].asname) for n in tree.body
+               if isinstance(n, ast.ImportFrom)]
+    assert imports == [('FooLexer', 'FooLexer', 'FooLexer'),
+                       ('FooParser', 'FooParser', 'FooParser')]
+    assert "__all__ = ['FooLexer', 'FooParser']\n" in stub
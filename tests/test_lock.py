@@ -0,0 +1,52 @@
+import pathlib
+import subprocess
+import sys
+
+from setuptools_antlr.lock import FileLock
+
+
+def test_try_acquire(tmpdir):
+    lock_file = pathlib.Path(str(tmpdir), 'package', '.antlr.lock')
+    lock = FileLock(lock_file)
+
+    assert lock.try_acquire()
+    assert lock.locked
+    assert lock_file.exists()
+
+    lock.release()
+
+    assert not lock.locked
+
+
+def test_try_acquire_conflict(tmpdir):
+    lock_file = pathlib.Path(str(tmpdir), '.antlr.lock')
+    lock = FileLock(lock_file)
+    other_lock = FileLock(lock_file)
+
+    with lock:
+        assert not other_lock.try_acquire()
+        assert not other_lock.acquire(timeout=0.1)
+
+    assert other_lock.try_acquire()
+    other_lock.release()
+
+
+def test_acquire_other_process(tmpdir):
+    lock_file = pathlib.Path(str(tmpdir), '.antlr.lock')
+    script = ('import pathlib, sys, time\n'
+              'from setuptools_antlr.lock import FileLock\n'
+              'with FileLock(pathlib.Path(sys.argv[1])):\n'
+              '    print("locked", flush=True)\n'
+              '    time.sleep(0.5)\n')
+    process = subprocess.Popen([sys.executable, '-c', script, str(lock_file)],
+                               stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        assert process.stdout.readline().strip() == 'locked'
+
+        lock = FileLock(lock_file)
+        assert not lock.try_acquire()
+        assert lock.acquire(timeout=10)
+        lock.release()
+    finally:
+        process.wait()
+        process.stdout.close()
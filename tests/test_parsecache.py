@@ -0,0 +1,105 @@
+import ast
+import json
+
+from setuptools_antlr.flattree import create_flat_tree_module
+from setuptools_antlr.parsecache import create_parse_cache_module
+
+
+def test_create_parse_cache_module():
+    source = create_parse_cache_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                       'from .FooParser import FooParser', 'FooParser',
+                                       'Foo.manifest.json')
+
+    compile(source, 'parsecache.py', 'exec')
+    tree = ast.parse(source)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assert classes == ['ParseCache']
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['get_fingerprint']
+    assert 'DEFAULT_REDUCE = None\n' in source
+
+
+def test_create_parse_cache_module_flat_tree():
+    source = create_parse_cache_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                       'from .FooParser import FooParser', 'FooParser',
+                                       'Foo.manifest.json', flat_tree=True)
+
+    compile(source, 'parsecache.py', 'exec')
+    assert 'from .flattree import flatten\n' in source
+    assert 'DEFAULT_REDUCE = flatten\n' in source
+
+
+def get_text(tree):
+    return tree.getText()
+
+
+def _load_parse_cache(expr_helper, flat_tree=False):
+    return expr_helper('parsecache', create_parse_cache_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser', 'Expr.manifest.json',
+        flat_tree=flat_tree))
+
+
+def test_parse(expr_helper, tmpdir):
+    parse_cache = _load_parse_cache(expr_helper)
+    cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text)
+
+    results = [cache.parse('a = 1;\nb = 2;\n'), cache.parse('a = 1;\nb = 2;\n'),
+               cache.parse('a = 1;\nb = 3;\n')]
+
+    assert results == ['a=1;b=2;<EOF>', 'a=1;b=2;<EOF>', 'a=1;b=3;<EOF>']
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.parse('1;', rule='stat') == cache.get('1;', 'stat') == '1;'
+
+
+def test_parse_shared(expr_helper, tmpdir):
+    parse_cache = _load_parse_cache(expr_helper)
+    cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text)
+    other_cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text)
+
+    cache.parse('a = 1;\n')
+
+    assert other_cache.get('a = 1;\n') == 'a=1;<EOF>'
+    assert other_cache.hits == 1
+
+
+def test_parse_regenerated(expr_helper, tmpdir):
+    parse_cache = _load_parse_cache(expr_helper)
+    manifest = tmpdir.join('expr_dsl', 'Expr.manifest.json')
+    manifest.write(json.dumps({'fingerprint': 'a' * 64}))
+    cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text)
+    cache.parse('a = 1;\n')
+
+    manifest.write(json.dumps({'fingerprint': 'b' * 64}))
+    regenerated_cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text)
+
+    assert regenerated_cache.get('a = 1;\n', default='missing') == 'missing'
+    assert [p.basename for p in tmpdir.join('cache', 'Expr').listdir()] == ['b' * 64]
+
+
+def test_parse_evicted(expr_helper, tmpdir):
+    parse_cache = _load_parse_cache(expr_helper)
+    cache = parse_cache.ParseCache(tmpdir.join('cache'), reduce=get_text, max_size=200)
+
+    for i in range(10):
+        cache.parse('a = {};\n'.format(i))
+
+    entries = list(cache.directory.glob('*.pickle'))
+    assert 0 < len(entries) < 10
+    assert sum(p.stat().st_size for p in entries) <= 200
+    assert cache.get('a = 9;\n') == 'a=9;<EOF>'
+
+
+def test_parse_flat_tree(expr_helper, tmpdir):
+    expr_helper('flattree', create_flat_tree_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser'))
+    parse_cache = _load_parse_cache(expr_helper, flat_tree=True)
+    cache = parse_cache.ParseCache(tmpdir.join('cache'))
+
+    flat = cache.parse('a = 1;\n')
+    cached = cache.parse('a = 1;\n')
+
+    assert cache.hits == 1
+    assert list(cached.kind) == list(flat.kind)
+    assert cached.rule_counts() == {'prog': 1, 'stat': 1, 'expr': 1}
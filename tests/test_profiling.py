@@ -0,0 +1,67 @@
+import ast
+
+from setuptools_antlr.profiling import create_profiling_module
+
+
+def test_create_profiling_module():
+    source = create_profiling_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer',
+                                     'from .FooParser import FooParser', 'FooParser',
+                                     {'r': ('Foo.g4', 3), 'sub': ('Bar.g4', 7)})
+
+    compile(source, 'profiling.py', 'exec')
+    assignments = {n.targets[0].id: n.value for n in ast.parse(source).body
+                   if isinstance(n, ast.Assign)}
+    assert ast.literal_eval(assignments['RULE_LOCATIONS']) == {'r': ('Foo.g4', 3),
+                                                               'sub': ('Bar.g4', 7)}
+    assert assignments['PARSER'].id == 'FooParser'
+
+
+TEXT = 'a = 1 + 2 * b;\n(a - 3) / 4;\nc = a;\n'
+
+RULE_LOCATIONS = {'prog': ('Expr.g4', 5), 'stat': ('Expr.g4', 9), 'expr': ('Expr.g4', 14)}
+
+
+def _create_parser(profiling, text):
+    from antlr4 import CommonTokenStream, InputStream
+
+    return profiling.PARSER(CommonTokenStream(profiling.LEXER(InputStream(text))))
+
+
+def _load_profiling(expr_helper):
+    return expr_helper('profiling', create_profiling_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer',
+        'from .ExprParser import ExprParser', 'ExprParser', RULE_LOCATIONS))
+
+
+def test_install(expr_helper):
+    profiling = _load_profiling(expr_helper)
+    parser = _create_parser(profiling, TEXT)
+    rule_names = profiling.PARSER.ruleNames
+
+    simulator = profiling.install(parser)
+    tree = parser.prog()
+
+    assert tree.toStringTree(rule_names) == _create_parser(profiling, TEXT).prog().toStringTree(
+        rule_names)
+    assert sum(d.invocations for d in simulator.decisions) > 0
+    assert all(d.sll_max_lookahead >= 1 for d in simulator.decisions if d.invocations)
+
+
+def test_profile(expr_helper, tmpdir):
+    profiling = _load_profiling(expr_helper)
+    tmpdir.join('1.expr').write(TEXT)
+    tmpdir.join('2.expr').write('a 1;\n')
+
+    decisions = profiling.profile([tmpdir.join('1.expr')])
+    invocations = sum(d.invocations for d in decisions)
+    decisions = profiling.profile([tmpdir.join('2.expr')], decisions=decisions)
+    rows = profiling.report(decisions)
+
+    assert sum(d.invocations for d in decisions) > invocations
+    assert {r['rule'] for r in rows if r['errors']} == {'stat'}
+    # decisions of prog are predicted from the next token without simulating the ATN
+    assert {r['rule'] for r in rows} == {'stat', 'expr'}
+    for row in rows:
+        assert (row['file'], row['line']) == RULE_LOCATIONS[row['rule']]
+    assert [r['seconds'] for r in rows] == sorted((r['seconds'] for r in rows), reverse=True)
+    assert len(profiling.report(decisions, top=2)) == 2
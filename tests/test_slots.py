@@ -0,0 +1,83 @@
+import ast
+
+from setuptools_antlr.slots import RUNTIME_CONTEXT_ATTRIBUTES, add_slots
+
+PARSER_SOURCE = '''class FooParser(Parser):
+
+    class ExprContext(ParserRuleContext):
+
+        def __init__(self, parser, parent=None, invokingState=-1):
+            super().__init__(parent, invokingState)
+            self.parser = parser
+            self.depth = None
+
+        def getRuleIndex(self):
+            return FooParser.RULE_expr
+
+        def copyFrom(self, ctx):
+            super().copyFrom(ctx)
+            self.depth = ctx.depth
+
+
+    class AddContext(ExprContext):
+
+        def __init__(self, parser, ctx):
+            super().__init__(parser)
+            self.left = None
+            self.op = None
+            self.copyFrom(ctx)
+
+        def op(self):
+            return self.getToken(FooParser.OP, 0)
+
+
+    class ListContext(ParserRuleContext):
+
+        def __init__(self, parser, parent=None, invokingState=-1):
+            super().__init__(parent, invokingState)
+            self.parser = parser
+            self._ID = None
+            self.ids = list()
+            self.count = 0
+            self.count += 1
+
+    class Helper(object):
+
+        def __init__(self):
+            self.value = None
+'''
+
+
+def get_slots(source):
+    slots = {}
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ClassDef):
+            for statement in node.body:
+                if isinstance(statement, ast.Assign) and statement.targets[0].id == '__slots__':
+                    slots[node.name] = ast.literal_eval(statement.value)
+    return slots
+
+
+def test_add_slots():
+    source = add_slots(PARSER_SOURCE)
+
+    compile(source, 'FooParser.py', 'exec')
+    slots = get_slots(source)
+    assert slots['ExprContext'] == RUNTIME_CONTEXT_ATTRIBUTES + ('parser', 'depth')
+    assert slots['ListContext'] == RUNTIME_CONTEXT_ATTRIBUTES + ('parser', '_ID', 'ids', 'count')
+    assert 'Helper' not in slots
+    assert 'FooParser' not in slots
+
+
+def test_add_slots_labelled_alternative():
+    slots = get_slots(add_slots(PARSER_SOURCE))
+
+    # inherited slots aren't declared again and slots don't shadow accessor methods
+    assert slots['AddContext'] == ('left',)
+
+
+def test_add_slots_indentation():
+    source = add_slots(PARSER_SOURCE)
+
+    assert "    class AddContext(ExprContext):\n\n        __slots__ = ('left',)\n" \
+           "        def __init__" in source
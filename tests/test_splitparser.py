@@ -0,0 +1,118 @@
+import importlib
+import pathlib
+import sys
+
+from setuptools_antlr.splitparser import get_parts_package, quote_context_annotations, \
+    split_parser
+
+PARSER_SOURCE = '''# Generated from Foo.g4 by ANTLR 4.7.1
+import sys
+
+
+class ParserRuleContext(object):
+
+    def __init__(self, parser):
+        self.parser = parser
+
+
+def serializedATN():
+    return 'atn'
+
+
+class FooParser(object):
+
+    grammarFileName = "Foo.g4"
+
+    atn = serializedATN().upper()
+
+    decisionsToDFA = [c for c in atn]
+
+    ruleNames = ['expr', 'list']
+
+    def __init__(self):
+        self.state = self.atn
+
+    class ExprContext(ParserRuleContext):
+
+        def getRuleIndex(self):
+            return FooParser.ruleNames.index('expr')
+
+
+    class AddContext(ExprContext):
+        pass
+
+
+    def expr(self):
+        return FooParser.AddContext(self)
+
+    class ListContext(ParserRuleContext):
+        pass
+
+    def list(self):
+        return self.expr()
+
+    def expr_sempred(self, localctx:ExprContext, predIndex:int):
+        return predIndex == 0
+'''
+
+MODULES = ('split_foo', 'split_foo.FooParser', 'split_foo._FooParser', 'split_foo._FooParser._atn',
+           'split_foo._FooParser.expr', 'split_foo._FooParser.list')
+
+
+def test_split_parser(tmpdir, monkeypatch):
+    package = tmpdir.mkdir('split_foo')
+    package.join('__init__.py').write('')
+    package.join('FooParser.py').write(split_parser(PARSER_SOURCE, pathlib.Path(str(package))))
+    monkeypatch.syspath_prepend(str(tmpdir))
+
+    assert sorted(p.basename for p in package.join('_FooParser').listdir()) == \
+        ['__init__.py', '_atn.py', 'expr.py', 'list.py']
+    try:
+        module = importlib.import_module('split_foo.FooParser')
+        parser_class = module.FooParser
+        assert 'split_foo._FooParser.expr' not in sys.modules
+        assert 'split_foo._FooParser._atn' not in sys.modules
+
+        parser = parser_class()
+        assert parser.state == 'ATN'
+        assert parser_class.decisionsToDFA == ['A', 'T', 'N']
+        assert module.serializedATN() == 'atn'
+        assert 'split_foo._FooParser.list' not in sys.modules
+
+        context = parser.list()
+        assert isinstance(context, parser_class.AddContext)
+        assert isinstance(context, parser_class.ExprContext)
+        assert context.getRuleIndex() == 0
+        assert 'ListContext' in dir(parser_class)
+        assert parser.expr_sempred(context, 0)
+    finally:
+        for name in MODULES:
+            sys.modules.pop(name, None)
+
+
+def test_split_parser_quotes_annotations(tmpdir):
+    source = split_parser(PARSER_SOURCE, pathlib.Path(str(tmpdir)))
+
+    compile(source, 'FooParser.py', 'exec')
+    assert "def expr_sempred(self, localctx:'ExprContext', predIndex:int):" in source
+    assert "    AddContext = _Part('AddContext', 'expr')\n" in source
+    assert 'class ExprContext' not in source
+
+
+def test_split_parser_without_parser_class(tmpdir):
+    source = 'class Foo(object):\n    pass\n'
+
+    assert split_parser(source, pathlib.Path(str(tmpdir))) == source
+    assert not tmpdir.listdir()
+
+
+def test_get_parts_package():
+    assert get_parts_package('FooParser') == '_FooParser'
+
+
+def test_quote_context_annotations():
+    source = quote_context_annotations('    def enterExpr(self, ctx:FooParser.ExprContext):\n'
+                                       '    def visitList(self, ctx: FooParser.ListContext):\n')
+
+    assert source == ("    def enterExpr(self, ctx:'FooParser.ExprContext'):\n"
+                      "    def visitList(self, ctx: 'FooParser.ListContext'):\n")
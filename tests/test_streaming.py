@@ -0,0 +1,83 @@
+import ast
+
+import pytest
+
+from setuptools_antlr.streaming import create_streaming_module
+
+
+def test_create_streaming_module():
+    source = create_streaming_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer')
+
+    compile(source, 'streaming.py', 'exec')
+    tree = ast.parse(source)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert classes == ['MappedInputStream', '_CopyingTokenFactory']
+    assert functions == ['create_lexer', 'iter_tokens']
+    assert 'from .FooLexer import FooLexer\n' in source
+
+
+# multi-byte characters in comments straddle chunk boundaries
+TEXT = 'abc = 12 * (x + 3); # größer ≥ €\n\n# 😀\nxyz;\n' * 20
+
+
+def _get_attributes(token):
+    return token.type, token.channel, token.start, token.stop, token.line, token.column, token.text
+
+
+def _load_streaming(expr_helper):
+    return expr_helper('streaming', create_streaming_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer'))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 65536])
+def test_iter_tokens(expr_helper, tmpdir, chunk_size):
+    from antlr4 import InputStream
+
+    streaming = _load_streaming(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write_text(TEXT, 'utf-8')
+    lexer = streaming.LEXER(InputStream(TEXT))
+    expected = [_get_attributes(t) for t in lexer.getAllTokens()]
+
+    tokens = [_get_attributes(t) for t in streaming.iter_tokens(path, chunk_size=chunk_size)]
+
+    assert tokens == expected
+
+
+def test_iter_tokens_channel(expr_helper, tmpdir):
+    streaming = _load_streaming(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write_text(TEXT, 'utf-8')
+
+    tokens = list(streaming.iter_tokens(path, channel=streaming.LEXER.HIDDEN, chunk_size=5))
+
+    assert [t.text for t in tokens[:2]] == ['# größer ≥ €', '# 😀']
+    assert len(tokens) == 40
+
+
+def test_iter_tokens_empty(expr_helper, tmpdir):
+    streaming = _load_streaming(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write_text('', 'utf-8')
+
+    assert list(streaming.iter_tokens(path)) == []
+
+
+def test_mapped_input_stream_parse(expr_helper, tmpdir):
+    from antlr4 import CommonTokenStream, InputStream
+    from expr_dsl.ExprParser import ExprParser
+
+    streaming = _load_streaming(expr_helper)
+    path = tmpdir.join('input.expr')
+    path.write_text(TEXT, 'utf-8')
+    expected = ExprParser(CommonTokenStream(streaming.LEXER(InputStream(TEXT)))).prog()
+
+    with streaming.MappedInputStream(path, chunk_size=16) as stream:
+        tree = ExprParser(CommonTokenStream(streaming.create_lexer(stream))).prog()
+        # characters before the current position are discarded
+        assert stream.size == len(TEXT)
+        with pytest.raises(ValueError):
+            stream.getText(0, 10)
+
+    assert tree.toStringTree(ExprParser.ruleNames) == expected.toStringTree(ExprParser.ruleNames)
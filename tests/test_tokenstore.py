@@ -0,0 +1,52 @@
+import ast
+
+import pytest
+
+from setuptools_antlr.tokenstore import create_token_store_module
+
+
+def test_create_token_store_module():
+    source = create_token_store_module('Foo', 'from .FooLexer import FooLexer', 'FooLexer')
+
+    compile(source, 'tokenstore.py', 'exec')
+    tree = ast.parse(source)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assert classes == ['TokenStore', 'TokenStoreFactory', 'TokenStoreStream']
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['create_token_stream']
+    assert 'from .FooLexer import FooLexer\n' in source
+
+
+TEXT = 'a = 1 + 2 * b; # first\n# second\n(a - 3) / 4;\n'
+
+
+def _get_attributes(token):
+    return (token.type, token.channel, token.start, token.stop, token.tokenIndex, token.line,
+            token.column, token.text)
+
+
+def _parse(stream):
+    from expr_dsl.ExprParser import ExprParser
+
+    parser = ExprParser(stream)
+    return parser.prog().toStringTree(ExprParser.ruleNames)
+
+
+@pytest.mark.parametrize('recycle', [True, False], ids=['recycled', 'not recycled'])
+def test_create_token_stream(expr_helper, recycle):
+    from antlr4 import CommonTokenStream, InputStream
+
+    token_store = expr_helper('tokenstore', create_token_store_module(
+        'Expr', 'from .ExprLexer import ExprLexer', 'ExprLexer'))
+    expected_stream = CommonTokenStream(token_store.LEXER(InputStream(TEXT)))
+
+    stream = token_store.create_token_stream(token_store.LEXER(InputStream(TEXT)),
+                                             recycle=recycle)
+
+    assert _parse(stream) == _parse(expected_stream)
+    expected = [_get_attributes(t) for t in expected_stream.tokens]
+    assert [_get_attributes(t) for t in stream.tokens] == expected
+    assert [stream.tokens.text(i) for i in range(len(stream.tokens))] == [e[-1] for e in expected]
+    assert stream.getText() == expected_stream.getText()
+    hidden = [t.text for t in stream.tokens if t.channel == token_store.LEXER.HIDDEN]
+    assert hidden == ['# first', '# second']
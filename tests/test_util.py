@@ -5,7 +5,7 @@ import unittest.mock
 
 import pytest
 
-from setuptools_antlr.util import camel_to_snake_case, find_java, validate_java
+from setuptools_antlr.util import camel_to_snake_case, find_java, validate_java, which_java
 
 
 def test_camel_to_snake_case():
@@ -110,3 +110,25 @@ def test_validate_java(mock_run, result, expected):
     mock_run.return_value = result
 
     assert validate_java('java.exe', '1.7.0') == expected
+
+
+@unittest.mock.patch('shutil.which')
+def test_which_java_java_home(mock_which):
+    with unittest.mock.patch.dict('os.environ', {'JAVA_HOME': 'c:/path/to/java'}):
+        mock_which.return_value = 'c:/path/to/java/bin/java.exe'
+
+        java_path = which_java()
+
+    assert java_path == pathlib.Path('c:/path/to/java/bin/java.exe')
+    _, kwargs = mock_which.call_args
+    assert kwargs['path'] == os.path.join('c:/path/to/java', 'bin')
+
+
+@unittest.mock.patch('shutil.which')
+def test_which_java_not_found(mock_which):
+    with unittest.mock.patch.dict('os.environ', {'JAVA_HOME': 'c:/path/to/java'}):
+        mock_which.return_value = None
+
+        java_path = which_java()
+
+    assert java_path is None
@@ -0,0 +1,202 @@
+import pathlib
+
+import pytest
+
+from setuptools_antlr.generator import GenerationOptions
+from setuptools_antlr.grammar import AntlrGrammar, find_grammars
+from setuptools_antlr.validation import GrammarError, format_errors, validate_grammar, \
+    validate_grammars
+
+VALID_GRAMMAR = '''/** Calculator with 'quotes' and { braces in comments */
+grammar Calc;
+
+options { superClass = object; contextSuperClass = antlr4.ParserRuleContext; }
+
+tokens { INDENT, DEDENT }
+
+@header {
+import re  # braces in strings '}' and comments // }
+}
+
+@parser::members {
+def helper(self, d={'a': '}'}):
+    return d
+}
+
+prog returns [int value = 0]
+@init { self.count = {} }
+    : stat+ EOF
+    ;
+
+stat locals [int n = 0]
+    : expr NEWLINE                          # printExpr
+    | ID '=' expr NEWLINE                   # assign
+    ;
+    catch [RecognitionException e] { raise e }
+    finally { pass }
+
+expr
+    : <assoc=right> expr '^' expr           # pow
+    | left=expr op=('*'|'/') right=expr     # mulDiv
+    | ids+=ID (',' ids+=ID)*                # list
+    | INT                                   # int
+    | {self.count is not None}? '(' expr ')'    # parens
+    ;
+
+fragment DIGIT : [0-9] ;
+INT : DIGIT+ ;
+ID  : [a-zA-Z_\\]]+ ;
+NEWLINE : '\\r'? '\\n' ;
+ESC : '\\'' | '\\\\' ;
+LBRACE : '{' -> channel(HIDDEN) ;
+RBRACE : '}' -> type(LBRACE) ;
+WS  : [ \\t]+ -> skip ;
+'''
+
+
+def create_grammar(tmpdir, name: str, content: str) -> AntlrGrammar:
+    path = pathlib.Path(str(tmpdir), name + '.g4')
+    path.write_text(content)
+    return AntlrGrammar(path)
+
+
+def validate(grammar: AntlrGrammar, *known_grammars) -> list:
+    return [(e.line, e.message) for e in validate_grammar(grammar, (grammar,) + known_grammars)]
+
+
+def test_validate_grammar(tmpdir):
+    grammar = create_grammar(tmpdir, 'Calc', VALID_GRAMMAR)
+
+    assert validate(grammar) == []
+
+
+def test_validate_grammar_name_mismatch(tmpdir):
+    grammar = create_grammar(tmpdir, 'Foo', '// Foo\nlexer grammar Bar;\nA : \'a\' ;\n')
+
+    assert validate(grammar) == [(2, 'grammar name Bar doesn\'t match file name Foo.g4')]
+
+
+@pytest.mark.parametrize('content', ['', 'r : \'a\' ;', 'grammar ;'],
+                         ids=['empty', 'no declaration', 'no name'])
+def test_validate_grammar_declaration_missing(tmpdir, content):
+    grammar = create_grammar(tmpdir, 'Foo', content)
+
+    errors = validate(grammar)
+
+    assert len(errors) == 1
+    assert errors[0][0] == 1
+    assert 'missing' in errors[0][1]
+
+
+@pytest.mark.parametrize('content, line, message', [
+    ('grammar Foo;\n@members {\n  def f(self):\n    return {\n}\nr : A ;\n', 2,
+     'unbalanced braces, \'{\' isn\'t closed'),
+    ('grammar Foo;\nr : A } ;\n', 2, 'unbalanced braces, \'}\' isn\'t opened'),
+    ('grammar Foo;\nr : (A | B ;\n', 2, 'unbalanced parentheses, \'(\' isn\'t closed'),
+    ('grammar Foo;\nr : A | B) ;\n', 2, 'unbalanced parentheses, \')\' isn\'t opened'),
+    ('grammar Foo;\nr : \'a\nA : \'a\' ;\n', 2, 'string literal isn\'t closed'),
+    ('grammar Foo;\n/* comment\nr : A ;\n', 2, 'comment isn\'t closed'),
+], ids=['open brace', 'close brace', 'open parenthesis', 'close parenthesis', 'literal',
+        'comment'])
+def test_validate_grammar_unbalanced(tmpdir, content, line, message):
+    grammar = create_grammar(tmpdir, 'Foo', content)
+
+    assert (line, message) in validate(grammar)
+
+
+@pytest.mark.parametrize('content, line, message', [
+    ('grammar Foo\nr : A ;\n', 1, 'missing \';\' after grammar declaration'),
+    ('grammar Foo;\nr : A\n  | B\nA : \'a\' ;\n', 3, 'missing \';\' at end of rule r'),
+    ('grammar Foo;\nr : A ;\nA : \'a\'\nfragment B : \'b\' ;\n', 3,
+     'missing \';\' at end of rule A'),
+    ('lexer grammar Foo;\nA : \'a\' -> mode(B)\nmode B;\nC : \'c\' ;\n', 2,
+     'missing \';\' at end of rule A'),
+    ('grammar Foo;\nr : A ;\nA : \'a\'', 3, 'missing \';\' at end of rule A'),
+    ('grammar Foo;\noptions { language = Python3 superClass = Base; }\nr : A ;\n', 2,
+     'missing \';\' after option language'),
+    ('lexer grammar Foo;\nA : \'a\' ;\nmode B\nC : \'c\' ;\n', 3,
+     'missing \';\' after mode declaration'),
+], ids=['declaration', 'parser rule', 'lexer rule', 'mode', 'end of file', 'option',
+        'mode declaration'])
+def test_validate_grammar_missing_semicolon(tmpdir, content, line, message):
+    grammar = create_grammar(tmpdir, 'Foo', content)
+
+    assert validate(grammar) == [(line, message)]
+
+
+def test_validate_grammar_misspelled_import(tmpdir):
+    grammar = create_grammar(tmpdir, 'Foo', 'grammar Foo;\nimport Terminal, Bar = Rules;\n'
+                                            'r : A ;\n')
+    terminals = create_grammar(tmpdir, 'Terminals', 'lexer grammar Terminals;\nA : \'a\' ;\n')
+
+    assert validate(grammar, terminals) == [
+        (2, 'imported grammar Rules isn\'t found'),
+        (2, 'imported grammar Terminal isn\'t found, did you mean Terminals?')]
+
+
+def test_validate_grammar_token_vocab_missing(tmpdir):
+    grammar = create_grammar(tmpdir, 'FooParser', 'parser grammar FooParser;\n\n'
+                                                  'options { tokenVocab = FooLexr; }\n'
+                                                  'r : A ;\n')
+    lexer = create_grammar(tmpdir, 'FooLexer', 'lexer grammar FooLexer;\nA : \'a\' ;\n')
+
+    assert validate(grammar, lexer) == [(3, 'token vocabulary FooLexr isn\'t found, did you mean '
+                                            'FooLexer?')]
+
+
+def test_validate_grammar_token_vocab_file(tmpdir):
+    grammar = create_grammar(tmpdir, 'FooParser', 'parser grammar FooParser;\n'
+                                                  'options { tokenVocab = FooLexer; }\n'
+                                                  'r : A ;\n')
+    tmpdir.join('FooLexer.tokens').write('A=1\n')
+
+    assert validate(grammar) == []
+
+
+def test_validate_grammar_token_vocab_not_set(tmpdir):
+    grammar = create_grammar(tmpdir, 'FooParser', 'parser grammar FooParser;\n'
+                                                  'tokens { A }\n'
+                                                  'r : A EOF\n  | B ;\n')
+
+    assert validate(grammar) == [(4, 'parser grammar uses token B but doesn\'t set option '
+                                     'tokenVocab')]
+
+
+@pytest.mark.parametrize('options', [
+    GenerationOptions(grammar_options={'tokenVocab': 'FooLexer'}),
+    GenerationOptions(overrides={'FooParser': {'grammar_options': {'tokenVocab': 'FooLexer'}}})
+], ids=['grammar-options', 'overrides'])
+def test_validate_grammars_token_vocab_option(tmpdir, options):
+    grammar = create_grammar(tmpdir, 'FooParser', 'parser grammar FooParser;\nr : A ;\n')
+
+    assert len(validate_grammars([grammar])) == 1
+    assert validate_grammars([grammar], options=options) == []
+
+
+def test_validate_grammar_unreadable(tmpdir):
+    assert validate_grammar(AntlrGrammar(pathlib.Path(str(tmpdir), 'Foo.g4'))) == []
+
+
+def test_validate_grammars(tmpdir):
+    base_dir = tmpdir.mkdir('grammars')
+    create_grammar(base_dir, 'Foo', 'grammar Foo;\nimport Rules, Missing;\nr : sub\n')
+    create_grammar(base_dir, 'Rules', 'parser grammar Rules;\nsub : A ;\n')
+    create_grammar(base_dir, 'Bar', 'grammar Baz;\nr : A ;\n')
+    grammars = find_grammars(pathlib.Path(str(base_dir)), strict=False)
+    foo = next(g for g in grammars if g.name == 'Foo')
+
+    errors = validate_grammars([foo], grammars)
+
+    # imported grammar Rules is validated too, but its tokens are provided by Foo
+    assert [(e.file.name, e.line, e.message) for e in errors] == [
+        ('Foo.g4', 2, 'imported grammar Missing isn\'t found'),
+        ('Foo.g4', 3, 'missing \';\' at end of rule r')]
+    assert len(validate_grammars(grammars)) == 3
+
+
+def test_format_errors():
+    errors = [GrammarError(pathlib.Path('Foo.g4'), 3, 'missing \';\' at end of rule r'),
+              GrammarError(pathlib.Path('Bar.g4'), 1, 'grammar declaration is missing')]
+
+    assert format_errors(errors) == ('Foo.g4:3: missing \';\' at end of rule r\n'
+                                     'Bar.g4:1: grammar declaration is missing')
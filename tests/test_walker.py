@@ -0,0 +1,103 @@
+import ast
+import inspect
+import sys
+
+import pytest
+
+from setuptools_antlr.walker import create_walker_module
+
+
+def test_create_walker_module():
+    source = create_walker_module('Foo', 'from .FooParser import FooParser', 'FooParser',
+                                  'FooListener')
+
+    compile(source, 'walker.py', 'exec')
+    tree = ast.parse(source)
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assert classes == ['TreeWalker']
+    functions = [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+    assert functions == ['_find_contexts', '_find_contained_rules', '_get_method', 'walk']
+    assert 'from .FooListener import FooListener\n' in source
+
+
+def _create_recorder(listener_class, names):
+    """Creates a listener recording calls of the passed methods."""
+    calls = []
+
+    def record(name):
+        return lambda self, node: calls.append((name, node.getText()))
+
+    cls = type('Recorder', (listener_class,), {n: record(n) for n in names})
+    return cls(), calls
+
+
+def _parse(text):
+    from antlr4 import CommonTokenStream, InputStream
+    from expr_dsl.ExprLexer import ExprLexer
+    from expr_dsl.ExprParser import ExprParser
+
+    lexer = ExprLexer(InputStream(text))
+    lexer.removeErrorListeners()
+    parser = ExprParser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    return parser.prog()
+
+
+def _load_walker(expr_helper):
+    return expr_helper('walker', create_walker_module(
+        'Expr', 'from .ExprParser import ExprParser', 'ExprParser', 'ExprListener'))
+
+
+@pytest.mark.parametrize('names', [
+    None,
+    ['enterInt'],
+    ['enterAssign', 'exitAssign']
+], ids=['all', 'terminal rule', 'rule'])
+@pytest.mark.parametrize('text', ['a = 1 + 2 * b;\n(a - 3) / 4;\n', 'a = 1 +;\n) b;\n'],
+                         ids=['valid', 'syntax errors'])
+def test_walk(expr_helper, names, text):
+    from antlr4 import ParseTreeWalker
+
+    walker = _load_walker(expr_helper)
+    if names is None:
+        names = [n for n in dir(walker.LISTENER) if n.startswith(('enter', 'exit', 'visit'))]
+    tree = _parse(text)
+    listener, calls = _create_recorder(walker.LISTENER, names)
+    expected_listener, expected_calls = _create_recorder(walker.LISTENER, names)
+    ParseTreeWalker.DEFAULT.walk(expected_listener, tree)
+
+    walker.walk(listener, tree)
+
+    assert calls == expected_calls
+    assert calls
+
+
+def test_walk_skipped(expr_helper):
+    walker = _load_walker(expr_helper)
+    listener, _ = _create_recorder(walker.LISTENER, ['enterAssign'])
+
+    tree_walker = walker.TreeWalker(listener)
+
+    # expressions can't contain statements
+    assert walker.PARSER.IntContext in tree_walker.skipped
+    assert walker.PARSER.AssignContext not in tree_walker.skipped
+
+
+def test_walk_deep_tree(expr_helper):
+    walker = _load_walker(expr_helper)
+    depth = 200
+    tree = _parse('(' * depth + '1' + ')' * depth + ';')
+    calls = []
+    listener = type('Recorder', (walker.LISTENER,), {
+        'enterInt': lambda self, ctx: calls.append('enterInt'),
+        'exitParens': lambda self, ctx: calls.append('exitParens')})()
+
+    # the iterative walk doesn't need a stack frame per level
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 50)
+    try:
+        walker.walk(listener, tree)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert calls == ['enterInt'] + ['exitParens'] * depth
@@ -0,0 +1,115 @@
+import pathlib
+import threading
+import time
+
+import pytest
+
+from setuptools_antlr.watch import InotifyWatcher, PollingWatcher, create_watcher, wait_debounced
+
+
+def _modify_later(path: pathlib.Path, content: str, delay: float=0.1):
+    timer = threading.Timer(delay, path.write_text, args=(content,))
+    timer.start()
+    return timer
+
+
+class TestPollingWatcher:
+    @pytest.fixture()
+    def watcher(self):
+        watcher = PollingWatcher('g4', interval=0.01)
+        yield watcher
+        watcher.close()
+
+    def test_wait_modified(self, tmpdir, watcher):
+        grammar_file = pathlib.Path(str(tmpdir), 'Foo.g4')
+        grammar_file.write_text('grammar Foo;')
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        grammar_file.write_text('grammar Foo;\n// changed')
+
+        assert watcher.wait(1.0) == {grammar_file}
+
+    def test_wait_created_and_deleted(self, tmpdir, watcher):
+        old_file = pathlib.Path(str(tmpdir), 'Foo.g4')
+        old_file.write_text('grammar Foo;')
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        old_file.unlink()
+        new_file = pathlib.Path(str(tmpdir), 'Bar.g4')
+        new_file.write_text('grammar Bar;')
+
+        assert watcher.wait(1.0) == {old_file, new_file}
+
+    def test_wait_other_file(self, tmpdir, watcher):
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        pathlib.Path(str(tmpdir), 'FooParser.py').write_text('# generated')
+
+        assert watcher.wait(0.05) == set()
+
+    def test_wait_timeout(self, tmpdir, watcher):
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        start = time.monotonic()
+        assert watcher.wait(0.05) == set()
+        assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.skipif(not InotifyWatcher.is_supported(), reason='inotify isn\'t available')
+class TestInotifyWatcher:
+    @pytest.fixture()
+    def watcher(self):
+        watcher = InotifyWatcher('g4')
+        yield watcher
+        watcher.close()
+
+    def test_wait_modified(self, tmpdir, watcher):
+        grammar_file = pathlib.Path(str(tmpdir), 'Foo.g4')
+        grammar_file.write_text('grammar Foo;')
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        timer = _modify_later(grammar_file, 'grammar Foo;\n// changed')
+        changed = watcher.wait(2.0)
+        timer.join()
+
+        assert changed == {grammar_file}
+
+    def test_wait_other_file(self, tmpdir, watcher):
+        watcher.watch([pathlib.Path(str(tmpdir))])
+
+        pathlib.Path(str(tmpdir), 'FooParser.py').write_text('# generated')
+
+        assert watcher.wait(0.05) == set()
+
+    def test_watch_removed_directory(self, tmpdir, watcher):
+        watched_dir = pathlib.Path(str(tmpdir.mkdir('watched')))
+        watcher.watch([watched_dir])
+        watcher.watch([])
+
+        pathlib.Path(watched_dir, 'Foo.g4').write_text('grammar Foo;')
+
+        assert watcher.wait(0.05) == set()
+
+
+def test_create_watcher():
+    watcher = create_watcher('g4')
+    try:
+        expected_type = InotifyWatcher if InotifyWatcher.is_supported() else PollingWatcher
+        assert isinstance(watcher, expected_type)
+    finally:
+        watcher.close()
+
+
+def test_wait_debounced(tmpdir):
+    foo_file = pathlib.Path(str(tmpdir), 'Foo.g4')
+    bar_file = pathlib.Path(str(tmpdir), 'Bar.g4')
+    watcher = PollingWatcher('g4', interval=0.01)
+    watcher.watch([pathlib.Path(str(tmpdir))])
+
+    foo_timer = _modify_later(foo_file, 'grammar Foo;', delay=0.0)
+    bar_timer = _modify_later(bar_file, 'grammar Bar;', delay=0.05)
+    changed = wait_debounced(watcher, 0.2)
+    foo_timer.join()
+    bar_timer.join()
+
+    assert changed == {foo_file, bar_file}